@@ -1,20 +1,176 @@
 """
 Elemzési API végpontok
 """
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import List, Optional, Dict, Any, Callable
 from loguru import logger
+from functools import partial
+import asyncio
+import json
+import threading
 
-from app.services.google_ads import get_google_ads_service
-from app.services.analytics import get_analytics_service
+from app.services.async_google_ads import get_async_google_ads_service
+from app.services.aggregates import OnlineAggregate
+from app.services.analytics import (
+    get_analytics_service,
+    run_analysis,
+    CAMPAIGN_DISTRIBUTION_FIELDS,
+    KEYWORD_DISTRIBUTION_FIELDS
+)
+from app.services.executor import get_analysis_executor, AnalysisTimeoutError, AnalysisCancelledError
+from app.services.google_ads import CAMPAIGN_PERFORMANCE_FIELD_SOURCES, resolve_date_range
+from app.services.scheduler import QuotaExhaustedError
 from app.config import settings
-from app.api.v1.models.schemas import AnalyticsInsight
+from app.api.v1.models.schemas import AnalyticsInsight, BudgetConstraints
 
 router = APIRouter()
 
 
+async def _fetch_multi_customer_performance(
+    customer_ids: Optional[List[str]],
+    manager_id: Optional[str],
+    date_range: str,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Lekérdezi és összefésüli több ügyfél fiók kampány teljesítményét
+    
+    Args:
+        customer_ids: Ügyfél azonosítók
+        manager_id: Manager fiók, amelynek ügyfeleit ki kell bontani
+        date_range: Dátum tartomány
+        fields: A hívó által használt mezők (opcionális, alapértelmezetten mind)
+        
+    Returns:
+        Összefésült adatok (customers, data, errors)
+    """
+    google_ads_service = get_async_google_ads_service(
+        settings.GOOGLE_ADS_CONFIG_FILE,
+        settings.GOOGLE_ADS_MAX_CONCURRENCY
+    )
+    
+    if not google_ads_service.is_configured():
+        raise HTTPException(
+            status_code=503,
+            detail="Google Ads API nincs konfigurálva."
+        )
+    
+    resolved_ids = await google_ads_service.resolve_customer_ids(customer_ids, manager_id)
+    
+    return await google_ads_service.get_multi_customer_campaign_performance(
+        customer_ids=resolved_ids,
+        date_range=date_range,
+        max_parallel=settings.MCC_FANOUT_CONCURRENCY,
+        fields=fields
+    )
+
+
+async def _run_analysis(request: Request, method: str, rows: int, **kwargs) -> Any:
+    """
+    Egy AnalyticsService elemzés futtatása a bemenet méretétől függően
+    
+    A küszöb (`ANALYSIS_OFFLOAD_MIN_ROWS`) alatti elemzés helyben fut. A
+    nagyobb a folyamat készletben, így nem tartja a GIL-t a worker többi
+    kérése elől; időkorláttal fut, és a kliens kapcsolat bontásakor
+    megszakad. A memoizálás ilyenkor is ebben a folyamatban történik; a
+    kulcs (a bemenet első ujjlenyomata) szálban számolódik, nem az event
+    loop-on.
+    
+    Args:
+        request: A kérés (a kapcsolat bontásának figyeléséhez)
+        method: Az AnalyticsService metódus neve
+        rows: A bemenet sorainak száma
+        **kwargs: A metódus argumentumai
+    
+    Returns:
+        Az elemzés eredménye
+    """
+    analytics_service = get_analytics_service()
+    executor = get_analysis_executor()
+    analysis = getattr(analytics_service, method)
+    
+    if not executor.should_offload(rows):
+        return executor.run_inline(analysis, **kwargs)
+    
+    cache = analytics_service.cache
+    key = None
+    if cache.enabled and hasattr(analysis, "cache_key"):
+        key = await asyncio.get_running_loop().run_in_executor(None, partial(analysis.cache_key, **kwargs))
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
+    result = await executor.submit(run_analysis, method, kwargs, is_disconnected=request.is_disconnected)
+    if key is not None:
+        cache.set(key, result)
+    return result
+
+
+def _comparison_fields(metric: str) -> List[str]:
+    """
+    Az összehasonlításhoz lekérdezendő mezők
+    
+    Ismeretlen metrikánál csak az azonosító mezők kérődnek le, és az
+    összehasonlítás a szokásos "metrika nem található" hibát adja.
+    """
+    return [metric] if metric in CAMPAIGN_PERFORMANCE_FIELD_SOURCES else []
+
+
+async def _aggregate_customers(
+    customer_ids: Optional[List[str]],
+    manager_id: Optional[str],
+    aggregate_one: Callable[[Any, str], OnlineAggregate]
+) -> Dict[str, Any]:
+    """
+    Ügyfelenkénti streamelt összesítés és a részeredmények összefésülése
+    
+    Az ügyfelek párhuzamosan, darabonként streamelve összesítődnek; a
+    memóriában ügyfelenként csak egy darab és az összesítés van.
+    
+    Args:
+        customer_ids: Ügyfél azonosítók
+        manager_id: Manager fiók, amelynek ügyfeleit ki kell bontani
+        aggregate_one: (GoogleAdsService, ügyfél azonosító) -> OnlineAggregate
+        
+    Returns:
+        Összefésült összesítés (aggregate), ügyfelenkénti összesítések (by_customer),
+        ügyfél lista (customers) és hibák (errors)
+    """
+    google_ads_service = get_async_google_ads_service(
+        settings.GOOGLE_ADS_CONFIG_FILE,
+        settings.GOOGLE_ADS_MAX_CONCURRENCY
+    )
+    
+    if not google_ads_service.is_configured():
+        raise HTTPException(
+            status_code=503,
+            detail="Google Ads API nincs konfigurálva."
+        )
+    
+    resolved_ids = await google_ads_service.resolve_customer_ids(customer_ids, manager_id)
+    results, errors = await google_ads_service.fan_out(
+        resolved_ids,
+        lambda customer_id: aggregate_one(google_ads_service.service, customer_id),
+        max_parallel=settings.MCC_FANOUT_CONCURRENCY
+    )
+    
+    merged = OnlineAggregate(())
+    for customer_id in resolved_ids:
+        if customer_id in results:
+            merged.merge(results[customer_id])
+    
+    return {
+        "aggregate": merged,
+        "by_customer": results,
+        "customers": resolved_ids,
+        "errors": errors
+    }
+
+
 @router.get("/campaign-insights")
 async def get_campaign_insights(
+    request: Request,
     customer_id: str = Query(..., description="Google Ads ügyfél azonosító"),
     campaign_id: Optional[str] = Query(None, description="Kampány azonosító (opcionális)"),
     date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
@@ -38,8 +194,10 @@ async def get_campaign_insights(
     - Konverzió nélküli kampányokat
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
-        analytics_service = get_analytics_service()
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         
         if not google_ads_service.is_configured():
             raise HTTPException(
@@ -48,7 +206,8 @@ async def get_campaign_insights(
             )
         
         # Teljesítmény adatok lekérdezése
-        performance_data = google_ads_service.get_campaign_performance(
+        data_source = await google_ads_service.describe_data_source(customer_id, "campaign", date_range)
+        performance_data = await google_ads_service.get_campaign_performance_columnar(
             customer_id=customer_id,
             campaign_id=campaign_id,
             date_range=date_range
@@ -61,13 +220,19 @@ async def get_campaign_insights(
             "min_ctr": min_ctr
         }
         
-        analysis_result = analytics_service.analyze_campaign_performance(
+        analysis_result = await _run_analysis(
+            request,
+            "analyze_campaign_performance",
+            len(performance_data),
             performance_data=performance_data,
             thresholds=thresholds
         )
+        analysis_result["data_source"] = data_source
         
         return analysis_result
         
+    except (QuotaExhaustedError, AnalysisTimeoutError, AnalysisCancelledError):
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -77,6 +242,7 @@ async def get_campaign_insights(
 
 @router.get("/keyword-insights")
 async def get_keyword_insights(
+    request: Request,
     customer_id: str = Query(..., description="Google Ads ügyfél azonosító"),
     campaign_id: Optional[str] = Query(None, description="Kampány azonosító (opcionális)"),
     date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
@@ -85,15 +251,20 @@ async def get_keyword_insights(
     """
     Kulcsszó teljesítmény elemzés és betekintések
     
-    Ez az endpoint elemzi a kulcsszavak teljesítményét és azonosítja:
+    Ez az endpoint a fiók összes kulcsszavát darabonként streamelve elemzi
+    (nem csak egy top mintát), és azonosítja:
     - Top teljesítő kulcsszavakat
     - Alulteljesítő kulcsszavakat (magas költség, alacsony konverzió)
     - Alacsony Quality Score-ú kulcsszavakat
     - Match type teljesítmény eloszlást
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         analytics_service = get_analytics_service()
+        executor = get_analysis_executor()
         
         if not google_ads_service.is_configured():
             raise HTTPException(
@@ -101,21 +272,48 @@ async def get_keyword_insights(
                 detail="Google Ads API nincs konfigurálva."
             )
         
-        # Kulcsszó adatok lekérdezése
-        keywords_data = google_ads_service.get_keywords_performance(
+        # Kulcsszó adatok streamelése és darabonkénti elemzése (a teljes fiókon)
+        data_source = await google_ads_service.describe_data_source(customer_id, "keyword", date_range)
+        keyword_chunks = google_ads_service.service.iter_keyword_chunks(
             customer_id=customer_id,
             campaign_id=campaign_id,
-            date_range=date_range
+            date_range=date_range,
+            chunk_size=settings.KEYWORD_STREAM_CHUNK_SIZE,
+            columnar=True
         )
         
-        # Elemzés futtatása
-        analysis_result = analytics_service.analyze_keyword_performance(
-            keywords_data=keywords_data,
-            min_impressions=min_impressions
+        # A stream forrása (ügyfél, abszolút időablak, adatforrás frissessége)
+        # a memoizálás kulcsa: ismételt kérésnél a stream nem fut le újra
+        start, end = resolve_date_range(date_range)
+        cache_key = (
+            customer_id,
+            campaign_id,
+            start.isoformat(),
+            end.isoformat(),
+            json.dumps(data_source, sort_keys=True, default=str)
+        )
+        
+        # A stream a szálkészletben olvasódik; a küszöb feletti darabok elemzése a
+        # folyamat készletben fut, és a kapcsolat bontásakor a következő darabnál leáll
+        cancelled = threading.Event()
+        analysis_result = await executor.supervise(
+            google_ads_service.run(
+                analytics_service.analyze_keyword_stream,
+                keyword_chunks=keyword_chunks,
+                min_impressions=min_impressions,
+                cache_key=cache_key,
+                executor=executor,
+                cancelled=cancelled
+            ),
+            on_cancel=cancelled.set,
+            is_disconnected=request.is_disconnected
         )
+        analysis_result["data_source"] = data_source
         
         return analysis_result
         
+    except (QuotaExhaustedError, AnalysisTimeoutError, AnalysisCancelledError):
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -123,11 +321,83 @@ async def get_keyword_insights(
         raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
 
 
+@router.get("/keyword-overlap")
+async def get_keyword_overlap(
+    request: Request,
+    customer_id: str = Query(..., description="Google Ads ügyfél azonosító"),
+    campaign_id: Optional[str] = Query(None, description="Kampány azonosító (opcionális)"),
+    date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
+    ignore_match_type: bool = Query(False, description="A különböző match type-ú kulcsszavak is egy csoportba kerülnek"),
+    offset: int = Query(0, ge=0, description="Az oldal kezdete (költség szerinti sorrendben)"),
+    limit: int = Query(50, ge=1, le=1000, description="Az oldal mérete (csoport)")
+):
+    """
+    Kulcsszó kannibalizáció és duplikáció keresés a teljes fiókon
+    
+    Csoportosítja az azonos vagy majdnem azonos kulcsszavakat (kisbetűsítés,
+    egyes szám és szórend normalizálás után, match type szerint), amelyek
+    több hirdetéscsoportban vagy kampányban versengenek egymással.
+    Csoportonként visszaadja:
+    - A normalizált szöveget, a match type-ot és az eredeti szöveg változatokat
+    - Az érintett hirdetéscsoportok és kampányok számát
+    - Az együttes költséget, konverziókat, kattintásokat
+    - A tagokat költség szerint csökkenő sorrendben
+    
+    A csoportok az együttes költség szerint csökkenő sorrendben, lapozva jönnek.
+    """
+    try:
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
+        
+        if not google_ads_service.is_configured():
+            raise HTTPException(
+                status_code=503,
+                detail="Google Ads API nincs konfigurálva."
+            )
+        
+        # A teljes fiók kulcsszavai oszlopos formában (a worker folyamatba osztott memórián át jutnak)
+        data_source = await google_ads_service.describe_data_source(customer_id, "keyword", date_range)
+        keywords_data = await google_ads_service.get_keywords_performance_columnar(
+            customer_id=customer_id,
+            campaign_id=campaign_id,
+            date_range=date_range
+        )
+        
+        overlap_result = await _run_analysis(
+            request,
+            "analyze_keyword_overlap",
+            len(keywords_data),
+            keywords_data=keywords_data,
+            ignore_match_type=ignore_match_type,
+            offset=offset,
+            limit=limit
+        )
+        overlap_result["data_source"] = data_source
+        
+        return overlap_result
+        
+    except (QuotaExhaustedError, AnalysisTimeoutError, AnalysisCancelledError):
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba a kulcsszó átfedés elemzéskor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
 @router.get("/compare-campaigns")
 async def compare_campaigns(
+    request: Request,
     customer_id: str = Query(..., description="Google Ads ügyfél azonosító"),
     date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
-    metric: str = Query("roas", description="Összehasonlítási metrika (roas, ctr, cost_per_conversion)")
+    metric: str = Query("roas", description="Összehasonlítási metrika (roas, ctr, cost_per_conversion)"),
+    top: Optional[int] = Query(None, ge=1, description="A legjobb N kampány"),
+    bottom: Optional[int] = Query(None, ge=1, description="A legrosszabb N kampány"),
+    offset: int = Query(0, ge=0, description="A rangsor oldal kezdete"),
+    limit: Optional[int] = Query(None, ge=1, description="A rangsor oldal mérete"),
+    percentiles: Optional[List[float]] = Query(None, description="Percentilisek 0 és 100 között (a paraméter ismételhető)")
 ):
     """
     Kampányok összehasonlítása egy adott metrika alapján
@@ -135,11 +405,16 @@ async def compare_campaigns(
     Visszaadja:
     - Legjobb és legrosszabb kampányt
     - Átlag, medián, szórás értékeket
-    - Teljes rangsorolást
+    - Rangsorolást: `offset`/`limit` szerinti oldalt, vagy ha sem `top`, sem
+      `bottom` nincs megadva és `limit` sem, a teljes rangsort
+    - **top** / **bottom**: A legjobb / legrosszabb N kampányt (részleges kiválasztással)
+    - **percentiles**: Percentiliseket és az általuk határolt sávok kampány darabszámát
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
-        analytics_service = get_analytics_service()
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         
         if not google_ads_service.is_configured():
             raise HTTPException(
@@ -147,20 +422,31 @@ async def compare_campaigns(
                 detail="Google Ads API nincs konfigurálva."
             )
         
-        # Teljesítmény adatok lekérdezése
-        performance_data = google_ads_service.get_campaign_performance(
+        # Csak az összehasonlított metrika (és a kampány azonosító, név) kerül lekérdezésre
+        performance_data = await google_ads_service.get_campaign_performance_columnar(
             customer_id=customer_id,
-            date_range=date_range
+            date_range=date_range,
+            fields=_comparison_fields(metric)
         )
         
         # Összehasonlítás
-        comparison_result = analytics_service.compare_campaigns(
+        comparison_result = await _run_analysis(
+            request,
+            "compare_campaigns",
+            len(performance_data),
             performance_data=performance_data,
-            metric=metric
+            metric=metric,
+            top=top,
+            bottom=bottom,
+            offset=offset,
+            limit=limit,
+            percentiles=percentiles
         )
         
         return comparison_result
         
+    except (QuotaExhaustedError, AnalysisTimeoutError, AnalysisCancelledError):
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -170,24 +456,40 @@ async def compare_campaigns(
 
 @router.post("/budget-allocation")
 async def calculate_budget_allocation(
+    request: Request,
     customer_id: str = Query(..., description="Google Ads ügyfél azonosító"),
     total_budget: float = Query(..., description="Teljes elérhető költségvetés"),
     date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
-    optimization_goal: str = Query("maximize_conversions", description="Optimalizálási cél")
+    optimization_goal: str = Query("maximize_conversions", description="Optimalizálási cél"),
+    constraints: Optional[BudgetConstraints] = None
 ):
     """
     Optimális költségvetés elosztás számítása
     
-    Az előző időszak teljesítménye alapján kiszámítja az optimális
-    költségvetés elosztást a kampányok között.
+    Az előző időszak napi adataiból kampányonként válaszgörbét illeszt
+    (csökkenő hozadék), és a költségvetést úgy osztja el, hogy a kampányok
+    határhozama azonos legyen. A `total_budget` az időszak költésével
+    (`current_budget`) azonos egységben értendő. A válasz a javaslat szerinti
+    várható konverziókat és ROAS-t is tartalmazza.
     
     Optimalizálási célok:
     - **maximize_conversions**: Konverziók maximalizálása
     - **maximize_roas**: ROAS maximalizálása
+    
+    Korlátok (opcionális request body, az összegek a `total_budget` egységében):
+    - **min_budget** / **max_budget**: Kampányonkénti alsó / felső korlát
+    - **max_change_percent**: Legfeljebb ennyi százalékos változás a jelenlegi költéshez képest
+    - **groups**: Kampány csoportok közös felső korláttal
+    
+    Korlátok esetén kampányonként a kötő korlát (`constraint`), és a
+    `constraints` mezőben a csoportok felhasználása és az el nem osztható
+    összeg is visszajön. Nem teljesíthető korlátoknál 400.
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
-        analytics_service = get_analytics_service()
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         
         if not google_ads_service.is_configured():
             raise HTTPException(
@@ -195,24 +497,287 @@ async def calculate_budget_allocation(
                 detail="Google Ads API nincs konfigurálva."
             )
         
-        # Teljesítmény adatok lekérdezése
-        performance_data = google_ads_service.get_campaign_performance(
-            customer_id=customer_id,
-            date_range=date_range
+        # Teljesítmény adatok és napi előzmény lekérdezése (oszlopos formában, párhuzamosan)
+        performance_data, daily_history = await asyncio.gather(
+            google_ads_service.get_campaign_performance_columnar(
+                customer_id=customer_id,
+                date_range=date_range
+            ),
+            google_ads_service.get_campaign_daily_history(customer_id, date_range)
         )
         
-        # Költségvetés elosztás számítása
-        allocation_result = analytics_service.calculate_budget_allocation(
-            performance_data=performance_data,
-            total_budget=total_budget,
-            optimization_goal=optimization_goal
+        # Költségvetés elosztás számítása (a görbe illesztés a napi előzmény méretével skálázódik)
+        allocations = await _run_analysis(
+            request,
+            "calculate_budget_allocations",
+            len(performance_data) + len(daily_history),
+            problems=[{
+                "performance_data": performance_data,
+                "total_budget": total_budget,
+                "optimization_goal": optimization_goal,
+                "daily_history": daily_history,
+                "constraints": constraints.model_dump() if constraints else None,
+                "period_days": 1
+            }]
         )
         
-        return allocation_result
+        return allocations[0]
         
+    except (QuotaExhaustedError, AnalysisTimeoutError, AnalysisCancelledError):
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Hiba a költségvetés elosztás számításakor: {e}")
         raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
 
+
+@router.get("/campaign-insights/multi-customer")
+async def get_multi_customer_campaign_insights(
+    request: Request,
+    customer_ids: Optional[List[str]] = Query(None, description="Ügyfél azonosítók (a paraméter ismételhető)"),
+    manager_id: Optional[str] = Query(None, description="Manager (MCC) fiók azonosító"),
+    date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
+    min_roas: float = Query(2.0, description="Minimum ROAS küszöb"),
+    max_cpa: float = Query(50.0, description="Maximum CPA küszöb"),
+    min_ctr: float = Query(0.01, description="Minimum CTR küszöb")
+):
+    """
+    Kampány elemzés több ügyfél fiókon át
+    
+    Ugyanaz az elemzés mint a /campaign-insights végponton, de az összes
+    megadott (vagy a manager fiók alá tartozó) ügyfél kampányain együtt.
+    Az egyes ügyfelek lekérdezési hibái az `errors` mezőben jelennek meg.
+    """
+    try:
+        merged = await _fetch_multi_customer_performance(customer_ids, manager_id, date_range)
+        
+        thresholds = {
+            "min_roas": min_roas,
+            "max_cpa": max_cpa,
+            "min_ctr": min_ctr
+        }
+        
+        analysis_result = await _run_analysis(
+            request,
+            "analyze_campaign_performance",
+            len(merged["data"]),
+            performance_data=merged["data"],
+            thresholds=thresholds
+        )
+        analysis_result["customers"] = merged["customers"]
+        analysis_result["errors"] = merged["errors"]
+        
+        return analysis_result
+        
+    except (QuotaExhaustedError, AnalysisTimeoutError, AnalysisCancelledError):
+        raise
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba a több ügyfeles kampány elemzéskor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
+@router.get("/compare-campaigns/multi-customer")
+async def compare_multi_customer_campaigns(
+    request: Request,
+    customer_ids: Optional[List[str]] = Query(None, description="Ügyfél azonosítók (a paraméter ismételhető)"),
+    manager_id: Optional[str] = Query(None, description="Manager (MCC) fiók azonosító"),
+    date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
+    metric: str = Query("roas", description="Összehasonlítási metrika (roas, ctr, cost_per_conversion)"),
+    top: Optional[int] = Query(None, ge=1, description="A legjobb N kampány"),
+    bottom: Optional[int] = Query(None, ge=1, description="A legrosszabb N kampány"),
+    offset: int = Query(0, ge=0, description="A rangsor oldal kezdete"),
+    limit: Optional[int] = Query(None, ge=1, description="A rangsor oldal mérete"),
+    percentiles: Optional[List[float]] = Query(None, description="Percentilisek 0 és 100 között (a paraméter ismételhető)")
+):
+    """
+    Kampányok összehasonlítása több ügyfél fiókon át
+    
+    A rangsor, top/bottom és percentilis paraméterek a `/compare-campaigns`
+    végpontéval egyeznek.
+    """
+    try:
+        merged = await _fetch_multi_customer_performance(
+            customer_ids, manager_id, date_range, fields=_comparison_fields(metric)
+        )
+        
+        comparison_result = await _run_analysis(
+            request,
+            "compare_campaigns",
+            len(merged["data"]),
+            performance_data=merged["data"],
+            metric=metric,
+            top=top,
+            bottom=bottom,
+            offset=offset,
+            limit=limit,
+            percentiles=percentiles
+        )
+        comparison_result["customers"] = merged["customers"]
+        comparison_result["errors"] = merged["errors"]
+        
+        return comparison_result
+        
+    except (QuotaExhaustedError, AnalysisTimeoutError, AnalysisCancelledError):
+        raise
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba a több ügyfeles kampány összehasonlításkor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
+@router.post("/budget-allocation/multi-customer")
+async def calculate_multi_customer_budget_allocation(
+    request: Request,
+    total_budget: float = Query(..., description="Teljes elérhető költségvetés"),
+    customer_ids: Optional[List[str]] = Query(None, description="Ügyfél azonosítók (a paraméter ismételhető)"),
+    manager_id: Optional[str] = Query(None, description="Manager (MCC) fiók azonosító"),
+    date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
+    optimization_goal: str = Query("maximize_conversions", description="Optimalizálási cél")
+):
+    """
+    Költségvetés elosztás több ügyfél fiók kampányai között
+    
+    A válaszgörbék itt napi előzmény nélkül, a prior rugalmassággal készülnek.
+    """
+    try:
+        merged = await _fetch_multi_customer_performance(customer_ids, manager_id, date_range)
+        
+        allocations = await _run_analysis(
+            request,
+            "calculate_budget_allocations",
+            len(merged["data"]),
+            problems=[{
+                "performance_data": merged["data"],
+                "total_budget": total_budget,
+                "optimization_goal": optimization_goal,
+                "daily_history": None,
+                "constraints": None,
+                "period_days": 1
+            }]
+        )
+        allocation_result = allocations[0]
+        allocation_result["customers"] = merged["customers"]
+        allocation_result["errors"] = merged["errors"]
+        
+        return allocation_result
+        
+    except (QuotaExhaustedError, AnalysisTimeoutError, AnalysisCancelledError):
+        raise
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba a több ügyfeles költségvetés elosztás számításakor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
+@router.get("/campaign-summary")
+async def get_campaign_summary(
+    customer_ids: Optional[List[str]] = Query(None, description="Ügyfél azonosítók (a paraméter ismételhető)"),
+    manager_id: Optional[str] = Query(None, description="Manager (MCC) fiók azonosító"),
+    date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány")
+):
+    """
+    Kampány összefoglaló (összegek, átlagok, eloszlás) állandó memóriában
+    
+    A kampány riport ügyfelenként darabonként streamelve összesítődik, a
+    sorok nem kerülnek egyszerre memóriába; az ügyfelek részeredményei
+    összefésülődnek. A `summary` a /campaign-insights összefoglalójával
+    egyezik, a `distribution` a ROAS, CTR és CPC percentiliseit adja
+    (kvantilis vázlatból, nagy fiókokon közelítőleg).
+    """
+    try:
+        analytics_service = get_analytics_service()
+        
+        def aggregate_one(service, customer_id: str) -> OnlineAggregate:
+            return analytics_service.aggregate_campaign_stream(
+                service.iter_campaign_chunks(customer_id, date_range=date_range, chunk_size=settings.KEYWORD_STREAM_CHUNK_SIZE)
+            )
+        
+        result = await _aggregate_customers(customer_ids, manager_id, aggregate_one)
+        aggregate = result["aggregate"]
+        
+        return {
+            "summary": analytics_service.campaign_summary(aggregate),
+            "distribution": analytics_service.summary_distribution(aggregate, CAMPAIGN_DISTRIBUTION_FIELDS),
+            "by_customer": {
+                customer_id: analytics_service.campaign_summary(customer_aggregate)
+                for customer_id, customer_aggregate in result["by_customer"].items()
+            },
+            "customers": result["customers"],
+            "errors": result["errors"]
+        }
+        
+    except QuotaExhaustedError:
+        raise
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba a kampány összefoglaló számításakor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
+@router.get("/keyword-summary")
+async def get_keyword_summary(
+    customer_ids: Optional[List[str]] = Query(None, description="Ügyfél azonosítók (a paraméter ismételhető)"),
+    manager_id: Optional[str] = Query(None, description="Manager (MCC) fiók azonosító"),
+    date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
+    min_impressions: int = Query(100, description="Minimum impressions (az elemzett kulcsszavak száma)")
+):
+    """
+    Kulcsszó összefoglaló (összegek, átlagok, eloszlás) állandó memóriában
+    
+    A teljes kulcsszó riport ügyfelenként darabonként streamelve
+    összesítődik (a legnagyobb fiókokon is csak egy darab van memóriában),
+    az ügyfelek részeredményei összefésülődnek. A `summary` a
+    /keyword-insights összefoglalójával egyezik, a `distribution` a költés,
+    CTR és Quality Score percentiliseit adja (kvantilis vázlatból).
+    """
+    try:
+        analytics_service = get_analytics_service()
+        
+        def aggregate_one(service, customer_id: str) -> OnlineAggregate:
+            return analytics_service.aggregate_keyword_stream(
+                service.iter_keyword_chunks(
+                    customer_id=customer_id,
+                    date_range=date_range,
+                    chunk_size=settings.KEYWORD_STREAM_CHUNK_SIZE,
+                    columnar=True
+                ),
+                min_impressions=min_impressions
+            )
+        
+        result = await _aggregate_customers(customer_ids, manager_id, aggregate_one)
+        aggregate = result["aggregate"]
+        
+        return {
+            "summary": analytics_service.keyword_summary(aggregate),
+            "distribution": analytics_service.summary_distribution(aggregate, KEYWORD_DISTRIBUTION_FIELDS),
+            "by_customer": {
+                customer_id: analytics_service.keyword_summary(customer_aggregate)
+                for customer_id, customer_aggregate in result["by_customer"].items()
+            },
+            "customers": result["customers"],
+            "errors": result["errors"]
+        }
+        
+    except QuotaExhaustedError:
+        raise
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba a kulcsszó összefoglaló számításakor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
@@ -5,12 +5,16 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from loguru import logger
 
-from app.services.google_ads import get_google_ads_service
+from app.services.async_google_ads import get_async_google_ads_service
 from app.services.automation import get_automation_service
+from app.services.mutations import get_mutation_service, default_job_id
+from app.services.google_ads import CAMPAIGN_PERFORMANCE_FIELD_SOURCES, resolve_date_range
+from app.services.scheduler import QuotaExhaustedError
 from app.config import settings
 from app.api.v1.models.schemas import (
     BidOptimizationRequest,
     BudgetOptimizationRequest,
+    ApplyRecommendationsRequest,
     AutomationStatus,
     APIResponse
 )
@@ -62,7 +66,10 @@ async def apply_bid_optimization(
     a bid módosításokhoz a beállított szabály alapján.
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         automation_service = get_automation_service()
         
         if not google_ads_service.is_configured():
@@ -71,11 +78,12 @@ async def apply_bid_optimization(
                 detail="Google Ads API nincs konfigurálva."
             )
         
-        # Teljesítmény adatok lekérdezése
-        performance_data = google_ads_service.get_campaign_performance(
+        # Teljesítmény adatok lekérdezése (csak a szabály által használt metrikák)
+        performance_data = await google_ads_service.get_campaign_performance(
             customer_id=customer_id,
             campaign_id=campaign_id,
-            date_range=date_range
+            date_range=date_range,
+            fields=automation_service.BID_OPTIMIZATION_FIELDS
         )
         
         if not performance_data:
@@ -92,6 +100,8 @@ async def apply_bid_optimization(
         
         return result
         
+    except QuotaExhaustedError:
+        raise
     except HTTPException:
         raise
     except Exception as e:
@@ -104,8 +114,9 @@ async def create_budget_optimization(request: BudgetOptimizationRequest):
     """
     Létrehoz egy automatikus költségvetés optimalizálási szabályt
     
-    A szabály több kampány között osztja el optimálisan a költségvetést
-    a megadott cél alapján.
+    A szabály több kampány között osztja el optimálisan a (napi) költségvetést
+    a megadott cél alapján, a megadott korlátok (kampányonkénti alsó/felső
+    korlát, maximális napi változás, csoport korlátok) mellett.
     
     Optimalizálási célok:
     - **maximize_conversions**: Konverziók maximalizálása
@@ -119,7 +130,8 @@ async def create_budget_optimization(request: BudgetOptimizationRequest):
             campaign_ids=request.campaign_ids,
             total_budget=request.total_budget,
             optimization_goal=request.optimization_goal,
-            enabled=True
+            enabled=True,
+            constraints=request.constraints.model_dump() if request.constraints else None
         )
         
         return result
@@ -129,6 +141,125 @@ async def create_budget_optimization(request: BudgetOptimizationRequest):
         raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
 
 
+@router.post("/apply", response_model=APIResponse)
+async def apply_recommendations(request: ApplyRecommendationsRequest):
+    """
+    Alkalmazza a szabályok javaslatait a Google Ads fiókban
+    
+    A bid szabályok kampány szintű javaslatai a kampányok kézi CPC bidjeire
+    (kulcsszó szinten), a költségvetés szabályok elosztása a kampányok napi
+    költségvetésére kerül, tömeges, részleges hibát engedő mutate kérésekkel.
+    
+    - **validate_only**: Dry run: az API validálja a műveleteket, de nem módosít
+    - **job_id**: Ugyanazzal a job azonosítóval újraküldve a már alkalmazott
+      műveletek kimaradnak (alapértelmezés: ügyfél, szabályok és a nap)
+    """
+    try:
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
+        automation_service = get_automation_service()
+        
+        if not google_ads_service.is_configured():
+            raise HTTPException(
+                status_code=503,
+                detail="Google Ads API nincs konfigurálva."
+            )
+        
+        rules = automation_service.get_applicable_rules(request.customer_id, request.rule_ids)
+        job_id = request.job_id or default_job_id(request.customer_id, request.rule_ids)
+        
+        performance_data = await google_ads_service.get_campaign_performance(
+            customer_id=request.customer_id,
+            date_range=request.date_range,
+            fields=automation_service.APPLY_FIELDS
+        )
+        by_campaign = {str(row["campaign_id"]): row for row in performance_data}
+        
+        adjustments, recommendations = automation_service.collect_bid_adjustments(rules, by_campaign)
+        
+        # Költségvetés szabályok: napi átlagokra (a szabály költségvetése napi összeg), egy kötegben
+        budgets = {}
+        if any(rule["type"] == "budget_optimization" for rule in rules):
+            daily_history = await google_ads_service.get_campaign_daily_history(request.customer_id, request.date_range)
+            # A max_change_percent sáv az élő napi költségvetéshez mér, nem az átlagos költéshez
+            campaign_budgets = await google_ads_service.get_campaign_budgets(request.customer_id, by_campaign)
+            start, end = resolve_date_range(request.date_range)
+            budgets, budget_recommendations = automation_service.collect_budget_allocations(
+                rules,
+                by_campaign,
+                daily_history,
+                period_days=(end - start).days + 1,
+                campaign_budgets=campaign_budgets
+            )
+            recommendations.update(budget_recommendations)
+        
+        def apply() -> dict:
+            mutation_service = get_mutation_service(settings.GOOGLE_ADS_CONFIG_FILE)
+            bids = mutation_service.plan_bid_changes(request.customer_id, adjustments)
+            budget_changes = mutation_service.plan_budget_changes(request.customer_id, budgets)
+            summary = mutation_service.apply_changes(
+                request.customer_id,
+                bids["changes"] + budget_changes["changes"],
+                job_id=job_id,
+                validate_only=request.validate_only
+            )
+            summary["skipped"] = {"keyword_bids": bids["skipped"], "campaign_budgets": budget_changes["skipped"]}
+            return summary
+        
+        # A tervezés (bid/költségvetés lekérdezés), a mutate kérések és a napló blokkolnak
+        summary = await google_ads_service.run(apply)
+        summary["recommendations"] = recommendations
+        automation_service.record_mutation_job([rule["rule_id"] for rule in rules], summary)
+        
+        return {
+            "success": summary["failed"] == 0,
+            "message": (
+                f"{summary['succeeded']} módosítás {'validálva' if request.validate_only else 'alkalmazva'}, "
+                f"{summary['failed']} hibás, {summary['already_applied']} már korábban alkalmazva"
+            ),
+            "data": summary
+        }
+        
+    except QuotaExhaustedError:
+        raise
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba a javaslatok alkalmazásakor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
+@router.get("/apply/{job_id}", response_model=List[dict])
+async def get_apply_job(job_id: str):
+    """
+    Egy javaslat alkalmazási job naplózott műveletei
+    
+    Műveletenként a régi és az új érték, a státusz és az esetleges hiba.
+    """
+    try:
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
+        mutation_service = get_mutation_service(settings.GOOGLE_ADS_CONFIG_FILE)
+        
+        operations = await google_ads_service.run(mutation_service.journal.get_job, job_id)
+        if not operations:
+            raise HTTPException(status_code=404, detail=f"Job nem található: {job_id}")
+        
+        return operations
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Hiba a job lekérdezésekor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
 @router.post("/alert/create", response_model=APIResponse)
 async def create_alert_rule(
     customer_id: str = Query(..., description="Google Ads ügyfél azonosító"),
@@ -180,7 +311,10 @@ async def check_alerts(
     riasztási szabályt. Visszaadja a kiváltott riasztásokat.
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         automation_service = get_automation_service()
         
         if not google_ads_service.is_configured():
@@ -189,10 +323,15 @@ async def check_alerts(
                 detail="Google Ads API nincs konfigurálva."
             )
         
-        # Teljesítmény adatok lekérdezése
-        performance_data = google_ads_service.get_campaign_performance(
+        # Csak az aktív riasztási szabályok által hivatkozott metrikák kerülnek lekérdezésre
+        alert_metrics = automation_service.get_alert_metrics()
+        if not alert_metrics:
+            return []
+        
+        performance_data = await google_ads_service.get_campaign_performance(
             customer_id=customer_id,
-            date_range=date_range
+            date_range=date_range,
+            fields=[metric for metric in alert_metrics if metric in CAMPAIGN_PERFORMANCE_FIELD_SOURCES]
         )
         
         # Riasztások ellenőrzése
@@ -200,6 +339,8 @@ async def check_alerts(
         
         return triggered_alerts
         
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
         logger.error(f"Hiba a riasztások ellenőrzésekor: {e}")
         raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
@@ -208,7 +349,8 @@ async def check_alerts(
 @router.get("/rules", response_model=List[dict])
 async def get_automation_rules(
     rule_type: Optional[str] = Query(None, description="Szabály típus (bid_optimization, budget_optimization, alert)"),
-    enabled_only: bool = Query(False, description="Csak engedélyezett szabályok")
+    enabled_only: bool = Query(False, description="Csak engedélyezett szabályok"),
+    changed_only: bool = Query(False, description="Csak a változott kampányokra vonatkozó szabályok")
 ):
     """
     Lekérdezi az automatizálási szabályokat
@@ -216,13 +358,16 @@ async def get_automation_rules(
     Szűrési lehetőségek:
     - **rule_type**: Szabály típus szerint szűrés
     - **enabled_only**: Csak az aktív szabályok
+    - **changed_only**: Csak azok, amelyek kampányai (státusz, költségvetés,
+      kulcsszó bidek) a szabály utolsó futása óta változtak
     """
     try:
         automation_service = get_automation_service()
         
         rules = automation_service.get_automation_rules(
             rule_type=rule_type,
-            enabled_only=enabled_only
+            enabled_only=enabled_only,
+            changed_only=changed_only
         )
         
         return rules
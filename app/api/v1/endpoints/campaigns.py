@@ -1,16 +1,19 @@
 """
 Kampány kezelés API végpontok
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from typing import List, Optional
 from loguru import logger
 
-from app.services.google_ads import get_google_ads_service
+from app.services.async_google_ads import get_async_google_ads_service
+from app.services.scheduler import QuotaExhaustedError
 from app.config import settings
+from app.api.v1.endpoints.common import set_data_source_headers
 from app.api.v1.models.schemas import (
     CampaignBase,
     CampaignPerformance,
     PerformanceRequest,
+    MultiCustomerPerformanceResponse,
     APIResponse
 )
 
@@ -27,7 +30,10 @@ async def list_campaigns(
     - **customer_id**: Google Ads ügyfél azonosító (10 számjegy, kötőjelek nélkül)
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         
         if not google_ads_service.is_configured():
             raise HTTPException(
@@ -35,9 +41,11 @@ async def list_campaigns(
                 detail="Google Ads API nincs konfigurálva. Kérlek állítsd be a google-ads.yaml fájlt."
             )
         
-        campaigns = google_ads_service.get_campaigns(customer_id)
+        campaigns = await google_ads_service.get_campaigns(customer_id)
         return campaigns
         
+    except QuotaExhaustedError:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -47,6 +55,7 @@ async def list_campaigns(
 
 @router.get("/performance", response_model=List[CampaignPerformance])
 async def get_campaign_performance(
+    response: Response,
     customer_id: str = Query(..., description="Google Ads ügyfél azonosító"),
     campaign_id: Optional[str] = Query(None, description="Kampány azonosító (opcionális)"),
     date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány")
@@ -67,9 +76,16 @@ async def get_campaign_performance(
     - Conversions (konverziók)
     - Conversion Rate (konverziós arány)
     - ROAS (megtérülés)
+    
+    Ha a helyi adattárház lefedi a tartományt (LAST_7/14/30/90_DAYS), a választ
+    onnan szolgálja ki; az `X-Data-Source` és `X-Data-Synced-Through` fejlécek
+    jelzik az adatok forrását és frissességét.
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         
         if not google_ads_service.is_configured():
             raise HTTPException(
@@ -77,14 +93,19 @@ async def get_campaign_performance(
                 detail="Google Ads API nincs konfigurálva. Kérlek állítsd be a google-ads.yaml fájlt."
             )
         
-        performance_data = google_ads_service.get_campaign_performance(
+        data_source = await google_ads_service.describe_data_source(customer_id, "campaign", date_range)
+        
+        performance_data = await google_ads_service.get_campaign_performance(
             customer_id=customer_id,
             campaign_id=campaign_id,
             date_range=date_range
         )
         
+        set_data_source_headers(response, data_source)
         return performance_data
         
+    except QuotaExhaustedError:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -101,7 +122,10 @@ async def get_campaign_performance_post(request: PerformanceRequest):
     ami hasznos lehet komplex lekérdezésekhez.
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         
         if not google_ads_service.is_configured():
             raise HTTPException(
@@ -109,7 +133,7 @@ async def get_campaign_performance_post(request: PerformanceRequest):
                 detail="Google Ads API nincs konfigurálva."
             )
         
-        performance_data = google_ads_service.get_campaign_performance(
+        performance_data = await google_ads_service.get_campaign_performance(
             customer_id=request.customer_id,
             campaign_id=request.campaign_id,
             date_range=request.date_range
@@ -117,9 +141,169 @@ async def get_campaign_performance_post(request: PerformanceRequest):
         
         return performance_data
         
+    except QuotaExhaustedError:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Hiba a teljesítmény adatok lekérdezésekor: {e}")
         raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
 
+
+@router.get("/performance/multi-customer", response_model=MultiCustomerPerformanceResponse)
+async def get_multi_customer_performance(
+    customer_ids: Optional[List[str]] = Query(None, description="Ügyfél azonosítók (a paraméter ismételhető)"),
+    manager_id: Optional[str] = Query(None, description="Manager (MCC) fiók, amelynek ügyfél fiókjait le kell kérdezni"),
+    date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány")
+):
+    """
+    Lekérdezi több ügyfél fiók kampány teljesítményét egyetlen válaszban
+    
+    - **customer_ids**: Ügyfél azonosítók listája (pl. `?customer_ids=111&customer_ids=222`)
+    - **manager_id**: Manager fiók; az alá tartozó aktív ügyfél fiókok automatikusan hozzáadódnak
+    - **date_range**: Dátum tartomány
+    
+    A lekérdezések párhuzamosan futnak (legfeljebb `MCC_FANOUT_CONCURRENCY` egyszerre).
+    Egy ügyfél hibája nem szakítja meg a többit, a hibák az `errors` mezőben jelennek meg.
+    """
+    try:
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
+        
+        if not google_ads_service.is_configured():
+            raise HTTPException(
+                status_code=503,
+                detail="Google Ads API nincs konfigurálva. Kérlek állítsd be a google-ads.yaml fájlt."
+            )
+        
+        resolved_ids = await google_ads_service.resolve_customer_ids(customer_ids, manager_id)
+        
+        return await google_ads_service.get_multi_customer_campaign_performance(
+            customer_ids=resolved_ids,
+            date_range=date_range,
+            max_parallel=settings.MCC_FANOUT_CONCURRENCY
+        )
+        
+    except QuotaExhaustedError:
+        raise
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba a több ügyfeles teljesítmény lekérdezésekor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
+@router.post("/warehouse/sync", response_model=APIResponse)
+async def sync_warehouse(
+    customer_id: str = Query(..., description="Google Ads ügyfél azonosító")
+):
+    """
+    Inkrementálisan szinkronizálja egy ügyfél napi metrikáit a helyi adattárházba
+    
+    Első futáskor `WAREHOUSE_HISTORY_DAYS` napot tölt be, később csak az új
+    napokat és a konverziós késleltetés miatt még változó utolsó
+    `WAREHOUSE_CONVERSION_LAG_DAYS` napot kérdezi le újra. Ütemezett
+    futtatásra (pl. cron) készült.
+    """
+    try:
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
+        
+        result = await google_ads_service.sync_warehouse(customer_id)
+        
+        return {
+            "success": True,
+            "message": "Adattárház szinkronizálva",
+            "data": result
+        }
+        
+    except QuotaExhaustedError:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba az adattárház szinkronizálásakor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
+@router.post("/changes/refresh", response_model=APIResponse)
+async def refresh_account_changes(
+    customer_id: str = Query(..., description="Google Ads ügyfél azonosító"),
+    force: bool = Query(False, description="A minimális lekérdezési időköz előtt is frissít")
+):
+    """
+    Frissíti a kampány metaadatokat a legutóbbi frissítés óta történt változások alapján
+    
+    A change_status és change_event erőforrásokból csak a vízjel óta változott
+    kampányokat, költségvetéseket és kulcsszavakat kérdezi le, és csak a
+    változott kampányokat tölti újra; a változott kampányokat érintő riport
+    cache bejegyzések törlődnek, az érintett automatizálási szabályok
+    megjelölődnek. Ütemezett futtatásra (pl. cron) készült.
+    """
+    try:
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
+        
+        if not google_ads_service.is_configured():
+            raise HTTPException(
+                status_code=503,
+                detail="Google Ads API nincs konfigurálva. Kérlek állítsd be a google-ads.yaml fájlt."
+            )
+        
+        changes = await google_ads_service.refresh_changes(customer_id, force=force)
+        
+        return {
+            "success": True,
+            "message": f"{len(changes['campaign_ids'])} kampány változott",
+            "data": changes
+        }
+        
+    except QuotaExhaustedError:
+        raise
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Hiba a változások frissítésekor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
+
+
+@router.delete("/cache", response_model=APIResponse)
+async def invalidate_report_cache(
+    customer_id: Optional[str] = Query(None, description="Ügyfél azonosító (ha nincs megadva, a teljes cache törlődik)")
+):
+    """
+    Érvényteleníti a riport cache-t
+    
+    A teljesítmény riportok (kampány és kulcsszó) a `REPORT_CACHE_TTL_SECONDS`
+    ideig cache-elődnek. Ezzel a végponttal a lejárat előtt is kikényszeríthető
+    az újralekérdezés, pl. egy tömeges módosítás után. A kampány pillanatképek
+    is eldobódnak, így a kampány lista is teljesen újratöltődik.
+    """
+    try:
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
+        
+        removed = google_ads_service.service.invalidate_cache(customer_id)
+        snapshots = google_ads_service.service.invalidate_metadata(customer_id)
+        
+        return {
+            "success": True,
+            "message": f"{removed} cache bejegyzés érvénytelenítve",
+            "data": {"removed": removed, "snapshots": snapshots}
+        }
+        
+    except Exception as e:
+        logger.error(f"Hiba a cache érvénytelenítésekor: {e}")
+        raise HTTPException(status_code=500, detail=f"Belső szerver hiba: {str(e)}")
@@ -0,0 +1,13 @@
+"""
+Több router által használt segédfüggvények
+"""
+from fastapi import Response
+from typing import Dict, Any
+
+
+def set_data_source_headers(response: Response, data_source: Dict[str, Any]) -> None:
+    """Beállítja az adatforrást és frissességet jelző válasz fejléceket"""
+    response.headers["X-Data-Source"] = data_source["source"]
+    if data_source["freshness"]:
+        response.headers["X-Data-Synced-Through"] = data_source["freshness"]["synced_through"]
+        response.headers["X-Data-Last-Sync"] = data_source["freshness"]["last_sync_at"]
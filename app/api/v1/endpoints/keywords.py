@@ -1,12 +1,14 @@
 """
 Kulcsszó elemzés API végpontok
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from typing import List, Optional
 from loguru import logger
 
-from app.services.google_ads import get_google_ads_service
+from app.services.async_google_ads import get_async_google_ads_service
+from app.services.scheduler import QuotaExhaustedError
 from app.config import settings
+from app.api.v1.endpoints.common import set_data_source_headers
 from app.api.v1.models.schemas import KeywordPerformance
 
 router = APIRouter()
@@ -14,9 +16,12 @@ router = APIRouter()
 
 @router.get("/performance", response_model=List[KeywordPerformance])
 async def get_keywords_performance(
+    response: Response,
     customer_id: str = Query(..., description="Google Ads ügyfél azonosító"),
     campaign_id: Optional[str] = Query(None, description="Kampány azonosító (opcionális)"),
-    date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány")
+    date_range: str = Query("LAST_30_DAYS", description="Dátum tartomány"),
+    page_size: int = Query(1000, ge=1, le=10000, description="Lapméret"),
+    page_token: Optional[str] = Query(None, description="Az előző válasz X-Next-Page-Token fejléce")
 ):
     """
     Lekérdezi a kulcsszavak teljesítményét
@@ -35,10 +40,17 @@ async def get_keywords_performance(
     - Conversions (konverziók)
     - Quality Score (minőségi pontszám)
     
-    Maximum 1000 kulcsszót ad vissza, impressions szerint rendezve.
+    A kulcsszavak impressions szerint (adattárházból kiszolgált tartománynál
+    a hirdetéscsoport és a kulcsszó azonosítója szerint) rendezve, lapozva
+    érkeznek. Ha van következő lap, annak tokenje az `X-Next-Page-Token`
+    válasz fejlécben található; ezt a `page_token` paraméterben visszaküldve
+    kérhető le.
     """
     try:
-        google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
         
         if not google_ads_service.is_configured():
             raise HTTPException(
@@ -46,14 +58,23 @@ async def get_keywords_performance(
                 detail="Google Ads API nincs konfigurálva. Kérlek állítsd be a google-ads.yaml fájlt."
             )
         
-        keywords_data = google_ads_service.get_keywords_performance(
+        data_source = await google_ads_service.describe_data_source(customer_id, "keyword", date_range)
+        
+        keywords_data, next_page_token = await google_ads_service.get_keywords_page(
             customer_id=customer_id,
             campaign_id=campaign_id,
-            date_range=date_range
+            date_range=date_range,
+            page_size=page_size,
+            page_token=page_token
         )
         
+        set_data_source_headers(response, data_source)
+        if next_page_token:
+            response.headers["X-Next-Page-Token"] = next_page_token
         return keywords_data
         
+    except QuotaExhaustedError:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
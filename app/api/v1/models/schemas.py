@@ -2,7 +2,7 @@
 Pydantic modellek az API-hoz
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 
@@ -32,6 +32,18 @@ class CampaignPerformance(BaseModel):
     roas: float
 
 
+class CustomerCampaignPerformance(CampaignPerformance):
+    """Kampány teljesítmény model ügyfél azonosítóval (több ügyfeles lekérdezésekhez)"""
+    customer_id: str
+
+
+class MultiCustomerPerformanceResponse(BaseModel):
+    """Több ügyfeles teljesítmény lekérdezés válasz model"""
+    customers: List[str]
+    data: List[CustomerCampaignPerformance]
+    errors: Dict[str, str] = Field(default_factory=dict, description="Ügyfelenkénti hibaüzenetek")
+
+
 class KeywordPerformance(BaseModel):
     """Kulcsszó teljesítmény model"""
     campaign_id: int
@@ -66,12 +78,41 @@ class BidOptimizationRequest(BaseModel):
     enabled: bool = Field(True, description="Optimalizálás engedélyezése")
 
 
+class BudgetGroupConstraint(BaseModel):
+    """Kampány csoport (címke) közös költségvetés korlátja"""
+    name: str = Field(..., description="Csoport neve")
+    campaign_ids: List[str] = Field(..., description="A csoport kampányai (egy kampány legfeljebb egy csoportban)")
+    max_budget: float = Field(..., ge=0, description="A csoport kampányainak együttes felső korlátja")
+
+
+class BudgetConstraints(BaseModel):
+    """Költségvetés elosztás korlátai (az összegek a total_budget egységében)"""
+    min_budget: Dict[str, float] = Field(default_factory=dict, description="Kampány azonosító -> alsó korlát")
+    max_budget: Dict[str, float] = Field(default_factory=dict, description="Kampány azonosító -> felső korlát")
+    max_change_percent: Optional[float] = Field(
+        None,
+        ge=0,
+        description="A jelenlegi költéshez (az apply-nál az élő napi költségvetéshez) képesti legnagyobb változás százalékban"
+    )
+    groups: List[BudgetGroupConstraint] = Field(default_factory=list, description="Csoportok közös felső korláttal")
+
+
 class BudgetOptimizationRequest(BaseModel):
     """Költségvetés optimalizálás request model"""
     customer_id: str = Field(..., description="Google Ads ügyfél azonosító")
     campaign_ids: List[str] = Field(..., description="Kampány azonosítók listája")
-    total_budget: float = Field(..., description="Teljes elérhető költségvetés")
+    total_budget: float = Field(..., description="Teljes elérhető (napi) költségvetés")
     optimization_goal: str = Field("maximize_conversions", description="Optimalizálási cél")
+    constraints: Optional[BudgetConstraints] = Field(None, description="Elosztási korlátok (napi összegekben)")
+
+
+class ApplyRecommendationsRequest(BaseModel):
+    """Javaslatok alkalmazása request model"""
+    customer_id: str = Field(..., description="Google Ads ügyfél azonosító")
+    rule_ids: List[str] = Field(..., description="Alkalmazandó bid és költségvetés szabályok")
+    date_range: str = Field("LAST_7_DAYS", description="A javaslatok alapjául szolgáló dátum tartomány")
+    validate_only: bool = Field(False, description="Csak ellenőrzés (dry run), nem módosít")
+    job_id: Optional[str] = Field(None, description="Idempotencia kulcs (alapértelmezés: ügyfél, szabályok és a nap)")
 
 
 class AutomationStatus(BaseModel):
@@ -22,9 +22,16 @@ class Settings(BaseSettings):
     GOOGLE_ADS_REFRESH_TOKEN: str = ""
     GOOGLE_ADS_LOGIN_CUSTOMER_ID: str = ""
     GOOGLE_ADS_CONFIG_FILE: str = "google-ads.yaml"
+    # google_ads (valódi API) vagy fake (szintetikus adatok, élő hozzáférés nélkül)
+    GOOGLE_ADS_BACKEND: str = "google_ads"
+    # Induláskori bemelegítés: csatornánkénti csatlakozási időkorlát
+    GOOGLE_ADS_WARMUP_TIMEOUT_SECONDS: float = 10.0
     
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./google_ads_automation.db"
+    WAREHOUSE_ENABLED: bool = False
+    WAREHOUSE_HISTORY_DAYS: int = 90
+    WAREHOUSE_CONVERSION_LAG_DAYS: int = 3
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -39,12 +46,68 @@ class Settings(BaseSettings):
     AUTO_BID_OPTIMIZATION_ENABLED: bool = False
     AUTO_BUDGET_OPTIMIZATION_ENABLED: bool = False
     AUTOMATION_CHECK_INTERVAL_MINUTES: int = 60
+    # Javaslatok alkalmazása: műveletek mutate kérésenként, e fölött batch job
+    MUTATION_CHUNK_SIZE: int = 5000
+    MUTATION_BATCH_JOB_THRESHOLD: int = 20000
+    MUTATION_BATCH_JOB_TIMEOUT_SECONDS: float = 1800.0
+    # Ennél kisebb javasolt napi költségvetés (pénznemben) nem kerül beállításra
+    MUTATION_MIN_DAILY_BUDGET: float = 1.0
     
     # Performance Thresholds
     MIN_ROAS_THRESHOLD: float = 2.0
     MAX_CPA_THRESHOLD: float = 50.0
     MIN_CTR_THRESHOLD: float = 0.01
     
+    # Performance Settings
+    GOOGLE_ADS_MAX_CONCURRENCY: int = 32
+    REPORT_CACHE_TTL_SECONDS: int = 900
+    REPORT_CACHE_MAX_ENTRIES: int = 512
+    REPORT_CACHE_MAX_MB: int = 256
+    MCC_FANOUT_CONCURRENCY: int = 16
+    CUSTOMER_HIERARCHY_CACHE_TTL_SECONDS: int = 3600
+    KEYWORD_STREAM_CHUNK_SIZE: int = 10000
+    # Elemzési eredmények memoizálása (bemeneti ujjlenyomat + paraméterek), 0: kikapcsolva
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 256
+    ANALYSIS_CACHE_TTL_SECONDS: int = 900
+    # Ennyi sortól fut egy elemzés a folyamat készletben (0 worker: minden elemzés helyben)
+    ANALYSIS_EXECUTOR_WORKERS: int = 2
+    ANALYSIS_OFFLOAD_MIN_ROWS: int = 50000
+    ANALYSIS_TIMEOUT_SECONDS: float = 120.0
+    # A worker folyamatoknak átadott nagy oszlopos adatok osztott memórián át (pickle helyett)
+    ANALYSIS_SHARED_MEMORY_ENABLED: bool = True
+    ANALYSIS_SHARED_MEMORY_MIN_MB: int = 4
+    
+    # Change Tracking Settings (change_status / change_event alapú kampány frissítés)
+    CHANGE_TRACKING_ENABLED: bool = True
+    # Ennél sűrűbben nem kérdezi le a változásokat (addig a pillanatképből szolgál ki)
+    CHANGE_TRACKING_MIN_INTERVAL_SECONDS: float = 60.0
+    # A változások késve jelenhetnek meg, ennyivel a vízjel előttről is lekérdez
+    CHANGE_TRACKING_OVERLAP_SECONDS: int = 300
+    # Ennyi változás felett (lekérdezési korlát, API maximum: 10 000) teljes újratöltés
+    CHANGE_TRACKING_MAX_CHANGES: int = 10000
+    
+    # Quota Scheduler Settings
+    GOOGLE_ADS_DEVELOPER_QPS: float = 20.0
+    GOOGLE_ADS_DEVELOPER_BURST: int = 40
+    GOOGLE_ADS_CUSTOMER_QPS: float = 5.0
+    GOOGLE_ADS_CUSTOMER_BURST: int = 10
+    GOOGLE_ADS_BACKGROUND_RESERVE: float = 0.25
+    GOOGLE_ADS_MAX_RETRIES: int = 4
+    GOOGLE_ADS_BACKOFF_BASE_SECONDS: float = 0.5
+    GOOGLE_ADS_BACKOFF_MAX_SECONDS: float = 30.0
+    GOOGLE_ADS_INTERACTIVE_MAX_WAIT_SECONDS: float = 10.0
+    GOOGLE_ADS_BACKGROUND_MAX_WAIT_SECONDS: float = 300.0
+    
+    # Fake Backend Settings (GOOGLE_ADS_BACKEND=fake)
+    FAKE_ADS_SEED: int = 42
+    FAKE_ADS_CAMPAIGNS: int = 50
+    FAKE_ADS_KEYWORDS: int = 5000
+    FAKE_ADS_DAYS: int = 90
+    FAKE_ADS_CLIENT_ACCOUNTS: int = 5
+    FAKE_ADS_LATENCY_SECONDS: float = 0.0
+    FAKE_ADS_LATENCY_JITTER: float = 0.0
+    FAKE_ADS_ERROR_RATE: float = 0.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,13 +1,17 @@
 """
 Google Ads Automation API - Fő alkalmazás
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from loguru import logger
+import asyncio
 import sys
 
 from app.config import settings
 from app.api.v1 import api_router
+from app.services.executor import AnalysisTimeoutError, AnalysisCancelledError
+from app.services.scheduler import QuotaExhaustedError
 
 # Logging konfiguráció
 logger.remove()
@@ -59,6 +63,32 @@ app.add_middleware(
 # API router hozzáadása
 app.include_router(api_router, prefix="/api/v1")
 
+# Készenlét: csak a sikeres induláskori bemelegítés után vált igazra (hibánál a warmup a hibát tartalmazza)
+app.state.ready = False
+app.state.warmup = None
+
+
+@app.exception_handler(QuotaExhaustedError)
+async def quota_exhausted_handler(request: Request, exc: QuotaExhaustedError):
+    """Kimerült Google Ads kvóta: 429 Retry-After fejléccel a 500 helyett"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+    )
+
+
+@app.exception_handler(AnalysisTimeoutError)
+async def analysis_timeout_handler(request: Request, exc: AnalysisTimeoutError):
+    """Időkorlátot túllépő elemzés: 504"""
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.exception_handler(AnalysisCancelledError)
+async def analysis_cancelled_handler(request: Request, exc: AnalysisCancelledError):
+    """Megszakított elemzés (a kliens bontotta a kapcsolatot): 499, a választ már senki nem olvassa"""
+    return JSONResponse(status_code=499, content={"detail": str(exc)})
+
 
 @app.get("/")
 async def root():
@@ -74,28 +104,105 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Egészségügyi ellenőrzés"""
-    from app.services.google_ads import get_google_ads_service
+    from app.services.async_google_ads import get_async_google_ads_service
     
-    google_ads_service = get_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE)
+    google_ads_service = get_async_google_ads_service(
+        settings.GOOGLE_ADS_CONFIG_FILE,
+        settings.GOOGLE_ADS_MAX_CONCURRENCY
+    )
     
     return {
         "status": "healthy",
+        "ready": app.state.ready,
         "google_ads_configured": google_ads_service.is_configured()
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Készenléti ellenőrzés: 503, amíg az induláskori bemelegítés be nem fejeződött, vagy ha hibával ért véget"""
+    if not app.state.ready:
+        return JSONResponse(status_code=503, content={"ready": False, "warmup": app.state.warmup})
+    return {"ready": True, "warmup": app.state.warmup}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Teljesítmény metrikák (szálkészlet, elemzési folyamat készlet, riport és elemzési cache, hívás összevonás, kvóta ütemező, változás követés)"""
+    from app.services.async_google_ads import get_async_google_ads_service
+    from app.services.analytics import get_analytics_service
+    from app.services.executor import get_analysis_executor
+    
+    google_ads_service = get_async_google_ads_service(
+        settings.GOOGLE_ADS_CONFIG_FILE,
+        settings.GOOGLE_ADS_MAX_CONCURRENCY
+    )
+    
+    return {
+        "google_ads_pool": google_ads_service.get_stats(),
+        "analysis_executor": get_analysis_executor().get_stats(),
+        "report_cache": google_ads_service.service.cache.get_stats(),
+        "analysis_cache": get_analytics_service().cache.get_stats(),
+        "single_flight": google_ads_service.service.single_flight.get_stats(),
+        "scheduler": google_ads_service.service.scheduler.get_stats(),
+        "change_tracker": google_ads_service.service.change_tracker.get_stats()
+    }
+
+
 @app.on_event("startup")
 async def startup_event():
     """Alkalmazás indításkor futó műveletek"""
     logger.info("Google Ads Automation API indítása...")
     logger.info(f"Debug mód: {settings.DEBUG}")
     logger.info(f"API verzió: {settings.API_VERSION}")
+    
+    from app.services.async_google_ads import get_async_google_ads_service
+    from app.services.automation import get_automation_service
+    from app.services.analytics import get_analytics_service
+    from app.services.executor import get_analysis_executor
+    
+    # A kliens, a gRPC csatorna és a stubok itt épülnek fel, nem az első kérésben
+    warmed_up = True
+    try:
+        google_ads_service = get_async_google_ads_service(
+            settings.GOOGLE_ADS_CONFIG_FILE,
+            settings.GOOGLE_ADS_MAX_CONCURRENCY
+        )
+        # Az automatizációs szabályok értesülnek a változott kampányokról
+        google_ads_service.service.add_change_listener(get_automation_service().on_account_changes)
+        # A streamelt elemzések memoizált eredményei a változott ügyfélnél érvénytelenülnek
+        google_ads_service.service.add_change_listener(get_analytics_service().on_account_changes)
+        # ...és a riport cache kézi vagy módosítás utáni törlésekor is
+        google_ads_service.service.add_invalidation_listener(get_analytics_service().on_reports_invalidated)
+        app.state.warmup = await google_ads_service.warmup()
+        logger.info(f"Google Ads kliens bemelegítve: {app.state.warmup}")
+    except Exception as e:
+        logger.error(f"Hiba a Google Ads kliens bemelegítésekor: {e}")
+        app.state.warmup = {"error": str(e)}
+        warmed_up = False
+    
+    # Az elemzés worker folyamatai (és bennük a pandas) itt indulnak, nem az első nagy elemzésben
+    try:
+        executor_warmup = await asyncio.get_running_loop().run_in_executor(None, get_analysis_executor().start)
+        logger.info(f"Elemzés worker folyamatok elindítva: {executor_warmup}")
+    except Exception as e:
+        logger.error(f"Hiba az elemzés worker folyamatok indításakor: {e}")
+        app.state.warmup = {**(app.state.warmup or {}), "executor_error": str(e)}
+        warmed_up = False
+    app.state.ready = warmed_up
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Alkalmazás leállításkor futó műveletek"""
     logger.info("Google Ads Automation API leállítása...")
+    app.state.ready = False
+    
+    from app.services.async_google_ads import shutdown_async_google_ads_service
+    from app.services.executor import shutdown_analysis_executor
+    
+    shutdown_async_google_ads_service()
+    shutdown_analysis_executor()
 
 
 if __name__ == "__main__":
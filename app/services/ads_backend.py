@@ -0,0 +1,435 @@
+"""
+GAQL végrehajtó backendek a GoogleAdsService mögött
+"""
+from typing import Optional, Any, Dict, Iterable, List, Sequence, TYPE_CHECKING
+from loguru import logger
+import threading
+import time
+import sys
+import os
+
+from app.config import settings
+
+# A google-ads SDK importja lassú (a folyamat indulási idejének jelentős része),
+# ezért csak a kliens tényleges betöltésekor importáljuk
+if TYPE_CHECKING:
+    from google.ads.googleads.client import GoogleAdsClient
+
+# Induláskor előre felépített szolgáltatás stubok
+WARMUP_SERVICES = ("GoogleAdsService",)
+
+# Módosítható erőforrások: szolgáltatás, művelet és kérés típusok, módosítható mezők
+MUTATE_RESOURCES: Dict[str, Dict[str, Any]] = {
+    "ad_group_criterion": {
+        "service": "AdGroupCriterionService",
+        "operation": "AdGroupCriterionOperation",
+        "request": "MutateAdGroupCriteriaRequest",
+        "method": "mutate_ad_group_criteria",
+        "batch_operation": "ad_group_criterion_operation",
+        "fields": ("cpc_bid_micros",)
+    },
+    "campaign_budget": {
+        "service": "CampaignBudgetService",
+        "operation": "CampaignBudgetOperation",
+        "request": "MutateCampaignBudgetsRequest",
+        "method": "mutate_campaign_budgets",
+        "batch_operation": "campaign_budget_operation",
+        "fields": ("amount_micros",)
+    }
+}
+
+# Batch jobhoz kérésenként feltöltött műveletek és eredmény lapméret
+BATCH_JOB_UPLOAD_SIZE = 1000
+
+
+def is_google_ads_error(error: BaseException) -> bool:
+    """
+    GoogleAdsException-e a hiba, az SDK betöltése nélkül
+    
+    Ha a google-ads SDK még nincs betöltve, egyetlen backend sem dobhatott
+    GoogleAdsException-t, így az importot itt sem kell kikényszeríteni.
+    """
+    errors = sys.modules.get("google.ads.googleads.errors")
+    return errors is not None and isinstance(error, errors.GoogleAdsException)
+
+
+class GoogleAdsBackend:
+    """
+    GAQL lekérdezéseket végrehajtó backend interfész
+    
+    A GoogleAdsService csak ezen a két hívási ponton keresztül éri el az API-t,
+    így a valódi Google Ads kliens helyett helyi (szintetikus) backend is
+    beköthető benchmarkokhoz és terheléses tesztekhez.
+    """
+    
+    name = "base"
+    
+    def search_stream(self, customer_id: str, query: str) -> Iterable[Any]:
+        """
+        Streamelő GAQL lekérdezés
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            query: GAQL lekérdezés
+        
+        Returns:
+            Batch-ek folyama, mindegyik `results` attribútummal (GoogleAdsRow-szerű sorok)
+        """
+        raise NotImplementedError
+    
+    def search_page(self, customer_id: str, query: str, page_size: int, page_token: Optional[str] = None) -> Any:
+        """
+        Egy lap lekérdezése szerver oldali lapozással
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            query: GAQL lekérdezés
+            page_size: Lapméret
+            page_token: Az előző lap `next_page_token` értéke
+        
+        Returns:
+            Lap `results` és `next_page_token` attribútumokkal
+        """
+        raise NotImplementedError
+    
+    def mutate(
+        self,
+        customer_id: str,
+        resource_type: str,
+        operations: Sequence[Dict[str, Any]],
+        partial_failure: bool = True,
+        validate_only: bool = False
+    ) -> List[Optional[str]]:
+        """
+        Erőforrás mezők módosítása egyetlen mutate kérésben
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            resource_type: Erőforrás típus (MUTATE_RESOURCES kulcsa)
+            operations: Módosítások (`resource_name`, `field`, `value` kulcsokkal)
+            partial_failure: A hibás műveletek nem akasztják meg a többit
+            validate_only: Csak ellenőrzés (dry run), módosítás nélkül
+        
+        Returns:
+            Műveletenkénti hibaüzenet a műveletek sorrendjében (None: sikeres)
+        """
+        raise NotImplementedError
+    
+    def run_batch_job(
+        self,
+        customer_id: str,
+        resource_type: str,
+        operations: Sequence[Dict[str, Any]]
+    ) -> List[Optional[str]]:
+        """
+        Nagy módosítás készlet végrehajtása aszinkron batch jobként (BatchJobService)
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            resource_type: Erőforrás típus (MUTATE_RESOURCES kulcsa)
+            operations: Módosítások (`resource_name`, `field`, `value` kulcsokkal)
+        
+        Returns:
+            Műveletenkénti hibaüzenet a műveletek sorrendjében (None: sikeres)
+        """
+        raise NotImplementedError
+    
+    def warmup(self) -> Dict[str, Any]:
+        """
+        Előkészíti a backendet az első kérés előtt (alapértelmezetten nincs teendő)
+        
+        Returns:
+            A bemelegítés részletei
+        """
+        return {"backend": self.name}
+
+
+class GoogleAdsClientBackend(GoogleAdsBackend):
+    """A valódi Google Ads API (google-ads kliens könyvtár)"""
+    
+    name = "google_ads"
+    
+    def __init__(self, client: "GoogleAdsClient"):
+        """
+        Args:
+            client: Inicializált Google Ads kliens
+        """
+        self.client = client
+        self._services: Dict[str, Any] = {}
+        self._services_lock = threading.Lock()
+    
+    @classmethod
+    def from_config_file(cls, config_file: str) -> Optional["GoogleAdsClientBackend"]:
+        """
+        Betölti a klienst egy google-ads.yaml fájlból
+        
+        Args:
+            config_file: Google Ads konfiguráció fájl elérési útja
+        
+        Returns:
+            Backend, vagy None ha a fájl hiányzik vagy hibás
+        """
+        if not os.path.exists(config_file):
+            logger.warning(f"Google Ads konfiguráció fájl nem található: {config_file}")
+            return None
+        
+        try:
+            from google.ads.googleads.client import GoogleAdsClient
+            
+            client = GoogleAdsClient.load_from_storage(config_file)
+            logger.info("Google Ads kliens sikeresen inicializálva")
+            return cls(client)
+        except Exception as e:
+            logger.error(f"Hiba a Google Ads kliens inicializálásakor: {e}")
+            return None
+    
+    @classmethod
+    def from_settings(cls) -> Optional["GoogleAdsClientBackend"]:
+        """
+        Betölti a klienst a GOOGLE_ADS_* beállításokból (környezeti változók)
+        
+        Returns:
+            Backend, vagy None ha a hitelesítési adatok hiányosak vagy hibásak
+        """
+        credentials = {
+            "developer_token": settings.GOOGLE_ADS_DEVELOPER_TOKEN,
+            "client_id": settings.GOOGLE_ADS_CLIENT_ID,
+            "client_secret": settings.GOOGLE_ADS_CLIENT_SECRET,
+            "refresh_token": settings.GOOGLE_ADS_REFRESH_TOKEN
+        }
+        missing = [key for key, value in credentials.items() if not value]
+        if missing:
+            logger.warning(f"Hiányzó Google Ads beállítások: {', '.join(missing)}")
+            return None
+        
+        config = dict(credentials, use_proto_plus=True)
+        if settings.GOOGLE_ADS_LOGIN_CUSTOMER_ID:
+            config["login_customer_id"] = settings.GOOGLE_ADS_LOGIN_CUSTOMER_ID.replace("-", "")
+        
+        try:
+            from google.ads.googleads.client import GoogleAdsClient
+            
+            client = GoogleAdsClient.load_from_dict(config)
+            logger.info("Google Ads kliens sikeresen inicializálva a környezeti beállításokból")
+            return cls(client)
+        except Exception as e:
+            logger.error(f"Hiba a Google Ads kliens inicializálásakor: {e}")
+            return None
+    
+    def get_service(self, name: str) -> Any:
+        """
+        Szolgáltatás stub név szerint, gyorsítótárazva
+        
+        A kliens `get_service` hívása minden alkalommal új gRPC csatornát és stubot
+        épít; itt szolgáltatásonként egyet hozunk létre és azt használjuk újra.
+        A stubok szálbiztosak, a szálkészlet párhuzamos hívásai megoszthatják.
+        
+        Args:
+            name: Szolgáltatás neve (pl. GoogleAdsService)
+        
+        Returns:
+            Szolgáltatás kliens
+        """
+        service = self._services.get(name)
+        if service is None:
+            with self._services_lock:
+                service = self._services.get(name)
+                if service is None:
+                    service = self.client.get_service(name)
+                    self._services[name] = service
+        return service
+    
+    def warmup(
+        self,
+        services: Sequence[str] = WARMUP_SERVICES,
+        connect_timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Felépíti a stubokat és megnyitja a gRPC csatornákat
+        
+        Az OAuth tokent a kliens betöltése már frissítette. A csatlakozás hibája
+        nem végzetes: ilyenkor az első kérés nyitja meg a csatornát, csak lassabban.
+        
+        Args:
+            services: Előre felépítendő szolgáltatások
+            connect_timeout: Csatornánkénti csatlakozási időkorlát másodpercben
+                (alapértelmezetten GOOGLE_ADS_WARMUP_TIMEOUT_SECONDS)
+        
+        Returns:
+            A bemelegítés részletei
+        """
+        import grpc
+        
+        if connect_timeout is None:
+            connect_timeout = settings.GOOGLE_ADS_WARMUP_TIMEOUT_SECONDS
+        
+        started = time.perf_counter()
+        details: Dict[str, Any] = {"backend": self.name, "services": list(services)}
+        
+        stubs = [self.get_service(name) for name in services]
+        
+        connected = 0
+        for name, stub in zip(services, stubs):
+            try:
+                grpc.channel_ready_future(stub.transport.grpc_channel).result(timeout=connect_timeout)
+                connected += 1
+            except Exception as e:
+                logger.warning(f"A(z) {name} gRPC csatorna nem csatlakozott induláskor: {e!r}")
+        details["channels_connected"] = connected
+        details["seconds"] = round(time.perf_counter() - started, 3)
+        return details
+    
+    def search_stream(self, customer_id: str, query: str) -> Iterable[Any]:
+        ga_service = self.get_service("GoogleAdsService")
+        return ga_service.search_stream(customer_id=customer_id, query=query)
+    
+    def search_page(self, customer_id: str, query: str, page_size: int, page_token: Optional[str] = None) -> Any:
+        ga_service = self.get_service("GoogleAdsService")
+        request = self.client.get_type("SearchGoogleAdsRequest")
+        request.customer_id = customer_id
+        request.query = query
+        request.page_size = page_size
+        if page_token:
+            request.page_token = page_token
+        
+        # Csak az első lapot kérjük le, a pager a továbbiakat nem tölti be
+        return next(iter(ga_service.search(request=request).pages))
+    
+    def _operation(self, resource_type: str, change: Dict[str, Any]) -> Any:
+        """Egy update művelet (csak a módosított mező van az update_mask-ban)"""
+        from google.api_core import protobuf_helpers
+        
+        operation = self.client.get_type(MUTATE_RESOURCES[resource_type]["operation"])
+        resource = operation.update
+        resource.resource_name = change["resource_name"]
+        setattr(resource, change["field"], change["value"])
+        self.client.copy_from(operation.update_mask, protobuf_helpers.field_mask(None, resource._pb))
+        return operation
+    
+    def _failure_errors(self, status: Any, count: int) -> List[Optional[str]]:
+        """
+        Részleges hiba (google.rpc.Status) szétbontása műveletenkénti üzenetekre
+        
+        Args:
+            status: A válasz `partial_failure_error` mezője
+            count: Műveletek száma
+        """
+        errors: List[Optional[str]] = [None] * count
+        if not status or not status.code:
+            return errors
+        
+        failure_type = type(self.client.get_type("GoogleAdsFailure"))
+        for detail in status.details:
+            failure = failure_type.deserialize(detail.value)
+            for error in failure.errors:
+                elements = error.location.field_path_elements
+                index = elements[0].index if elements else None
+                if index is None or not 0 <= index < count:
+                    # A hiba nem köthető egy művelethez: mindegyiket hibásnak tekintjük
+                    return [error.message] * count
+                errors[index] = error.message
+        return errors
+    
+    def mutate(
+        self,
+        customer_id: str,
+        resource_type: str,
+        operations: Sequence[Dict[str, Any]],
+        partial_failure: bool = True,
+        validate_only: bool = False
+    ) -> List[Optional[str]]:
+        spec = MUTATE_RESOURCES[resource_type]
+        service = self.get_service(spec["service"])
+        request = self.client.get_type(spec["request"])
+        request.customer_id = customer_id
+        request.operations.extend(self._operation(resource_type, change) for change in operations)
+        request.partial_failure = partial_failure
+        request.validate_only = validate_only
+        
+        response = getattr(service, spec["method"])(request=request)
+        return self._failure_errors(response.partial_failure_error, len(operations))
+    
+    def run_batch_job(
+        self,
+        customer_id: str,
+        resource_type: str,
+        operations: Sequence[Dict[str, Any]]
+    ) -> List[Optional[str]]:
+        spec = MUTATE_RESOURCES[resource_type]
+        batch_job_service = self.get_service("BatchJobService")
+        
+        job_operation = self.client.get_type("BatchJobOperation")
+        self.client.copy_from(job_operation.create, self.client.get_type("BatchJob"))
+        batch_job = batch_job_service.mutate_batch_job(customer_id=customer_id, operation=job_operation).result.resource_name
+        
+        # A műveletek sorrendben, sequence tokennel fűzve kerülnek a jobba
+        sequence_token = None
+        for start in range(0, len(operations), BATCH_JOB_UPLOAD_SIZE):
+            mutate_operations = []
+            for change in operations[start:start + BATCH_JOB_UPLOAD_SIZE]:
+                mutate_operation = self.client.get_type("MutateOperation")
+                self.client.copy_from(
+                    getattr(mutate_operation, spec["batch_operation"]),
+                    self._operation(resource_type, change)
+                )
+                mutate_operations.append(mutate_operation)
+            response = batch_job_service.add_batch_job_operations(
+                resource_name=batch_job,
+                sequence_token=sequence_token,
+                mutate_operations=mutate_operations
+            )
+            sequence_token = response.next_sequence_token
+        
+        logger.info(f"Batch job indítása: {batch_job} ({len(operations)} művelet)")
+        batch_job_service.run_batch_job(resource_name=batch_job).result(
+            timeout=settings.MUTATION_BATCH_JOB_TIMEOUT_SECONDS
+        )
+        
+        request = self.client.get_type("ListBatchJobResultsRequest")
+        request.resource_name = batch_job
+        request.page_size = BATCH_JOB_UPLOAD_SIZE
+        errors: List[Optional[str]] = [None] * len(operations)
+        for result in batch_job_service.list_batch_job_results(request=request):
+            if result.status.code:
+                errors[result.operation_index] = result.status.message
+        return errors
+
+
+def create_backend(name: str, config_file: str) -> Optional[GoogleAdsBackend]:
+    """
+    Létrehozza a beállított backendet
+    
+    Args:
+        name: Backend neve (GOOGLE_ADS_BACKEND: google_ads vagy fake)
+        config_file: Google Ads konfiguráció fájl (csak a google_ads backendhez)
+    
+    A valódi kliens a konfiguráció fájlból töltődik be; ha a fájl nem létezik,
+    a GOOGLE_ADS_* környezeti beállításokból.
+    
+    Returns:
+        Backend, vagy None ha a valódi kliens nincs konfigurálva
+    
+    Raises:
+        ValueError: Ismeretlen backend név esetén
+    """
+    if name == GoogleAdsClientBackend.name:
+        if not os.path.exists(config_file) and settings.GOOGLE_ADS_DEVELOPER_TOKEN:
+            return GoogleAdsClientBackend.from_settings()
+        return GoogleAdsClientBackend.from_config_file(config_file)
+    
+    if name == "fake":
+        from app.services.fake_google_ads import FakeGoogleAdsBackend
+        
+        logger.warning("Szintetikus (fake) Google Ads backend használatban, az adatok nem valódiak")
+        return FakeGoogleAdsBackend(
+            seed=settings.FAKE_ADS_SEED,
+            campaigns=settings.FAKE_ADS_CAMPAIGNS,
+            keywords=settings.FAKE_ADS_KEYWORDS,
+            days=settings.FAKE_ADS_DAYS,
+            client_accounts=settings.FAKE_ADS_CLIENT_ACCOUNTS,
+            latency_seconds=settings.FAKE_ADS_LATENCY_SECONDS,
+            latency_jitter=settings.FAKE_ADS_LATENCY_JITTER,
+            error_rate=settings.FAKE_ADS_ERROR_RATE
+        )
+    
+    raise ValueError(f"Ismeretlen Google Ads backend: {name}")
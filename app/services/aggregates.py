@@ -0,0 +1,384 @@
+"""
+Egy menetben (darabonként) számolt, összefésülhető statisztikák
+"""
+from typing import Optional, Iterable, List, Dict, Any
+import math
+import numpy as np
+
+from app.services.columnar import ReportData, numeric_columns
+
+# A kvantilis vázlat tömörítési paramétere: nagyobb érték pontosabb, de több centroid (~ennek a fele)
+SKETCH_COMPRESSION = 200
+
+# Ennyi értékig a vázlat pontos (minden érték megmarad), efölött centroidokba tömörít
+SKETCH_CAPACITY = 4096
+
+
+class QuantileSketch:
+    """
+    Összefésülhető kvantilis vázlat (t-digest jellegű)
+    
+    Legfeljebb SKETCH_CAPACITY értékig minden érték megmarad, és a
+    kvantilisek pontosak (a pandas/NumPy lineáris interpolációjával
+    egyeznek). Efölött az értékek súlyozott centroidokba tömörülnek; a
+    centroidok mérete a kvantilis skálán arcsin szerint nő, így a szélek
+    (kis és nagy kvantilisek) pontosabbak, mint a közép. A memória az
+    értékek számától független.
+    """
+    
+    def __init__(self, compression: int = SKETCH_COMPRESSION, capacity: int = SKETCH_CAPACITY):
+        self.compression = compression
+        self.capacity = max(capacity, compression)
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        # Tömörítés után is egyenként tartott pontok (átlag, súly); pontos módban minden súly 1
+        self._means = np.zeros(0)
+        self._weights = np.zeros(0)
+        self._pending: List[np.ndarray] = []
+        self._pending_weights: List[np.ndarray] = []
+        self._pending_count = 0
+        self.exact = True
+    
+    def update(self, values: np.ndarray) -> None:
+        """Értékek hozzáadása (a NaN és végtelen értékek kimaradnak)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self._add(values, None)
+    
+    def merge(self, other: "QuantileSketch") -> None:
+        """Egy másik vázlat hozzáfésülése (pl. másik ügyfél vagy folyamat részeredménye)"""
+        other._flush()
+        if not other.count:
+            return
+        self.exact = self.exact and other.exact
+        self._add(other._means, other._weights)
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+    
+    def _add(self, means: np.ndarray, weights: Optional[np.ndarray]) -> None:
+        self._pending.append(means)
+        self._pending_weights.append(np.ones(len(means)) if weights is None else weights)
+        self._pending_count += len(means)
+        self.count += int(len(means) if weights is None else round(weights.sum()))
+        self.minimum = min(self.minimum, float(means.min()))
+        self.maximum = max(self.maximum, float(means.max()))
+        if len(self._means) + self._pending_count > self.capacity:
+            self._flush(compress=True)
+    
+    def _flush(self, compress: bool = False) -> None:
+        """A függő értékek rendezett beolvasztása, szükség esetén tömörítéssel"""
+        if not self._pending and not compress:
+            return
+        means = np.concatenate([self._means] + self._pending)
+        weights = np.concatenate([self._weights] + self._pending_weights)
+        self._pending, self._pending_weights, self._pending_count = [], [], 0
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        
+        if compress and len(means) > self.capacity:
+            # Csoportosítás a k skála egész értékei szerint: k(q) = δ/(2π) · arcsin(2q - 1)
+            total = weights.sum()
+            midpoints = (np.cumsum(weights) - weights / 2) / total
+            bucket = np.floor(self.compression / (2 * math.pi) * np.arcsin(2 * midpoints - 1))
+            starts = np.flatnonzero(np.concatenate([[True], bucket[1:] != bucket[:-1]]))
+            grouped = np.add.reduceat(weights, starts)
+            means = np.add.reduceat(means * weights, starts) / grouped
+            weights = grouped
+            self.exact = False
+        
+        self._means, self._weights = means, weights
+    
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        """
+        Kvantilisek (0 <= q <= 1)
+        
+        Returns:
+            A kvantilis értékek (üres vázlatnál NaN)
+        """
+        qs = np.asarray(list(qs), dtype=np.float64)
+        if not self.count:
+            return np.full(len(qs), np.nan)
+        self._flush()
+        if self.exact:
+            return np.quantile(self._means, qs)
+        
+        # A centroidok középpontjai között lineárisan, a széleken a minimumig/maximumig
+        centers = np.cumsum(self._weights) - self._weights / 2
+        positions = np.concatenate([[0.0], centers, [self.count]])
+        values = np.concatenate([[self.minimum], self._means, [self.maximum]])
+        return np.interp(qs * self.count, positions, values)
+    
+    def quantile(self, q: float) -> float:
+        """Egy kvantilis (üres vázlatnál NaN)"""
+        return float(self.quantiles([q])[0])
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-kompatibilis állapot (más folyamatnak vagy tárolásra, lásd from_dict)"""
+        self._flush()
+        return {
+            "compression": self.compression,
+            "capacity": self.capacity,
+            "count": self.count,
+            "minimum": self.minimum if self.count else None,
+            "maximum": self.maximum if self.count else None,
+            "exact": self.exact,
+            "means": self._means.tolist(),
+            "weights": self._weights.tolist()
+        }
+    
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "QuantileSketch":
+        """Vázlat visszaállítása a to_dict állapotából"""
+        sketch = cls(state["compression"], state["capacity"])
+        sketch.count = state["count"]
+        if sketch.count:
+            sketch.minimum, sketch.maximum = state["minimum"], state["maximum"]
+        sketch.exact = state["exact"]
+        sketch._means = np.array(state["means"], dtype=np.float64)
+        sketch._weights = np.array(state["weights"], dtype=np.float64)
+        return sketch
+
+
+class RunningStats:
+    """
+    Egy metrika darabonként frissített statisztikái
+    
+    Darab, összeg, átlag és szórás (Welford/Chan összefésüléssel, numerikusan
+    stabil), minimum és maximum a sor indexükkel, valamint (kérésre)
+    kvantilis vázlat; minden darab egyszer kerül feldolgozásra. A NaN
+    értékek kimaradnak (mint a pandas aggregációknál).
+    """
+    
+    def __init__(
+        self,
+        quantiles: bool = True,
+        compression: int = SKETCH_COMPRESSION,
+        capacity: int = SKETCH_CAPACITY
+    ):
+        """
+        Args:
+            quantiles: Kvantilis vázlat is készüljön (enélkül csak a momentumok és szélsőértékek)
+            compression: A vázlat tömörítési paramétere
+            capacity: Ennyi értékig pontos a vázlat
+        """
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.nan
+        self.maximum = math.nan
+        # A (legelső) minimum és maximum sor indexe az update hívások offset-jével
+        self.min_index = -1
+        self.max_index = -1
+        self.sketch = QuantileSketch(compression, capacity) if quantiles else None
+    
+    def update(self, values: np.ndarray, offset: int = 0) -> None:
+        """
+        Egy darab feldolgozása
+        
+        Args:
+            values: A darab értékei
+            offset: A darab első sorának indexe (a minimum/maximum helyéhez)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        if not valid.all():
+            positions = np.flatnonzero(valid)
+            values = values[valid]
+        else:
+            positions = None
+        if not len(values):
+            return
+        
+        count = len(values)
+        total = float(values.sum())
+        mean = total / count
+        m2 = float(np.square(values - mean).sum())
+        self._combine(count, total, mean, m2)
+        
+        low, high = int(values.argmin()), int(values.argmax())
+        value_low, value_high = float(values[low]), float(values[high])
+        if positions is not None:
+            low, high = int(positions[low]), int(positions[high])
+        if self.min_index < 0 or value_low < self.minimum:
+            self.minimum, self.min_index = value_low, offset + low
+        if self.max_index < 0 or value_high > self.maximum:
+            self.maximum, self.max_index = value_high, offset + high
+        if self.sketch is not None:
+            self.sketch.update(values)
+    
+    def merge(self, other: "RunningStats", offset: int = 0) -> None:
+        """
+        Egy másik (pl. másik ügyfél adatain számolt) statisztika hozzáfésülése
+        
+        Args:
+            other: A hozzáfésülendő statisztika
+            offset: A másik statisztika sor indexeinek eltolása
+        """
+        if not other.count:
+            return
+        self._combine(other.count, other.total, other.mean, other.m2)
+        if self.min_index < 0 or other.minimum < self.minimum:
+            self.minimum, self.min_index = other.minimum, offset + other.min_index
+        if self.max_index < 0 or other.maximum > self.maximum:
+            self.maximum, self.max_index = other.maximum, offset + other.max_index
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+    
+    def _combine(self, count: int, total: float, mean: float, m2: float) -> None:
+        """Chan-féle összefésülés (darab, összeg, átlag, négyzetes eltérés összeg)"""
+        if not self.count:
+            # Üres statisztikába pontos másolat (a képlet az átlagot kerekítené)
+            self.count, self.total, self.mean, self.m2 = count, total, mean, m2
+            return
+        combined = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / combined
+        self.m2 += m2 + delta * delta * self.count * count / combined
+        self.total += total
+        self.count = combined
+    
+    @property
+    def variance(self) -> float:
+        """Korrigált (n-1) szórásnégyzet, mint a pandas std()"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+    
+    @property
+    def std(self) -> float:
+        """Korrigált (n-1) szórás"""
+        return math.sqrt(self.variance) if self.count > 1 else math.nan
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-kompatibilis állapot (lásd from_dict)"""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "m2": self.m2,
+            "minimum": self.minimum if self.count else None,
+            "maximum": self.maximum if self.count else None,
+            "min_index": self.min_index,
+            "max_index": self.max_index,
+            "sketch": self.sketch.to_dict() if self.sketch is not None else None
+        }
+    
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "RunningStats":
+        """Statisztika visszaállítása a to_dict állapotából"""
+        stats = cls(quantiles=False)
+        stats.count, stats.total, stats.mean, stats.m2 = state["count"], state["total"], state["mean"], state["m2"]
+        if stats.count:
+            stats.minimum, stats.maximum = state["minimum"], state["maximum"]
+        stats.min_index, stats.max_index = state["min_index"], state["max_index"]
+        if state["sketch"] is not None:
+            stats.sketch = QuantileSketch.from_dict(state["sketch"])
+        return stats
+
+
+class OnlineAggregate:
+    """
+    Több metrika darabonként táplált, összefésülhető összesítése
+    
+    Riport darabokból (pl. search_stream darabok) frissül, a sorokat nem
+    tartja meg: metrikánként RunningStats (darab, összeg, átlag, szórás,
+    szélsőértékek, opcionálisan kvantilis vázlat), a sorok száma és
+    tetszőleges elnevezett számlálók. Ügyfelenként vagy folyamatonként
+    számolt részeredmények merge-dzsel egyesíthetők, a to_dict/from_dict
+    állapot pedig JSON-kompatibilis, így folyamatok között is átadható.
+    """
+    
+    def __init__(self, fields: Iterable[str], quantile_fields: Iterable[str] = ()):
+        """
+        Args:
+            fields: Az összesített numerikus mezők
+            quantile_fields: A mezők, amelyekhez kvantilis vázlat is készül
+        """
+        quantile_fields = set(quantile_fields)
+        self.fields = list(dict.fromkeys(list(fields) + sorted(quantile_fields)))
+        self.rows = 0
+        self.counts: Dict[str, int] = {}
+        self.stats = {name: RunningStats(quantiles=name in quantile_fields) for name in self.fields}
+        # A riportokban ténylegesen előforduló mezők (a hiányzó mező összege nem 0, hanem ismeretlen)
+        self.present: set = set()
+    
+    def update(self, chunk: ReportData) -> None:
+        """Egy riport darab (szótár lista vagy ColumnarResult) hozzáadása"""
+        self.update_columns(numeric_columns(chunk, self.fields), len(chunk))
+    
+    def update_columns(self, columns: Dict[str, np.ndarray], rows: int) -> None:
+        """Egy darab hozzáadása már kinyert oszlop tömbökből"""
+        for name, values in columns.items():
+            stats = self.stats.get(name)
+            if stats is not None:
+                stats.update(values, self.rows)
+                self.present.add(name)
+        self.rows += rows
+    
+    def increment(self, name: str, count: int = 1) -> None:
+        """Egy elnevezett számláló növelése (pl. a szűrt sorok száma)"""
+        self.counts[name] = self.counts.get(name, 0) + count
+    
+    def merge(self, other: "OnlineAggregate") -> None:
+        """Egy másik összesítés hozzáfésülése (a sor indexek a saját sorok után folytatódnak)"""
+        for name, stats in other.stats.items():
+            if name not in self.stats:
+                self.stats[name] = RunningStats(quantiles=stats.sketch is not None)
+                self.fields.append(name)
+            self.stats[name].merge(stats, self.rows)
+        for name, count in other.counts.items():
+            self.increment(name, count)
+        self.present |= other.present
+        self.rows += other.rows
+    
+    def has(self, name: str) -> bool:
+        """A mező szerepelt-e a riportokban"""
+        return name in self.present
+    
+    def total(self, name: str) -> float:
+        """A mező összege (a NaN értékek nélkül)"""
+        return self.stats[name].total
+    
+    def mean(self, name: str) -> Optional[float]:
+        """A mező átlaga (None, ha nincs ismert érték)"""
+        stats = self.stats[name]
+        return stats.mean if stats.count else None
+    
+    def quantiles(self, name: str, percentiles: Iterable[float]) -> Dict[str, Optional[float]]:
+        """
+        A mező percentilisei a kvantilis vázlatból
+        
+        Returns:
+            "p<percentilis>" -> érték (None, ha nincs ismert érték)
+        
+        Raises:
+            ValueError: Ha a mezőhöz nem készült kvantilis vázlat
+        """
+        stats = self.stats[name]
+        if stats.sketch is None:
+            raise ValueError(f"A(z) '{name}' mezőhöz nem készült kvantilis vázlat")
+        percentiles = list(percentiles)
+        values = stats.sketch.quantiles([p / 100 for p in percentiles]).tolist()
+        return {f"p{p:g}": (value if stats.count else None) for p, value in zip(percentiles, values)}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-kompatibilis állapot (lásd from_dict)"""
+        return {
+            "rows": self.rows,
+            "counts": dict(self.counts),
+            "present": sorted(self.present),
+            "stats": {name: stats.to_dict() for name, stats in self.stats.items()}
+        }
+    
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "OnlineAggregate":
+        """Összesítés visszaállítása a to_dict állapotából"""
+        aggregate = cls(())
+        aggregate.rows = state["rows"]
+        aggregate.counts = dict(state["counts"])
+        aggregate.present = set(state["present"])
+        aggregate.stats = {name: RunningStats.from_dict(stats) for name, stats in state["stats"].items()}
+        aggregate.fields = list(aggregate.stats)
+        return aggregate
@@ -0,0 +1,247 @@
+"""
+Elemzési eredmények memoizálása (bemeneti ujjlenyomat + paraméterek)
+"""
+from typing import Optional, Dict, Any, Tuple, Callable, TypeVar
+from collections import OrderedDict
+from loguru import logger
+import functools
+import hashlib
+import inspect
+import io
+import pickle
+import threading
+import time
+
+from app.services.columnar import ColumnarResult
+
+T = TypeVar("T")
+
+
+class _FingerprintPickler(pickle.Pickler):
+    """Pickler, amely az oszlopos eredményeket a tartalmuk ujjlenyomatával helyettesíti"""
+    
+    def persistent_id(self, obj: Any) -> Optional[Tuple[str, str]]:
+        if isinstance(obj, ColumnarResult):
+            return ("columnar", obj.fingerprint())
+        return None
+
+
+def request_fingerprint(value: Any) -> str:
+    """
+    Egy elemzési kérés (bemeneti adatok és paraméterek) ujjlenyomata
+    
+    A szótár listák tartalma (pickle), az oszlopos eredmények a saját,
+    egyszer számolt ujjlenyomatukkal kerülnek a hash-be.
+    
+    Raises:
+        pickle.PicklingError, TypeError, AttributeError: Nem szerializálható
+            érték (pl. iterátor) esetén
+    """
+    buffer = io.BytesIO()
+    _FingerprintPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+    return hashlib.blake2b(buffer.getbuffer(), digest_size=16).hexdigest()
+
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _contains_rows(value: Any) -> bool:
+    """
+    Van-e az argumentumok között szótár listás (sor formátumú) riport adat
+    
+    Sor listának az a lista számít, amelynek első eleme csak skalár
+    értékeket tartalmazó szótár; a szótárak, listák és tuple-ök (pl. a
+    költségvetés feladatok) rekurzívan vizsgálódnak.
+    """
+    if isinstance(value, dict):
+        return any(_contains_rows(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], dict) and all(isinstance(item, _SCALAR_TYPES) for item in value[0].values()):
+            return True
+        return any(_contains_rows(item) for item in value)
+    return False
+
+
+def _copy_result(value: Any) -> Any:
+    """
+    Felszíni másolat: a hívók a válasz legfelső szintjét kiegészíthetik
+    (pl. customers, errors), a cache-elt példány ettől nem változik
+    """
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+class AnalysisCache:
+    """
+    LRU + TTL cache az elemzési eredményekhez
+    
+    A kulcs az elemzés neve és a bemenet ujjlenyomata a paraméterekkel, így
+    frissült adatokon (más tartalom) az elemzés magától újra lefut. A
+    streamelt bemenetű elemzések kulcsa a lekérdezést írja le (ügyfél,
+    időablak, adatforrás); ezek az ügyfél változásakor (change listener) és
+    a TTL lejártakor érvénytelenülnek. A visszaadott eredmények felszíni
+    másolatok, a beágyazott listákat és szótárakat csak olvasni szabad.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 900):
+        """
+        Args:
+            max_entries: Bejegyzések maximális száma (0: kikapcsolva)
+            ttl_seconds: Bejegyzés élettartama másodpercben
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """A memoizálás be van-e kapcsolva"""
+        return self.max_entries > 0
+    
+    def get(self, key: Tuple) -> Optional[Any]:
+        """
+        Visszaadja a kulcshoz tartozó eredmény másolatát
+        
+        Returns:
+            Az eredmény felszíni másolata, vagy None ha nincs érvényes találat
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _copy_result(value)
+    
+    def set(self, key: Tuple, value: Any, customer_id: Optional[str] = None) -> None:
+        """
+        Eltárol egy eredményt
+        
+        Args:
+            key: Cache kulcs
+            value: Az eredmény (felszíni másolata kerül tárolásra)
+            customer_id: Ha az eredmény egy ügyfél lekérdezéséhez kötött, az ügyfél (célzott érvénytelenítéshez)
+        """
+        if not self.enabled:
+            return
+        
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires_at, _copy_result(value), customer_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, customer_id: Optional[str] = None) -> int:
+        """
+        Érvényteleníti a bejegyzéseket
+        
+        Args:
+            customer_id: Ha meg van adva, csak az ügyfél lekérdezéséhez kötött bejegyzések
+                (a tartalom alapú kulcsok frissült adaton maguktól nem találnak)
+        
+        Returns:
+            Törölt bejegyzések száma
+        """
+        with self._lock:
+            keys = [
+                key for key, (_, _, scope) in self._entries.items()
+                if customer_id is None or scope == customer_id
+            ]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+        
+        if keys:
+            logger.info(f"Elemzési cache érvénytelenítve: {len(keys)} bejegyzés")
+        return len(keys)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Visszaadja a cache találati és méret statisztikáit"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+def memoized(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Dekorátor: egy elemző metódus eredménye a `self.cache` (AnalysisCache) alatt
+    
+    A kulcs az elemzés neve és az összes argumentum (alapértelmezésekkel
+    együtt) ujjlenyomata. Nem szerializálható argumentumnál (pl. iterátor)
+    és szótár listás riport adatnál a metódus memoizálás nélkül fut: a sorok
+    teljes tartalmának hash-e (pl. egy több ügyfeles, minden kérésnél újonnan
+    összefésült lista) drágább lenne magánál az elemzésnél, míg az oszlopos
+    eredmény ujjlenyomata objektumonként egyszer számolódik. A kulcs a
+    `cache_key(*args, **kwargs)` attribútummal a metódus hívása nélkül is
+    előállítható (pl. ha az elemzés egy worker folyamatban fut, és az
+    eredményt a hívó tárolja).
+    
+    Args:
+        name: Az elemzés neve (a kulcs része)
+    """
+    def decorate(method: Callable[..., T]) -> Callable[..., T]:
+        signature = inspect.signature(method)
+        
+        def cache_key(*args, **kwargs) -> Optional[Tuple]:
+            bound = signature.bind(None, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop("self")
+            if _contains_rows(arguments):
+                return None
+            try:
+                return (name, request_fingerprint(arguments))
+            except (pickle.PicklingError, TypeError, AttributeError):
+                return None
+        
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs) -> T:
+            cache: Optional[AnalysisCache] = getattr(self, "cache", None)
+            if cache is None or not cache.enabled:
+                return method(self, *args, **kwargs)
+            
+            key = cache_key(*args, **kwargs)
+            if key is None:
+                return method(self, *args, **kwargs)
+            
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            
+            result = method(self, *args, **kwargs)
+            cache.set(key, result)
+            return result
+        
+        wrapper.cache_key = cache_key
+        return wrapper
+    
+    return decorate
@@ -1,30 +1,308 @@
 """
 Adatelemzési szolgáltatások
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Tuple, TYPE_CHECKING
 from loguru import logger
-import pandas as pd
 from datetime import datetime
+import threading
+import numpy as np
+
+from app.services.aggregates import RunningStats, OnlineAggregate
+from app.services.analysis_cache import AnalysisCache, memoized
+from app.services.budget_optimizer import PRIOR_ELASTICITY, ResponseCurves, fit_response_curves, solve_allocation
+from app.services.change_tracker import ChangeSet
+from app.services.columnar import ColumnarResult, ReportData, to_dataframe, numeric_columns, text_values
+from app.services.keyword_overlap import KeywordOverlapIndex
+from app.config import settings
+
+# A pandas az első DataFrame építéskor töltődik be (app.services.columnar.to_dataframe)
+if TYPE_CHECKING:
+    import pandas as pd
+    from app.services.executor import AnalysisExecutor
+
+
+# Egy betekintés legfeljebb ennyi érintett kampányt sorol fel (a legnagyobb hatásúakat)
+MAX_AFFECTED_CAMPAIGNS = 100
+
+# Egy átfedő kulcsszó csoport legfeljebb ennyi tagot és eredeti szöveg változatot sorol fel (költség szerint)
+MAX_OVERLAP_MEMBERS = 20
+
+# Az átfedő csoport tagjainak mezői a válaszban
+_OVERLAP_MEMBER_FIELDS = (
+    "campaign_id", "campaign_name", "ad_group_id", "ad_group_name", "keyword", "match_type",
+    "impressions", "clicks", "cost", "conversions", "conversions_value"
+)
+
+# A költségvetés elosztás támogatott céljai
+OPTIMIZATION_GOALS = ("maximize_conversions", "maximize_roas")
+
+# A kampány elemzés által használt numerikus oszlopok
+_CAMPAIGN_METRICS = (
+    "roas", "cost_per_conversion", "ctr", "cost", "conversions", "clicks", "impressions", "average_cpc"
+)
+
+# Az összefoglalók (summary) mezői, és amelyekhez az összefoglaló végpontok eloszlást is adnak
+CAMPAIGN_SUMMARY_FIELDS = ("cost", "conversions", "clicks", "impressions", "roas", "ctr", "average_cpc")
+CAMPAIGN_DISTRIBUTION_FIELDS = ("roas", "ctr", "average_cpc")
+KEYWORD_SUMMARY_FIELDS = ("cost", "conversions", "ctr", "quality_score")
+KEYWORD_DISTRIBUTION_FIELDS = ("cost", "ctr", "quality_score")
+
+# Az összefoglaló végpontok eloszlás percentilisei
+SUMMARY_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    A k legnagyobb érték indexei csökkenő sorrendben
+    
+    A pandas `nlargest(k, keep='first')` viselkedését követi: egyenlő
+    értékeknél a korábbi sor kerül előre, a NaN értékek csak akkor (a végén)
+    szerepelnek, ha nincs k érvényes érték. A teljes rendezés helyett
+    részleges partícionálást használ.
+    """
+    missing = np.isnan(values) if values.dtype.kind == "f" else np.zeros(len(values), dtype=bool)
+    candidates = np.flatnonzero(~missing)
+    if len(candidates) > k:
+        subset = values[candidates]
+        kth = np.partition(subset, len(subset) - k)[len(subset) - k]
+        above = candidates[subset > kth]
+        ties = candidates[subset == kth][:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    order = np.lexsort((candidates, -values[candidates]))
+    top = candidates[order]
+    if len(top) < k and missing.any():
+        top = np.concatenate([top, np.flatnonzero(missing)[:k - len(top)]])
+    return top
+
+
+def _affected_campaigns(
+    data: ReportData,
+    mask: np.ndarray,
+    impact: Optional[np.ndarray],
+    max_affected: Optional[int]
+) -> Tuple[List[str], int]:
+    """
+    A maszk szerinti kampány nevek és a teljes darabszám
+    
+    Ha több kampány érintett mint `max_affected`, csak a hatás (pl. költség)
+    szerinti top-K kerül a listába, hatás szerint csökkenő sorrendben;
+    egyébként mind, az eredeti sorrendben.
+    """
+    index = np.flatnonzero(mask)
+    total = len(index)
+    if max_affected is not None and total > max_affected:
+        if impact is None:
+            index = index[:max_affected]
+        else:
+            index = index[_top_k(np.nan_to_num(impact[index], nan=-np.inf), max_affected)]
+    return text_values(data, "campaign_name", index), total
+
+
+def _ranking_entries(data: ReportData, metric: str, values: np.ndarray, index: np.ndarray) -> List[Dict[str, Any]]:
+    """Rangsor bejegyzések (kampány név, metrika érték) a megadott sorokra, NaN helyett None"""
+    names = text_values(data, "campaign_name", index)
+    return [
+        {"campaign_name": name, metric: None if value != value else value}
+        for name, value in zip(names, values[index].tolist())
+    ]
+
+
+def _percentile_buckets(
+    values: np.ndarray,
+    stats: RunningStats,
+    percentiles: Iterable[float]
+) -> Tuple[Dict[str, float], List[Dict[str, Any]]]:
+    """
+    Percentilisek (a kvantilis vázlatból) és a percentilis sávok kampány darabszáma
+    
+    A sávok a szomszédos határok közé eső (alulról nyitott, felülről zárt)
+    értékeket számolják; az első sáv a minimumtól indul.
+    """
+    points = sorted(set(float(p) for p in percentiles))
+    if any(not 0 < p < 100 for p in points):
+        raise ValueError("A percentilisek 0 és 100 közé kell essenek (határok nélkül)")
+    
+    cuts = stats.sketch.quantiles([p / 100 for p in points])
+    valid = values[~np.isnan(values)] if values.dtype.kind == "f" else values
+    counts = np.bincount(np.searchsorted(cuts, valid, side="left"), minlength=len(cuts) + 1)
+    
+    bounds = [0.0] + points + [100.0]
+    edges = [stats.minimum] + cuts.tolist() + [stats.maximum]
+    buckets = [
+        {
+            "from_percentile": bounds[i],
+            "to_percentile": bounds[i + 1],
+            "lower": edges[i],
+            "upper": edges[i + 1],
+            "campaigns": int(counts[i])
+        }
+        for i in range(len(bounds) - 1)
+    ]
+    return {f"p{p:g}": value for p, value in zip(points, cuts.tolist())}, buckets
+
+
+def _frame_columns(df: "pd.DataFrame", names: Iterable[str]) -> Dict[str, np.ndarray]:
+    """DataFrame oszlopok float64 tömbként (a hiányzó értékek NaN-ként), csak a meglévőkre"""
+    return {name: df[name].to_numpy(dtype=np.float64, na_value=np.nan) for name in names if name in df.columns}
+
+
+def _overlap_members(data: ColumnarResult, rows: np.ndarray) -> List[Dict[str, Any]]:
+    """Átfedő csoport tagjai szótárakként (azonosítók, nevek, szöveg, match type és a teljesítmény összegek)"""
+    values = {}
+    for name in _OVERLAP_MEMBER_FIELDS:
+        if name in data.categories:
+            values[name] = text_values(data, name, rows)
+        else:
+            values[name] = data.column(name)[rows].tolist()
+    return [dict(zip(_OVERLAP_MEMBER_FIELDS, row)) for row in zip(*values.values())]
+
+
+def _to_records(df: "pd.DataFrame") -> List[Dict[str, Any]]:
+    """DataFrame sorai szótárakként, a hiányzó értékek (pl. quality_score) NaN helyett None-ként"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def _concat_largest(frames: Iterable[Optional["pd.DataFrame"]], n: int, column: str) -> Optional["pd.DataFrame"]:
+    """
+    Keretek egyesítése és a legnagyobb n sor kiválasztása
+    
+    Az üres keretek kimaradnak az egyesítésből (a pandas különben minden
+    hívásnál FutureWarning-ot ad); ha minden keret üres, az első marad meg,
+    hogy az oszlopai megmaradjanak.
+    """
+    import pandas as pd
+    
+    present = [frame for frame in frames if frame is not None]
+    non_empty = [frame for frame in present if not frame.empty]
+    if not non_empty:
+        return present[0] if present else None
+    combined = non_empty[0] if len(non_empty) == 1 else pd.concat(non_empty)
+    return combined.nlargest(n, column)
+
+
+class _KeywordStreamState:
+    """
+    A streamelt kulcsszó elemzés összefésülhető állapota
+    
+    Darabonként (akár egy worker folyamatban) számolható, és a részállapotok
+    a stream sorrendjében összefésülve ugyanazt adják, mint a darabok
+    egymás utáni feldolgozása: az összesítés, a top 10-es jelöltek, a
+    számlálók és a match type összegek.
+    """
+    
+    def __init__(self):
+        self.aggregate = OnlineAggregate(KEYWORD_SUMMARY_FIELDS)
+        self.top_df: Optional["pd.DataFrame"] = None
+        self.underperform_df: Optional["pd.DataFrame"] = None
+        self.underperform_count = 0
+        self.underperform_cost = 0.0
+        self.low_qs_count = 0
+        self.low_qs_sum = 0.0
+        self.match_type_totals: Optional["pd.DataFrame"] = None
+    
+    def update(self, chunk: ReportData, min_impressions: int) -> None:
+        """Egy kulcsszó darab feldolgozása"""
+        if not chunk:
+            return
+        
+        df = to_dataframe(chunk)
+        df_filtered = df[df['impressions'] >= min_impressions]
+        
+        self.aggregate.update_columns(_frame_columns(df, KEYWORD_SUMMARY_FIELDS), len(df))
+        self.aggregate.increment("analyzed_keywords", len(df_filtered))
+        
+        # Top 10 jelöltek: az eddigi top 10 és az új darab közül
+        self.top_df = _concat_largest([self.top_df, df_filtered], 10, 'conversions')
+        
+        underperform_chunk = df_filtered[(df_filtered['cost'] > 10) & (df_filtered['conversions'] == 0)]
+        if not underperform_chunk.empty:
+            self.underperform_count += len(underperform_chunk)
+            self.underperform_cost += float(underperform_chunk['cost'].sum())
+            self.underperform_df = _concat_largest([self.underperform_df, underperform_chunk], 10, 'cost')
+        
+        low_qs = df_filtered[df_filtered['quality_score'] < 5]
+        self.low_qs_count += len(low_qs)
+        self.low_qs_sum += float(low_qs['quality_score'].sum())
+        
+        chunk_match_types = df.groupby('match_type', observed=True)[['cost', 'conversions', 'clicks']].sum()
+        self.add_match_types(chunk_match_types)
+    
+    def add_match_types(self, totals: "pd.DataFrame") -> None:
+        """Match type összegek hozzáadása"""
+        self.match_type_totals = totals if self.match_type_totals is None else self.match_type_totals.add(totals, fill_value=0)
+    
+    def merge(self, other: "_KeywordStreamState") -> None:
+        """Egy később érkező darab (vagy darabsorozat) részállapotának hozzáfésülése"""
+        self.aggregate.merge(other.aggregate)
+        self.top_df = _concat_largest([self.top_df, other.top_df], 10, 'conversions')
+        self.underperform_df = _concat_largest([self.underperform_df, other.underperform_df], 10, 'cost')
+        self.underperform_count += other.underperform_count
+        self.underperform_cost += other.underperform_cost
+        self.low_qs_count += other.low_qs_count
+        self.low_qs_sum += other.low_qs_sum
+        if other.match_type_totals is not None:
+            self.add_match_types(other.match_type_totals)
+
+
+def _keyword_chunk_state(chunk: ReportData, min_impressions: int) -> _KeywordStreamState:
+    """Egy kulcsszó darab részállapota (folyamat készletben futtatható)"""
+    state = _KeywordStreamState()
+    state.update(chunk, min_impressions)
+    return state
 
 
 class AnalyticsService:
     """Adatelemzési szolgáltatás osztály"""
     
-    def __init__(self):
-        """Inicializálja az elemzési szolgáltatást"""
-        pass
+    def __init__(self, cache: Optional[AnalysisCache] = None):
+        """
+        Inicializálja az elemzési szolgáltatást
+        
+        Args:
+            cache: Elemzési eredmény cache (alapértelmezetten a beállítások szerint jön létre)
+        """
+        self.cache = cache if cache is not None else AnalysisCache(
+            max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.ANALYSIS_CACHE_TTL_SECONDS
+        )
+    
+    def on_account_changes(self, changes: ChangeSet) -> None:
+        """
+        Fiók változás figyelő: az ügyfél lekérdezéséhez kötött (streamelt) eredmények törlése
+        
+        A tartalom ujjlenyomattal kulcsolt eredmények frissült adaton maguktól
+        nem találnak, így azokat nem kell törölni.
+        """
+        self.cache.invalidate(changes.customer_id)
     
+    def on_reports_invalidated(self, customer_id: Optional[str]) -> None:
+        """
+        Riport cache érvénytelenítés figyelő (pl. saját módosítások vagy kézi törlés után)
+        
+        Args:
+            customer_id: Az érintett ügyfél (None: minden ügyfél)
+        """
+        self.cache.invalidate(customer_id)
+    
+    @memoized("campaign_performance")
     def analyze_campaign_performance(
         self,
-        performance_data: List[Dict[str, Any]],
-        thresholds: Optional[Dict[str, float]] = None
+        performance_data: ReportData,
+        thresholds: Optional[Dict[str, float]] = None,
+        max_affected: Optional[int] = MAX_AFFECTED_CAMPAIGNS
     ) -> Dict[str, Any]:
         """
         Elemzi a kampány teljesítményt és betekintéseket ad
         
+        Az elemzés DataFrame nélkül, közvetlenül az oszlop tömbökön fut: a
+        küszöb maszkok és az összesítések egyszer számolódnak, a kampány
+        nevek pedig csak a kiválasztott sorokra oldódnak fel.
+        
         Args:
-            performance_data: Kampány teljesítmény adatok
+            performance_data: Kampány teljesítmény adatok (szótár lista vagy ColumnarResult)
             thresholds: Küszöbértékek (ROAS, CPA, CTR)
+            max_affected: Betekintésenként legfeljebb ennyi érintett kampány (a legnagyobb
+                hatásúak, None esetén mind); levágáskor az `affected_total` a teljes darabszám
             
         Returns:
             Elemzési eredmények és ajánlások
@@ -44,103 +322,105 @@ class AnalyticsService:
                 "min_ctr": 0.01
             }
         
-        df = pd.DataFrame(performance_data)
+        columns = numeric_columns(performance_data, _CAMPAIGN_METRICS)
+        cost = columns.get("cost")
+        impressions = columns.get("impressions")
         
         insights = []
         recommendations = []
         
-        # ROAS elemzés
-        if 'roas' in df.columns:
-            low_roas_campaigns = df[df['roas'] < thresholds['min_roas']]
-            if not low_roas_campaigns.empty:
-                insights.append({
-                    "type": "low_roas",
-                    "severity": "warning",
-                    "message": f"{len(low_roas_campaigns)} kampány ROAS értéke a küszöb ({thresholds['min_roas']}) alatt van",
-                    "affected_campaigns": low_roas_campaigns['campaign_name'].tolist(),
-                    "metric_value": low_roas_campaigns['roas'].mean()
-                })
+        def add_insight(insight_type, severity, message, mask, impact, metric_value, recommendation=None):
+            names, total = _affected_campaigns(performance_data, mask, impact, max_affected)
+            insight = {
+                "type": insight_type,
+                "severity": severity,
+                "message": message,
+                "affected_campaigns": names,
+                "metric_value": metric_value
+            }
+            if total > len(names):
+                insight["affected_total"] = total
+            insights.append(insight)
+            if recommendation is not None:
+                recommendation_type, recommendation_message = recommendation
                 recommendations.append({
-                    "type": "roas_optimization",
-                    "message": "Fontold meg az alacsony ROAS-ú kampányok költségvetésének csökkentését vagy optimalizálását",
-                    "campaigns": low_roas_campaigns['campaign_name'].tolist()
+                    "type": recommendation_type,
+                    "message": recommendation_message,
+                    "campaigns": names
                 })
         
+        # ROAS elemzés
+        if "roas" in columns:
+            roas = columns["roas"]
+            mask = roas < thresholds['min_roas']
+            count = int(np.count_nonzero(mask))
+            if count:
+                add_insight(
+                    "low_roas", "warning",
+                    f"{count} kampány ROAS értéke a küszöb ({thresholds['min_roas']}) alatt van",
+                    mask, cost, roas[mask].mean(),
+                    ("roas_optimization", "Fontold meg az alacsony ROAS-ú kampányok költségvetésének csökkentését vagy optimalizálását")
+                )
+        
         # CPA elemzés
-        if 'cost_per_conversion' in df.columns:
-            high_cpa_campaigns = df[df['cost_per_conversion'] > thresholds['max_cpa']]
-            if not high_cpa_campaigns.empty:
-                insights.append({
-                    "type": "high_cpa",
-                    "severity": "warning",
-                    "message": f"{len(high_cpa_campaigns)} kampány CPA értéke a küszöb ({thresholds['max_cpa']}) felett van",
-                    "affected_campaigns": high_cpa_campaigns['campaign_name'].tolist(),
-                    "metric_value": high_cpa_campaigns['cost_per_conversion'].mean()
-                })
-                recommendations.append({
-                    "type": "cpa_optimization",
-                    "message": "Optimalizáld a magas CPA-jú kampányok kulcsszavait és ajánlatait",
-                    "campaigns": high_cpa_campaigns['campaign_name'].tolist()
-                })
+        if "cost_per_conversion" in columns:
+            cost_per_conversion = columns["cost_per_conversion"]
+            mask = cost_per_conversion > thresholds['max_cpa']
+            count = int(np.count_nonzero(mask))
+            if count:
+                add_insight(
+                    "high_cpa", "warning",
+                    f"{count} kampány CPA értéke a küszöb ({thresholds['max_cpa']}) felett van",
+                    mask, cost, cost_per_conversion[mask].mean(),
+                    ("cpa_optimization", "Optimalizáld a magas CPA-jú kampányok kulcsszavait és ajánlatait")
+                )
         
         # CTR elemzés
-        if 'ctr' in df.columns:
-            low_ctr_campaigns = df[df['ctr'] < thresholds['min_ctr']]
-            if not low_ctr_campaigns.empty:
-                insights.append({
-                    "type": "low_ctr",
-                    "severity": "info",
-                    "message": f"{len(low_ctr_campaigns)} kampány CTR értéke alacsony ({thresholds['min_ctr']} alatt)",
-                    "affected_campaigns": low_ctr_campaigns['campaign_name'].tolist(),
-                    "metric_value": low_ctr_campaigns['ctr'].mean()
-                })
-                recommendations.append({
-                    "type": "ctr_improvement",
-                    "message": "Javítsd a hirdetés szövegeket és relevanciát az alacsony CTR-ű kampányokban",
-                    "campaigns": low_ctr_campaigns['campaign_name'].tolist()
-                })
+        if "ctr" in columns:
+            ctr = columns["ctr"]
+            mask = ctr < thresholds['min_ctr']
+            count = int(np.count_nonzero(mask))
+            if count:
+                add_insight(
+                    "low_ctr", "info",
+                    f"{count} kampány CTR értéke alacsony ({thresholds['min_ctr']} alatt)",
+                    mask, impressions, ctr[mask].mean(),
+                    ("ctr_improvement", "Javítsd a hirdetés szövegeket és relevanciát az alacsony CTR-ű kampányokban")
+                )
         
         # Költség elemzés
-        if 'cost' in df.columns:
-            total_cost = df['cost'].sum()
-            top_spending = df.nlargest(5, 'cost')
+        if cost is not None:
+            total_cost = np.nansum(cost)
+            top_index = _top_k(cost, 5)
+            top_cost = np.nansum(cost[top_index])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                top_share = top_cost / total_cost * 100
             
             insights.append({
                 "type": "spending_distribution",
                 "severity": "info",
-                "message": f"Top 5 kampány a teljes költség {(top_spending['cost'].sum() / total_cost * 100):.1f}%-át teszi ki",
-                "affected_campaigns": top_spending['campaign_name'].tolist(),
-                "metric_value": top_spending['cost'].sum()
+                "message": f"Top 5 kampány a teljes költség {top_share:.1f}%-át teszi ki",
+                "affected_campaigns": text_values(performance_data, "campaign_name", top_index),
+                "metric_value": top_cost
             })
         
         # Konverzió elemzés
-        if 'conversions' in df.columns and 'cost' in df.columns:
-            zero_conversion_campaigns = df[df['conversions'] == 0]
-            if not zero_conversion_campaigns.empty and zero_conversion_campaigns['cost'].sum() > 0:
-                insights.append({
-                    "type": "zero_conversions",
-                    "severity": "critical",
-                    "message": f"{len(zero_conversion_campaigns)} kampány nem generált konverziót, de költött {zero_conversion_campaigns['cost'].sum():.2f} egységet",
-                    "affected_campaigns": zero_conversion_campaigns['campaign_name'].tolist(),
-                    "metric_value": zero_conversion_campaigns['cost'].sum()
-                })
-                recommendations.append({
-                    "type": "zero_conversion_action",
-                    "message": "Vizsgáld felül vagy szüneteltesd a konverzió nélküli kampányokat",
-                    "campaigns": zero_conversion_campaigns['campaign_name'].tolist()
-                })
+        if "conversions" in columns and cost is not None:
+            mask = columns["conversions"] == 0
+            count = int(np.count_nonzero(mask))
+            zero_conversion_cost = np.nansum(cost[mask])
+            if count and zero_conversion_cost > 0:
+                add_insight(
+                    "zero_conversions", "critical",
+                    f"{count} kampány nem generált konverziót, de költött {zero_conversion_cost:.2f} egységet",
+                    mask, cost, zero_conversion_cost,
+                    ("zero_conversion_action", "Vizsgáld felül vagy szüneteltesd a konverzió nélküli kampányokat")
+                )
         
         # Összefoglaló statisztikák
-        summary = {
-            "total_campaigns": len(df),
-            "total_cost": float(df['cost'].sum()) if 'cost' in df.columns else 0,
-            "total_conversions": float(df['conversions'].sum()) if 'conversions' in df.columns else 0,
-            "total_clicks": int(df['clicks'].sum()) if 'clicks' in df.columns else 0,
-            "total_impressions": int(df['impressions'].sum()) if 'impressions' in df.columns else 0,
-            "average_roas": float(df['roas'].mean()) if 'roas' in df.columns else 0,
-            "average_ctr": float(df['ctr'].mean()) if 'ctr' in df.columns else 0,
-            "average_cpc": float(df['average_cpc'].mean()) if 'average_cpc' in df.columns else 0
-        }
+        aggregate = OnlineAggregate(CAMPAIGN_SUMMARY_FIELDS)
+        aggregate.update_columns(columns, len(performance_data))
+        summary = self.campaign_summary(aggregate)
         
         logger.info(f"Kampány teljesítmény elemzés kész: {len(insights)} betekintés, {len(recommendations)} ajánlás")
         
@@ -151,16 +431,17 @@ class AnalyticsService:
             "analyzed_at": datetime.now().isoformat()
         }
     
+    @memoized("keyword_performance")
     def analyze_keyword_performance(
         self,
-        keywords_data: List[Dict[str, Any]],
+        keywords_data: ReportData,
         min_impressions: int = 100
     ) -> Dict[str, Any]:
         """
         Elemzi a kulcsszavak teljesítményét
         
         Args:
-            keywords_data: Kulcsszó teljesítmény adatok
+            keywords_data: Kulcsszó teljesítmény adatok (szótár lista vagy ColumnarResult)
             min_impressions: Minimum impressions szűrő
             
         Returns:
@@ -174,18 +455,22 @@ class AnalyticsService:
                 "summary": {}
             }
         
-        df = pd.DataFrame(keywords_data)
+        df = to_dataframe(keywords_data)
         
         # Szűrés minimum impressions alapján
         df_filtered = df[df['impressions'] >= min_impressions]
         
+        aggregate = OnlineAggregate(KEYWORD_SUMMARY_FIELDS)
+        aggregate.update_columns(_frame_columns(df, KEYWORD_SUMMARY_FIELDS), len(df))
+        aggregate.increment("analyzed_keywords", len(df_filtered))
+        
         insights = []
         
         # Top teljesítők (magas CTR és konverzió)
         top_performers = []
         if 'ctr' in df_filtered.columns and 'conversions' in df_filtered.columns:
             top_df = df_filtered.nlargest(10, 'conversions')
-            top_performers = top_df.to_dict('records')
+            top_performers = _to_records(top_df)
             
             insights.append({
                 "type": "top_keywords",
@@ -200,7 +485,7 @@ class AnalyticsService:
             # Kulcsszavak amelyek költöttek de nem konvertáltak
             underperform_df = df_filtered[(df_filtered['cost'] > 10) & (df_filtered['conversions'] == 0)]
             if not underperform_df.empty:
-                underperformers = underperform_df.nlargest(10, 'cost').to_dict('records')
+                underperformers = _to_records(underperform_df.nlargest(10, 'cost'))
                 
                 insights.append({
                     "type": "underperforming_keywords",
@@ -222,7 +507,7 @@ class AnalyticsService:
         
         # Match type elemzés
         if 'match_type' in df.columns:
-            match_type_performance = df.groupby('match_type').agg({
+            match_type_performance = df.groupby('match_type', observed=True).agg({
                 'cost': 'sum',
                 'conversions': 'sum',
                 'clicks': 'sum'
@@ -235,14 +520,7 @@ class AnalyticsService:
                 "data": match_type_performance
             })
         
-        summary = {
-            "total_keywords": len(df),
-            "analyzed_keywords": len(df_filtered),
-            "total_cost": float(df['cost'].sum()) if 'cost' in df.columns else 0,
-            "total_conversions": float(df['conversions'].sum()) if 'conversions' in df.columns else 0,
-            "average_ctr": float(df['ctr'].mean()) if 'ctr' in df.columns else 0,
-            "average_quality_score": float(df['quality_score'].mean()) if 'quality_score' in df.columns else None
-        }
+        summary = self.keyword_summary(aggregate)
         
         logger.info(f"Kulcsszó teljesítmény elemzés kész: {len(insights)} betekintés")
         
@@ -254,112 +532,776 @@ class AnalyticsService:
             "analyzed_at": datetime.now().isoformat()
         }
     
+    def analyze_keyword_stream(
+        self,
+        keyword_chunks: Iterable[ReportData],
+        min_impressions: int = 100,
+        cache_key: Optional[Tuple] = None,
+        executor: Optional["AnalysisExecutor"] = None,
+        cancelled: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """
+        Elemzi a kulcsszavak teljesítményét darabonként érkező adatokon
+        
+        Ugyanazt az eredményt adja, mint az analyze_keyword_performance, de a
+        teljes kulcsszó listát sosem tartja memóriában: darabonként csak az
+        összesítést (OnlineAggregate) és a top 10-es jelölteket őrzi meg.
+        
+        Args:
+            keyword_chunks: Kulcsszó teljesítmény adatok darabjai
+            min_impressions: Minimum impressions szűrő
+            cache_key: A stream forrását leíró kulcs, első eleme az ügyfél azonosító
+                (opcionális); megadásakor az eredmény memoizálódik, és találatnál a
+                stream nem olvasódik
+            executor: Elemzés végrehajtó (opcionális); megadásakor a küszöb feletti
+                darabok a folyamat készletben dolgozódnak fel
+            cancelled: Megszakítás jelző az executor-ral feldolgozott streamhez;
+                beállításakor a feldolgozás a következő darabnál leáll
+        
+        Returns:
+            Kulcsszó elemzési eredmények
+        
+        Raises:
+            AnalysisTimeoutError, AnalysisCancelledError: Az executor-ral feldolgozott
+                stream időtúllépésekor, illetve megszakításakor
+        """
+        key = ("keyword_stream", cache_key, min_impressions) if cache_key is not None else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        state = _KeywordStreamState()
+        if executor is not None:
+            # A küszöb feletti részt a folyamat készlet dolgozza fel, a részállapotok sorrendben fésülődnek
+            for partial in executor.map_chunks(_keyword_chunk_state, keyword_chunks, min_impressions, cancelled=cancelled):
+                state.merge(partial)
+        else:
+            for chunk in keyword_chunks:
+                state.update(chunk, min_impressions)
+        
+        aggregate = state.aggregate
+        if aggregate.rows == 0:
+            return {
+                "insights": [],
+                "top_performers": [],
+                "underperformers": [],
+                "summary": {}
+            }
+        
+        insights = []
+        
+        top_performers = _to_records(state.top_df)
+        top_conversions = float(state.top_df['conversions'].sum())
+        total_conversions = aggregate.total("conversions")
+        insights.append({
+            "type": "top_keywords",
+            "severity": "info",
+            "message": f"Top 10 kulcsszó generálta a konverziók {(top_conversions / total_conversions * 100 if total_conversions else 0):.1f}%-át",
+            "metric_value": top_conversions
+        })
+        
+        underperformers = []
+        if state.underperform_count:
+            underperformers = _to_records(state.underperform_df)
+            insights.append({
+                "type": "underperforming_keywords",
+                "severity": "warning",
+                "message": f"{state.underperform_count} kulcsszó költött de nem konvertált",
+                "metric_value": state.underperform_cost
+            })
+        
+        if state.low_qs_count:
+            insights.append({
+                "type": "low_quality_score",
+                "severity": "warning",
+                "message": f"{state.low_qs_count} kulcsszó Quality Score-ja 5 alatt van",
+                "metric_value": state.low_qs_sum / state.low_qs_count
+            })
+        
+        insights.append({
+            "type": "match_type_distribution",
+            "severity": "info",
+            "message": "Match type teljesítmény eloszlás",
+            "data": state.match_type_totals.to_dict('index')
+        })
+        
+        summary = self.keyword_summary(aggregate)
+        
+        logger.info(f"Kulcsszó stream elemzés kész: {aggregate.rows} kulcsszó, {len(insights)} betekintés")
+        
+        result = {
+            "insights": insights,
+            "top_performers": top_performers,
+            "underperformers": underperformers,
+            "summary": summary,
+            "analyzed_at": datetime.now().isoformat()
+        }
+        if key is not None:
+            self.cache.set(key, result, customer_id=str(cache_key[0]))
+        return result
+    
+    @memoized("keyword_overlap")
+    def analyze_keyword_overlap(
+        self,
+        keywords_data: ReportData,
+        ignore_match_type: bool = False,
+        offset: int = 0,
+        limit: int = 50,
+        max_members: int = MAX_OVERLAP_MEMBERS
+    ) -> Dict[str, Any]:
+        """
+        Kulcsszó kannibalizáció: azonos vagy majdnem azonos kulcsszavak több helyen
+        
+        A kulcsszavak normalizált szövege (kisbetűs, egyes számú szavak,
+        rendezett szórend) és match type-ja szerinti hash index alapján
+        csoportosít (app.services.keyword_overlap); minden legalább két
+        kulcsszavas csoport átfedés. A csoportok az együttes költségük szerint
+        csökkenő sorrendben, lapozva kerülnek a válaszba, a tagjaikkal.
+        
+        Args:
+            keywords_data: Kulcsszó teljesítmény adatok (a teljes fiók, szótár lista vagy ColumnarResult)
+            ignore_match_type: Ha igaz, a különböző match type-ú kulcsszavak is egy csoportba kerülnek
+            offset: Az oldal kezdete a költség szerinti sorrendben
+            limit: Az oldal mérete (csoport)
+            max_members: Csoportonként legfeljebb ennyi tag és szöveg változat (költség szerint)
+        
+        Returns:
+            Átfedő csoportok, összesítés és betekintések
+        """
+        if offset < 0 or limit < 1:
+            raise ValueError("Az offset nem lehet negatív, a limit legalább 1")
+        
+        if not keywords_data:
+            return {
+                "insights": [],
+                "groups": [],
+                "summary": {},
+                "pagination": {"offset": offset, "limit": limit, "total": 0}
+            }
+        
+        index = KeywordOverlapIndex(keywords_data, ignore_match_type=ignore_match_type)
+        data = index.data
+        group_count = len(index)
+        
+        end = min(group_count, offset + limit)
+        page = _top_k(index.cost, end)[offset:]
+        member_rows = index.group_rows(page)
+        
+        # A tagok költség szerint csökkenő sorrendben (egyenlőségnél az eredeti sorrendben)
+        cost = data.column("cost")
+        member_rows = [rows[_top_k(cost[rows], len(rows))] for rows in member_rows]
+        shown = [rows[:max_members] for rows in member_rows]
+        records = _overlap_members(data, np.concatenate(shown)) if shown else []
+        keyword_lookup = data.categories["keyword"]
+        
+        groups = []
+        start = 0
+        for group, rows, shown_rows in zip(page.tolist(), member_rows, shown):
+            members = records[start:start + len(shown_rows)]
+            start += len(shown_rows)
+            variant_codes = dict.fromkeys(data.columns["keyword"][rows].tolist())
+            variants = [keyword_lookup[code] for code in list(variant_codes)[:max_members]]
+            
+            group_cost = float(index.cost[group])
+            group_conversions = float(index.conversions[group])
+            campaigns = int(index.campaigns[group])
+            ad_groups = int(index.ad_groups[group])
+            groups.append({
+                "normalized_keyword": index.normalized_text(group),
+                "match_type": index.match_type(group),
+                "scope": "cross_campaign" if campaigns > 1 else "cross_ad_group" if ad_groups > 1 else "same_ad_group",
+                "duplicate_type": "exact" if index.variants[group] == 1 else "near",
+                "keywords": int(index.keywords[group]),
+                "ad_groups": ad_groups,
+                "campaigns": campaigns,
+                "variants": variants,
+                "cost": group_cost,
+                "conversions": group_conversions,
+                "conversions_value": float(index.conversions_value[group]),
+                "clicks": int(index.clicks[group]),
+                "impressions": int(index.impressions[group]),
+                "cost_per_conversion": group_cost / group_conversions if group_conversions > 0 else None,
+                "members": members
+            })
+        
+        total_cost = float(np.nansum(cost))
+        overlap_cost = float(index.cost.sum())
+        overlap_keywords = int(index.keywords.sum())
+        cross_campaign = int((index.campaigns > 1).sum())
+        summary = {
+            "total_keywords": index.total_keywords,
+            "distinct_keywords": index.distinct_keys,
+            "overlap_groups": group_count,
+            "overlapping_keywords": overlap_keywords,
+            "cross_campaign_groups": cross_campaign,
+            "overlap_cost": overlap_cost,
+            "overlap_conversions": float(index.conversions.sum()),
+            "overlap_cost_share": overlap_cost / total_cost if total_cost > 0 else 0.0
+        }
+        
+        insights = []
+        if group_count:
+            insights.append({
+                "type": "keyword_cannibalization",
+                "severity": "warning" if cross_campaign else "info",
+                "message": (
+                    f"{overlap_keywords} kulcsszó {group_count} átfedő csoportban verseng önmagával "
+                    f"({cross_campaign} csoport több kampányban), együttes költségük {overlap_cost:.2f}"
+                ),
+                "metric_value": overlap_cost
+            })
+        
+        logger.info(f"Kulcsszó átfedés elemzés kész: {index.total_keywords} kulcsszó, {group_count} átfedő csoport")
+        
+        return {
+            "insights": insights,
+            "groups": groups,
+            "summary": summary,
+            "pagination": {"offset": offset, "limit": limit, "total": group_count},
+            "analyzed_at": datetime.now().isoformat()
+        }
+    
+    def aggregate_campaign_stream(
+        self,
+        campaign_chunks: Iterable[ReportData],
+        quantile_fields: Iterable[str] = CAMPAIGN_DISTRIBUTION_FIELDS
+    ) -> OnlineAggregate:
+        """
+        Kampány teljesítmény darabok összesítése állandó memóriában
+        
+        Args:
+            campaign_chunks: Kampány teljesítmény adatok darabjai
+            quantile_fields: A mezők, amelyekhez kvantilis vázlat is készül
+        
+        Returns:
+            Összefésülhető összesítés (lásd campaign_summary)
+        """
+        aggregate = OnlineAggregate(CAMPAIGN_SUMMARY_FIELDS, quantile_fields)
+        for chunk in campaign_chunks:
+            aggregate.update(chunk)
+        return aggregate
+    
+    def aggregate_keyword_stream(
+        self,
+        keyword_chunks: Iterable[ReportData],
+        min_impressions: int = 100,
+        quantile_fields: Iterable[str] = KEYWORD_DISTRIBUTION_FIELDS
+    ) -> OnlineAggregate:
+        """
+        Kulcsszó teljesítmény darabok összesítése állandó memóriában
+        
+        Args:
+            keyword_chunks: Kulcsszó teljesítmény adatok darabjai
+            min_impressions: Az elemzett kulcsszavak (analyzed_keywords) impression küszöbe
+            quantile_fields: A mezők, amelyekhez kvantilis vázlat is készül
+        
+        Returns:
+            Összefésülhető összesítés (lásd keyword_summary)
+        """
+        aggregate = OnlineAggregate(KEYWORD_SUMMARY_FIELDS, quantile_fields)
+        for chunk in keyword_chunks:
+            columns = numeric_columns(chunk, aggregate.fields + ["impressions"])
+            aggregate.update_columns(columns, len(chunk))
+            if "impressions" in columns:
+                aggregate.increment("analyzed_keywords", int(np.count_nonzero(columns["impressions"] >= min_impressions)))
+        return aggregate
+    
+    def campaign_summary(self, aggregate: OnlineAggregate) -> Dict[str, Any]:
+        """A kampány elemzés összefoglalója (summary) egy összesítésből"""
+        def total(name: str) -> float:
+            return aggregate.total(name) if aggregate.has(name) else 0
+        
+        def average(name: str) -> float:
+            return (aggregate.mean(name) or 0.0) if aggregate.has(name) else 0
+        
+        return {
+            "total_campaigns": aggregate.rows,
+            "total_cost": total("cost"),
+            "total_conversions": total("conversions"),
+            "total_clicks": int(total("clicks")),
+            "total_impressions": int(total("impressions")),
+            "average_roas": average("roas"),
+            "average_ctr": average("ctr"),
+            "average_cpc": average("average_cpc")
+        }
+    
+    def keyword_summary(self, aggregate: OnlineAggregate) -> Dict[str, Any]:
+        """A kulcsszó elemzés összefoglalója (summary) egy összesítésből"""
+        return {
+            "total_keywords": aggregate.rows,
+            "analyzed_keywords": aggregate.counts.get("analyzed_keywords", 0),
+            "total_cost": aggregate.total("cost") if aggregate.has("cost") else 0,
+            "total_conversions": aggregate.total("conversions") if aggregate.has("conversions") else 0,
+            "average_ctr": (aggregate.mean("ctr") or 0.0) if aggregate.has("ctr") else 0,
+            "average_quality_score": aggregate.mean("quality_score") if aggregate.has("quality_score") else None
+        }
+    
+    def summary_distribution(
+        self,
+        aggregate: OnlineAggregate,
+        fields: Iterable[str],
+        percentiles: Iterable[float] = SUMMARY_PERCENTILES
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Mezőnkénti eloszlás (minimum, maximum, szórás, percentilisek) egy összesítésből
+        
+        Csak a riportokban szereplő, kvantilis vázlattal összesített mezőkre.
+        """
+        distribution = {}
+        for name in fields:
+            if not aggregate.has(name) or aggregate.stats[name].sketch is None:
+                continue
+            stats = aggregate.stats[name]
+            distribution[name] = {
+                "count": stats.count,
+                "min": stats.minimum if stats.count else None,
+                "max": stats.maximum if stats.count else None,
+                "std_dev": stats.std if stats.count > 1 else None,
+                **aggregate.quantiles(name, percentiles)
+            }
+        return distribution
+    
+    @memoized("compare_campaigns")
     def compare_campaigns(
         self,
-        performance_data: List[Dict[str, Any]],
-        metric: str = "roas"
+        performance_data: ReportData,
+        metric: str = "roas",
+        top: Optional[int] = None,
+        bottom: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        percentiles: Optional[Iterable[float]] = None
     ) -> Dict[str, Any]:
         """
         Összehasonlítja a kampányokat egy adott metrika alapján
         
+        A legjobb/legrosszabb kampány, az átlag, a szórás és a medián egyetlen
+        menetben számolódik (RunningStats, a medián és a percentilisek
+        kvantilis vázlatból, SKETCH_CAPACITY kampányig pontosan). A rangsorok
+        teljes rendezés helyett részleges kiválasztással készülnek, így csak a
+        kért részük kerül a válaszba.
+        
         Args:
-            performance_data: Kampány teljesítmény adatok
+            performance_data: Kampány teljesítmény adatok (szótár lista vagy ColumnarResult)
             metric: Összehasonlítási metrika (roas, ctr, cost_per_conversion, stb.)
+            top: A legjobb `top` kampány (csökkenő sorrendben, `top` kulcs alatt)
+            bottom: A legrosszabb `bottom` kampány (növekvő sorrendben, `bottom` kulcs alatt)
+            offset: A rangsor oldal kezdete (csökkenő rangsorban)
+            limit: A rangsor oldal mérete; top/bottom nélkül és limit nélkül a teljes rangsor
+            percentiles: Percentilisek (0-100 között) és az általuk határolt sávok
             
         Returns:
             Összehasonlítási eredmények
+        
+        Raises:
+            ValueError: Érvénytelen percentilis esetén
         """
         if not performance_data:
             return {"error": "Nincs adat az összehasonlításhoz"}
         
-        df = pd.DataFrame(performance_data)
-        
-        if metric not in df.columns:
+        columns = numeric_columns(performance_data, [metric])
+        if metric not in columns:
             return {"error": f"A metrika '{metric}' nem található az adatokban"}
         
-        # Rendezés a metrika szerint
-        sorted_df = df.sort_values(by=metric, ascending=False)
+        values = columns[metric]
+        stats = RunningStats()
+        stats.update(values)
+        if not stats.count:
+            return {"error": f"A metrika '{metric}' értéke egyik kampánynál sem ismert"}
         
-        # Statisztikák
-        stats = {
+        names = text_values(performance_data, "campaign_name", np.array([stats.max_index, stats.min_index]))
+        result = {
             "metric": metric,
-            "best_campaign": {
-                "name": sorted_df.iloc[0]['campaign_name'],
-                "value": float(sorted_df.iloc[0][metric])
-            },
-            "worst_campaign": {
-                "name": sorted_df.iloc[-1]['campaign_name'],
-                "value": float(sorted_df.iloc[-1][metric])
-            },
-            "average": float(df[metric].mean()),
-            "median": float(df[metric].median()),
-            "std_dev": float(df[metric].std()),
-            "rankings": sorted_df[['campaign_name', metric]].to_dict('records')
+            "best_campaign": {"name": names[0], "value": stats.maximum},
+            "worst_campaign": {"name": names[1], "value": stats.minimum},
+            "average": stats.mean,
+            "median": stats.sketch.quantile(0.5),
+            "std_dev": stats.std if stats.count > 1 else None,
+            "campaigns": len(values)
         }
         
-        return stats
+        # A lapozott rangsor csak kérésre (vagy top/bottom nélkül, a korábbi teljes rangsorként)
+        if limit is not None or offset or (top is None and bottom is None):
+            end = len(values) if limit is None else min(len(values), offset + limit)
+            index = _top_k(values, end)[offset:]
+            result["rankings"] = _ranking_entries(performance_data, metric, values, index)
+            result["pagination"] = {"offset": offset, "limit": limit, "total": len(values)}
+        if top is not None:
+            result["top"] = _ranking_entries(performance_data, metric, values, _top_k(values, top))
+        if bottom is not None:
+            result["bottom"] = _ranking_entries(performance_data, metric, values, _top_k(-values, bottom))
+        if percentiles:
+            result["percentiles"], result["percentile_buckets"] = _percentile_buckets(values, stats, percentiles)
+        
+        return result
     
     def calculate_budget_allocation(
         self,
-        performance_data: List[Dict[str, Any]],
+        performance_data: ReportData,
         total_budget: float,
-        optimization_goal: str = "maximize_conversions"
+        optimization_goal: str = "maximize_conversions",
+        daily_history: Optional[ReportData] = None,
+        constraints: Optional[Dict[str, Any]] = None,
+        period_days: float = 1
     ) -> Dict[str, Any]:
         """
         Kiszámítja az optimális költségvetés elosztást
         
+        Kampányonként válaszgörbét illeszt (költés -> konverzió, illetve
+        konverziós érték), és a költségvetést a határhozamok kiegyenlítésével
+        osztja el (app.services.budget_optimizer). A görbék az időszak
+        tényleges költésén mennek át, így a total_budget az időszak költésével
+        (current_budget) azonos egységben értendő; period_days megadásakor a
+        költések és a költségvetések napi átlagok.
+        
         Args:
-            performance_data: Kampány teljesítmény adatok
+            performance_data: Kampány teljesítmény adatok (szótár lista vagy ColumnarResult)
             total_budget: Teljes elérhető költségvetés
             optimization_goal: Optimalizálási cél (maximize_conversions, maximize_roas)
+            daily_history: Kampány/nap előzmény a görbék rugalmasságához (opcionális,
+                enélkül a prior rugalmasság érvényes)
+            constraints: Korlátok (opcionális): min_budget és max_budget (kampány
+                azonosító -> összeg), max_change_percent (a jelenlegi költéshez képest),
+                groups (name, campaign_ids, max_budget: a csoport közös felső korlátja)
+            period_days: Az időszak napjainak száma (a teljesítmény adatok napi átlagra osztva)
             
         Returns:
-            Költségvetés elosztási javaslat
+            Költségvetés elosztási javaslat a várható konverziókkal és ROAS-sal
+        
+        Raises:
+            ValueError: Ismeretlen cél vagy nem teljesíthető korlátok esetén
         """
-        if not performance_data:
-            return {"error": "Nincs adat a költségvetés elosztáshoz"}
+        return self.calculate_budget_allocations([{
+            "performance_data": performance_data,
+            "total_budget": total_budget,
+            "optimization_goal": optimization_goal,
+            "daily_history": daily_history,
+            "constraints": constraints,
+            "period_days": period_days
+        }])[0]
+    
+    @memoized("budget_allocations")
+    def calculate_budget_allocations(
+        self,
+        problems: List[Dict[str, Any]],
+        strict: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Több független költségvetés elosztás (pl. ügyfelenként vagy szabályonként) egyben
         
-        df = pd.DataFrame(performance_data)
+        A feladatok görbéi külön illesztődnek, a korlátos elosztás viszont egyetlen
+        vektoros megoldás az összes feladat kampányain, így sok fiók újraszámolása
+        is egy hívás.
         
-        allocations = []
+        Args:
+            problems: Feladatok a calculate_budget_allocation paramétereivel (performance_data,
+                total_budget, optimization_goal, daily_history, constraints, period_days),
+                opcionálisan current_budgets (kampány azonosító -> élő napi költségvetés:
+                a current_budget és a max_change_percent sáv alapja a költés helyett)
+            strict: Hibás feladatnál ValueError; különben a feladat eredménye {"error": ...}
+            
+        Returns:
+            Elosztási javaslatok a feladatok sorrendjében
+        """
+        prepared = []
+        for problem in problems:
+            try:
+                prepared.append(_prepare_budget_problem(problem))
+            except ValueError as e:
+                if strict:
+                    raise
+                prepared.append({"result": {"error": str(e)}})
         
-        if optimization_goal == "maximize_conversions":
-            # Költségvetés elosztás konverziós arány alapján
-            if 'conversion_rate' in df.columns and 'cost' in df.columns:
-                df['weight'] = df['conversion_rate'] * df['cost']
-                total_weight = df['weight'].sum()
-                
-                for _, row in df.iterrows():
-                    allocated_budget = (row['weight'] / total_weight) * total_budget if total_weight > 0 else 0
-                    allocations.append({
-                        "campaign_id": row['campaign_id'],
-                        "campaign_name": row['campaign_name'],
-                        "current_budget": row.get('cost', 0),
-                        "recommended_budget": round(allocated_budget, 2),
-                        "change_percent": round(((allocated_budget - row.get('cost', 0)) / row.get('cost', 1)) * 100, 2) if row.get('cost', 0) > 0 else 0
-                    })
-        
-        elif optimization_goal == "maximize_roas":
-            # Költségvetés elosztás ROAS alapján
-            if 'roas' in df.columns and 'cost' in df.columns:
-                df['weight'] = df['roas'] * df['cost']
-                total_weight = df['weight'].sum()
-                
-                for _, row in df.iterrows():
-                    allocated_budget = (row['weight'] / total_weight) * total_budget if total_weight > 0 else 0
-                    allocations.append({
-                        "campaign_id": row['campaign_id'],
-                        "campaign_name": row['campaign_name'],
-                        "current_budget": row.get('cost', 0),
-                        "recommended_budget": round(allocated_budget, 2),
-                        "change_percent": round(((allocated_budget - row.get('cost', 0)) / row.get('cost', 1)) * 100, 2) if row.get('cost', 0) > 0 else 0
-                    })
+        solvable = [item for item in prepared if "result" not in item]
+        if solvable:
+            sizes = [len(item["campaign_ids"]) for item in solvable]
+            group_offsets = np.cumsum([0] + [len(item["group_caps"]) for item in solvable[:-1]])
+            curves = ResponseCurves(
+                np.concatenate([item["curves"].scale for item in solvable]),
+                np.concatenate([item["curves"].elasticity for item in solvable]),
+                np.concatenate([item["curves"].fitted for item in solvable]),
+                np.concatenate([item["curves"].measured for item in solvable])
+            )
+            recommended, group_bound = solve_allocation(
+                curves,
+                np.array([item["total_budget"] for item in solvable], dtype=np.float64),
+                problem=np.repeat(np.arange(len(solvable)), sizes),
+                lower=np.concatenate([item["lower"] for item in solvable]),
+                upper=np.concatenate([item["upper"] for item in solvable]),
+                group=np.concatenate([
+                    np.where(item["group"] >= 0, item["group"] + offset, -1)
+                    for item, offset in zip(solvable, group_offsets)
+                ]),
+                group_caps=np.concatenate([item["group_caps"] for item in solvable])
+            )
+            
+            start = 0
+            for item, size in zip(solvable, sizes):
+                item["result"] = _allocation_result(
+                    item,
+                    recommended[start:start + size],
+                    group_bound[start:start + size]
+                )
+                start += size
         
+        return [item["result"] for item in prepared]
+
+
+def _prepare_budget_problem(problem: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Egy költségvetés elosztási feladat tömbjei: görbék, korlátok és csoportok
+    
+    Returns:
+        A feladat adatai, vagy {"result": ...} ha nincs mit elosztani
+    """
+    performance_data = problem["performance_data"]
+    total_budget = problem["total_budget"]
+    optimization_goal = problem.get("optimization_goal", "maximize_conversions")
+    
+    if not performance_data:
+        return {"result": {"error": "Nincs adat a költségvetés elosztáshoz"}}
+    
+    if optimization_goal not in OPTIMIZATION_GOALS:
+        raise ValueError(
+            f"Ismeretlen optimalizálási cél: {optimization_goal} "
+            f"(támogatott: {', '.join(OPTIMIZATION_GOALS)})"
+        )
+    
+    columns = numeric_columns(performance_data, ("campaign_id", "cost", "conversions", "conversions_value"))
+    if len(columns) < 4:
         return {
-            "optimization_goal": optimization_goal,
-            "total_budget": total_budget,
-            "allocations": sorted(allocations, key=lambda x: x['recommended_budget'], reverse=True)
+            "result": {
+                "optimization_goal": optimization_goal,
+                "total_budget": total_budget,
+                "allocations": [],
+                "unallocated": total_budget
+            }
+        }
+    
+    period_days = problem.get("period_days") or 1
+    campaign_ids = columns["campaign_id"].astype(np.int64)
+    cost = np.nan_to_num(columns["cost"]) / period_days
+    conversions = np.nan_to_num(columns["conversions"]) / period_days
+    conversions_value = np.nan_to_num(columns["conversions_value"]) / period_days
+    
+    fitted = fit_response_curves(
+        campaign_ids,
+        cost,
+        {"conversions": conversions, "conversions_value": conversions_value},
+        problem.get("daily_history")
+    )
+    
+    # Jelenlegi költségvetés: az élő napi költségvetés, ha ismert, különben a napi átlagos költés
+    current = cost.copy()
+    current_budgets = problem.get("current_budgets")
+    if current_budgets:
+        for i, campaign_id in enumerate(campaign_ids.tolist()):
+            amount = current_budgets.get(str(campaign_id))
+            if amount is not None:
+                current[i] = amount
+    
+    prepared = {
+        "performance_data": performance_data,
+        "total_budget": total_budget,
+        "optimization_goal": optimization_goal,
+        "constraints": problem.get("constraints"),
+        "campaign_ids": campaign_ids,
+        "cost": cost,
+        "current": current,
+        "conversions": conversions,
+        "conversions_value": conversions_value,
+        "conversion_curves": fitted["conversions"],
+        "value_curves": fitted["conversions_value"],
+        "curves": fitted["conversions" if optimization_goal == "maximize_conversions" else "conversions_value"]
+    }
+    prepared.update(_budget_bounds(campaign_ids, current, total_budget, problem.get("constraints")))
+    return prepared
+
+
+def _budget_bounds(
+    campaign_ids: np.ndarray,
+    current: np.ndarray,
+    total_budget: float,
+    constraints: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Kampányonkénti alsó/felső korlátok és csoportok a korlát leírásból
+    
+    A max_change_percent a jelenlegi költségvetés (élő napi költségvetés vagy
+    napi átlagos költés) körüli sávra szűkít (ahol az nem 0), de a kampányra megadott min_budget/max_budget
+    elsőbbséget élvez (pl. egy kampány a sávnál jobban is visszavágható);
+    a kötő korlát oka (min_budget, max_budget, max_change) kampányonként
+    megmarad.
+    
+    Raises:
+        ValueError: Ellentmondó vagy nem teljesíthető korlátok esetén
+    """
+    count = len(campaign_ids)
+    bounds = {
+        "lower": np.zeros(count),
+        "upper": np.full(count, np.inf),
+        "lower_reason": np.full(count, None, dtype=object),
+        "upper_reason": np.full(count, None, dtype=object),
+        "group": np.full(count, -1, dtype=np.intp),
+        "group_caps": np.zeros(0),
+        "group_names": []
+    }
+    if not constraints:
+        return bounds
+    
+    lower, upper = bounds["lower"], bounds["upper"]
+    keys = [str(campaign_id) for campaign_id in campaign_ids.tolist()]
+    position = {key: i for i, key in enumerate(keys)}
+    
+    for field, target, reasons in (("min_budget", lower, bounds["lower_reason"]), ("max_budget", upper, bounds["upper_reason"])):
+        for campaign_id, amount in (constraints.get(field) or {}).items():
+            i = position.get(str(campaign_id))
+            if i is not None:
+                target[i] = amount
+                reasons[i] = field
+    
+    conflict = np.flatnonzero(lower > upper)
+    if len(conflict):
+        i = conflict[0]
+        raise ValueError(f"A(z) {keys[i]} kampány korlátai ellentmondanak: min_budget {lower[i]:.2f} > max_budget {upper[i]:.2f}")
+    
+    max_change_percent = constraints.get("max_change_percent")
+    if max_change_percent is not None:
+        change = max_change_percent / 100
+        has_current = current > 0
+        # A sáv a megadott kampány korlátokon belülre esik
+        band_lower = np.clip(current * max(1 - change, 0.0), lower, upper)
+        band_upper = np.clip(current * (1 + change), lower, upper)
+        tighter = has_current & (band_lower > lower)
+        lower[tighter] = band_lower[tighter]
+        bounds["lower_reason"][tighter] = "max_change"
+        tighter = has_current & (band_upper < upper)
+        upper[tighter] = band_upper[tighter]
+        bounds["upper_reason"][tighter] = "max_change"
+    
+    if lower.sum() > total_budget:
+        raise ValueError(f"A kampányok alsó korlátainak összege ({lower.sum():.2f}) meghaladja a költségvetést ({total_budget})")
+    
+    group, caps = bounds["group"], []
+    for spec in constraints.get("groups") or []:
+        index = len(caps)
+        for campaign_id in spec["campaign_ids"]:
+            i = position.get(str(campaign_id))
+            if i is None:
+                continue
+            if group[i] >= 0:
+                raise ValueError(
+                    f"A(z) {campaign_id} kampány több csoportban szerepel "
+                    f"({bounds['group_names'][group[i]]}, {spec['name']})"
+                )
+            group[i] = index
+        caps.append(float(spec["max_budget"]))
+        bounds["group_names"].append(spec["name"])
+        floor = lower[group == index].sum()
+        if floor > spec["max_budget"]:
+            raise ValueError(
+                f"A(z) {spec['name']} csoport kampányainak alsó korlátai ({floor:.2f}) "
+                f"meghaladják a csoport korlátját ({spec['max_budget']})"
+            )
+    bounds["group_caps"] = np.array(caps, dtype=np.float64)
+    
+    return bounds
+
+
+def _allocation_result(item: Dict[str, Any], recommended: np.ndarray, group_bound: np.ndarray) -> Dict[str, Any]:
+    """Egy feladat elosztási javaslata (kampányonként és összesítve)"""
+    cost = item["cost"]
+    current = item["current"]
+    conversions = item["conversions"]
+    conversions_value = item["conversions_value"]
+    total_budget = item["total_budget"]
+    constraints = item["constraints"]
+    
+    expected_conversions = item["conversion_curves"].value(recommended)
+    expected_value = item["value_curves"].value(recommended)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_percent = np.where(current > 0, np.round((recommended - current) / current * 100, 2), 0.0)
+        expected_roas = np.where(recommended > 0, np.round(expected_value / recommended, 2), 0.0)
+    recommended_budget = np.round(recommended, 2)
+    
+    # Javasolt költségvetés szerint csökkenő sorrend (egyenlőségnél az eredeti sorrend)
+    order = np.argsort(-recommended_budget, kind="stable")
+    allocations = [
+        {
+            "campaign_id": campaign_id,
+            "campaign_name": campaign_name,
+            "current_budget": current_budget,
+            "recommended_budget": budget,
+            "change_percent": change,
+            "expected_conversions": conversions_at_budget,
+            "expected_roas": roas
         }
+        for campaign_id, campaign_name, current_budget, budget, change, conversions_at_budget, roas in zip(
+            item["campaign_ids"][order].tolist(),
+            text_values(item["performance_data"], "campaign_name", order),
+            current[order].tolist(),
+            recommended_budget[order].tolist(),
+            change_percent[order].tolist(),
+            np.round(expected_conversions[order], 2).tolist(),
+            expected_roas[order].tolist()
+        )
+    ]
+    
+    total_cost = float(cost.sum())
+    total_expected_value = float(expected_value.sum())
+    allocated = float(recommended.sum())
+    unallocated = round(max(total_budget - allocated, 0.0), 2)
+    
+    result = {
+        "optimization_goal": item["optimization_goal"],
+        "total_budget": total_budget,
+        "allocations": allocations,
+        "unallocated": unallocated,
+        "expected": {
+            "conversions": round(float(expected_conversions.sum()), 2),
+            "conversions_value": round(total_expected_value, 2),
+            # Az el nem osztott maradék nem költés, a ROAS csak az elosztott összegre vetül
+            "roas": round(total_expected_value / allocated, 2) if allocated > 0 else 0,
+            "current_conversions": round(float(conversions.sum()), 2),
+            "current_roas": round(float(conversions_value.sum()) / total_cost, 2) if total_cost > 0 else 0
+        },
+        "model": {
+            "curve": "power_law",
+            "fitted_campaigns": int(np.count_nonzero(item["curves"].fitted)),
+            "prior_curve_campaigns": int(np.count_nonzero(~item["curves"].measured)),
+            "prior_elasticity": PRIOR_ELASTICITY
+        }
+    }
+    
+    if constraints:
+        # A kötő korlát kampányonként: csoport, felső vagy alsó korlát
+        lower, upper = item["lower"], item["upper"]
+        at_lower = (lower > 0) & (recommended <= lower + 1e-9 * np.maximum(lower, 1.0))
+        # Végtelen felső korlátnál a tűrés 1 (inf - inf helyett), a kampány ott nem köt
+        bounded = np.isfinite(upper)
+        at_upper = bounded & (recommended >= upper - 1e-9 * np.where(bounded, np.maximum(upper, 1.0), 1.0))
+        binding = np.where(
+            group_bound,
+            "group",
+            np.where(at_upper, item["upper_reason"], np.where(at_lower, item["lower_reason"], None))
+        )
+        for allocation, constraint in zip(allocations, binding[order].tolist()):
+            allocation["constraint"] = constraint
+        
+        group = item["group"]
+        group_spend = np.bincount(group[group >= 0], recommended[group >= 0], minlength=len(item["group_caps"]))
+        result["constraints"] = {
+            "bound_campaigns": int(np.count_nonzero(group_bound | at_upper | at_lower)),
+            "unallocated": unallocated,
+            "groups": [
+                {"name": name, "max_budget": cap, "allocated": round(float(spent), 2)}
+                for name, cap, spent in zip(item["group_names"], item["group_caps"].tolist(), group_spend.tolist())
+            ]
+        }
+    
+    return result
 
 
 # Singleton instance
@@ -378,3 +1320,27 @@ def get_analytics_service() -> AnalyticsService:
         _analytics_service = AnalyticsService()
     return _analytics_service
 
+
+def init_analysis_worker() -> None:
+    """
+    Az elemzés végrehajtó worker folyamatainak inicializálója
+    
+    A worker szolgáltatása nem memoizál: az eredményt a hívó folyamat cache-eli.
+    """
+    # A pandas a bemelegítéskor töltődik be, nem az első elemzésben
+    import pandas
+    
+    global _analytics_service
+    _analytics_service = AnalyticsService(cache=AnalysisCache(max_entries=0))
+
+
+def run_analysis(method: str, kwargs: Dict[str, Any]) -> Any:
+    """
+    Egy AnalyticsService elemzés futtatása név szerint (folyamat készletben futtatható)
+    
+    Args:
+        method: Az AnalyticsService metódus neve
+        kwargs: A metódus argumentumai
+    """
+    return getattr(get_analytics_service(), method)(**kwargs)
+
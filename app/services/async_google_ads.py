@@ -0,0 +1,333 @@
+"""
+Aszinkron homlokzat a Google Ads API szolgáltatás fölött
+"""
+from typing import Optional, List, Dict, Any, Callable, Iterable, Tuple, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from loguru import logger
+import asyncio
+import contextvars
+
+from app.services.columnar import ColumnarResult
+from app.services.google_ads import GoogleAdsService, get_google_ads_service
+
+T = TypeVar("T")
+
+
+class AsyncGoogleAdsService:
+    """
+    Aszinkron Google Ads szolgáltatás
+    
+    A szinkron (blokkoló) GAQL hívásokat egy korlátos szálkészletben futtatja,
+    így egy lassú lekérdezés nem állítja meg a worker event loop-ját, és egy
+    workeren egyszerre több ügyfél riport is futhat.
+    """
+    
+    def __init__(self, service: GoogleAdsService, max_concurrency: int = 32):
+        """
+        Inicializálja az aszinkron homlokzatot
+        
+        Args:
+            service: A becsomagolt szinkron GoogleAdsService
+            max_concurrency: Egyszerre futó Google Ads hívások maximális száma
+        """
+        self.service = service
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="google-ads"
+        )
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+    
+    def is_configured(self) -> bool:
+        """Ellenőrzi, hogy a becsomagolt kliens konfigurálva van-e"""
+        return self.service.is_configured()
+    
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Futtat egy blokkoló hívást a szálkészletben
+        
+        Args:
+            func: Meghívandó szinkron függvény
+            *args, **kwargs: A függvény argumentumai
+        
+        Returns:
+            A függvény visszatérési értéke
+        """
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            # A kontextus (pl. a kérés prioritása) a szálkészletben is érvényes marad
+            context = contextvars.copy_context()
+            result = await loop.run_in_executor(self._executor, partial(context.run, func, *args, **kwargs))
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+    
+    async def warmup(self) -> Dict[str, Any]:
+        """Aszinkron változata a GoogleAdsService.warmup metódusnak"""
+        return await self.run(self.service.warmup)
+    
+    async def get_campaigns(self, customer_id: str) -> List[Dict[str, Any]]:
+        """Aszinkron változata a GoogleAdsService.get_campaigns metódusnak"""
+        return await self.run(self.service.get_campaigns, customer_id)
+    
+    async def get_campaign_performance(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS",
+        fields: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Aszinkron változata a GoogleAdsService.get_campaign_performance metódusnak"""
+        return await self.run(
+            self.service.get_campaign_performance,
+            customer_id=customer_id,
+            campaign_id=campaign_id,
+            date_range=date_range,
+            fields=fields
+        )
+    
+    async def get_keywords_performance(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS"
+    ) -> List[Dict[str, Any]]:
+        """Aszinkron változata a GoogleAdsService.get_keywords_performance metódusnak"""
+        return await self.run(
+            self.service.get_keywords_performance,
+            customer_id=customer_id,
+            campaign_id=campaign_id,
+            date_range=date_range
+        )
+    
+    async def get_campaign_performance_columnar(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS",
+        fields: Optional[Iterable[str]] = None
+    ) -> ColumnarResult:
+        """Aszinkron változata a GoogleAdsService.get_campaign_performance_columnar metódusnak"""
+        return await self.run(
+            self.service.get_campaign_performance_columnar,
+            customer_id=customer_id,
+            campaign_id=campaign_id,
+            date_range=date_range,
+            fields=fields
+        )
+    
+    async def get_campaign_daily_history(self, customer_id: str, date_range: str = "LAST_30_DAYS") -> ColumnarResult:
+        """Aszinkron változata a GoogleAdsService.get_campaign_daily_history metódusnak"""
+        return await self.run(self.service.get_campaign_daily_history, customer_id, date_range)
+    
+    async def get_campaign_budgets(self, customer_id: str, campaign_ids: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Aszinkron változata a GoogleAdsService.get_campaign_budgets metódusnak"""
+        return await self.run(self.service.get_campaign_budgets, customer_id, list(campaign_ids))
+    
+    async def get_keywords_performance_columnar(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS"
+    ) -> ColumnarResult:
+        """Aszinkron változata a GoogleAdsService.get_keywords_performance_columnar metódusnak"""
+        return await self.run(
+            self.service.get_keywords_performance_columnar,
+            customer_id=customer_id,
+            campaign_id=campaign_id,
+            date_range=date_range
+        )
+    
+    async def get_keywords_page(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS",
+        page_size: int = 1000,
+        page_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Aszinkron változata a GoogleAdsService.get_keywords_page metódusnak"""
+        return await self.run(
+            self.service.get_keywords_page,
+            customer_id=customer_id,
+            campaign_id=campaign_id,
+            date_range=date_range,
+            page_size=page_size,
+            page_token=page_token
+        )
+    
+    async def describe_data_source(self, customer_id: str, entity: str, date_range: str) -> Dict[str, Any]:
+        """Aszinkron változata a GoogleAdsService.describe_data_source metódusnak"""
+        return await self.run(self.service.describe_data_source, customer_id, entity, date_range)
+    
+    async def sync_warehouse(self, customer_id: str) -> Dict[str, Any]:
+        """Aszinkron változata a GoogleAdsService.sync_warehouse metódusnak"""
+        return await self.run(self.service.sync_warehouse, customer_id)
+    
+    async def refresh_changes(self, customer_id: str, force: bool = False) -> Dict[str, Any]:
+        """Aszinkron változata a GoogleAdsService.refresh_changes metódusnak (szótárként)"""
+        changes = await self.run(self.service.refresh_changes, customer_id, force)
+        return changes.to_dict()
+    
+    async def resolve_customer_ids(
+        self,
+        customer_ids: Optional[List[str]] = None,
+        manager_id: Optional[str] = None
+    ) -> List[str]:
+        """
+        Összeállítja a lekérdezendő ügyfél fiókok listáját
+        
+        Args:
+            customer_ids: Explicit ügyfél azonosítók
+            manager_id: Manager fiók, amelynek ügyfél hierarchiáját ki kell bontani
+            
+        Returns:
+            Duplikátumok nélküli ügyfél azonosító lista
+        """
+        if not customer_ids and not manager_id:
+            raise ValueError("Legalább egy customer_id vagy manager_id megadása kötelező")
+        
+        resolved = list(customer_ids or [])
+        if manager_id:
+            resolved.extend(await self.run(self.service.get_customer_clients, manager_id))
+        
+        return list(dict.fromkeys(resolved))
+    
+    async def fan_out(
+        self,
+        customer_ids: List[str],
+        func: Callable[[str], T],
+        max_parallel: int = 16
+    ) -> Tuple[Dict[str, T], Dict[str, str]]:
+        """
+        Lefuttat egy hívást több ügyfél fiókra párhuzamosan
+        
+        Az egyes ügyfelek hibái nem szakítják meg a többi lekérdezést,
+        hanem külön hibalistába kerülnek.
+        
+        Args:
+            customer_ids: Ügyfél azonosítók
+            func: Ügyfél azonosítóval hívandó szinkron függvény
+            max_parallel: Egyszerre futó ügyfél lekérdezések maximális száma
+            
+        Returns:
+            (ügyfelenkénti eredmények, ügyfelenkénti hibaüzenetek)
+        """
+        semaphore = asyncio.Semaphore(max_parallel)
+        results: Dict[str, T] = {}
+        errors: Dict[str, str] = {}
+        
+        async def run_one(customer_id: str) -> None:
+            async with semaphore:
+                try:
+                    results[customer_id] = await self.run(func, customer_id)
+                except Exception as e:
+                    logger.warning(f"Hiba a(z) {customer_id} ügyfél lekérdezésekor: {e}")
+                    errors[customer_id] = str(e)
+        
+        await asyncio.gather(*(run_one(customer_id) for customer_id in customer_ids))
+        return results, errors
+    
+    async def get_multi_customer_campaign_performance(
+        self,
+        customer_ids: List[str],
+        date_range: str = "LAST_30_DAYS",
+        max_parallel: int = 16,
+        fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Lekérdezi több ügyfél fiók kampány teljesítményét párhuzamosan
+        
+        Args:
+            customer_ids: Ügyfél azonosítók
+            date_range: Dátum tartomány
+            max_parallel: Egyszerre futó ügyfél lekérdezések maximális száma
+            fields: A hívó által használt mezők (opcionális, lásd GoogleAdsService.get_campaign_performance)
+            
+        Returns:
+            Összefésült teljesítmény adatok (customer_id mezővel) és ügyfelenkénti hibák
+        """
+        results, errors = await self.fan_out(
+            customer_ids,
+            partial(self.service.get_campaign_performance, date_range=date_range, fields=fields),
+            max_parallel=max_parallel
+        )
+        
+        data = [
+            {**row, "customer_id": customer_id}
+            for customer_id in customer_ids if customer_id in results
+            for row in results[customer_id]
+        ]
+        
+        logger.info(
+            f"Több ügyfeles lekérdezés kész: {len(results)}/{len(customer_ids)} ügyfél, "
+            f"{len(data)} rekord, {len(errors)} hiba"
+        )
+        
+        return {
+            "customers": customer_ids,
+            "data": data,
+            "errors": errors
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Visszaadja a szálkészlet kihasználtsági adatait
+        
+        Returns:
+            Futó, befejezett és hibás hívások száma
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed
+        }
+    
+    def shutdown(self) -> None:
+        """Leállítja a szálkészletet"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Google Ads szálkészlet leállítva")
+
+
+# Singleton instance
+_async_google_ads_service: Optional[AsyncGoogleAdsService] = None
+
+
+def get_async_google_ads_service(
+    config_file: str = "google-ads.yaml",
+    max_concurrency: int = 32
+) -> AsyncGoogleAdsService:
+    """
+    Visszaadja az aszinkron Google Ads szolgáltatás singleton instance-t
+    
+    Args:
+        config_file: Konfiguráció fájl elérési útja
+        max_concurrency: Egyszerre futó Google Ads hívások maximális száma
+    
+    Returns:
+        AsyncGoogleAdsService instance
+    """
+    global _async_google_ads_service
+    if _async_google_ads_service is None:
+        _async_google_ads_service = AsyncGoogleAdsService(
+            get_google_ads_service(config_file),
+            max_concurrency=max_concurrency
+        )
+    return _async_google_ads_service
+
+
+def shutdown_async_google_ads_service() -> None:
+    """Leállítja az aszinkron szolgáltatás szálkészletét, ha létezik"""
+    global _async_google_ads_service
+    if _async_google_ads_service is not None:
+        _async_google_ads_service.shutdown()
+        _async_google_ads_service = None
@@ -1,15 +1,29 @@
 """
 Automatizációs szolgáltatások
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Set
 from loguru import logger
 from datetime import datetime
 import json
 
+from app.services.analytics import get_analytics_service
+from app.services.change_tracker import ChangeSet
+from app.services.columnar import ReportData
+from app.services.mutations import combine_adjustments
+
 
 class AutomationService:
     """Automatizációs szolgáltatás osztály"""
     
+    # A bid optimalizálás által használt kampány teljesítmény mezők
+    BID_OPTIMIZATION_FIELDS = ("roas", "cost_per_conversion")
+    
+    # A javaslatok alkalmazásához (bid és költségvetés szabályok) lekérdezett mezők
+    APPLY_FIELDS = BID_OPTIMIZATION_FIELDS + ("cost", "conversions", "conversions_value")
+    
+    # Alkalmazható szabály típusok
+    APPLICABLE_RULE_TYPES = ("bid_optimization", "budget_optimization")
+    
     def __init__(self):
         """Inicializálja az automatizációs szolgáltatást"""
         self.automation_rules = {}
@@ -140,6 +154,7 @@ class AutomationService:
         
         # Szabály frissítése
         rule["last_run"] = datetime.now().isoformat()
+        _clear_changes(rule)
         
         # Történet mentése
         self.automation_history.append({
@@ -158,13 +173,155 @@ class AutomationService:
             "rule": rule
         }
     
+    def get_applicable_rules(self, customer_id: str, rule_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Az alkalmazandó bid és költségvetés szabályok
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            rule_ids: Szabály azonosítók
+            
+        Returns:
+            Szabályok a megadott sorrendben
+        
+        Raises:
+            ValueError: Ismeretlen, másik ügyfélhez tartozó, kikapcsolt vagy nem
+                alkalmazható típusú szabály esetén
+        """
+        if not rule_ids:
+            raise ValueError("Legalább egy szabály azonosító szükséges")
+        
+        rules = []
+        for rule_id in dict.fromkeys(rule_ids):
+            rule = self.automation_rules.get(rule_id)
+            if rule is None:
+                raise ValueError(f"Szabály nem található: {rule_id}")
+            if rule["customer_id"] != customer_id:
+                raise ValueError(f"A szabály ({rule_id}) másik ügyfélhez tartozik")
+            if rule["type"] not in self.APPLICABLE_RULE_TYPES:
+                raise ValueError(f"A szabály ({rule_id}) típusa nem alkalmazható: {rule['type']}")
+            if not rule["enabled"]:
+                raise ValueError(f"A szabály ({rule_id}) nincs engedélyezve")
+            rules.append(rule)
+        return rules
+    
+    def collect_bid_adjustments(
+        self,
+        rules: List[Dict[str, Any]],
+        performance_by_campaign: Dict[str, Dict[str, Any]]
+    ) -> Tuple[Dict[str, float], Dict[str, List[Dict[str, Any]]]]:
+        """
+        A bid szabályok javaslatai kampányonként egyetlen százalékos módosítássá összevonva
+        
+        Args:
+            rules: Szabályok (a nem bid típusúak kimaradnak)
+            performance_by_campaign: Kampány azonosító -> teljesítmény adatok
+            
+        Returns:
+            (kampány azonosító -> módosítás százalékban, szabály azonosító -> javaslatok)
+        """
+        by_campaign: Dict[str, List[Dict[str, Any]]] = {}
+        recommendations = {}
+        for rule in rules:
+            if rule["type"] != "bid_optimization":
+                continue
+            performance = performance_by_campaign.get(str(rule["campaign_id"]))
+            if performance is None:
+                continue
+            result = self.apply_bid_optimization(rule["rule_id"], performance)
+            recommendations[rule["rule_id"]] = result.get("recommendations", [])
+            by_campaign.setdefault(str(rule["campaign_id"]), []).extend(recommendations[rule["rule_id"]])
+        
+        adjustments = {
+            campaign_id: combine_adjustments(campaign_recommendations)
+            for campaign_id, campaign_recommendations in by_campaign.items()
+            if campaign_recommendations
+        }
+        return adjustments, recommendations
+    
+    def collect_budget_allocations(
+        self,
+        rules: List[Dict[str, Any]],
+        performance_by_campaign: Dict[str, Dict[str, Any]],
+        daily_history: Optional[ReportData] = None,
+        period_days: float = 1,
+        campaign_budgets: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[Dict[str, float], Dict[str, List[Dict[str, Any]]]]:
+        """
+        A költségvetés szabályok elosztásai egyetlen kötegelt számítással
+        
+        Minden szabály külön feladat a saját kampányaival és korlátaival; a
+        korlátos elosztás az összes szabályra (akár több ügyfélre) egyben fut.
+        
+        Args:
+            rules: Szabályok (a nem költségvetés típusúak kimaradnak)
+            performance_by_campaign: Kampány azonosító -> teljesítmény adatok
+            daily_history: Kampány/nap előzmény a válaszgörbékhez (opcionális)
+            period_days: A teljesítmény adatok időszakának napjai (napi átlaghoz)
+            campaign_budgets: A kampányok élő költségvetései (GoogleAdsService.get_campaign_budgets
+                sorai); megadásakor a jelenlegi költségvetés és a max_change_percent sáv
+                ezekhez mér, különben a napi átlagos költéshez
+            
+        Returns:
+            (kampány azonosító -> javasolt napi költségvetés, szabály azonosító -> elosztás)
+        
+        Raises:
+            ValueError: Nem teljesíthető korlátok esetén
+        """
+        budget_rules = [rule for rule in rules if rule["type"] == "budget_optimization"]
+        current_budgets = _current_daily_budgets(campaign_budgets, performance_by_campaign) if campaign_budgets else None
+        problems = []
+        for rule in budget_rules:
+            campaign_ids = {str(campaign_id) for campaign_id in rule["campaign_ids"]}
+            problems.append({
+                "performance_data": [row for campaign_id, row in performance_by_campaign.items() if campaign_id in campaign_ids],
+                "total_budget": rule["total_budget"],
+                "optimization_goal": rule["optimization_goal"],
+                "daily_history": daily_history,
+                "constraints": rule.get("constraints"),
+                "period_days": period_days,
+                "current_budgets": current_budgets
+            })
+        
+        budgets = {}
+        recommendations = {}
+        for rule, allocation in zip(budget_rules, get_analytics_service().calculate_budget_allocations(problems)):
+            recommendations[rule["rule_id"]] = allocation.get("allocations", [])
+            for item in recommendations[rule["rule_id"]]:
+                budgets[str(item["campaign_id"])] = item["recommended_budget"]
+        return budgets, recommendations
+    
+    def record_mutation_job(self, rule_ids: List[str], summary: Dict[str, Any]) -> None:
+        """
+        Egy javaslat alkalmazási job eredményének mentése a történetbe (szabályonként)
+        
+        Args:
+            rule_ids: Az alkalmazott szabályok
+            summary: A MutationService.apply_changes összesítése
+        """
+        timestamp = datetime.now().isoformat()
+        for rule_id in dict.fromkeys(rule_ids):
+            if not summary["validate_only"] and rule_id in self.automation_rules:
+                _clear_changes(self.automation_rules[rule_id])
+            self.automation_history.append({
+                "rule_id": rule_id,
+                "timestamp": timestamp,
+                "job_id": summary["job_id"],
+                "validate_only": summary["validate_only"],
+                "mutations": {
+                    key: summary[key]
+                    for key in ("submitted", "succeeded", "failed", "already_applied", "requests", "mode")
+                }
+            })
+    
     def create_budget_optimization_rule(
         self,
         customer_id: str,
         campaign_ids: List[str],
         total_budget: float,
         optimization_goal: str = "maximize_conversions",
-        enabled: bool = True
+        enabled: bool = True,
+        constraints: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Létrehoz egy költségvetés optimalizálási szabályt
@@ -172,9 +329,10 @@ class AutomationService:
         Args:
             customer_id: Google Ads ügyfél azonosító
             campaign_ids: Kampány azonosítók listája
-            total_budget: Teljes elérhető költségvetés
+            total_budget: Teljes elérhető (napi) költségvetés
             optimization_goal: Optimalizálási cél
             enabled: Szabály engedélyezve van-e
+            constraints: Elosztási korlátok (lásd AnalyticsService.calculate_budget_allocation)
             
         Returns:
             Létrehozott szabály adatai
@@ -188,6 +346,7 @@ class AutomationService:
             "campaign_ids": campaign_ids,
             "total_budget": total_budget,
             "optimization_goal": optimization_goal,
+            "constraints": constraints,
             "enabled": enabled,
             "created_at": datetime.now().isoformat(),
             "last_run": None,
@@ -253,6 +412,19 @@ class AutomationService:
             "rule": rule
         }
     
+    def get_alert_metrics(self) -> List[str]:
+        """
+        Visszaadja az aktív riasztási szabályok által hivatkozott metrikákat
+        
+        Returns:
+            Metrika nevek (duplikátumok nélkül)
+        """
+        return list(dict.fromkeys(
+            rule["metric"]
+            for rule in self.automation_rules.values()
+            if rule["type"] == "alert" and rule["enabled"]
+        ))
+    
     def check_alert_rules(
         self,
         performance_data: List[Dict[str, Any]]
@@ -315,10 +487,50 @@ class AutomationService:
         
         return triggered_alerts
     
+    def on_account_changes(self, changes: ChangeSet) -> None:
+        """
+        Fiók változás figyelő: megjelöli a változott kampányokra vonatkozó szabályokat
+        
+        A megjelölt szabályok (`changed`) kampányainak beállításai (státusz,
+        költségvetés, bid stratégia, kulcsszó bidek) a szabály utolsó futása
+        óta megváltoztak, így a következő futáskor elsőként érdemes őket
+        újraértékelni. A kampány nélküli (teljes fiókra szóló) szabályok minden
+        változáskor megjelölődnek.
+        
+        Args:
+            changes: A GoogleAdsService.refresh_changes változásai
+        """
+        changed_at = datetime.now().isoformat()
+        marked = 0
+        for rule in self.automation_rules.values():
+            if rule["customer_id"] != changes.customer_id:
+                continue
+            
+            campaigns = _rule_campaigns(rule)
+            if campaigns is None:
+                touched = changes.campaign_ids
+            elif changes.full_refresh:
+                touched = campaigns
+            else:
+                touched = campaigns & changes.campaign_ids
+                if not touched:
+                    continue
+            
+            rule["changed"] = True
+            rule["changed_at"] = changed_at
+            rule["changed_campaign_ids"] = sorted(set(rule.get("changed_campaign_ids", [])) | touched)
+            if campaigns and campaigns <= changes.removed_campaign_ids:
+                rule["status"] = "campaign_removed"
+            marked += 1
+        
+        if marked:
+            logger.info(f"{marked} automatizálási szabály kampányai változtak ({changes.customer_id})")
+    
     def get_automation_rules(
         self,
         rule_type: Optional[str] = None,
-        enabled_only: bool = False
+        enabled_only: bool = False,
+        changed_only: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Lekérdezi az automatizálási szabályokat
@@ -326,6 +538,7 @@ class AutomationService:
         Args:
             rule_type: Szabály típus szűrő (opcionális)
             enabled_only: Csak az engedélyezett szabályok
+            changed_only: Csak azok, amelyek kampányai az utolsó futás óta változtak
             
         Returns:
             Szabályok listája
@@ -338,6 +551,9 @@ class AutomationService:
         if enabled_only:
             rules = [r for r in rules if r["enabled"]]
         
+        if changed_only:
+            rules = [r for r in rules if r.get("changed")]
+        
         return rules
     
     def update_automation_rule(
@@ -429,6 +645,45 @@ class AutomationService:
         return history[:limit]
 
 
+def _rule_campaigns(rule: Dict[str, Any]) -> Optional[Set[int]]:
+    """A szabály kampányai (None: a teljes fiókra vonatkozik)"""
+    campaign_ids = rule.get("campaign_ids") or ([rule["campaign_id"]] if rule.get("campaign_id") else [])
+    campaigns = {int(campaign_id) for campaign_id in campaign_ids if str(campaign_id).isdigit()}
+    return campaigns or None
+
+
+def _current_daily_budgets(
+    campaign_budgets: List[Dict[str, Any]],
+    performance_by_campaign: Dict[str, Dict[str, Any]]
+) -> Dict[str, float]:
+    """
+    Kampány azonosító -> élő napi költségvetés (pénznemben)
+    
+    A megosztott költségvetés a kampányai között a költésük arányában oszlik
+    meg (költés nélkül egyenlően), így a kampányonkénti sávok összege a
+    megosztott költségvetés körüli sáv, amire a plan_budget_changes az
+    összegzett javaslatot beállítja.
+    """
+    members: Dict[str, List[Dict[str, Any]]] = {}
+    for row in campaign_budgets:
+        members.setdefault(row["resource_name"], []).append(row)
+    
+    current = {}
+    for rows in members.values():
+        costs = [float((performance_by_campaign.get(str(row["campaign_id"])) or {}).get("cost") or 0.0) for row in rows]
+        total_cost = sum(costs)
+        for row, cost in zip(rows, costs):
+            share = cost / total_cost if total_cost > 0 else 1 / len(rows)
+            current[str(row["campaign_id"])] = row["amount_micros"] / 1_000_000 * share
+    return current
+
+
+def _clear_changes(rule: Dict[str, Any]) -> None:
+    """A változás jelölés törlése a szabály futása után"""
+    rule["changed"] = False
+    rule["changed_campaign_ids"] = []
+
+
 # Singleton instance
 _automation_service: Optional[AutomationService] = None
 
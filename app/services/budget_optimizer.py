@@ -0,0 +1,341 @@
+"""
+Költségvetés optimalizálás kampányonkénti válaszgörbékkel (költés -> konverzió)
+"""
+from typing import Optional, Dict, Tuple, Union
+import numpy as np
+
+from app.services.columnar import ReportData, numeric_columns
+
+# Napi előzmény nélkül ezt a rugalmasságot feltételezzük (10% több költés ~6% több konverzió)
+PRIOR_ELASTICITY = 0.6
+
+# A becsült rugalmasság ennyi napnyi súllyal húzódik a prior felé (kevés napnál a prior dominál)
+PRIOR_WEIGHT_DAYS = 7.0
+
+# A rugalmasság határai: 1-nél nem lenne csökkenő a hozadék, 0 közelében a görbe vízszintes
+MIN_ELASTICITY = 0.05
+MAX_ELASTICITY = 0.95
+
+# Mért érték nélküli kampány prior görbéje a fiók átlagos hozamának ennyi részével számol
+# (a jelenlegi költésén), így nem esik ki az elosztásból, de a mért kampányok előnyt élveznek
+PRIOR_VALUE_SHARE = 0.5
+
+# Kampányonként legalább ennyi költéssel és konverzióval rendelkező nap kell a becsléshez
+MIN_FIT_DAYS = 3
+
+# A vízszint felezéses keresésének lépésszáma (a log vízszint intervallum 1M kampánynál is legfeljebb ~13 széles)
+BISECTION_STEPS = 60
+
+
+class ResponseCurves:
+    """
+    Kampányonkénti hatványfüggvény válaszgörbék: érték(s) = scale * s ** elasticity
+    
+    A 0 < elasticity < 1 kitevő a csökkenő hozadékot írja le: minden további
+    költés egység kevesebb konverziót (vagy konverziós értéket) hoz. A
+    görbék kampányonként egy-egy elemként NumPy tömbökben élnek.
+    """
+    
+    def __init__(
+        self,
+        scale: np.ndarray,
+        elasticity: np.ndarray,
+        fitted: np.ndarray,
+        measured: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            scale: Skála (a görbe az időszak tényleges költésén és értékén megy át)
+            elasticity: Rugalmasság (a log-log görbe meredeksége)
+            fitted: A rugalmasság napi előzményből becsült (különben a prior)
+            measured: A görbe mért értéken megy át (különben prior görbe; alapértelmezés: mind mért)
+        """
+        self.scale = scale
+        self.elasticity = elasticity
+        self.fitted = fitted
+        self.measured = np.ones(len(scale), dtype=bool) if measured is None else measured
+    
+    def __len__(self) -> int:
+        return len(self.scale)
+    
+    def value(self, spend: np.ndarray) -> np.ndarray:
+        """A görbe szerinti várható érték a megadott költéseknél (prior görbénél 0: nincs mért érték)"""
+        return np.where(self.measured, self.scale * np.power(spend, self.elasticity), 0.0)
+
+
+def fit_response_curves(
+    campaign_ids: np.ndarray,
+    spend: np.ndarray,
+    values: Dict[str, np.ndarray],
+    history: Optional[ReportData] = None
+) -> Dict[str, ResponseCurves]:
+    """
+    Válaszgörbék illesztése
+    
+    A rugalmasság kampányonként a napi (költés, érték) pontok log-log
+    regressziójának meredeksége, a prior felé húzva (PRIOR_WEIGHT_DAYS); a
+    skála úgy áll be, hogy a görbe átmenjen az időszak tényleges költésén és
+    értékén. A hatványfüggvény rugalmassága mértékegység független, így a
+    napi előzményből becsült meredekség az időszak összesített költésére is
+    érvényes.
+    
+    Mért érték (költés és konverzió) nélküli kampánynál a skála 0 lenne, és
+    a kampány semmit sem kapna; helyette prior görbét kap, amely a jelenlegi
+    költésén (költés nélkül a költéssel rendelkező kampányok mediánján) a
+    fiók átlagos hozamának PRIOR_VALUE_SHARE részét adja. Ha a fióknak
+    egyáltalán nincs mért értéke, minden kampány prior görbéjű, és az
+    elosztás a jelenlegi költés arányait követi.
+    
+    Args:
+        campaign_ids: Kampány azonosítók
+        spend: A kampányok költése az időszakban
+        values: Érték oszlop név (conversions, conversions_value) -> a kampányok értéke az időszakban
+        history: Napi előzmény (campaign_id, cost és az érték oszlopokkal), opcionális
+    
+    Returns:
+        Érték oszlop név -> ResponseCurves a kampányok sorrendjében
+    """
+    count = len(campaign_ids)
+    daily = None
+    if history is not None and len(history):
+        daily = numeric_columns(history, ("campaign_id", "cost") + tuple(values))
+        if len(daily) < 2 + len(values):
+            daily = None
+    
+    if daily is not None:
+        # Az előzmény sorok kampányhoz rendelése és a log költés egyszer, minden érték oszlophoz
+        order = np.argsort(campaign_ids, kind="stable")
+        sorted_ids = campaign_ids[order]
+        position = np.minimum(np.searchsorted(sorted_ids, daily["campaign_id"]), count - 1)
+        rows = np.flatnonzero((sorted_ids[position] == daily["campaign_id"]) & (daily["cost"] > 0))
+        group = order[position[rows]]
+        log_spend = np.log(daily["cost"][rows])
+    
+    curves = {}
+    for name, value in values.items():
+        elasticity = np.full(count, PRIOR_ELASTICITY)
+        fitted = np.zeros(count, dtype=bool)
+        
+        if daily is not None:
+            daily_value = daily[name][rows]
+            valid = daily_value > 0
+            slope, days = _fit_elasticity(count, group[valid], log_spend[valid], np.log(daily_value[valid]))
+            fitted = days > 0
+            slope = np.clip(slope, MIN_ELASTICITY, MAX_ELASTICITY)
+            elasticity = (days * slope + PRIOR_WEIGHT_DAYS * PRIOR_ELASTICITY) / (days + PRIOR_WEIGHT_DAYS)
+        
+        elasticity = np.clip(elasticity, MIN_ELASTICITY, MAX_ELASTICITY)
+        
+        scale = np.zeros(count)
+        positive = (spend > 0) & (value > 0)
+        scale[positive] = value[positive] / np.power(spend[positive], elasticity[positive])
+        
+        prior = ~positive
+        if prior.any():
+            rate = PRIOR_VALUE_SHARE * value[positive].sum() / spend[positive].sum() if positive.any() else 1.0
+            spending = spend > 0
+            reference = np.where(spending, spend, np.median(spend[spending]) if spending.any() else 1.0)[prior]
+            scale[prior] = rate * reference / np.power(reference, elasticity[prior])
+        curves[name] = ResponseCurves(scale, elasticity, fitted, positive)
+    
+    return curves
+
+
+def _fit_elasticity(count: int, group: np.ndarray, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Kampányonkénti log-log meredekség csoportosított összegekből (np.bincount)
+    
+    Args:
+        count: Kampányok száma
+        group: A napi pontok kampány indexe
+        x: log költés
+        y: log érték
+    
+    Returns:
+        (meredekség, a becsléshez használt napok száma; 0 ha nem becsülhető)
+    """
+    days = np.bincount(group, minlength=count).astype(np.float64)
+    sum_x = np.bincount(group, x, minlength=count)
+    sum_y = np.bincount(group, y, minlength=count)
+    sum_xx = np.bincount(group, x * x, minlength=count)
+    sum_xy = np.bincount(group, x * y, minlength=count)
+    
+    # A költésnek napról napra változnia kell, különben a meredekség nem becsülhető
+    denominator = days * sum_xx - sum_x * sum_x
+    estimable = (days >= MIN_FIT_DAYS) & (denominator > 1e-9 * days * days)
+    
+    slope = np.zeros(count)
+    slope[estimable] = (days * sum_xy - sum_x * sum_y)[estimable] / denominator[estimable]
+    return slope, np.where(estimable, days, 0.0)
+
+
+def solve_allocation(
+    curves: ResponseCurves,
+    total_budgets: np.ndarray,
+    problem: Optional[np.ndarray] = None,
+    lower: Optional[np.ndarray] = None,
+    upper: Optional[np.ndarray] = None,
+    group: Optional[np.ndarray] = None,
+    group_caps: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Korlátos költségvetés elosztás, több független feladattal egy vektoros menetben
+    
+    Feladatonként a görbék szerinti összértéket maximalizálja a költségvetés,
+    a kampányonkénti alsó/felső korlátok és a csoportok közös felső korlátja
+    mellett. A célfüggvény konkáv, a korlátok lineárisak (konvex feladat); a
+    megoldás a KKT feltételekből adódik: minden kampány a
+    s = (scale * elasticity / ν) ** (1 / (1 - elasticity)) költést kapja a
+    korlátaira vágva, ahol ν = max(λ, τ): λ a feladat vízszintje, τ a
+    kampány csoportjáé (ha a csoport korlátja köt). A τ értékeket, majd a λ
+    értékeket felezéssel keresi log skálán, minden lépésben az összes csoport,
+    illetve feladat egyszerre (np.bincount összegekkel).
+    
+    Args:
+        curves: Válaszgörbék (az összes feladat kampányai)
+        total_budgets: Feladatonkénti költségvetés
+        problem: Kampányonként a feladat indexe (alapértelmezés: egyetlen feladat)
+        lower: Kampányonkénti alsó korlát (alapértelmezés: 0)
+        upper: Kampányonkénti felső korlát (alapértelmezés: nincs)
+        group: Kampányonként a csoport indexe, -1 ha nincs csoportban (egy kampány legfeljebb
+            egy csoportban, egy csoport kampányai egy feladatból)
+        group_caps: Csoportonként a csoport kampányainak együttes felső korlátja
+    
+    Returns:
+        (javasolt költések, a csoport korlátja köti-e a kampányt)
+    
+    Raises:
+        ValueError: Ha a korlátok nem teljesíthetők
+    """
+    count = len(curves)
+    total_budgets = np.asarray(total_budgets, dtype=np.float64)
+    problem = np.zeros(count, dtype=np.intp) if problem is None else problem
+    lower = np.zeros(count) if lower is None else lower
+    upper = np.full(count, np.inf) if upper is None else upper
+    
+    if np.any(lower > upper):
+        raise ValueError("Egy kampány alsó korlátja nagyobb a felső korlátjánál")
+    floor_totals = np.bincount(problem, lower, minlength=len(total_budgets))
+    if np.any(floor_totals > total_budgets * (1 + 1e-9) + 1e-9):
+        raise ValueError("A kampányok alsó korlátainak összege meghaladja a költségvetést")
+    
+    with np.errstate(divide="ignore"):
+        log_gain = np.log(curves.scale * curves.elasticity)
+    exponent = 1.0 / (1.0 - curves.elasticity)
+    
+    # A csoportok vízszintje: csak ott köt, ahol a tagok felső korlátja együtt meghaladja a csoportét
+    base = np.full(count, -np.inf)
+    group_bound = np.zeros(count, dtype=bool)
+    if group is not None and group_caps is not None and len(group_caps):
+        members = np.flatnonzero(group >= 0)
+        member_group = group[members]
+        group_floor = np.bincount(member_group, lower[members], minlength=len(group_caps))
+        if np.any(group_floor > group_caps * (1 + 1e-9) + 1e-9):
+            raise ValueError("Egy csoport kampányainak alsó korlátai meghaladják a csoport korlátját")
+        
+        levels = _bisect_levels(
+            member_group,
+            group_caps,
+            group_floor,
+            log_gain[members],
+            exponent[members],
+            lower[members],
+            upper[members],
+            np.full(len(members), -np.inf)
+        )
+        binding = np.bincount(member_group, upper[members], minlength=len(group_caps)) > group_caps
+        base[members] = np.where(binding[member_group], levels[member_group], -np.inf)
+        group_bound[members] = binding[member_group]
+    
+    levels = _bisect_levels(problem, total_budgets, floor_totals, log_gain, exponent, lower, upper, base)
+    level = np.maximum(levels[problem], base)
+    group_bound &= base > levels[problem]
+    
+    return _spend_at(level, log_gain, exponent, lower, upper), group_bound
+
+
+def _spend_at(
+    level: Union[float, np.ndarray],
+    log_gain: np.ndarray,
+    exponent: np.ndarray,
+    lower: Optional[np.ndarray],
+    upper: Optional[np.ndarray]
+) -> np.ndarray:
+    """
+    A költés a megadott (log) vízszinteken, a kampány korlátaira vágva
+    
+    Érték nélküli kampánynál (log_gain = -inf) és végtelen vízszintnél az
+    exponens -inf, így a költés az alsó korlát. A None korlát nem vág.
+    """
+    spend = np.subtract(log_gain, level)
+    spend *= exponent
+    with np.errstate(over="ignore"):
+        np.exp(spend, out=spend)
+    if lower is not None:
+        np.maximum(spend, lower, out=spend)
+    if upper is not None:
+        np.minimum(spend, upper, out=spend)
+    return spend
+
+
+def _bisect_levels(
+    bucket: np.ndarray,
+    targets: np.ndarray,
+    floors: np.ndarray,
+    log_gain: np.ndarray,
+    exponent: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    base: np.ndarray
+) -> np.ndarray:
+    """
+    Csoportonként (feladatonként) az a log vízszint, ahol a tagok költése a célösszeg
+    
+    Ha a célösszeg nem érhető el (a felső korlátok együtt kevesebbek), a
+    keresés az alsó határhoz, vagyis a maximális költéshez konvergál.
+    
+    Returns:
+        Vízszintek (+inf, ha a célösszeg csak az alsó korlátokat fedezi)
+    """
+    size = len(targets)
+    active = np.isfinite(log_gain)
+    active_bucket = bucket[active]
+    counts = np.bincount(active_bucket, minlength=size)
+    
+    # Az alsó határon bármely tag egymaga elérné a célösszeget, a felsőn a tagok
+    # a korláton felül együtt legfeljebb a maradékot kapják
+    slack = targets - floors
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reach = log_gain[active] - np.log(np.maximum(targets, 1e-300))[active_bucket] / exponent[active]
+        share = log_gain[active] - np.log(np.maximum(slack, 1e-300) / np.maximum(counts, 1))[active_bucket] / exponent[active]
+    low = np.full(size, np.inf)
+    high = np.full(size, -np.inf)
+    np.minimum.at(low, active_bucket, reach)
+    np.maximum.at(high, active_bucket, share)
+    
+    # Tagok értékkel nélkül vagy elfogyott keret: a vízszint közömbös, illetve végtelen
+    idle = counts == 0
+    exhausted = ~idle & (slack <= 1e-9 * np.maximum(targets, 1.0))
+    low[idle | exhausted] = 0.0
+    high[idle | exhausted] = 0.0
+    
+    # Egyetlen feladatnál (a leggyakoribb eset) a vízszint skalár, az összeg egy redukció;
+    # a nem kötő (0, illetve végtelen) korlátokat nem kell lépésenként alkalmazni
+    single = size == 1
+    grouped = np.isfinite(base).any()
+    lower = lower if lower.any() else None
+    upper = upper if np.isfinite(upper).any() else None
+    for _ in range(BISECTION_STEPS):
+        middle = 0.5 * (low + high)
+        level = middle[0] if single else middle[bucket]
+        if grouped:
+            level = np.maximum(level, base)
+        spend = _spend_at(level, log_gain, exponent, lower, upper)
+        over = (spend.sum(keepdims=True) if single else np.bincount(bucket, spend, minlength=size)) > targets
+        low = np.where(over, middle, low)
+        high = np.where(over, high, middle)
+        if np.all(high - low <= 1e-13 * np.maximum(np.abs(high), 1.0)):
+            break
+    
+    high[exhausted] = np.inf
+    return high
@@ -0,0 +1,156 @@
+"""
+Fiók változások követése (change_status / change_event magas vízjel)
+"""
+from typing import Optional, List, Dict, Any, Set, Tuple, Callable
+from datetime import datetime
+from loguru import logger
+import threading
+
+# Ennyi napra visszamenőleg kérdezhetők le a változások (change_event: 30, change_status: 90 nap)
+CHANGE_HISTORY_DAYS = 30
+
+# A lekérdezett dátum-idő formátum (a fiók időzónájában)
+CHANGE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ChangeSet:
+    """
+    Egy ügyfél fiók változásai két frissítés között
+    
+    A `full_refresh` azt jelzi, hogy a változások nem voltak követhetők
+    (pl. túl sok változás vagy túl régi vízjel), ezért az ügyfél minden
+    entitását változottnak kell tekinteni.
+    """
+    
+    def __init__(self, customer_id: str, full_refresh: bool = False):
+        self.customer_id = customer_id
+        self.full_refresh = full_refresh
+        self.campaign_ids: Set[int] = set()
+        self.removed_campaign_ids: Set[int] = set()
+        self.criteria: Set[str] = set()
+        self.budgets: Set[str] = set()
+    
+    def is_empty(self) -> bool:
+        """Nincs változás (és nem teljes újratöltés)"""
+        return not (self.full_refresh or self.campaign_ids or self.criteria or self.budgets)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-kompatibilis összesítés"""
+        return {
+            "customer_id": self.customer_id,
+            "full_refresh": self.full_refresh,
+            "campaign_ids": sorted(self.campaign_ids),
+            "removed_campaign_ids": sorted(self.removed_campaign_ids),
+            "criteria": len(self.criteria),
+            "budgets": len(self.budgets)
+        }
+
+
+class AccountSnapshot:
+    """Egy ügyfél kampány metaadatai és a változás követés vízjele"""
+    
+    def __init__(self, customer_id: str):
+        self.customer_id = customer_id
+        self.time_zone: Optional[str] = None
+        # Az utolsó frissítés időpontja a fiók időzónájában; az ezutáni változásokat kell lekérdezni
+        self.high_water_mark: Optional[datetime] = None
+        # Az utolsó lekérdezés változásai (erőforrás, időpont), az átfedő ablak kettős feldolgozása ellen
+        self.seen_changes: Set[Tuple[str, str]] = set()
+        self.checked_at = 0.0
+        self.campaigns: Optional[Dict[int, Dict[str, Any]]] = None
+        self.budget_campaigns: Dict[str, Set[int]] = {}
+        self.full_refreshes = 0
+        self.incremental_refreshes = 0
+        # Egy ügyfél frissítései sorban futnak (a vízjel és a pillanatkép együtt változik)
+        self.lock = threading.Lock()
+    
+    def load(self, campaigns: List[Dict[str, Any]], high_water_mark: datetime) -> None:
+        """A teljes kampány lista betöltése"""
+        self.campaigns = {}
+        self.budget_campaigns = {}
+        self.seen_changes = set()
+        self.update(campaigns)
+        self.high_water_mark = high_water_mark
+        self.full_refreshes += 1
+    
+    def update(self, campaigns: List[Dict[str, Any]]) -> None:
+        """Kampányok felülírása (új és módosított kampányok)"""
+        for campaign in campaigns:
+            previous = self.campaigns.get(campaign["id"])
+            if previous is not None and previous.get("budget_resource_name"):
+                self.budget_campaigns.get(previous["budget_resource_name"], set()).discard(campaign["id"])
+            self.campaigns[campaign["id"]] = campaign
+            if campaign.get("budget_resource_name"):
+                self.budget_campaigns.setdefault(campaign["budget_resource_name"], set()).add(campaign["id"])
+
+
+class ChangeTracker:
+    """
+    Ügyfelenkénti pillanatképek és a változás figyelők nyilvántartása
+    
+    A változások lekérdezését a GoogleAdsService végzi; a tracker a
+    pillanatképeket tárolja, és a változott azonosítókat továbbítja a
+    regisztrált figyelőknek (riport cache, automatizációs szabályok).
+    """
+    
+    def __init__(self):
+        self._snapshots: Dict[str, AccountSnapshot] = {}
+        self._listeners: List[Callable[[ChangeSet], None]] = []
+        self._lock = threading.Lock()
+    
+    def snapshot(self, customer_id: str) -> AccountSnapshot:
+        """Az ügyfél pillanatképe (első használatkor üresen jön létre)"""
+        with self._lock:
+            snapshot = self._snapshots.get(customer_id)
+            if snapshot is None:
+                snapshot = self._snapshots[customer_id] = AccountSnapshot(customer_id)
+            return snapshot
+    
+    def drop(self, customer_id: Optional[str] = None) -> int:
+        """
+        Eldobja a pillanatképeket (a következő lekérdezés teljes újratöltés)
+        
+        Args:
+            customer_id: Ha meg van adva, csak ennek az ügyfélnek a pillanatképe
+        
+        Returns:
+            Eldobott pillanatképek száma
+        """
+        with self._lock:
+            if customer_id is None:
+                count = len(self._snapshots)
+                self._snapshots.clear()
+                return count
+            return 1 if self._snapshots.pop(customer_id, None) is not None else 0
+    
+    def add_listener(self, listener: Callable[[ChangeSet], None]) -> None:
+        """Figyelő regisztrálása (minden nem üres változás halmazt megkap)"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+    
+    def notify(self, changes: ChangeSet) -> None:
+        """A változások továbbítása a figyelőknek; egy figyelő hibája nem állítja meg a többit"""
+        if changes.is_empty():
+            return
+        
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                logger.warning(f"Hiba a változás figyelőben ({getattr(listener, '__qualname__', listener)}): {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Pillanatképek és frissítések statisztikái"""
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+            listeners = len(self._listeners)
+        return {
+            "accounts": len(snapshots),
+            "campaigns": sum(len(snapshot.campaigns or {}) for snapshot in snapshots),
+            "full_refreshes": sum(snapshot.full_refreshes for snapshot in snapshots),
+            "incremental_refreshes": sum(snapshot.incremental_refreshes for snapshot in snapshots),
+            "listeners": listeners
+        }
@@ -0,0 +1,482 @@
+"""
+Oszlopos (columnar) riport eredmények
+"""
+from typing import List, Dict, Any, Tuple, Sequence, Iterable, Union, Callable, Optional, TYPE_CHECKING
+from array import array
+import hashlib
+import numpy as np
+
+# A pandas importja lassú (a folyamat indulási idejének jelentős része), ezért csak
+# az első DataFrame építéskor / szótár kódoláskor töltődik be
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Oszlop típusok: int64 (darabszámok, micros összegek), float64 (arányok), category (szótár kódolt szöveg)
+INT64 = "int64"
+FLOAT64 = "float64"
+CATEGORY = "category"
+
+CAMPAIGN_PERFORMANCE_SCHEMA: Tuple[Tuple[str, str], ...] = (
+    ("campaign_id", INT64),
+    ("campaign_name", CATEGORY),
+    ("impressions", INT64),
+    ("clicks", INT64),
+    ("ctr", FLOAT64),
+    ("average_cpc_micros", INT64),
+    ("cost_micros", INT64),
+    ("conversions", FLOAT64),
+    ("conversions_value", FLOAT64),
+    ("cost_per_conversion_micros", INT64),
+    ("conversion_rate", FLOAT64)
+)
+
+KEYWORD_PERFORMANCE_SCHEMA: Tuple[Tuple[str, str], ...] = (
+    ("campaign_id", INT64),
+    ("campaign_name", CATEGORY),
+    ("ad_group_id", INT64),
+    ("ad_group_name", CATEGORY),
+    ("keyword", CATEGORY),
+    ("match_type", CATEGORY),
+    ("impressions", INT64),
+    ("clicks", INT64),
+    ("ctr", FLOAT64),
+    ("average_cpc_micros", INT64),
+    ("cost_micros", INT64),
+    ("conversions", FLOAT64),
+    ("conversions_value", FLOAT64),
+    ("quality_score", FLOAT64)
+)
+
+# Kampány/nap sorok a válaszgörbe illesztéshez (app.services.budget_optimizer)
+CAMPAIGN_DAILY_SCHEMA: Tuple[Tuple[str, str], ...] = (
+    ("campaign_id", INT64),
+    ("cost_micros", INT64),
+    ("conversions", FLOAT64),
+    ("conversions_value", FLOAT64)
+)
+
+# A szótár (dict) formátumú sorok oszlopai, a GoogleAdsService dekódolóival azonos sorrendben
+CAMPAIGN_PERFORMANCE_FIELDS = (
+    "campaign_id", "campaign_name", "impressions", "clicks", "ctr", "average_cpc", "cost",
+    "conversions", "conversions_value", "cost_per_conversion", "conversion_rate", "roas"
+)
+
+KEYWORD_PERFORMANCE_FIELDS = (
+    "campaign_id", "campaign_name", "ad_group_id", "ad_group_name", "keyword", "match_type",
+    "impressions", "clicks", "ctr", "average_cpc", "cost", "conversions", "conversions_value",
+    "quality_score"
+)
+
+CAMPAIGN_DAILY_FIELDS = ("campaign_id", "cost", "conversions", "conversions_value")
+
+_NUMPY_DTYPES = {INT64: np.int64, FLOAT64: np.float64}
+_ARRAY_TYPECODES = {INT64: "q", FLOAT64: "d"}
+
+
+def _codes_dtype(category_count: int) -> np.dtype:
+    """A kategória kódok legszűkebb egész típusa (a pandas Categorical szabálya szerint)"""
+    if category_count < np.iinfo(np.int8).max:
+        return np.dtype(np.int8)
+    if category_count < np.iinfo(np.int16).max:
+        return np.dtype(np.int16)
+    return np.dtype(np.int32)
+
+
+class ColumnarResult:
+    """
+    Oszlopos riport eredmény
+    
+    Minden oszlop egy típusos NumPy tömb; a szöveges oszlopok szótár kódolva
+    (int32 kód + kategória lista) tárolódnak. A pénzösszegek micros egységben,
+    int64-ként vannak; a szótár formátumú sorok pénz mezői (cost, average_cpc,
+    cost_per_conversion) és a roas ezekből vektorosan számolódnak.
+    
+    Az eredmény a riport cache-ben több kérés között megosztva él, ezért a
+    tömbjeit (és a belőle készült DataFrame oszlopait) csak olvasni szabad.
+    """
+    
+    def __init__(
+        self,
+        schema: Sequence[Tuple[str, str]],
+        columns: Dict[str, np.ndarray],
+        categories: Dict[str, List[str]],
+        fields: Sequence[str]
+    ):
+        """
+        Args:
+            schema: (oszlop név, típus) párok
+            columns: Oszlop név -> tömb (kategória oszlopnál a kódok)
+            categories: Kategória oszlop név -> kategória lista
+            fields: A szótár formátumú sorok mezői
+        """
+        self.schema = tuple(schema)
+        self.columns = columns
+        self.categories = categories
+        self.fields = tuple(fields)
+        self._derived: Dict[str, np.ndarray] = {}
+        self._fingerprint: Optional[str] = None
+    
+    def __len__(self) -> int:
+        first = self.schema[0][0]
+        return len(self.columns[first])
+    
+    @property
+    def nbytes(self) -> int:
+        """Az oszlopok és kategóriák becsült memóriamérete bájtban"""
+        size = sum(array.nbytes for array in self.columns.values())
+        size += sum(array.nbytes for array in self._derived.values())
+        size += sum(sum(len(value) + 49 for value in values) for values in self.categories.values())
+        return size
+    
+    def fingerprint(self) -> str:
+        """
+        A tartalom ujjlenyomata (a tárolt oszlopok és kategóriák hash-e)
+        
+        Az eredmény csak olvasható, ezért a hash első kéréskor számolódik és
+        megmarad: a riport cache-ből újra kiadott eredménynél ingyenes.
+        
+        Returns:
+            Hexadecimális BLAKE2b kivonat
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(repr((self.schema, self.fields)).encode())
+            for name in sorted(self.columns):
+                values = np.ascontiguousarray(self.columns[name])
+                digest.update(f"{name}:{values.dtype}:{len(values)}".encode())
+                digest.update(values.data)
+                if name in self.categories:
+                    digest.update("\x00".join(map(str, self.categories[name])).encode("utf-8", "surrogatepass"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+    
+    def column(self, name: str) -> np.ndarray:
+        """
+        Visszaad egy oszlopot NumPy tömbként
+        
+        A tárolt oszlopokat másolás nélkül adja vissza, a származtatott pénz
+        oszlopokat (cost, average_cpc, cost_per_conversion, roas) első
+        használatkor számolja és megjegyzi.
+        
+        Args:
+            name: Oszlop név
+        
+        Returns:
+            Az oszlop tömbje (kategória oszlopnál a kódok)
+        """
+        if name in self.columns:
+            return self.columns[name]
+        if name not in self._derived:
+            self._derived[name] = self._derive(name)
+        return self._derived[name]
+    
+    def _derive(self, name: str) -> np.ndarray:
+        """Származtatott oszlop kiszámítása"""
+        if name in ("cost", "average_cpc", "cost_per_conversion"):
+            source = "cost_micros" if name == "cost" else f"{name}_micros"
+            result = self.columns[source] / 1_000_000
+        elif name == "roas":
+            cost = self.column("cost")
+            result = np.divide(
+                self.columns["conversions_value"],
+                cost,
+                out=np.zeros(len(cost), dtype=np.float64),
+                where=cost > 0
+            )
+        else:
+            raise KeyError(name)
+        
+        return result
+    
+    def to_dataframe(self) -> "pd.DataFrame":
+        """
+        DataFrame nézet a szótár formátumú mezőkkel
+        
+        A tárolt oszlopok nem másolódnak: a numerikus tömbök és a kategória
+        kódok közvetlenül kerülnek a DataFrame-be.
+        
+        Returns:
+            pandas DataFrame
+        """
+        import pandas as pd
+        
+        data = {}
+        for name in self.fields:
+            if name in self.categories:
+                data[name] = pd.Categorical.from_codes(
+                    self.columns[name],
+                    categories=pd.Index(self.categories[name], dtype=object),
+                    validate=False
+                )
+            else:
+                data[name] = self.column(name)
+        return pd.DataFrame(data, copy=False)
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Szótár formátumú sorok (a JSON válasz határán)
+        
+        Returns:
+            Sorok listája, ugyanazokkal a mezőkkel mint a GoogleAdsService szótár dekódolói
+        """
+        values = []
+        for name in self.fields:
+            if name in self.categories:
+                lookup = self.categories[name]
+                values.append([lookup[code] for code in self.columns[name].tolist()])
+            else:
+                values.append(self.column(name).tolist())
+        
+        records = [dict(zip(self.fields, row)) for row in zip(*values)]
+        
+        if "quality_score" in self.fields:
+            for record in records:
+                score = record["quality_score"]
+                record["quality_score"] = None if score != score else int(score)
+        
+        return records
+
+
+class ColumnarBuilder:
+    """
+    Oszlopos eredmény építő
+    
+    A numerikus oszlopok értékei dekódolás közben közvetlenül típusos
+    pufferekbe (array.array) kerülnek, amelyeket a finish() másolás nélkül
+    ad át NumPy-nak. A szöveges oszlopokat rögzített méretű blokkonként
+    szótár kódolja, így a sorokból kiolvasott szövegek nem halmozódnak fel.
+    Soronkénti szótár sehol nem keletkezik.
+    
+    Használat a dekódolóban:
+        builder = ColumnarBuilder(schema, fields)
+        campaign_id, campaign_name, ... = builder.appenders()
+        for row in rows:
+            campaign_id(row.campaign.id)
+            ...
+            builder.end_row()
+        result = builder.finish()
+    """
+    
+    def __init__(
+        self,
+        schema: Sequence[Tuple[str, str]],
+        fields: Sequence[str],
+        block_size: int = 8192
+    ):
+        """
+        Args:
+            schema: (oszlop név, típus) párok
+            fields: A szótár formátumú sorok mezői
+            block_size: Szöveges oszlopok szótár kódolásának blokkmérete (sor)
+        """
+        self.schema = tuple(schema)
+        self.fields = tuple(fields)
+        self.block_size = block_size
+        self._names = [name for name, _ in self.schema]
+        self._kinds = [kind for _, kind in self.schema]
+        self._columns: List[Any] = [
+            [] if kind == CATEGORY else array(_ARRAY_TYPECODES[kind])
+            for kind in self._kinds
+        ]
+        self._category_blocks: Dict[int, List[Tuple[np.ndarray, np.ndarray]]] = {
+            i: [] for i, kind in enumerate(self._kinds) if kind == CATEGORY
+        }
+        self._appenders = [column.append for column in self._columns]
+        self._pending = 0
+    
+    def appenders(self) -> List[Callable[[Any], None]]:
+        """
+        Az oszlopok hozzáfűző függvényei a séma sorrendjében
+        
+        Minden sor összes oszlopának kitöltése után end_row() hívandó. A float
+        oszlopok None helyett NaN-t, az int64 oszlopok egész számot várnak.
+        
+        Returns:
+            Hozzáfűző függvények listája
+        """
+        return list(self._appenders)
+    
+    def end_row(self) -> None:
+        """Lezár egy sort; blokkhatáron szótár kódolja a szöveges oszlopokat"""
+        self._pending += 1
+        if self._pending >= self.block_size:
+            self._flush_categories()
+    
+    def append(self, values: Sequence[Any]) -> None:
+        """
+        Hozzáad egy sort a séma sorrendjében megadott értékekkel
+        
+        Args:
+            values: Oszlop értékek (kategória oszlopnál a szöveg, hiányzó float értéknél None)
+        """
+        for append, kind, value in zip(self._appenders, self._kinds, values):
+            if value is None and kind == FLOAT64:
+                value = np.nan
+            append(value)
+        self.end_row()
+    
+    def append_record(self, record: Dict[str, Any]) -> None:
+        """
+        Hozzáad egy szótár formátumú sort (pl. az adattárházból)
+        
+        A `*_micros` oszlopok értéke a megfelelő pénz mezőből számolódik.
+        
+        Args:
+            record: Szótár formátumú sor
+        """
+        values = []
+        for name in self._names:
+            if name.endswith("_micros"):
+                amount = record.get(name[:-len("_micros")]) or 0
+                values.append(int(round(amount * 1_000_000)))
+            else:
+                values.append(record.get(name))
+        self.append(values)
+    
+    def _flush_categories(self) -> None:
+        """A pufferelt szöveges értékek blokkonkénti szótár kódolása"""
+        import pandas as pd
+        
+        for i, blocks in self._category_blocks.items():
+            column = self._columns[i]
+            if column:
+                blocks.append(pd.factorize(np.array(column, dtype=object), use_na_sentinel=False))
+                # Helyben ürítjük, hogy a kiadott hozzáfűző függvények érvényesek maradjanak
+                del column[:]
+        self._pending = 0
+    
+    def finish(self) -> ColumnarResult:
+        """
+        Lezárja az építést
+        
+        Returns:
+            A kész ColumnarResult
+        """
+        self._flush_categories()
+        
+        columns = {}
+        categories = {}
+        for i, (name, kind) in enumerate(self.schema):
+            if kind == CATEGORY:
+                columns[name], categories[name] = _merge_category_blocks(self._category_blocks[i])
+            else:
+                columns[name] = np.frombuffer(self._columns[i], dtype=_NUMPY_DTYPES[kind])
+        
+        return ColumnarResult(self.schema, columns, categories, self.fields)
+
+
+def _merge_category_blocks(blocks: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Blokkonként szótár kódolt oszlop egyesítése globális kódokra
+    
+    A blokkok egyedi értékeit egyetlen factorize hívás képezi le a globális
+    kategóriákra (első előfordulás sorrendjében), a kódok átírása vektoros.
+    """
+    if not blocks:
+        return np.empty(0, dtype=np.int8), []
+    
+    import pandas as pd
+    
+    global_codes, uniques = pd.factorize(np.concatenate([block_uniques for _, block_uniques in blocks]))
+    # A pandas Categorical a legszűkebb kód típust használja; ha már így tároljuk, nincs másolás
+    global_codes = global_codes.astype(_codes_dtype(len(uniques)))
+    
+    parts = []
+    offset = 0
+    for local_codes, block_uniques in blocks:
+        parts.append(global_codes[offset:offset + len(block_uniques)][local_codes])
+        offset += len(block_uniques)
+    
+    return np.concatenate(parts), uniques.tolist()
+
+
+# Riport adat: szótár formátumú sorok listája vagy oszlopos eredmény
+ReportData = Union[List[Dict[str, Any]], ColumnarResult]
+
+
+def columnar_from_records(
+    records: Iterable[Dict[str, Any]],
+    schema: Sequence[Tuple[str, str]],
+    fields: Sequence[str]
+) -> ColumnarResult:
+    """
+    Szótár formátumú sorokból oszlopos eredményt épít
+    
+    Args:
+        records: Sorok
+        schema: (oszlop név, típus) párok
+        fields: A szótár formátumú sorok mezői
+    
+    Returns:
+        ColumnarResult
+    """
+    builder = ColumnarBuilder(schema, fields)
+    for record in records:
+        builder.append_record(record)
+    return builder.finish()
+
+
+def to_dataframe(data: ReportData) -> "pd.DataFrame":
+    """
+    DataFrame egy riport eredményből (szótár lista vagy ColumnarResult)
+    
+    Args:
+        data: Sorok listája vagy ColumnarResult
+    
+    Returns:
+        pandas DataFrame
+    """
+    if isinstance(data, ColumnarResult):
+        return data.to_dataframe()
+    
+    import pandas as pd
+    
+    return pd.DataFrame(data)
+
+
+def numeric_columns(data: ReportData, names: Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Numerikus oszlopok NumPy tömbként, DataFrame építés nélkül
+    
+    ColumnarResult esetén a tárolt (illetve származtatott) tömbök másolás
+    nélkül; szótár listánál float64 tömbök, a hiányzó értékek NaN-ként
+    (mint a pandas DataFrame oszlopaiban).
+    
+    Args:
+        data: Sorok listája vagy ColumnarResult
+        names: A kért oszlopok
+    
+    Returns:
+        Oszlop név -> tömb, csak a riportban szereplő oszlopokra
+    """
+    if isinstance(data, ColumnarResult):
+        return {name: data.column(name) for name in names if name in data.fields}
+    
+    present = set()
+    for row in data:
+        present.update(row.keys())
+    return {
+        name: np.array([row.get(name) for row in data], dtype=np.float64)
+        for name in names if name in present
+    }
+
+
+def text_values(data: ReportData, name: str, index: np.ndarray) -> List[Any]:
+    """
+    Egy szöveges oszlop értékei a megadott sor indexeken
+    
+    ColumnarResult esetén csak a kiválasztott kódok oldódnak fel, így a
+    kategória oszlop nem alakul teljes egészében Python sztring listává.
+    
+    Args:
+        data: Sorok listája vagy ColumnarResult
+        name: Oszlop név
+        index: Sor indexek (a visszaadott lista sorrendje)
+    
+    Returns:
+        Az értékek listája
+    """
+    if isinstance(data, ColumnarResult):
+        lookup = data.categories[name]
+        return [lookup[code] for code in data.columns[name][index].tolist()]
+    return [data[position].get(name) for position in index.tolist()]
@@ -0,0 +1,456 @@
+"""
+CPU-igényes elemzések futtatása az event loop-on kívül, folyamat készletben
+"""
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Iterable, Iterator, Deque, Tuple, TypeVar
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from functools import partial
+from loguru import logger
+import asyncio
+import multiprocessing
+import threading
+import time
+
+from app.config import settings
+from app.services.shared_data import SharedDatasetRegistry, SharedDatasetHandle, resolve_shared, release_attachments
+
+T = TypeVar("T")
+
+# Ennyi másodpercenként ellenőrzi, hogy a kliens bontotta-e a kapcsolatot
+DISCONNECT_POLL_SECONDS = 0.25
+
+
+class AnalysisTimeoutError(Exception):
+    """Az elemzés nem fejeződött be az időkorláton belül"""
+
+
+class AnalysisCancelledError(Exception):
+    """Az elemzés megszakadt (a kliens bontotta a kapcsolatot)"""
+
+
+def _timed_call(func: Callable[..., T], args: Tuple, kwargs: Dict[str, Any]) -> Tuple[T, float, float]:
+    """
+    Worker oldali hívás: az eredmény mellett a kezdés és a befejezés ideje (várakozási metrikához)
+    
+    Az osztott memóriába publikált adatok leírói a hívás előtt a csatlakozott
+    eredményekre cserélődnek, a szegmensek a hívás után lezáródnak.
+    """
+    started = time.time()
+    attachments = []
+    try:
+        args, kwargs = resolve_shared((args, kwargs), attachments)
+        result = func(*args, **kwargs)
+    finally:
+        args = kwargs = None
+        release_attachments(attachments)
+    return result, started, time.time()
+
+
+def _warm_worker() -> int:
+    """Bemelegítő feladat: a worker folyamat elindul és lefut az inicializálója"""
+    return multiprocessing.current_process().pid
+
+
+def _cancel_submitted(submission: "asyncio.Future[Future]") -> None:
+    """A megszakított várakozás közben beküldött feladat törlése"""
+    if not submission.cancelled() and submission.exception() is None:
+        submission.result().cancel()
+
+
+class AnalysisExecutor:
+    """
+    Elemzés végrehajtó: kis bemenet helyben, nagy bemenet folyamat készletben
+    
+    Egy nagy (pl. több százezer soros) pandas elemzés a GIL-t tartva az
+    egész worker minden kérését megállítaná; a küszöb feletti elemzések
+    ezért egy előre elindított (meleg) folyamat készletben futnak, a kisebbek
+    helyben, a sorosítás költsége nélkül. A feladatok időkorláttal futnak,
+    és a kliens kapcsolat bontásakor megszakadnak: a még sorban álló
+    feladatok törlődnek, a már futó feladat eredménye eldobódik.
+    
+    A nagy ColumnarResult argumentumok (shared_datasets megadásakor) nem
+    sorosítódnak: osztott memóriába kerülnek, a worker csak olvasható
+    nézetekkel csatlakozik hozzájuk, és a feladat végén felszabadulnak.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = 2,
+        offload_min_rows: int = 50000,
+        timeout_seconds: float = 120.0,
+        initializer: Optional[Callable[[], None]] = None,
+        shared_datasets: Optional[SharedDatasetRegistry] = None
+    ):
+        """
+        Inicializálja a végrehajtót (a folyamatok a start() hívással vagy az első feladattal indulnak)
+        
+        Args:
+            max_workers: Worker folyamatok száma (0: minden elemzés helyben fut)
+            offload_min_rows: Ennyi sortól kerül egy elemzés a folyamat készletbe
+            timeout_seconds: Alapértelmezett időkorlát feladatonként
+            initializer: A worker folyamatokban induláskor lefutó függvény
+            shared_datasets: Az osztott memóriás adatátadás kezelője (None: minden argumentum pickle)
+        """
+        self.max_workers = max_workers
+        self.offload_min_rows = offload_min_rows
+        self.timeout_seconds = timeout_seconds
+        self.initializer = initializer
+        self.shared_datasets = shared_datasets
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._cancelled = 0
+        self._inline = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+    
+    @property
+    def enabled(self) -> bool:
+        """Van-e folyamat készlet (max_workers > 0)"""
+        return self.max_workers > 0
+    
+    def should_offload(self, rows: int) -> bool:
+        """A megadott méretű bemenet elemzése a folyamat készletbe kerül-e"""
+        return self.enabled and rows >= self.offload_min_rows
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """A folyamat készlet (első használatkor jön létre)"""
+        with self._lock:
+            if self._pool is None:
+                # spawn: a szülő szálai (gRPC, szálkészletek) nem öröklődnek a workerekbe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer
+                )
+            return self._pool
+    
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Egy használhatatlanná vált készlet eldobása (pl. egy worker elhalt); a következő feladat újat indít"""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        logger.error("Az elemzési folyamat készlet használhatatlanná vált (egy worker leállt), újraindul")
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def start(self) -> Dict[str, Any]:
+        """
+        Elindítja és bemelegíti a worker folyamatokat (blokkoló)
+        
+        Minden workerre egy bemelegítő feladat kerül, így a folyamat indítás
+        és az inicializáló (pl. a pandas import) nem az első elemzést terheli.
+        
+        Returns:
+            Bemelegítés eredménye (workers, pids, seconds)
+        """
+        if not self.enabled:
+            return {"workers": 0}
+        
+        started = time.perf_counter()
+        pool = self._get_pool()
+        futures = [pool.submit(_warm_worker) for _ in range(self.max_workers)]
+        pids = sorted({future.result(timeout=self.timeout_seconds) for future in futures})
+        return {
+            "workers": self.max_workers,
+            "pids": pids,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+    
+    def run_inline(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Helyben futtat egy (küszöb alatti) elemzést"""
+        with self._lock:
+            self._inline += 1
+        return func(*args, **kwargs)
+    
+    def _submit(self, func: Callable[..., T], *args, **kwargs) -> "Future[Tuple[T, float, float]]":
+        """Feladat beküldése a folyamat készletbe (a metrikák frissítésével)"""
+        handles: List[SharedDatasetHandle] = []
+        if self.shared_datasets is not None:
+            args, kwargs = self.shared_datasets.share((args, kwargs), handles)
+        
+        pool = self._get_pool()
+        try:
+            try:
+                future = pool.submit(_timed_call, func, args, kwargs)
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                pool = self._get_pool()
+                future = pool.submit(_timed_call, func, args, kwargs)
+        except BaseException:
+            if handles:
+                self.shared_datasets.release_all(handles)
+            raise
+        
+        submitted_at = time.time()
+        with self._lock:
+            self._submitted += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        
+        def done(future: Future) -> None:
+            error = None if future.cancelled() else future.exception()
+            with self._lock:
+                self._in_flight -= 1
+                if error is not None:
+                    self._failed += 1
+                elif not future.cancelled():
+                    _, started, finished = future.result()
+                    self._completed += 1
+                    self._wait_seconds += max(0.0, started - submitted_at)
+                    self._run_seconds += finished - started
+            
+            # A szegmensek a feladat végén (törléskor is) szabadulnak fel: futó feladat még olvashatja őket
+            if handles:
+                self.shared_datasets.release_all(handles)
+            
+            if isinstance(error, BrokenProcessPool):
+                # A készlet saját szálából hívódik: az eldobás (shutdown) külön szálon fut
+                threading.Thread(target=self._discard_pool, args=(pool,), daemon=True).start()
+        
+        future.add_done_callback(done)
+        return future
+    
+    async def submit(
+        self,
+        func: Callable[..., T],
+        *args,
+        timeout: Optional[float] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        **kwargs
+    ) -> T:
+        """
+        Lefuttat egy függvényt a folyamat készletben, és megvárja az eredményét
+        
+        A függvénynek és az argumentumoknak sorosíthatónak (pickle) kell
+        lenniük: modul szintű függvény, szótár listák, ColumnarResult. A
+        küszöb feletti ColumnarResult-ok (szótárakban, listákban is) osztott
+        memórián keresztül jutnak át; a publikálás és a beküldés szálban fut,
+        nem az event loop-on.
+        
+        Args:
+            func: Modul szintű függvény
+            *args, **kwargs: A függvény argumentumai
+            timeout: Időkorlát másodpercben (alapértelmezetten timeout_seconds)
+            is_disconnected: Aszinkron függvény, amely igazat ad, ha a kliens bontotta a
+                kapcsolatot (pl. Request.is_disconnected)
+        
+        Returns:
+            A függvény visszatérési értéke
+        
+        Raises:
+            AnalysisTimeoutError: Időtúllépés esetén
+            AnalysisCancelledError: Ha a kliens bontotta a kapcsolatot
+        """
+        submission = asyncio.get_running_loop().run_in_executor(None, partial(self._submit, func, *args, **kwargs))
+        try:
+            future = await asyncio.shield(submission)
+        except asyncio.CancelledError:
+            # A beküldés a szálban még befejeződhet: a feladat ilyenkor azonnal törlődik
+            submission.add_done_callback(_cancel_submitted)
+            raise
+        
+        result, _, _ = await self.supervise(
+            asyncio.wrap_future(future),
+            on_cancel=future.cancel,
+            timeout=timeout,
+            is_disconnected=is_disconnected
+        )
+        return result
+    
+    async def supervise(
+        self,
+        awaitable: Awaitable[T],
+        on_cancel: Optional[Callable[[], Any]] = None,
+        timeout: Optional[float] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> T:
+        """
+        Megvár egy futó elemzést időkorláttal, a kliens kapcsolat figyelésével
+        
+        Időtúllépéskor vagy a kapcsolat bontásakor az on_cancel hívódik (pl. a
+        folyamat feladat törlése, vagy egy szálban futó stream elemzés
+        megszakítási jelzője).
+        
+        Args:
+            awaitable: A megvárandó elemzés
+            on_cancel: Megszakításkor hívott függvény
+            timeout: Időkorlát másodpercben (alapértelmezetten timeout_seconds)
+            is_disconnected: Aszinkron függvény, amely igazat ad, ha a kliens bontotta a kapcsolatot
+        
+        Raises:
+            AnalysisTimeoutError: Időtúllépés esetén
+            AnalysisCancelledError: Ha a kliens bontotta a kapcsolatot
+        """
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(awaitable)
+        deadline = loop.time() + (timeout if timeout is not None else self.timeout_seconds)
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise AnalysisTimeoutError(
+                        f"Az elemzés nem fejeződött be {self.timeout_seconds if timeout is None else timeout:g} másodperc alatt"
+                    )
+                
+                done, _ = await asyncio.wait({task}, timeout=min(DISCONNECT_POLL_SECONDS, remaining))
+                if done:
+                    return task.result()
+                
+                if is_disconnected is not None and await is_disconnected():
+                    with self._lock:
+                        self._cancelled += 1
+                    raise AnalysisCancelledError("A kliens bontotta a kapcsolatot, az elemzés megszakítva")
+        finally:
+            if not task.done():
+                task.cancel()
+                if on_cancel is not None:
+                    on_cancel()
+                logger.warning("Elemzés megszakítva (időtúllépés, kapcsolat bontás vagy leállítás)")
+    
+    def map_chunks(
+        self,
+        func: Callable[..., T],
+        chunks: Iterable[Any],
+        *args,
+        cancelled: Optional[threading.Event] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator[T]:
+        """
+        Darabonként alkalmaz egy függvényt egy streamre, az eredmények sorrendjében (blokkoló)
+        
+        Amíg a stream eddigi sorainak száma a küszöb alatt van, a darabok
+        helyben dolgozódnak fel; utána a folyamat készletbe kerülnek, egyszerre
+        legfeljebb 2 * max_workers darab, így a stream olvasása és a
+        feldolgozás átfedésben fut, a memória pedig korlátos marad.
+        
+        Args:
+            func: Modul szintű függvény (darab, *args) -> részeredmény
+            chunks: A darabok (pl. ColumnarResult stream)
+            *args: A függvény további argumentumai
+            cancelled: Beállításakor a feldolgozás a következő darabnál megszakad
+            timeout: Időkorlát a teljes streamre (alapértelmezetten timeout_seconds)
+        
+        Yields:
+            A darabok részeredményei a stream sorrendjében
+        
+        Raises:
+            AnalysisTimeoutError: Időtúllépés esetén
+            AnalysisCancelledError: Ha a cancelled jelző be van állítva
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout_seconds)
+        pending: Deque[Future] = deque()
+        rows = 0
+        try:
+            for chunk in chunks:
+                self._check_stream(cancelled, deadline)
+                
+                if not self.should_offload(rows):
+                    rows += len(chunk)
+                    yield self.run_inline(func, chunk, *args)
+                    continue
+                
+                rows += len(chunk)
+                pending.append(self._submit(func, chunk, *args))
+                while len(pending) >= 2 * self.max_workers:
+                    yield self._stream_result(pending.popleft(), cancelled, deadline)
+            
+            while pending:
+                yield self._stream_result(pending.popleft(), cancelled, deadline)
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def _check_stream(self, cancelled: Optional[threading.Event], deadline: float) -> None:
+        """Megszakítás és időkorlát ellenőrzése stream feldolgozás közben"""
+        if cancelled is not None and cancelled.is_set():
+            raise AnalysisCancelledError("Az elemzés megszakítva")
+        if time.monotonic() >= deadline:
+            with self._lock:
+                self._timeouts += 1
+            raise AnalysisTimeoutError("A stream elemzés túllépte az időkorlátot")
+    
+    def _stream_result(self, future: Future, cancelled: Optional[threading.Event], deadline: float) -> Any:
+        """Egy darab eredményének megvárása (a megszakítás jelző figyelésével)"""
+        while True:
+            self._check_stream(cancelled, deadline)
+            try:
+                result, _, _ = future.result(timeout=min(DISCONNECT_POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+                return result
+            except FutureTimeoutError:
+                continue
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Visszaadja a sor és kihasználtsági metrikákat"""
+        with self._lock:
+            busy = min(self._in_flight, self.max_workers)
+            return {
+                "workers": self.max_workers,
+                "started": self._pool is not None,
+                "offload_min_rows": self.offload_min_rows,
+                "busy": busy,
+                "queue_depth": self._in_flight - busy,
+                "max_queue_depth": max(0, self._max_in_flight - self.max_workers),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timeouts": self._timeouts,
+                "cancelled": self._cancelled,
+                "inline": self._inline,
+                "average_wait_seconds": self._wait_seconds / self._completed if self._completed else 0.0,
+                "average_run_seconds": self._run_seconds / self._completed if self._completed else 0.0,
+                "shared_memory": self.shared_datasets.get_stats() if self.shared_datasets is not None else None
+            }
+    
+    def shutdown(self) -> None:
+        """Leállítja a folyamat készletet (a sorban álló feladatok törlődnek)"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if self.shared_datasets is not None:
+            self.shared_datasets.shutdown()
+
+
+# Singleton instance
+_analysis_executor: Optional[AnalysisExecutor] = None
+
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """
+    Visszaadja az elemzés végrehajtó singleton instance-t (a beállítások alapján)
+    
+    Returns:
+        AnalysisExecutor instance
+    """
+    global _analysis_executor
+    if _analysis_executor is None:
+        from app.services.analytics import init_analysis_worker
+        
+        _analysis_executor = AnalysisExecutor(
+            max_workers=settings.ANALYSIS_EXECUTOR_WORKERS,
+            offload_min_rows=settings.ANALYSIS_OFFLOAD_MIN_ROWS,
+            timeout_seconds=settings.ANALYSIS_TIMEOUT_SECONDS,
+            initializer=init_analysis_worker,
+            shared_datasets=(
+                SharedDatasetRegistry(min_bytes=settings.ANALYSIS_SHARED_MEMORY_MIN_MB * 1024 * 1024)
+                if settings.ANALYSIS_SHARED_MEMORY_ENABLED else None
+            )
+        )
+    return _analysis_executor
+
+
+def shutdown_analysis_executor() -> None:
+    """Leállítja az elemzés végrehajtó folyamat készletét, ha létezik"""
+    global _analysis_executor
+    if _analysis_executor is not None:
+        _analysis_executor.shutdown()
+        _analysis_executor = None
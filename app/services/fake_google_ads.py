@@ -0,0 +1,937 @@
+"""
+Szintetikus Google Ads backend (élő hozzáférés nélküli benchmarkokhoz és terheléses tesztekhez)
+"""
+from typing import Optional, List, Dict, Any, Iterator, Sequence, Tuple, Callable
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+import random
+import re
+import threading
+import time
+import zlib
+
+from google.ads.googleads.errors import GoogleAdsException
+import grpc
+import numpy as np
+
+from app.services.ads_backend import GoogleAdsBackend
+from app.services.google_ads import resolve_date_range
+
+# A generátor felső korlátai (ügyfél fiókonként)
+MAX_CAMPAIGNS = 10_000
+MAX_KEYWORDS = 1_000_000
+MAX_DAYS = 365
+
+CHANNEL_TYPES = ["SEARCH", "SEARCH", "SEARCH", "SHOPPING", "DISPLAY", "PERFORMANCE_MAX"]
+BIDDING_STRATEGIES = ["MAXIMIZE_CONVERSIONS", "TARGET_CPA", "TARGET_ROAS", "MANUAL_CPC", "MAXIMIZE_CONVERSION_VALUE"]
+MATCH_TYPES = ["EXACT", "PHRASE", "BROAD"]
+CRITERION_STATUSES = ["ENABLED", "PAUSED"]
+
+# Kulcsszó szókészlet: a szövegek ismétlődnek kampányok és hirdetéscsoportok között
+KEYWORD_WORDS = [
+    "cipő", "női", "férfi", "gyerek", "olcsó", "akció", "online", "webshop", "bolt", "rendelés",
+    "kabát", "táska", "óra", "ékszer", "parfüm", "laptop", "telefon", "tok", "töltő", "kerékpár",
+    "sátor", "hátizsák", "futócipő", "sportcipő", "téli", "nyári", "budapest", "debrecen", "szeged", "ár",
+    "vélemény", "teszt", "legjobb", "használt", "új", "kiárusítás", "márkás", "bőr", "outlet", "szállítás"
+]
+
+# Hét napjai szerinti forgalmi szorzó (hétfő = 0)
+WEEKDAY_FACTORS = np.array([1.05, 1.08, 1.06, 1.02, 0.95, 0.85, 0.90])
+
+# Ennyi előre generált zaj vektor közül választ naponta a generátor
+_NOISE_POOL_SIZE = 7
+
+# Azonosító tartományok kezdete (kampány költségvetések és kulcsszó kritériumok)
+BUDGET_ID_BASE = 2_000_000
+CRITERION_ID_BASE = 100_000_000
+
+# A bidek és költségvetések a pénznem legkisebb számlázható egységének (0.01) többszörösei
+BILLABLE_UNIT_MICROS = 10_000
+
+# A szintetikus fiókok időzónája (a változás időpontok ebben értendők)
+FAKE_TIME_ZONE = "Europe/Budapest"
+
+# Módosított erőforrás típus -> változás erőforrás (a valódi API-hoz hasonlóan a költségvetés csak change_event-ben)
+_CHANGE_RESOURCE_TYPES = {"ad_group_criterion": "AD_GROUP_CRITERION", "campaign_budget": "CAMPAIGN_BUDGET"}
+
+_BUDGET_RESOURCE_PATTERN = re.compile(r"^customers/(?P<customer>\d+)/campaignBudgets/(?P<budget>\d+)$")
+_CRITERION_RESOURCE_PATTERN = re.compile(r"^customers/(?P<customer>\d+)/adGroupCriteria/(?P<ad_group>\d+)~(?P<criterion>\d+)$")
+
+_QUERY_PATTERN = re.compile(
+    r"^SELECT (?P<fields>.+?) FROM (?P<resource>\w+)"
+    r"(?: WHERE (?P<where>.+?))?"
+    r"(?: ORDER BY (?P<order>[\w.]+)(?: (?P<direction>ASC|DESC))?)?"
+    r"(?: LIMIT (?P<limit>\d+))?$",
+    re.IGNORECASE
+)
+
+_CONDITION_PATTERN = re.compile(
+    r"(?P<field>[\w.]+) (?:"
+    r"BETWEEN '(?P<start>\d{4}-\d{2}-\d{2})' AND '(?P<end>\d{4}-\d{2}-\d{2})'"
+    r"|DURING (?P<during>\w+)"
+    r"|IN \((?P<ids>[\d, ]+)\)"
+    r"|IN \((?P<names>'[^)]*)\)"
+    r"|(?P<op>!=|>=|<=|=) (?P<value>'[^']*'|\w+)"
+    r")(?: AND |$)",
+    re.IGNORECASE
+)
+
+_ENUMS: Dict[str, SimpleNamespace] = {}
+
+
+def _enum(name: str) -> SimpleNamespace:
+    """Proto enum-szerű érték (`.name` attribútummal), értékenként egyetlen példány"""
+    value = _ENUMS.get(name)
+    if value is None:
+        value = _ENUMS.setdefault(name, SimpleNamespace(name=name))
+    return value
+
+
+def keyword_text(text_index: int) -> str:
+    """Determinisztikus kulcsszó szöveg a szókészletből (2-3 szó)"""
+    size = len(KEYWORD_WORDS)
+    first, rest = text_index % size, text_index // size
+    second, third = rest % size, rest // size
+    if third == 0:
+        return f"{KEYWORD_WORDS[second]} {KEYWORD_WORDS[first]}"
+    return f"{KEYWORD_WORDS[third % size]} {KEYWORD_WORDS[second]} {KEYWORD_WORDS[first]}"
+
+
+def check_limits(campaigns: int, keywords: int, days: int) -> None:
+    """Ellenőrzi a generátor méret paramétereit"""
+    if not 1 <= campaigns <= MAX_CAMPAIGNS:
+        raise ValueError(f"A kampányok száma 1 és {MAX_CAMPAIGNS} között lehet: {campaigns}")
+    if not 0 <= keywords <= MAX_KEYWORDS:
+        raise ValueError(f"A kulcsszavak száma 0 és {MAX_KEYWORDS} között lehet: {keywords}")
+    if not 1 <= days <= MAX_DAYS:
+        raise ValueError(f"A napok száma 1 és {MAX_DAYS} között lehet: {days}")
+
+
+def _customer_seed(customer_id: str) -> int:
+    """Ügyfél azonosítóból képzett seed (számjegyes azonosítónál maga a szám)"""
+    text = str(customer_id).replace("-", "")
+    return int(text) if text.isdigit() else zlib.crc32(text.encode("utf-8"))
+
+
+class SyntheticAccount:
+    """
+    Egy ügyfél fiók determinisztikus szintetikus adatai
+    
+    A fiók szerkezete (kampányok, hirdetéscsoportok, kulcsszavak és azok alap
+    teljesítménye) a seedből és az ügyfél azonosítóból generálódik. A napi
+    metrikák a nap sorszámából számolódnak (hét napja, szezonalitás és egy
+    előre generált zaj vektor), így bármely nap bármikor újraszámolható, és
+    ugyanaz a lekérdezés mindig ugyanazt az eredményt adja.
+    """
+    
+    def __init__(self, customer_id: str, seed: int = 42, campaigns: int = 50, keywords: int = 5000, days: int = 90):
+        """
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            seed: Globális seed
+            campaigns: Kampányok száma (legfeljebb MAX_CAMPAIGNS)
+            keywords: Kulcsszavak száma (legfeljebb MAX_KEYWORDS)
+            days: Visszamenőleges napok száma, amelyekre adat van (legfeljebb MAX_DAYS)
+        """
+        check_limits(campaigns, keywords, days)
+        
+        self.customer_id = customer_id
+        self.campaign_count = campaigns
+        self.keyword_count = keywords
+        self.days = days
+        rng = np.random.default_rng([seed, _customer_seed(customer_id)])
+        
+        # Kampányok
+        self.campaign_ids = np.arange(campaigns, dtype=np.int64) + 1_000_000
+        self.campaign_status = np.where(rng.random(campaigns) < 0.85, "ENABLED", "PAUSED")
+        self.campaign_names = [f"Kampány {i + 1}" for i in range(campaigns)]
+        self.campaign_name_rank = np.argsort(np.argsort(np.array(self.campaign_names), kind="stable"))
+        channel_types = rng.integers(0, len(CHANNEL_TYPES), campaigns)
+        bidding_strategies = rng.integers(0, len(BIDDING_STRATEGIES), campaigns)
+        budgets = (np.round(rng.lognormal(np.log(20), 0.8, campaigns), 0) * 1_000_000).astype(np.int64)
+        self.campaigns = [
+            SimpleNamespace(
+                id=int(self.campaign_ids[i]),
+                name=self.campaign_names[i],
+                status=_enum(str(self.campaign_status[i])),
+                advertising_channel_type=_enum(CHANNEL_TYPES[channel_types[i]]),
+                bidding_strategy_type=_enum(BIDDING_STRATEGIES[bidding_strategies[i]])
+            )
+            for i in range(campaigns)
+        ]
+        self.campaign_budgets = [
+            SimpleNamespace(
+                id=BUDGET_ID_BASE + i,
+                resource_name=f"customers/{customer_id}/campaignBudgets/{BUDGET_ID_BASE + i}",
+                amount_micros=int(amount)
+            )
+            for i, amount in enumerate(budgets)
+        ]
+        campaign_weight = rng.lognormal(0.0, 1.0, campaigns)
+        
+        # Hirdetéscsoportok (átlagosan 25 kulcsszó csoportonként)
+        ad_group_count = max(campaigns, keywords // 25)
+        self.ad_group_ids = np.arange(ad_group_count, dtype=np.int64) + 50_000_000
+        self.ad_group_campaign = np.arange(ad_group_count) % campaigns
+        self.ad_groups = [
+            SimpleNamespace(id=int(self.ad_group_ids[j]), name=f"Hirdetéscsoport {j + 1}")
+            for j in range(ad_group_count)
+        ]
+        
+        # Kulcsszavak
+        self.keyword_ad_group = rng.integers(0, ad_group_count, keywords)
+        self.keyword_campaign = self.ad_group_campaign[self.keyword_ad_group]
+        self.criterion_ids = np.arange(keywords, dtype=np.int64) + CRITERION_ID_BASE
+        self.keyword_text_index = rng.integers(0, max(1, keywords // 3), keywords)
+        self.keyword_match_type = rng.choice(len(MATCH_TYPES), keywords, p=[0.3, 0.3, 0.4])
+        self.keyword_status = np.where(rng.random(keywords) < 0.95, "ENABLED", "PAUSED")
+        # 0 = nincs minőségi mutató (kevés adat)
+        self.quality_score = np.where(rng.random(keywords) < 0.9, rng.integers(1, 11, keywords), 0)
+        
+        # Alap teljesítmény: nehézfarkú megjelenítés eloszlás, kampány szintű szorzóval
+        self.base_impressions = (rng.lognormal(1.5, 1.4, keywords) * campaign_weight[self.keyword_campaign]).astype(np.float32)
+        self.ctr = rng.beta(2, 40, keywords).astype(np.float32)
+        self.cpc_micros = np.round(rng.lognormal(np.log(800_000), 0.6, keywords)).astype(np.int64)
+        # Kézi CPC bid: a tényleges CPC fölött, számlázható egységre kerekítve
+        units = np.maximum(1, np.round(self.cpc_micros * 1.25 / BILLABLE_UNIT_MICROS))
+        self.cpc_bid_micros = units.astype(np.int64) * BILLABLE_UNIT_MICROS
+        self.conversion_rate = rng.beta(2, 50, keywords).astype(np.float32)
+        self.value_per_conversion = rng.lognormal(np.log(40), 0.5, keywords).astype(np.float32)
+        self._noise = rng.lognormal(0.0, 0.35, (_NOISE_POOL_SIZE, keywords)).astype(np.float32)
+        
+        self._windows: "OrderedDict[Tuple[date, date], Dict[str, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def history(self, today: Optional[date] = None) -> Tuple[date, date]:
+        """Az adatokkal lefedett napok (mindkét vége zárt, a mai nap is benne van)"""
+        today = today or date.today()
+        return today - timedelta(days=self.days), today
+    
+    def day_metrics(self, day: date) -> Dict[str, np.ndarray]:
+        """
+        Egy nap kulcsszó szintű nyers metrikái
+        
+        Args:
+            day: A nap
+        
+        Returns:
+            impressions, clicks, cost_micros, conversions, conversions_value tömbök
+        """
+        ordinal = day.toordinal()
+        season = WEEKDAY_FACTORS[day.weekday()] * (1.0 + 0.15 * np.sin(2 * np.pi * day.timetuple().tm_yday / 365.0))
+        noise = self._noise
+        
+        # float32-ben számol (a 365 napos, 1M kulcsszavas tartomány is másodpercek alatt összesíthető)
+        impressions = self.base_impressions * noise[ordinal % _NOISE_POOL_SIZE]
+        impressions *= np.float32(season)
+        np.floor(impressions, out=impressions)
+        clicks = impressions * self.ctr
+        clicks *= noise[(ordinal + 3) % _NOISE_POOL_SIZE]
+        clicks += np.float32(0.5)
+        np.floor(clicks, out=clicks)
+        np.minimum(clicks, impressions, out=clicks)
+        # Konverzió és érték századokban kerekítve (mint az API két tizedesjegye)
+        conversions = clicks * self.conversion_rate
+        conversions *= noise[(ordinal + 5) % _NOISE_POOL_SIZE]
+        conversions *= np.float32(100)
+        conversions += np.float32(0.5)
+        np.floor(conversions, out=conversions)
+        conversions_value = conversions * self.value_per_conversion
+        conversions_value += np.float32(0.5)
+        np.floor(conversions_value, out=conversions_value)
+        clicks = clicks.astype(np.int64)
+        
+        return {
+            "impressions": impressions.astype(np.int64),
+            "clicks": clicks,
+            "cost_micros": clicks * self.cpc_micros,
+            "conversions": conversions.astype(np.float64) / 100,
+            "conversions_value": conversions_value.astype(np.float64) / 100
+        }
+    
+    def window_metrics(self, start: date, end: date) -> Dict[str, np.ndarray]:
+        """
+        Egy dátum tartomány összesített kulcsszó szintű metrikái
+        
+        A legutóbbi tartományok eredménye cache-elődik (a tömbök csak olvashatók).
+        
+        Args:
+            start: Kezdő nap
+            end: Záró nap
+        
+        Returns:
+            Nyers metrika tömbök (mint a day_metrics)
+        """
+        first, last = self.history()
+        start, end = max(start, first), min(end, last)
+        key = (start, end)
+        
+        with self._lock:
+            cached = self._windows.get(key)
+            if cached is not None:
+                self._windows.move_to_end(key)
+                return cached
+        
+        totals = {
+            "impressions": np.zeros(self.keyword_count, dtype=np.int64),
+            "clicks": np.zeros(self.keyword_count, dtype=np.int64),
+            "cost_micros": np.zeros(self.keyword_count, dtype=np.int64),
+            "conversions": np.zeros(self.keyword_count, dtype=np.float64),
+            "conversions_value": np.zeros(self.keyword_count, dtype=np.float64)
+        }
+        day = start
+        while day <= end:
+            for name, values in self.day_metrics(day).items():
+                totals[name] += values
+            day += timedelta(days=1)
+        for name in ("conversions", "conversions_value"):
+            totals[name] = np.round(totals[name], 2)
+        for values in totals.values():
+            values.flags.writeable = False
+        
+        with self._lock:
+            self._windows[key] = totals
+            while len(self._windows) > 8:
+                self._windows.popitem(last=False)
+        return totals
+    
+    def campaign_metrics(self, metrics: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Kulcsszó szintű metrikák kampány szintre összesítve"""
+        totals = {}
+        for name, values in metrics.items():
+            summed = np.bincount(self.keyword_campaign, weights=values, minlength=self.campaign_count)
+            totals[name] = np.round(summed).astype(np.int64) if values.dtype.kind == "i" else np.round(summed, 2)
+        return totals
+    
+    def campaign_column(self, field: str) -> np.ndarray:
+        """Kampány szintű szűrő / rendezési oszlop"""
+        if field == "campaign.id":
+            return self.campaign_ids
+        if field == "campaign.status":
+            return self.campaign_status
+        if field == "campaign.name":
+            return self.campaign_name_rank
+        raise ValueError(f"A fake backend nem támogatja a(z) {field} mezőt szűrésre/rendezésre")
+    
+    def keyword_column(self, field: str) -> np.ndarray:
+        """Kulcsszó szintű szűrő / rendezési oszlop (a kampány mezők kulcsszó szintre vetítve)"""
+        if field.startswith("campaign."):
+            return self.campaign_column(field)[self.keyword_campaign]
+        if field == "ad_group.id":
+            return self.ad_group_ids[self.keyword_ad_group]
+        if field == "ad_group_criterion.criterion_id":
+            return self.criterion_ids
+        if field == "ad_group_criterion.status":
+            return self.keyword_status
+        if field == "metrics.quality_score":
+            return self.quality_score
+        raise ValueError(f"A fake backend nem támogatja a(z) {field} mezőt szűrésre/rendezésre")
+    
+    def locate(self, resource_type: str, resource_name: str) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Egy módosítandó erőforrás indexe a fiókban
+        
+        Returns:
+            (index, None), vagy (None, hibaüzenet) ha az erőforrás nem létezik
+        """
+        pattern = _CRITERION_RESOURCE_PATTERN if resource_type == "ad_group_criterion" else _BUDGET_RESOURCE_PATTERN
+        match = pattern.match(resource_name)
+        if match is None or match.group("customer") != self.customer_id:
+            return None, f"Érvénytelen erőforrás név: {resource_name}"
+        
+        if resource_type == "ad_group_criterion":
+            index = int(match.group("criterion")) - CRITERION_ID_BASE
+            found = 0 <= index < self.keyword_count and (
+                self.ad_group_ids[self.keyword_ad_group[index]] == int(match.group("ad_group"))
+            )
+        else:
+            index = int(match.group("budget")) - BUDGET_ID_BASE
+            found = 0 <= index < self.campaign_count
+        if not found:
+            return None, f"Az erőforrás nem található: {resource_name}"
+        return index, None
+    
+    def check_change(self, resource_type: str, change: Dict[str, Any]) -> Optional[str]:
+        """Egy módosítás ellenőrzése (None: érvényes), a valódi API hibáinak megfelelően"""
+        _, error = self.locate(resource_type, change["resource_name"])
+        if error:
+            return error
+        value = change["value"]
+        if not isinstance(value, int) or value < BILLABLE_UNIT_MICROS:
+            return f"Túl alacsony érték: {value}"
+        if value % BILLABLE_UNIT_MICROS:
+            return f"Az érték nem a számlázható egység többszöröse: {value}"
+        return None
+    
+    def change_campaign(self, resource_type: str, resource_name: str) -> int:
+        """A módosított erőforrás kampánya (a költségvetések kampányonként különállók)"""
+        index, _ = self.locate(resource_type, resource_name)
+        if resource_type == "ad_group_criterion":
+            index = self.keyword_campaign[index]
+        return int(self.campaign_ids[index])
+    
+    def apply_change(self, resource_type: str, change: Dict[str, Any]) -> None:
+        """Egy (már ellenőrzött) módosítás alkalmazása"""
+        index, _ = self.locate(resource_type, change["resource_name"])
+        if resource_type == "ad_group_criterion":
+            self.cpc_bid_micros[index] = change["value"]
+        else:
+            self.campaign_budgets[index].amount_micros = change["value"]
+
+
+def _derived_metrics(metrics: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Kiegészíti a nyers metrikákat a számított arányokkal (ctr, average_cpc, ...)"""
+    impressions = metrics["impressions"]
+    clicks = metrics["clicks"]
+    cost_micros = metrics["cost_micros"]
+    conversions = metrics["conversions"]
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        derived = dict(metrics)
+        derived["ctr"] = np.where(impressions > 0, clicks / impressions, 0.0)
+        derived["average_cpc"] = np.where(clicks > 0, cost_micros / clicks, 0.0)
+        derived["cost_per_conversion"] = np.where(conversions > 0, cost_micros / conversions, 0.0)
+        derived["conversion_rate"] = np.where(clicks > 0, conversions / clicks, 0.0)
+    return derived
+
+
+class _ParsedQuery:
+    """Egy (a GaqlQuery által előállított alakú) GAQL lekérdezés elemei"""
+    
+    def __init__(self, query: str):
+        match = _QUERY_PATTERN.match(" ".join(query.split()))
+        if match is None:
+            raise ValueError(f"A fake backend nem tudja értelmezni a lekérdezést: {query}")
+        
+        self.resource = match.group("resource")
+        self.fields = [field.strip() for field in match.group("fields").split(",")]
+        self.window: Optional[Tuple[date, date]] = None
+        self.filters: List[Tuple[str, str, Any]] = []
+        self.order = match.group("order")
+        self.descending = (match.group("direction") or "ASC").upper() == "DESC"
+        self.limit = int(match.group("limit")) if match.group("limit") else None
+        
+        where = match.group("where") or ""
+        position = 0
+        while position < len(where):
+            condition = _CONDITION_PATTERN.match(where, position)
+            if condition is None:
+                raise ValueError(f"A fake backend nem támogatja a feltételt: {where[position:]}")
+            position = condition.end()
+            
+            field = condition.group("field")
+            if condition.group("start"):
+                self.window = (date.fromisoformat(condition.group("start")), date.fromisoformat(condition.group("end")))
+            elif condition.group("during"):
+                self.window = resolve_date_range(condition.group("during").upper())
+            elif condition.group("ids") is not None:
+                ids = [int(value) for value in condition.group("ids").split(",")]
+                self.filters.append((field, "IN", ids))
+            elif condition.group("names") is not None:
+                names = [value.strip().strip("'") for value in condition.group("names").split(",")]
+                self.filters.append((field, "IN", names))
+            else:
+                value = condition.group("value")
+                value = value.strip("'") if value.startswith("'") else (int(value) if value.isdigit() else value.upper())
+                self.filters.append((field, condition.group("op"), value))
+        
+        self.daily = "segments.date" in self.fields
+        if self.daily and self.window is None:
+            raise ValueError("segments.date lekérdezéséhez dátum feltétel szükséges")
+        self.needs_metrics = any(field.startswith("metrics.") for field in self.fields) or (
+            self.order is not None and self.order.startswith("metrics.")
+        )
+
+
+class FakeGoogleAdsBackend(GoogleAdsBackend):
+    """
+    Helyi szintetikus backend a valódi Google Ads API helyett
+    
+    Ugyanazokat a GAQL lekérdezéseket szolgálja ki (campaign, keyword_view,
+    customer_client, customer, change_status, change_event erőforrások),
+    mint amiket a GoogleAdsService küld, a
+    SyntheticAccount által generált adatokból. A hívásonkénti késleltetés és
+    a hibaarány (RESOURCE_EXHAUSTED GoogleAdsException) injektálható, így a
+    cache, a párhuzamosság, a kvóta ütemező és az elemzések élő hozzáférés
+    nélkül, reprodukálhatóan mérhetők. A kulcsszó bid és költségvetés
+    módosításokat (mutate, batch job) a memóriában alkalmazza, a valódi API
+    partial_failure és validate_only szemantikájával.
+    """
+    
+    name = "fake"
+    
+    def __init__(
+        self,
+        seed: int = 42,
+        campaigns: int = 50,
+        keywords: int = 5000,
+        days: int = 90,
+        client_accounts: int = 5,
+        latency_seconds: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: grpc.StatusCode = grpc.StatusCode.RESOURCE_EXHAUSTED,
+        batch_size: int = 10000,
+        max_accounts: int = 16
+    ):
+        """
+        Args:
+            seed: Seed a generátorhoz (azonos seed azonos adatokat ad)
+            campaigns: Kampányok száma fiókonként
+            keywords: Kulcsszavak száma fiókonként
+            days: Visszamenőleges napok száma, amelyekre adat van
+            client_accounts: Ügyfél fiókok száma manager (MCC) fiókonként
+            latency_seconds: Hívásonkénti késleltetés (az első sor előtt)
+            latency_jitter: A késleltetés relatív szórása (0.2 = ±20%)
+            error_rate: A hívások ekkora hányada hibával tér vissza
+            error_status: A szimulált hiba gRPC státusza
+            batch_size: Sorok száma stream batch-enként
+            max_accounts: Ennyi generált fiók marad memóriában (LRU)
+        """
+        # A paraméterek ellenőrzése már itt, ne csak az első lekérdezéskor
+        check_limits(campaigns, keywords, days)
+        
+        self.seed = seed
+        self.campaigns = campaigns
+        self.keywords = keywords
+        self.days = days
+        self.client_accounts = client_accounts
+        self.latency_seconds = latency_seconds
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.batch_size = batch_size
+        self.max_accounts = max_accounts
+        
+        self._accounts: "OrderedDict[str, SyntheticAccount]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+        self.batch_jobs = 0
+        # Alkalmazott módosítások ügyfelenként, hogy a kiszorított fiók újragenerálás után is megőrizze őket
+        self._changes: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+        # Változás napló ügyfelenként (időpont, változás típus, erőforrás név, kampány) a change_status / change_event lekérdezésekhez
+        self._change_log: Dict[str, List[Tuple[str, str, str, int]]] = {}
+    
+    def account(self, customer_id: str) -> SyntheticAccount:
+        """Az ügyfél szintetikus fiókja (első használatkor generálódik)"""
+        with self._lock:
+            account = self._accounts.get(customer_id)
+            if account is not None:
+                self._accounts.move_to_end(customer_id)
+                return account
+        
+        account = SyntheticAccount(customer_id, self.seed, self.campaigns, self.keywords, self.days)
+        with self._lock:
+            if customer_id not in self._accounts:
+                for (resource_type, _), change in self._changes.get(customer_id, {}).items():
+                    account.apply_change(resource_type, change)
+            account = self._accounts.setdefault(customer_id, account)
+            while len(self._accounts) > self.max_accounts:
+                self._accounts.popitem(last=False)
+        return account
+    
+    def search_stream(self, customer_id: str, query: str) -> Iterator[Any]:
+        # Mint a gRPC stream: a késleltetés és a hiba az első batch olvasásakor jelentkezik
+        self._simulate_call(customer_id)
+        chunks, builder = self._plan(customer_id, _ParsedQuery(query))
+        
+        for chunk in chunks:
+            size = len(chunk["index"])
+            for offset in range(0, size, self.batch_size):
+                yield SimpleNamespace(results=builder(chunk, offset, min(offset + self.batch_size, size)))
+    
+    def search_page(self, customer_id: str, query: str, page_size: int, page_token: Optional[str] = None) -> Any:
+        self._simulate_call(customer_id)
+        chunks, builder = self._plan(customer_id, _ParsedQuery(query))
+        start = int(page_token) if page_token else 0
+        
+        # Csak a lapra eső sorok épülnek fel, az előttük lévőket index szinten ugorja át
+        results: List[Any] = []
+        skip = start
+        has_more = False
+        for chunk in chunks:
+            size = len(chunk["index"])
+            if len(results) == page_size:
+                if size:
+                    has_more = True
+                    break
+                continue
+            if skip >= size:
+                skip -= size
+                continue
+            high = min(size, skip + page_size - len(results))
+            results.extend(builder(chunk, skip, high))
+            has_more = high < size
+            skip = 0
+            if has_more:
+                break
+        
+        next_token = str(start + len(results)) if has_more else ""
+        return SimpleNamespace(results=results, next_page_token=next_token)
+    
+    def mutate(
+        self,
+        customer_id: str,
+        resource_type: str,
+        operations: Sequence[Dict[str, Any]],
+        partial_failure: bool = True,
+        validate_only: bool = False
+    ) -> List[Optional[str]]:
+        self._simulate_call(customer_id)
+        return self._apply_changes(customer_id, resource_type, operations, partial_failure, validate_only)
+    
+    def run_batch_job(
+        self,
+        customer_id: str,
+        resource_type: str,
+        operations: Sequence[Dict[str, Any]]
+    ) -> List[Optional[str]]:
+        self._simulate_call(customer_id)
+        with self._lock:
+            self.batch_jobs += 1
+        # A batch job műveletei egymástól függetlenül sikerülnek vagy hibáznak
+        return self._apply_changes(customer_id, resource_type, operations, True, False)
+    
+    def _apply_changes(
+        self,
+        customer_id: str,
+        resource_type: str,
+        operations: Sequence[Dict[str, Any]],
+        partial_failure: bool,
+        validate_only: bool
+    ) -> List[Optional[str]]:
+        """Ellenőrzi és (validate_only nélkül) alkalmazza a módosításokat"""
+        account = self.account(customer_id)
+        errors = [account.check_change(resource_type, change) for change in operations]
+        if not partial_failure and any(errors):
+            # Részleges hiba mód nélkül egy hibás művelet az egész kérést meghiúsítja
+            first = next(error for error in errors if error)
+            return [error or f"A kérés meghiúsult: {first}" for error in errors]
+        if validate_only:
+            return errors
+        
+        changed_at = datetime.now(ZoneInfo(FAKE_TIME_ZONE)).strftime("%Y-%m-%d %H:%M:%S.%f")
+        with self._lock:
+            changes = self._changes.setdefault(customer_id, {})
+            log = self._change_log.setdefault(customer_id, [])
+            for change, error in zip(operations, errors):
+                if error is None:
+                    account.apply_change(resource_type, change)
+                    changes[(resource_type, change["resource_name"])] = dict(change)
+                    log.append((
+                        changed_at,
+                        _CHANGE_RESOURCE_TYPES[resource_type],
+                        change["resource_name"],
+                        account.change_campaign(resource_type, change["resource_name"])
+                    ))
+        return errors
+    
+    def _simulate_call(self, customer_id: str) -> None:
+        """Késleltetés és véletlen hiba a beállítások szerint"""
+        with self._lock:
+            self.calls += 1
+            jitter = self._random.uniform(-self.latency_jitter, self.latency_jitter)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.failures += 1
+        
+        if self.latency_seconds > 0:
+            time.sleep(max(0.0, self.latency_seconds * (1.0 + jitter)))
+        if failed:
+            error = _FakeRpcError(self.error_status)
+            raise GoogleAdsException(error, error, None, f"fake-{customer_id}-{self.calls}")
+    
+    def _plan(
+        self,
+        customer_id: str,
+        query: _ParsedQuery
+    ) -> Tuple[Iterator[Dict[str, Any]], Callable[[Dict[str, Any], int, int], List[Any]]]:
+        """
+        A lekérdezés végrehajtási terve
+        
+        Returns:
+            (darabok folyama, sor építő); egy darab a sorok szűrt és rendezett
+            entitás indexei a hozzájuk tartozó metrikákkal (napi lekérdezésnél
+            naponta egy darab), a sor építő egy darab [low, high) szeletéből
+            GoogleAdsRow-szerű objektumokat készít
+        """
+        if query.resource == "customer_client":
+            return iter([self._customer_client_chunk(customer_id, query)]), _customer_client_rows
+        if query.resource == "customer":
+            customer = SimpleNamespace(customer=SimpleNamespace(id=int(customer_id), time_zone=FAKE_TIME_ZONE))
+            return iter([{"index": np.arange(1), "rows": [customer]}]), _prebuilt_rows
+        if query.resource in ("change_status", "change_event"):
+            return iter([self._change_chunk(customer_id, query)]), _prebuilt_rows
+        
+        if query.resource not in ("campaign", "keyword_view"):
+            raise ValueError(f"A fake backend nem támogatja a(z) {query.resource} erőforrást")
+        
+        account = self.account(customer_id)
+        level = "campaign" if query.resource == "campaign" else "keyword"
+        builder = _campaign_rows if level == "campaign" else _keyword_rows
+        column = account.campaign_column if level == "campaign" else account.keyword_column
+        count = account.campaign_count if level == "campaign" else account.keyword_count
+        
+        mask = np.ones(count, dtype=bool)
+        for field, op, value in query.filters:
+            values = column(field)
+            if op == "IN":
+                mask &= np.isin(values, value)
+            elif op == "=":
+                mask &= values == value
+            elif op == "!=":
+                mask &= values != value
+            else:
+                raise ValueError(f"A fake backend nem támogatja a(z) {op} feltételt a(z) {field} mezőre")
+        
+        def chunk(metrics: Optional[Dict[str, np.ndarray]], day: Optional[date]) -> Dict[str, Any]:
+            selected = mask
+            if metrics is not None:
+                if level == "campaign":
+                    metrics = account.campaign_metrics(metrics)
+                metrics = _derived_metrics(metrics)
+                # A nulla megjelenítésű sorokat (napi bontásban és kulcsszavaknál) az API sem adja vissza
+                if query.daily or level == "keyword":
+                    selected = mask & (metrics["impressions"] > 0)
+            
+            index = np.flatnonzero(selected)
+            if query.order and query.order != "segments.date":
+                key = metrics[query.order[len("metrics."):]] if query.order.startswith("metrics.") else column(query.order)
+                order = np.argsort(key[index], kind="stable")
+                index = index[order[::-1]] if query.descending else index[order]
+            if query.limit is not None:
+                index = index[:query.limit]
+            return {
+                "account": account,
+                "index": index,
+                "metrics": metrics,
+                "date": day.isoformat() if day else None
+            }
+        
+        if not query.needs_metrics:
+            return iter([chunk(None, None)]), builder
+        
+        window = query.window or account.history()
+        if not query.daily:
+            return iter([chunk(account.window_metrics(*window), None)]), builder
+        
+        def daily_chunks() -> Iterator[Dict[str, Any]]:
+            first, last = account.history()
+            day, end = max(window[0], first), min(window[1], last)
+            while day <= end:
+                yield chunk(account.day_metrics(day), day)
+                day += timedelta(days=1)
+        
+        return daily_chunks(), builder
+    
+    def _change_chunk(self, customer_id: str, query: _ParsedQuery) -> Dict[str, Any]:
+        """
+        change_status / change_event sorok a változás naplóból
+        
+        A change_status erőforrásonként csak a legutolsó változást adja, a
+        change_event minden változást; mindkettő csak a kulcsszó bid és a
+        költségvetés módosításokat ismeri (a fake backend csak ezeket módosítja).
+        """
+        with self._lock:
+            log = list(self._change_log.get(customer_id, []))
+        
+        prefix = f"{query.resource}."
+        for field, op, value in query.filters:
+            name = field[len(prefix):] if field.startswith(prefix) else None
+            if name in ("last_change_date_time", "change_date_time") and op in (">=", "<="):
+                log = [entry for entry in log if (entry[0] >= value if op == ">=" else entry[0] <= value)]
+            elif name in ("resource_type", "change_resource_type") and op in ("IN", "="):
+                types = set(value) if op == "IN" else {value}
+                log = [entry for entry in log if entry[1] in types]
+            else:
+                raise ValueError(f"A fake backend nem támogatja a(z) {field} {op} feltételt")
+        
+        if query.resource == "change_status":
+            latest = {entry[2]: entry for entry in log}
+            rows = [
+                SimpleNamespace(change_status=SimpleNamespace(
+                    resource_type=_enum(resource_type),
+                    resource_status=_enum("CHANGED"),
+                    last_change_date_time=changed_at,
+                    campaign=f"customers/{customer_id}/campaigns/{campaign_id}",
+                    ad_group_criterion=resource_name if resource_type == "AD_GROUP_CRITERION" else ""
+                ))
+                for changed_at, resource_type, resource_name, campaign_id in latest.values()
+            ]
+        else:
+            rows = [
+                SimpleNamespace(change_event=SimpleNamespace(
+                    change_date_time=changed_at,
+                    change_resource_type=_enum(resource_type),
+                    change_resource_name=resource_name,
+                    campaign=f"customers/{customer_id}/campaigns/{campaign_id}"
+                ))
+                for changed_at, resource_type, resource_name, campaign_id in log
+            ]
+        if query.limit is not None:
+            rows = rows[:query.limit]
+        return {"index": np.arange(len(rows)), "rows": rows}
+    
+    def _customer_client_chunk(self, manager_id: str, query: _ParsedQuery) -> Dict[str, Any]:
+        """A manager fiók alá tartozó szintetikus ügyfél fiókok (mind aktív, nem manager)"""
+        base = _customer_seed(manager_id) % 9_000_000_000 + 1_000_000_000
+        index = np.arange(self.client_accounts, dtype=np.int64) + base + 1
+        for field, op, value in query.filters:
+            expected = {"customer_client.manager": "FALSE", "customer_client.status": "ENABLED"}.get(field)
+            if expected is None:
+                raise ValueError(f"A fake backend nem támogatja a(z) {field} mezőt szűrésre/rendezésre")
+            if (str(value).upper() == expected) != (op == "="):
+                index = index[:0]
+        return {"index": index}
+
+
+class _FakeRpcError(grpc.RpcError):
+    """Szimulált gRPC hiba (a GoogleAdsException `error` mezőjébe)"""
+    
+    def __init__(self, status: grpc.StatusCode):
+        self._status = status
+    
+    def code(self) -> grpc.StatusCode:
+        return self._status
+    
+    def details(self) -> str:
+        return "Szimulált hiba (fake Google Ads backend)"
+
+
+def _metric_lists(chunk: Dict[str, Any], index: np.ndarray) -> List[List[Any]]:
+    """A sorokhoz tartozó metrika értékek Python listákként (a sor építés sorrendjében)"""
+    metrics = chunk["metrics"]
+    return [
+        metrics[name][index].tolist()
+        for name in (
+            "impressions", "clicks", "ctr", "average_cpc", "cost_micros", "conversions",
+            "conversions_value", "cost_per_conversion", "conversion_rate"
+        )
+    ]
+
+
+def _metrics_row(
+    impressions: int,
+    clicks: int,
+    ctr: float,
+    average_cpc: float,
+    cost_micros: int,
+    conversions: float,
+    conversions_value: float,
+    cost_per_conversion: float,
+    conversion_rate: float
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        impressions=impressions,
+        clicks=clicks,
+        ctr=ctr,
+        average_cpc=average_cpc,
+        cost_micros=cost_micros,
+        conversions=conversions,
+        conversions_value=conversions_value,
+        cost_per_conversion=cost_per_conversion,
+        conversion_rate=conversion_rate
+    )
+
+
+def _campaign_rows(chunk: Dict[str, Any], low: int, high: int) -> List[Any]:
+    """campaign erőforrás sorok"""
+    account: SyntheticAccount = chunk["account"]
+    index = chunk["index"][low:high]
+    segments = SimpleNamespace(date=chunk["date"]) if chunk["date"] else None
+    campaigns = account.campaigns
+    budgets = account.campaign_budgets
+    
+    if chunk["metrics"] is None:
+        return [
+            SimpleNamespace(campaign=campaigns[i], campaign_budget=budgets[i])
+            for i in index.tolist()
+        ]
+    
+    return [
+        SimpleNamespace(
+            campaign=campaigns[i],
+            campaign_budget=budgets[i],
+            metrics=_metrics_row(*values),
+            segments=segments
+        )
+        for i, *values in zip(index.tolist(), *_metric_lists(chunk, index))
+    ]
+
+
+def _keyword_rows(chunk: Dict[str, Any], low: int, high: int) -> List[Any]:
+    """keyword_view erőforrás sorok"""
+    account: SyntheticAccount = chunk["account"]
+    index = chunk["index"][low:high]
+    segments = SimpleNamespace(date=chunk["date"]) if chunk["date"] else None
+    campaigns = account.campaigns
+    ad_groups = account.ad_groups
+    match_types = [_enum(name) for name in MATCH_TYPES]
+    statuses = {name: _enum(name) for name in CRITERION_STATUSES}
+    
+    rows = []
+    columns = zip(
+        account.keyword_campaign[index].tolist(),
+        account.keyword_ad_group[index].tolist(),
+        account.criterion_ids[index].tolist(),
+        account.keyword_text_index[index].tolist(),
+        account.keyword_match_type[index].tolist(),
+        account.keyword_status[index].tolist(),
+        account.quality_score[index].tolist(),
+        account.cpc_bid_micros[index].tolist(),
+        *(_metric_lists(chunk, index) if chunk["metrics"] is not None else [])
+    )
+    for campaign, ad_group, criterion_id, text_index, match_type, status, quality_score, bid, *values in columns:
+        metrics = _metrics_row(*values) if values else SimpleNamespace()
+        if quality_score:
+            metrics.quality_score = quality_score
+        rows.append(SimpleNamespace(
+            campaign=campaigns[campaign],
+            ad_group=ad_groups[ad_group],
+            ad_group_criterion=_Criterion(
+                account.customer_id,
+                ad_groups[ad_group].id,
+                criterion_id,
+                statuses[status],
+                SimpleNamespace(text=keyword_text(text_index), match_type=match_types[match_type]),
+                bid
+            ),
+            metrics=metrics,
+            segments=segments
+        ))
+    return rows
+
+
+class _Criterion:
+    """ad_group_criterion mező (az erőforrás név csak kérésre épül fel)"""
+    
+    __slots__ = ("customer_id", "ad_group_id", "criterion_id", "status", "keyword", "cpc_bid_micros")
+    
+    def __init__(self, customer_id: str, ad_group_id: int, criterion_id: int, status: Any, keyword: Any, cpc_bid_micros: int):
+        self.customer_id = customer_id
+        self.ad_group_id = ad_group_id
+        self.criterion_id = criterion_id
+        self.status = status
+        self.keyword = keyword
+        self.cpc_bid_micros = cpc_bid_micros
+    
+    @property
+    def resource_name(self) -> str:
+        return f"customers/{self.customer_id}/adGroupCriteria/{self.ad_group_id}~{self.criterion_id}"
+
+
+def _prebuilt_rows(chunk: Dict[str, Any], low: int, high: int) -> List[Any]:
+    """Előre felépített sorok (kis eredményhalmazú erőforrások)"""
+    return chunk["rows"][low:high]
+
+
+def _customer_client_rows(chunk: Dict[str, Any], low: int, high: int) -> List[Any]:
+    """customer_client erőforrás sorok"""
+    return [
+        SimpleNamespace(customer_client=SimpleNamespace(id=client_id, descriptive_name=f"Ügyfél {client_id}", level=1))
+        for client_id in chunk["index"][low:high].tolist()
+    ]
@@ -1,44 +1,1352 @@
 """
 Google Ads API integráció
 """
-from typing import Optional, List, Dict, Any
-from google.ads.googleads.client import GoogleAdsClient
-from google.ads.googleads.errors import GoogleAdsException
+from typing import Optional, List, Dict, Any, Iterator, Iterable, Tuple, Callable, Union, TYPE_CHECKING
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
+from operator import attrgetter
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from loguru import logger
-import os
+import math
+import re
+import sys
+import threading
+import time
+
+from app.config import settings
+from app.services.ads_backend import GoogleAdsBackend, create_backend, is_google_ads_error
+from app.services.change_tracker import (
+    AccountSnapshot,
+    ChangeSet,
+    ChangeTracker,
+    CHANGE_HISTORY_DAYS,
+    CHANGE_TIME_FORMAT
+)
+from app.services.columnar import (
+    ColumnarBuilder,
+    ColumnarResult,
+    CAMPAIGN_PERFORMANCE_SCHEMA,
+    CAMPAIGN_PERFORMANCE_FIELDS,
+    CAMPAIGN_DAILY_SCHEMA,
+    CAMPAIGN_DAILY_FIELDS,
+    KEYWORD_PERFORMANCE_SCHEMA,
+    KEYWORD_PERFORMANCE_FIELDS,
+    columnar_from_records
+)
+from app.services.scheduler import BACKGROUND, QuotaScheduler, get_quota_scheduler, request_priority
+
+# Az adattárház (SQLAlchemy) csak WAREHOUSE_ENABLED esetén töltődik be
+if TYPE_CHECKING:
+    from app.services.warehouse import PerformanceWarehouse
+
+
+def resolve_date_range(date_range: str, today: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Feloldja a GAQL dátum tartomány konstanst abszolút dátumokra
+    
+    Args:
+        date_range: GAQL DURING konstans (pl. LAST_7_DAYS, THIS_MONTH)
+        today: Referencia nap (alapértelmezetten a mai nap)
+        
+    Returns:
+        (kezdő nap, záró nap) pár, mindkettő inkluzív
+    """
+    today = today or date.today()
+    yesterday = today - timedelta(days=1)
+    
+    if date_range == "TODAY":
+        return today, today
+    if date_range == "YESTERDAY":
+        return yesterday, yesterday
+    if date_range.startswith("LAST_") and date_range.endswith("_DAYS"):
+        days = date_range[len("LAST_"):-len("_DAYS")]
+        if days.isdigit() and int(days) > 0:
+            return today - timedelta(days=int(days)), yesterday
+    if date_range == "THIS_MONTH":
+        return today.replace(day=1), today
+    if date_range == "LAST_MONTH":
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        return last_month_end.replace(day=1), last_month_end
+    if date_range == "THIS_WEEK_MON_TODAY":
+        return today - timedelta(days=today.weekday()), today
+    if date_range == "THIS_WEEK_SUN_TODAY":
+        return today - timedelta(days=(today.weekday() + 1) % 7), today
+    if date_range == "LAST_WEEK_MON_SUN":
+        start = today - timedelta(days=today.weekday() + 7)
+        return start, start + timedelta(days=6)
+    if date_range == "LAST_WEEK_SUN_SAT":
+        start = today - timedelta(days=(today.weekday() + 1) % 7 + 7)
+        return start, start + timedelta(days=6)
+    if date_range == "LAST_BUSINESS_WEEK":
+        start = today - timedelta(days=today.weekday() + 7)
+        return start, start + timedelta(days=4)
+    
+    raise ValueError(f"Nem támogatott dátum tartomány: {date_range}")
+
+
+# A GAQL `DURING` operátor által közvetlenül támogatott tartományok
+GAQL_DURING_RANGES = {
+    "TODAY",
+    "YESTERDAY",
+    "LAST_7_DAYS",
+    "LAST_14_DAYS",
+    "LAST_30_DAYS",
+    "THIS_MONTH",
+    "LAST_MONTH",
+    "THIS_WEEK_MON_TODAY",
+    "THIS_WEEK_SUN_TODAY",
+    "LAST_WEEK_MON_SUN",
+    "LAST_WEEK_SUN_SAT",
+    "LAST_BUSINESS_WEEK"
+}
+
+
+def date_condition(date_range: str) -> str:
+    """
+    GAQL dátum feltétel egy dátum tartomány konstanshoz
+    
+    A `DURING` által nem támogatott tartományokat (pl. LAST_90_DAYS)
+    abszolút `BETWEEN` feltétellé oldja fel.
+    
+    Args:
+        date_range: Dátum tartomány konstans
+        
+    Returns:
+        GAQL WHERE feltétel a segments.date mezőre
+    """
+    if date_range in GAQL_DURING_RANGES:
+        return f"segments.date DURING {date_range}"
+    
+    start, end = resolve_date_range(date_range)
+    return f"segments.date BETWEEN '{start.isoformat()}' AND '{end.isoformat()}'"
+
+
+def normalize_query(query: str) -> str:
+    """Egységesíti a GAQL lekérdezés szövegét (whitespace összevonás)"""
+    return " ".join(query.split())
+
+
+_GAQL_FIELD_PATTERN = re.compile(r"^[a-z_]+(\.[a-z_]+)+$")
+
+
+def validate_id(value: Any) -> int:
+    """
+    Ellenőriz egy Google Ads azonosítót (kampány, hirdetéscsoport stb.)
+    
+    Args:
+        value: Azonosító (szám vagy számjegyekből álló szöveg)
+        
+    Returns:
+        Az azonosító egész számként
+        
+    Raises:
+        ValueError: Ha az azonosító nem csak számjegyekből áll
+    """
+    text = str(value).strip()
+    if not text.isdigit():
+        raise ValueError(f"Érvénytelen azonosító: {value}")
+    return int(text)
+
+
+class GaqlQuery:
+    """
+    GAQL lekérdezés építő
+    
+    A lekérdezést mezőkészletből, szűrőkből és dátum ablakból állítja össze.
+    Az azonosító szűrők értékei validált egész számok (nem szöveg beillesztés),
+    a mezők és feltételek rendezve kerülnek a lekérdezésbe, így ugyanaz a
+    lekérdezés mindig ugyanazt a kanonikus szöveget adja, ami cache kulcsként
+    használható.
+    """
+    
+    def __init__(self, resource: str, fields: Iterable[str]):
+        """
+        Args:
+            resource: Lekérdezett erőforrás (pl. campaign, keyword_view)
+            fields: Lekérdezett mezők (pl. campaign.id, metrics.clicks)
+        """
+        self.resource = resource
+        self.fields = sorted(set(fields))
+        self.conditions: List[str] = []
+        self.ordering: Optional[str] = None
+        self.row_limit: Optional[int] = None
+        
+        for field in self.fields:
+            self._check_field(field)
+        if not self.fields:
+            raise ValueError("Legalább egy lekérdezett mező szükséges")
+    
+    @staticmethod
+    def _check_field(field: str) -> None:
+        """Ellenőrzi a mező nevét (csak `erőforrás.mező` alakú név engedélyezett)"""
+        if not _GAQL_FIELD_PATTERN.match(field):
+            raise ValueError(f"Érvénytelen GAQL mező: {field}")
+    
+    def during(self, date_range: str) -> "GaqlQuery":
+        """Dátum ablak egy dátum tartomány konstansból"""
+        self.conditions.append(date_condition(date_range))
+        return self
+    
+    def between(self, start: date, end: date) -> "GaqlQuery":
+        """Dátum ablak abszolút napokkal (mindkét vége zárt)"""
+        self.conditions.append(f"segments.date BETWEEN '{start.isoformat()}' AND '{end.isoformat()}'")
+        return self
+    
+    def where_id(self, field: str, value: Any) -> "GaqlQuery":
+        """Egyenlőség szűrő egy validált azonosítóra"""
+        self._check_field(field)
+        self.conditions.append(f"{field} = {validate_id(value)}")
+        return self
+    
+    def where_ids(self, field: str, values: Iterable[Any]) -> "GaqlQuery":
+        """IN szűrő validált azonosítókra"""
+        self._check_field(field)
+        ids = sorted({validate_id(value) for value in values})
+        if not ids:
+            raise ValueError(f"Üres azonosító lista a(z) {field} szűrőhöz")
+        self.conditions.append(f"{field} IN ({', '.join(str(i) for i in ids)})")
+        return self
+    
+    def where(self, condition: str) -> "GaqlQuery":
+        """Állandó feltétel (pl. státusz szűrő); felhasználói érték nem kerülhet bele"""
+        self.conditions.append(" ".join(condition.split()))
+        return self
+    
+    def order_by(self, field: str, descending: bool = True) -> "GaqlQuery":
+        """Rendezés egy mező szerint"""
+        self._check_field(field)
+        self.ordering = f"{field} {'DESC' if descending else 'ASC'}"
+        return self
+    
+    def changed_between(self, field: str, start: datetime, end: datetime) -> "GaqlQuery":
+        """Dátum-idő ablak (mindkét vége zárt), pl. change_status.last_change_date_time"""
+        self._check_field(field)
+        self.conditions.append(f"{field} >= '{start.strftime(CHANGE_TIME_FORMAT)}'")
+        self.conditions.append(f"{field} <= '{end.strftime(CHANGE_TIME_FORMAT)}'")
+        return self
+    
+    def limit(self, count: int) -> "GaqlQuery":
+        """Legfeljebb ennyi sor"""
+        if int(count) <= 0:
+            raise ValueError(f"Érvénytelen sor korlát: {count}")
+        self.row_limit = int(count)
+        return self
+    
+    def build(self) -> str:
+        """
+        Kanonikus GAQL lekérdezés szöveg
+        
+        Returns:
+            Egysoros GAQL lekérdezés
+        """
+        query = f"SELECT {', '.join(self.fields)} FROM {self.resource}"
+        if self.conditions:
+            query += f" WHERE {' AND '.join(sorted(set(self.conditions)))}"
+        if self.ordering:
+            query += f" ORDER BY {self.ordering}"
+        if self.row_limit is not None:
+            query += f" LIMIT {self.row_limit}"
+        return query
+    
+    def __str__(self) -> str:
+        return self.build()
+
+
+# Kampány teljesítmény riport: kimeneti mező -> a kiszámításához szükséges GAQL mezők
+CAMPAIGN_PERFORMANCE_FIELD_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "campaign_id": ("campaign.id",),
+    "campaign_name": ("campaign.name",),
+    "impressions": ("metrics.impressions",),
+    "clicks": ("metrics.clicks",),
+    "ctr": ("metrics.ctr",),
+    "average_cpc": ("metrics.average_cpc",),
+    "cost": ("metrics.cost_micros",),
+    "conversions": ("metrics.conversions",),
+    "conversions_value": ("metrics.conversions_value",),
+    "cost_per_conversion": ("metrics.cost_per_conversion",),
+    "conversion_rate": ("metrics.conversion_rate",),
+    "roas": ("metrics.conversions_value", "metrics.cost_micros")
+}
+
+# Kampány teljesítmény oszlopos séma: oszlop -> GAQL mező
+CAMPAIGN_PERFORMANCE_COLUMN_SOURCES: Dict[str, str] = {
+    "campaign_id": "campaign.id",
+    "campaign_name": "campaign.name",
+    "impressions": "metrics.impressions",
+    "clicks": "metrics.clicks",
+    "ctr": "metrics.ctr",
+    "average_cpc_micros": "metrics.average_cpc",
+    "cost_micros": "metrics.cost_micros",
+    "conversions": "metrics.conversions",
+    "conversions_value": "metrics.conversions_value",
+    "cost_per_conversion_micros": "metrics.cost_per_conversion",
+    "conversion_rate": "metrics.conversion_rate"
+}
+
+# A kampány riport mindig tartalmazza az azonosító mezőket
+CAMPAIGN_KEY_FIELDS = ("campaign_id", "campaign_name")
+
+
+def campaign_performance_projection(fields: Optional[Iterable[str]] = None) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Feloldja a kampány teljesítmény riport mezőkészletét
+    
+    Args:
+        fields: Igényelt kimeneti mezők (None esetén az összes); a kampány
+            azonosító és név mindig benne van
+            
+    Returns:
+        (lekérdezendő GAQL mezők, a belőlük előálló kimeneti mezők)
+        
+    Raises:
+        ValueError: Ismeretlen mező esetén
+    """
+    if fields is None:
+        names = set(CAMPAIGN_PERFORMANCE_FIELD_SOURCES)
+    else:
+        names = set(CAMPAIGN_KEY_FIELDS) | set(fields)
+        unknown = names - set(CAMPAIGN_PERFORMANCE_FIELD_SOURCES)
+        if unknown:
+            raise ValueError(f"Ismeretlen kampány teljesítmény mező(k): {', '.join(sorted(unknown))}")
+    
+    gaql_fields = tuple(sorted({source for name in names for source in CAMPAIGN_PERFORMANCE_FIELD_SOURCES[name]}))
+    return gaql_fields, _campaign_output_fields(gaql_fields)
+
+
+def _campaign_output_fields(gaql_fields: Iterable[str]) -> Tuple[str, ...]:
+    """A GAQL mezőkből kiszámítható kimeneti mezők (a teljes riport mezősorrendjében)"""
+    selected = set(gaql_fields)
+    return tuple(
+        name for name in CAMPAIGN_PERFORMANCE_FIELDS
+        if selected.issuperset(CAMPAIGN_PERFORMANCE_FIELD_SOURCES[name])
+    )
+
+
+class ReportCache:
+    """
+    TTL + LRU cache a GAQL riport eredményekhez
+    
+    A bejegyzések kulcsa (ügyfél, normalizált GAQL, abszolút dátum tartomány),
+    így a relatív tartományok (pl. LAST_30_DAYS) éjfélkor automatikusan új
+    kulcsot kapnak. A cache a bejegyzések számát és becsült memóriaméretét is
+    korlátozza, túllépéskor a legrégebben használt bejegyzést dobja el. A
+    bejegyzések kampány hatóköre (egy kampány vagy a teljes fiók) alapján a
+    változott kampányokat érintő bejegyzések célzottan érvényteleníthetők.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 512,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: float = 900
+    ):
+        """
+        Inicializálja a cache-t
+        
+        Args:
+            max_entries: Bejegyzések maximális száma
+            max_bytes: Becsült maximális memóriahasználat bájtban
+            ttl_seconds: Alapértelmezett élettartam másodpercben
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, List[Dict[str, Any]], Optional[frozenset]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Tuple) -> Optional[Union[List[Dict[str, Any]], ColumnarResult]]:
+        """
+        Visszaadja a kulcshoz tartozó sorokat, ha érvényesek
+        
+        Args:
+            key: Cache kulcs
+            
+        Returns:
+            A sorok listájának másolata (oszlopos eredménynél maga a csak
+            olvasható eredmény), vagy None ha nincs találat
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, size, rows, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _share_rows(rows)
+    
+    def set(
+        self,
+        key: Tuple,
+        rows: Union[List[Dict[str, Any]], ColumnarResult],
+        ttl_seconds: Optional[float] = None,
+        campaign_ids: Optional[Iterable[int]] = None
+    ) -> None:
+        """
+        Eltárolja a sorokat a kulcs alatt
+        
+        Args:
+            key: Cache kulcs
+            rows: Tárolandó sorok
+            ttl_seconds: Bejegyzés élettartama (alapértelmezetten a cache TTL-je)
+            campaign_ids: A riportban szereplő kampányok (None: a teljes fiók)
+        """
+        size = _estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        
+        expires_at = time.monotonic() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            scope = frozenset(campaign_ids) if campaign_ids is not None else None
+            self._entries[key] = (expires_at, size, _share_rows(rows), scope)
+            self._bytes += size
+            
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+    
+    def invalidate(self, customer_id: Optional[str] = None) -> int:
+        """
+        Érvényteleníti a bejegyzéseket
+        
+        Args:
+            customer_id: Ha meg van adva, csak ennek az ügyfélnek a bejegyzései törlődnek
+            
+        Returns:
+            Törölt bejegyzések száma
+        """
+        with self._lock:
+            keys = [k for k in self._entries if customer_id is None or k[0] == customer_id]
+            for key in keys:
+                self._remove(key)
+        
+        logger.info(f"Riport cache érvénytelenítve: {len(keys)} bejegyzés")
+        return len(keys)
+    
+    def invalidate_campaigns(self, customer_id: str, campaign_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Érvényteleníti a megadott kampányokat érintő bejegyzéseket
+        
+        A teljes fiókra szóló riportok minden kampányt érintenek.
+        
+        Args:
+            customer_id: Ügyfél azonosító
+            campaign_ids: Változott kampányok (None: az ügyfél összes bejegyzése)
+            
+        Returns:
+            Törölt bejegyzések száma
+        """
+        if campaign_ids is None:
+            return self.invalidate(customer_id)
+        
+        changed = set(campaign_ids)
+        with self._lock:
+            keys = [
+                key for key, (_, _, _, scope) in self._entries.items()
+                if key[0] == customer_id and (scope is None or not scope.isdisjoint(changed))
+            ]
+            for key in keys:
+                self._remove(key)
+        
+        if keys:
+            logger.info(f"Riport cache: {len(keys)} bejegyzés érvénytelenítve {len(changed)} változott kampány miatt")
+        return len(keys)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Visszaadja a cache találati és méret statisztikáit"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "estimated_bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+    
+    def _remove(self, key: Tuple) -> None:
+        """Eltávolít egy bejegyzést (a lock-ot a hívó tartja)"""
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class _InFlightCall:
+    """Egy folyamatban lévő upstream hívás állapota"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Azonos, egyidejűleg futó hívások összevonása
+    
+    Ha ugyanarra a kulcsra már fut egy hívás, a későbbi hívók nem indítanak
+    új upstream kérést, hanem megvárják az elsőt, és annak eredményét
+    (vagy kivételét) kapják meg.
+    """
+    
+    def __init__(self):
+        """Inicializálja az összevonó réteget"""
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple, _InFlightCall] = {}
+        self.executed = 0
+        self.coalesced = 0
+    
+    def do(self, key: Tuple, func: Callable[[], Any]) -> Any:
+        """
+        Végrehajtja a függvényt, vagy csatlakozik egy futó azonos híváshoz
+        
+        Args:
+            key: A hívást azonosító kulcs
+            func: Az upstream hívást végző függvény
+            
+        Returns:
+            A (közös) hívás eredménye
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Visszaadja az összevonási statisztikákat"""
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "in_flight": len(self._calls),
+                "upstream_calls": self.executed,
+                "coalesced_calls": self.coalesced,
+                "coalesced_ratio": self.coalesced / total if total else 0.0
+            }
+
+
+def _share_rows(rows: Union[List[Dict[str, Any]], ColumnarResult]) -> Union[List[Dict[str, Any]], ColumnarResult]:
+    """A hívónak átadható példány: a listából másolat, az oszlopos eredményt (csak olvasásra) közösen használják"""
+    if isinstance(rows, ColumnarResult):
+        return rows
+    return list(rows)
+
+
+def _estimate_size(rows: Union[List[Dict[str, Any]], ColumnarResult]) -> int:
+    """Becsli a sorok memóriaméretét az első sor alapján"""
+    if isinstance(rows, ColumnarResult):
+        return rows.nbytes
+    
+    size = sys.getsizeof(rows)
+    if rows:
+        first = rows[0]
+        row_size = sys.getsizeof(first) + sum(sys.getsizeof(v) for v in first.values())
+        size += row_size * len(rows)
+    return size
 
 
 class GoogleAdsService:
     """Google Ads API szolgáltatás osztály"""
     
-    def __init__(self, config_file: str = "google-ads.yaml"):
+    def __init__(
+        self,
+        config_file: str = "google-ads.yaml",
+        cache: Optional[ReportCache] = None,
+        warehouse: Optional["PerformanceWarehouse"] = None,
+        scheduler: Optional[QuotaScheduler] = None,
+        backend: Optional[GoogleAdsBackend] = None,
+        change_tracker: Optional[ChangeTracker] = None
+    ):
+        """
+        Inicializálja a Google Ads klienst
+        
+        Args:
+            config_file: Google Ads konfiguráció fájl elérési útja
+            cache: Riport cache (alapértelmezetten a beállítások szerint jön létre)
+            warehouse: Helyi teljesítmény adattárház (opcionális)
+            scheduler: Kvóta ütemező (alapértelmezetten a folyamat közös ütemezője)
+            backend: GAQL backend (alapértelmezetten a GOOGLE_ADS_BACKEND beállítás szerint)
+            change_tracker: Fiók változás követő (kampány pillanatképek és figyelők)
+        """
+        self.config_file = config_file
+        self.warehouse = warehouse
+        self.scheduler = scheduler if scheduler is not None else get_quota_scheduler()
+        self.backend = backend if backend is not None else create_backend(settings.GOOGLE_ADS_BACKEND, config_file)
+        self.cache = cache if cache is not None else ReportCache(
+            max_entries=settings.REPORT_CACHE_MAX_ENTRIES,
+            max_bytes=settings.REPORT_CACHE_MAX_MB * 1024 * 1024,
+            ttl_seconds=settings.REPORT_CACHE_TTL_SECONDS
+        )
+        self.single_flight = SingleFlight()
+        self.change_tracker = change_tracker if change_tracker is not None else ChangeTracker()
+        # A változott kampányokat érintő riportok a TTL lejárta előtt is újra lekérdeződnek
+        self.change_tracker.add_listener(self._invalidate_changed)
+        self._invalidation_listeners: List[Callable[[Optional[str]], None]] = []
+    
+    def is_configured(self) -> bool:
+        """Ellenőrzi, hogy a kliens konfigurálva van-e"""
+        return self.backend is not None
+    
+    def warmup(self) -> Dict[str, Any]:
+        """
+        Bemelegíti a backendet (kliens, gRPC csatorna, szolgáltatás stubok)
+        
+        Returns:
+            A bemelegítés részletei
+        """
+        if not self.is_configured():
+            return {"backend": None}
+        return self.backend.warmup()
+    
+    def _search_stream(self, customer_id: str, query: str) -> Iterator[Any]:
+        """
+        Végrehajt egy GAQL lekérdezést search_stream-mel
+        
+        A sorokat batch-enként, a megérkezésük sorrendjében adja tovább, így a hívó
+        már az utolsó batch beérkezése előtt elkezdheti a feldolgozást. A hívás
+        a kvóta ütemezőn keresztül indul (rátakorlát, prioritás, backoff).
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            query: GAQL lekérdezés
+            
+        Yields:
+            GoogleAdsRow objektumok
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        stream = self.scheduler.stream(customer_id, lambda: self.backend.search_stream(customer_id, query))
+        
+        for batch in stream:
+            for row in batch.results:
+                yield row
+    
+    def iter_campaigns(self, customer_id: str, campaign_ids: Optional[Iterable[Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streameli az összes kampányt egy ügyfél fiókból
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_ids: Ha meg van adva, csak ezek a kampányok
+            
+        Yields:
+            Kampány adatok soronként
+        """
+        query = GaqlQuery("campaign", [
+            "campaign.id",
+            "campaign.name",
+            "campaign.status",
+            "campaign.advertising_channel_type",
+            "campaign.bidding_strategy_type",
+            "campaign_budget.resource_name",
+            "campaign_budget.amount_micros"
+        ]).order_by("campaign.name", descending=False)
+        if campaign_ids is not None:
+            query.where_ids("campaign.id", campaign_ids)
+        
+        for row in self._search_stream(customer_id, query.build()):
+            yield _decode_campaign_row(row)
+    
+    def iter_campaign_performance(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS"
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streameli a kampány teljesítmény adatokat
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_id: Kampány azonosító (opcionális, ha nincs megadva, minden kampányt lekérdez)
+            date_range: Dátum tartomány (pl. LAST_7_DAYS, LAST_30_DAYS, THIS_MONTH)
+            
+        Yields:
+            Teljesítmény adatok soronként
+        """
+        query = self._campaign_performance_query(campaign_id, date_range)
+        
+        for row in self._search_stream(customer_id, query):
+            yield _decode_campaign_performance_row(row)
+    
+    def iter_campaign_chunks(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS",
+        chunk_size: int = 10000
+    ) -> Iterator[ColumnarResult]:
+        """
+        Streameli a kampány teljesítmény riportot rögzített méretű oszlopos darabokban
+        
+        A darabok az adattárházból (ha lefedi a tartományt) vagy a
+        search_stream-ből érkeznek, a riport cache megkerülésével.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_id: Kampány azonosító (opcionális)
+            date_range: Dátum tartomány
+            chunk_size: Egy darab sorainak száma
+            
+        Yields:
+            Oszlopos kampány teljesítmény darabok
+        """
+        gaql_fields, output_fields = campaign_performance_projection()
+        
+        window = self._warehouse_window(customer_id, "campaign", date_range)
+        if window is not None:
+            performance_data = self.warehouse.get_campaign_performance(customer_id, *window, campaign_id=campaign_id)
+            for start in range(0, len(performance_data), chunk_size):
+                yield columnar_from_records(
+                    performance_data[start:start + chunk_size], _campaign_schema(gaql_fields), output_fields
+                )
+            return
+        
+        rows = self._search_stream(customer_id, self._campaign_performance_query(campaign_id, date_range, gaql_fields))
+        while True:
+            chunk = _collect_campaign_performance_columnar(islice(rows, chunk_size))
+            if not len(chunk):
+                return
+            yield chunk
+    
+    def _campaign_performance_query(
+        self,
+        campaign_id: Optional[str],
+        date_range: str,
+        gaql_fields: Optional[Iterable[str]] = None
+    ) -> str:
+        """Összeállítja a kampány teljesítmény GAQL lekérdezést (alapértelmezetten az összes mezővel)"""
+        if gaql_fields is None:
+            gaql_fields, _ = campaign_performance_projection()
+        
+        query = GaqlQuery("campaign", gaql_fields).during(date_range)
+        if campaign_id:
+            query.where_id("campaign.id", campaign_id)
+        if "metrics.impressions" in query.fields:
+            query.order_by("metrics.impressions")
+        return query.build()
+    
+    def iter_keywords_performance(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS"
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streameli a kulcsszavak teljesítményét
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_id: Kampány azonosító (opcionális)
+            date_range: Dátum tartomány
+            
+        Yields:
+            Kulcsszó teljesítmény adatok soronként
+        """
+        query = self._keywords_performance_query(campaign_id, date_range)
+        
+        for row in self._search_stream(customer_id, query):
+            yield _decode_keyword_performance_row(row)
+    
+    def _keywords_performance_query(self, campaign_id: Optional[str], date_range: str) -> str:
+        """Összeállítja a kulcsszó teljesítmény GAQL lekérdezést"""
+        query = GaqlQuery("keyword_view", [
+            "campaign.id",
+            "campaign.name",
+            "ad_group.id",
+            "ad_group.name",
+            "ad_group_criterion.keyword.text",
+            "ad_group_criterion.keyword.match_type",
+            "metrics.impressions",
+            "metrics.clicks",
+            "metrics.ctr",
+            "metrics.average_cpc",
+            "metrics.cost_micros",
+            "metrics.conversions",
+            "metrics.conversions_value",
+            "metrics.quality_score"
+        ]).during(date_range).where("ad_group_criterion.status = 'ENABLED'")
+        
+        if campaign_id:
+            query.where_id("campaign.id", campaign_id)
+        return query.order_by("metrics.impressions").build()
+    
+    def get_keywords_page(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS",
+        page_size: int = 1000,
+        page_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lekérdezi a kulcsszó teljesítmény egy lapját
+        
+        Élő lekérdezésnél a Google Ads API szerver oldali lapozását (page_token)
+        használja (impressions szerint rendezve). Adattárházból kiszolgált
+        tartománynál a sorok a (hirdetéscsoport, kulcsszó) kulcs szerint
+        rendezettek, a token az előző lap utolsó kulcsa
+        (`wh:<ad_group_id>:<criterion_id>`), így a lapok költsége nem nő.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_id: Kampány azonosító (opcionális)
+            date_range: Dátum tartomány
+            page_size: Lapméret (legfeljebb 10000)
+            page_token: Az előző lap által visszaadott token (első lapnál None)
+            
+        Returns:
+            (kulcsszó adatok, következő lap tokenje vagy None)
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        window = self._warehouse_window(customer_id, "keyword", date_range)
+        if window is not None:
+            rows, next_key = self.warehouse.get_keywords_page(
+                customer_id, *window, campaign_id=campaign_id, page_size=page_size, after=_parse_warehouse_token(page_token)
+            )
+            return rows, (f"wh:{next_key[0]}:{next_key[1]}" if next_key is not None else None)
+        
+        if page_token and page_token.startswith("wh:"):
+            raise ValueError("A lap token az adattárházhoz tartozik, de a tartomány már nem onnan szolgálható ki")
+        
+        try:
+            query = self._keywords_performance_query(campaign_id, date_range)
+            page = self.scheduler.call(
+                customer_id,
+                lambda: self.backend.search_page(customer_id, query, page_size, page_token)
+            )
+            keywords_data = [_decode_keyword_performance_row(row) for row in page.results]
+            
+            logger.info(f"Kulcsszó lap lekérdezve: {len(keywords_data)} rekord")
+            return keywords_data, page.next_page_token or None
+            
+        except Exception as e:
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba a kulcsszó lap lekérdezésekor: {e}")
+            raise
+    
+    def iter_keyword_chunks(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS",
+        chunk_size: int = 10000,
+        columnar: bool = False
+    ) -> Iterator[Union[List[Dict[str, Any]], ColumnarResult]]:
+        """
+        Streameli a teljes kulcsszó riportot rögzített méretű darabokban
+        
+        A teljes fiók egyszerre sosem kerül memóriába; a darabok az adattárház
+        egyetlen streamelt lekérdezéséből (ha lefedi a tartományt) vagy a
+        search_stream-ből érkeznek.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_id: Kampány azonosító (opcionális)
+            date_range: Dátum tartomány
+            chunk_size: Egy darab sorainak száma
+            columnar: Ha True, a darabok ColumnarResult-ként érkeznek szótár listák helyett
+            
+        Yields:
+            Kulcsszó adatok listái (vagy oszlopos darabok)
+        """
+        window = self._warehouse_window(customer_id, "keyword", date_range)
+        if window is not None:
+            for chunk in self.warehouse.iter_keywords_performance(
+                customer_id, *window, campaign_id=campaign_id, chunk_size=chunk_size
+            ):
+                if columnar:
+                    chunk = columnar_from_records(chunk, KEYWORD_PERFORMANCE_SCHEMA, KEYWORD_PERFORMANCE_FIELDS)
+                yield chunk
+            return
+        
+        query = self._keywords_performance_query(campaign_id, date_range)
+        rows = self._search_stream(customer_id, query)
+        while True:
+            if columnar:
+                chunk = _collect_keyword_performance_columnar(islice(rows, chunk_size))
+            else:
+                chunk = [_decode_keyword_performance_row(row) for row in islice(rows, chunk_size)]
+            if not len(chunk):
+                return
+            yield chunk
+    
+    def iter_campaign_daily_metrics(self, customer_id: str, start: date, end: date) -> Iterator[Dict[str, Any]]:
+        """
+        Streameli a kampányok napi szintű nyers metrikáit (adattárház szinkronhoz)
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            start: Kezdő nap
+            end: Záró nap
+            
+        Yields:
+            Kampány/nap sorok
+        """
+        query = GaqlQuery("campaign", [
+            "segments.date",
+            "campaign.id",
+            "campaign.name",
+            "metrics.impressions",
+            "metrics.clicks",
+            "metrics.cost_micros",
+            "metrics.conversions",
+            "metrics.conversions_value"
+        ]).between(start, end).build()
+        
+        for row in self._search_stream(customer_id, query):
+            yield _decode_campaign_daily_row(row)
+    
+    def iter_keyword_daily_metrics(self, customer_id: str, start: date, end: date) -> Iterator[Dict[str, Any]]:
+        """
+        Streameli a kulcsszavak napi szintű nyers metrikáit (adattárház szinkronhoz)
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            start: Kezdő nap
+            end: Záró nap
+            
+        Yields:
+            Kulcsszó/nap sorok
+        """
+        query = GaqlQuery("keyword_view", [
+            "segments.date",
+            "campaign.id",
+            "campaign.name",
+            "ad_group.id",
+            "ad_group.name",
+            "ad_group_criterion.criterion_id",
+            "ad_group_criterion.keyword.text",
+            "ad_group_criterion.keyword.match_type",
+            "metrics.impressions",
+            "metrics.clicks",
+            "metrics.cost_micros",
+            "metrics.conversions",
+            "metrics.conversions_value",
+            "metrics.quality_score"
+        ]).between(start, end).where("ad_group_criterion.status = 'ENABLED'").build()
+        
+        for row in self._search_stream(customer_id, query):
+            yield _decode_keyword_daily_row(row)
+    
+    def _warehouse_window(self, customer_id: str, entity: str, date_range: str) -> Optional[Tuple[date, date]]:
+        """
+        Visszaadja a feloldott dátum tartományt, ha az adattárház ki tudja szolgálni
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            entity: campaign vagy keyword
+            date_range: Dátum tartomány konstans
+            
+        Returns:
+            (kezdő nap, záró nap), vagy None ha élő API lekérdezés szükséges
+        """
+        if self.warehouse is None:
+            return None
+        
+        from app.services.warehouse import WAREHOUSE_DATE_RANGES
+        
+        if date_range not in WAREHOUSE_DATE_RANGES:
+            return None
+        
+        start, end = resolve_date_range(date_range)
+        if not self.warehouse.covers(customer_id, entity, start, end):
+            return None
+        return start, end
+    
+    def describe_data_source(self, customer_id: str, entity: str, date_range: str) -> Dict[str, Any]:
+        """
+        Leírja, honnan szolgálja ki a szolgáltatás az adott riportot
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            entity: campaign vagy keyword
+            date_range: Dátum tartomány konstans
+            
+        Returns:
+            Adatforrás (warehouse vagy api) és az adattárház frissessége
+        """
+        if self._warehouse_window(customer_id, entity, date_range) is None:
+            return {"source": "api", "freshness": None}
+        
+        return {
+            "source": "warehouse",
+            "freshness": self.warehouse.get_freshness(customer_id, entity)
+        }
+    
+    def sync_warehouse(self, customer_id: str) -> Dict[str, Any]:
+        """
+        Inkrementálisan szinkronizálja egy ügyfél napi metrikáit a helyi adattárházba
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            
+        Returns:
+            Szinkronizálási eredmény
+        """
+        if self.warehouse is None:
+            raise ValueError("A helyi adattárház nincs engedélyezve (WAREHOUSE_ENABLED)")
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        # Háttér munka: az interaktív lekérdezések elsőbbséget kapnak a kvótából
+        with request_priority(BACKGROUND):
+            result = self.warehouse.sync_customer(
+                customer_id,
+                self,
+                history_days=settings.WAREHOUSE_HISTORY_DAYS,
+                lag_days=settings.WAREHOUSE_CONVERSION_LAG_DAYS
+            )
+        self.invalidate_cache(customer_id)
+        return result
+    
+    def _cached_report(
+        self,
+        customer_id: str,
+        query: str,
+        date_range: Optional[str],
+        decoder: Callable[[Iterator[Any]], Union[List[Dict[str, Any]], ColumnarResult]],
+        ttl_seconds: Optional[float] = None,
+        campaign_id: Optional[str] = None
+    ) -> Union[List[Dict[str, Any]], ColumnarResult]:
+        """
+        Lefuttat egy riport lekérdezést a riport cache-en keresztül
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            query: GAQL lekérdezés
+            date_range: Dátum tartomány konstans (a cache kulcshoz oldjuk fel), dátum nélküli lekérdezésnél None
+            decoder: A sor folyamot dekódoló függvény (szótár listát vagy ColumnarResult-ot ad)
+            ttl_seconds: Bejegyzés élettartama (alapértelmezetten a cache TTL-je)
+            campaign_id: Ha a riport egy kampányra szűkített, a kampány (a célzott érvénytelenítéshez)
+            
+        Returns:
+            Dekódolt sorok listája vagy oszlopos eredmény
+        """
+        if date_range is not None:
+            start, end = resolve_date_range(date_range)
+            window = (start.isoformat(), end.isoformat())
+        else:
+            window = ("", "")
+        # A dekódoló is a kulcs része: ugyanaz a lekérdezés szótár és oszlopos formában külön bejegyzés
+        key = (customer_id, normalize_query(query)) + window + (decoder.__name__,)
+        
+        rows = self.cache.get(key)
+        if rows is not None:
+            return rows
+        
+        def fetch() -> Union[List[Dict[str, Any]], ColumnarResult]:
+            fetched = decoder(self._search_stream(customer_id, query))
+            self.cache.set(key, fetched, ttl_seconds, campaign_ids=[int(campaign_id)] if campaign_id else None)
+            return fetched
+        
+        # Az egyidejű azonos kérések egyetlen upstream hívást osztanak meg
+        return _share_rows(self.single_flight.do(key, fetch))
+    
+    def get_customer_clients(self, manager_id: str) -> List[str]:
+        """
+        Lekérdezi egy manager (MCC) fiók alá tartozó ügyfél fiókokat
+        
+        A customer_client hierarchiát bejárva az összes aktív, nem manager
+        ügyfél fiókot visszaadja. Az eredmény CUSTOMER_HIERARCHY_CACHE_TTL_SECONDS
+        ideig cache-elődik.
+        
+        Args:
+            manager_id: Manager fiók azonosító
+            
+        Returns:
+            Ügyfél azonosítók listája
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        query = GaqlQuery("customer_client", [
+            "customer_client.id",
+            "customer_client.descriptive_name",
+            "customer_client.level"
+        ]).where("customer_client.manager = FALSE").where("customer_client.status = 'ENABLED'").build()
+        
+        try:
+            clients = self._cached_report(
+                manager_id,
+                query,
+                None,
+                _decode_customer_client_rows,
+                ttl_seconds=settings.CUSTOMER_HIERARCHY_CACHE_TTL_SECONDS
+            )
+            
+            logger.info(f"{len(clients)} ügyfél fiók a(z) {manager_id} manager fiók alatt")
+            return [str(client["id"]) for client in clients]
+            
+        except Exception as e:
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba az ügyfél hierarchia lekérdezésekor: {e}")
+            raise
+    
+    def invalidate_cache(self, customer_id: Optional[str] = None) -> int:
         """
-        Inicializálja a Google Ads klienst
+        Érvényteleníti a riport cache bejegyzéseit
+        
+        A riportokra épülő cache-ek (pl. a memoizált elemzések) az
+        érvénytelenítési figyelőkön keresztül értesülnek.
         
         Args:
-            config_file: Google Ads konfiguráció fájl elérési útja
+            customer_id: Ha meg van adva, csak ennek az ügyfélnek a bejegyzései törlődnek
+            
+        Returns:
+            Törölt bejegyzések száma
         """
-        self.config_file = config_file
-        self.client: Optional[GoogleAdsClient] = None
-        
-        if os.path.exists(config_file):
+        removed = self.cache.invalidate(customer_id)
+        for listener in list(self._invalidation_listeners):
             try:
-                self.client = GoogleAdsClient.load_from_storage(config_file)
-                logger.info("Google Ads kliens sikeresen inicializálva")
+                listener(customer_id)
             except Exception as e:
-                logger.error(f"Hiba a Google Ads kliens inicializálásakor: {e}")
-                self.client = None
-        else:
-            logger.warning(f"Google Ads konfiguráció fájl nem található: {config_file}")
+                logger.warning(f"Hiba az érvénytelenítési figyelőben ({getattr(listener, '__qualname__', listener)}): {e}")
+        return removed
     
-    def is_configured(self) -> bool:
-        """Ellenőrzi, hogy a kliens konfigurálva van-e"""
-        return self.client is not None
+    def add_invalidation_listener(self, listener: Callable[[Optional[str]], None]) -> None:
+        """
+        Figyelő regisztrálása a riport cache érvénytelenítésére
+        
+        Args:
+            listener: Az invalidate_cache minden hívásakor meghívódik az ügyfél
+                azonosítóval (None: minden ügyfél)
+        """
+        if listener not in self._invalidation_listeners:
+            self._invalidation_listeners.append(listener)
+    
+    def invalidate_metadata(self, customer_id: Optional[str] = None) -> int:
+        """
+        Eldobja a kampány pillanatképeket (a következő lekérdezés teljes újratöltés)
+        
+        A saját módosítások után hívandó: a change_status / change_event percekkel
+        később jelezheti őket, addig a pillanatkép a régi értéket mutatná.
+        
+        Args:
+            customer_id: Ha meg van adva, csak ennek az ügyfélnek a pillanatképe
+            
+        Returns:
+            Eldobott pillanatképek száma
+        """
+        return self.change_tracker.drop(customer_id)
+    
+    def add_change_listener(self, listener: Callable[[ChangeSet], None]) -> None:
+        """
+        Figyelő regisztrálása a fiók változásokra
+        
+        Args:
+            listener: Minden nem üres változás halmazzal (ChangeSet) meghívódik
+        """
+        self.change_tracker.add_listener(listener)
+    
+    def refresh_changes(self, customer_id: str, force: bool = False) -> ChangeSet:
+        """
+        Frissíti az ügyfél kampány pillanatképét a legutóbbi frissítés óta történt változásokból
+        
+        Első hívásra a teljes kampány listát tölti be; utána a change_status és
+        change_event erőforrásokból csak a vízjel óta változott kampányokat,
+        költségvetéseket és kulcsszavakat kérdezi le, és csak a változott
+        kampányokat tölti újra. A változott azonosítók a figyelőkhöz kerülnek.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            force: A CHANGE_TRACKING_MIN_INTERVAL_SECONDS előtt is lekérdezi a változásokat
+            
+        Returns:
+            A változások
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        return self._refresh_snapshot(self.change_tracker.snapshot(customer_id), force)
+    
+    def _refresh_snapshot(self, snapshot: AccountSnapshot, force: bool = False) -> ChangeSet:
+        """A pillanatkép frissítése (teljes betöltés vagy a változások alapján)"""
+        customer_id = snapshot.customer_id
+        with snapshot.lock:
+            interval = settings.CHANGE_TRACKING_MIN_INTERVAL_SECONDS
+            if snapshot.campaigns is not None and not force and time.monotonic() - snapshot.checked_at < interval:
+                return ChangeSet(customer_id)
+            
+            checked_at = time.monotonic()
+            if snapshot.time_zone is None:
+                snapshot.time_zone = self._account_time_zone(customer_id)
+            # A vízjel a lekérdezések előtti időpont, így a közben történt változások a következő körbe esnek
+            now = _account_now(snapshot.time_zone)
+            
+            changes = self._incremental_changes(snapshot, now) if snapshot.campaigns is not None else None
+            if changes is None:
+                reload = snapshot.campaigns is not None
+                snapshot.load(list(self.iter_campaigns(customer_id)), now)
+                changes = ChangeSet(customer_id, full_refresh=reload)
+                logger.info(f"Kampány pillanatkép betöltve ({customer_id}): {len(snapshot.campaigns)} kampány")
+            snapshot.checked_at = checked_at
+        
+        self.change_tracker.notify(changes)
+        return changes
+    
+    def _incremental_changes(self, snapshot: AccountSnapshot, now: datetime) -> Optional[ChangeSet]:
+        """
+        A vízjel óta történt változások beolvasása és a változott kampányok újratöltése
+        
+        Returns:
+            A változások, vagy None ha teljes újratöltés szükséges (túl régi
+            vízjel vagy a lekérdezési korlátot elérő változás mennyiség)
+        """
+        customer_id = snapshot.customer_id
+        # Átfedés: a változások késve jelenhetnek meg a change_status / change_event erőforrásokban
+        start = snapshot.high_water_mark - timedelta(seconds=settings.CHANGE_TRACKING_OVERLAP_SECONDS)
+        if now - start >= timedelta(days=CHANGE_HISTORY_DAYS):
+            logger.info(f"A változás vízjel túl régi ({customer_id}), teljes újratöltés")
+            return None
+        
+        # A vízjel másodpercre kerekített, a felső határ az aktuális másodpercet is lefedi
+        end = now + timedelta(seconds=1)
+        limit = settings.CHANGE_TRACKING_MAX_CHANGES
+        status_query = GaqlQuery("change_status", [
+            "change_status.resource_type",
+            "change_status.resource_status",
+            "change_status.last_change_date_time",
+            "change_status.campaign",
+            "change_status.ad_group_criterion"
+        ]).changed_between("change_status.last_change_date_time", start, end).where(
+            "change_status.resource_type IN ('CAMPAIGN', 'AD_GROUP_CRITERION')"
+        ).limit(limit).build()
+        # A költségvetés módosítások nem jelennek meg a change_status-ban
+        event_query = GaqlQuery("change_event", [
+            "change_event.change_date_time",
+            "change_event.change_resource_type",
+            "change_event.change_resource_name"
+        ]).changed_between("change_event.change_date_time", start, end).where(
+            "change_event.change_resource_type = 'CAMPAIGN_BUDGET'"
+        ).limit(limit).build()
+        
+        statuses = list(self._search_stream(customer_id, status_query))
+        events = list(self._search_stream(customer_id, event_query))
+        if len(statuses) >= limit or len(events) >= limit:
+            logger.info(f"Túl sok változás ({customer_id}), teljes újratöltés")
+            return None
+        
+        changes = ChangeSet(customer_id)
+        stale: set = set()
+        # Az átfedő ablakban az előző körben már feldolgozott változások kimaradnak
+        seen = {
+            (row.change_status.ad_group_criterion or row.change_status.campaign, row.change_status.last_change_date_time)
+            for row in statuses
+        } | {(row.change_event.change_resource_name, row.change_event.change_date_time) for row in events}
+        statuses = [
+            row for row in statuses
+            if (row.change_status.ad_group_criterion or row.change_status.campaign, row.change_status.last_change_date_time)
+            not in snapshot.seen_changes
+        ]
+        events = [
+            row for row in events
+            if (row.change_event.change_resource_name, row.change_event.change_date_time) not in snapshot.seen_changes
+        ]
+        
+        for row in statuses:
+            change = row.change_status
+            campaign_id = _resource_id(change.campaign)
+            if change.resource_type.name == "CAMPAIGN":
+                if campaign_id is not None:
+                    stale.add(campaign_id)
+                    if change.resource_status.name == "REMOVED":
+                        changes.removed_campaign_ids.add(campaign_id)
+            elif change.ad_group_criterion:
+                changes.criteria.add(change.ad_group_criterion)
+                if campaign_id is not None:
+                    changes.campaign_ids.add(campaign_id)
+        for row in events:
+            budget = row.change_event.change_resource_name
+            changes.budgets.add(budget)
+            stale.update(snapshot.budget_campaigns.get(budget, ()))
+        
+        if stale:
+            campaigns = list(self.iter_campaigns(customer_id, stale))
+            snapshot.update(campaigns)
+            changes.removed_campaign_ids.update(campaign["id"] for campaign in campaigns if campaign["status"] == "REMOVED")
+            changes.campaign_ids.update(stale)
+        
+        snapshot.high_water_mark = now
+        snapshot.seen_changes = seen
+        snapshot.incremental_refreshes += 1
+        if not changes.is_empty():
+            logger.info(
+                f"Fiók változások ({customer_id}): {len(stale)} kampány újratöltve, "
+                f"{len(changes.criteria)} kulcsszó, {len(changes.budgets)} költségvetés változott"
+            )
+        return changes
+    
+    def _account_time_zone(self, customer_id: str) -> str:
+        """A fiók időzónája (a change_status / change_event időpontjai ebben értendők)"""
+        query = GaqlQuery("customer", ["customer.time_zone"]).build()
+        for row in self._search_stream(customer_id, query):
+            return row.customer.time_zone
+        raise ValueError(f"Az ügyfél fiók nem található: {customer_id}")
+    
+    def _invalidate_changed(self, changes: ChangeSet) -> None:
+        """Változás figyelő: a változott kampányokat érintő riport cache bejegyzések törlése"""
+        self.cache.invalidate_campaigns(changes.customer_id, None if changes.full_refresh else changes.campaign_ids)
     
     def get_campaigns(self, customer_id: str) -> List[Dict[str, Any]]:
         """
         Lekérdezi az összes kampányt egy ügyfél fiókból
         
+        CHANGE_TRACKING_ENABLED esetén a kampány pillanatképből szolgál ki, amelyet
+        a refresh_changes csak a változott kampányokkal frissít.
+        
         Args:
             customer_id: Google Ads ügyfél azonosító
             
@@ -49,52 +1357,31 @@ class GoogleAdsService:
             raise ValueError("Google Ads kliens nincs konfigurálva")
         
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
-            
-            query = """
-                SELECT
-                    campaign.id,
-                    campaign.name,
-                    campaign.status,
-                    campaign.advertising_channel_type,
-                    campaign.bidding_strategy_type,
-                    campaign_budget.amount_micros
-                FROM campaign
-                ORDER BY campaign.name
-            """
-            
-            response = ga_service.search(customer_id=customer_id, query=query)
-            
-            campaigns = []
-            for row in response:
-                campaign = row.campaign
-                budget = row.campaign_budget
-                
-                campaigns.append({
-                    "id": campaign.id,
-                    "name": campaign.name,
-                    "status": campaign.status.name,
-                    "channel_type": campaign.advertising_channel_type.name,
-                    "bidding_strategy": campaign.bidding_strategy_type.name,
-                    "budget_micros": budget.amount_micros if budget else None,
-                    "budget": budget.amount_micros / 1_000_000 if budget and budget.amount_micros else None
-                })
+            if settings.CHANGE_TRACKING_ENABLED:
+                snapshot = self.change_tracker.snapshot(customer_id)
+                self._refresh_snapshot(snapshot)
+                with snapshot.lock:
+                    campaigns = [dict(campaign) for campaign in snapshot.campaigns.values()]
+                campaigns.sort(key=lambda campaign: campaign["name"])
+            else:
+                campaigns = list(self.iter_campaigns(customer_id))
             
             logger.info(f"{len(campaigns)} kampány lekérdezve az ügyfél {customer_id} fiókból")
             return campaigns
             
-        except GoogleAdsException as ex:
-            logger.error(f"Google Ads API hiba: {ex}")
-            raise
         except Exception as e:
-            logger.error(f"Hiba a kampányok lekérdezésekor: {e}")
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba a kampányok lekérdezésekor: {e}")
             raise
     
     def get_campaign_performance(
         self, 
         customer_id: str, 
         campaign_id: Optional[str] = None,
-        date_range: str = "LAST_30_DAYS"
+        date_range: str = "LAST_30_DAYS",
+        fields: Optional[Iterable[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Lekérdezi a kampány teljesítmény adatokat
@@ -103,6 +1390,8 @@ class GoogleAdsService:
             customer_id: Google Ads ügyfél azonosító
             campaign_id: Kampány azonosító (opcionális, ha nincs megadva, minden kampányt lekérdez)
             date_range: Dátum tartomány (pl. LAST_7_DAYS, LAST_30_DAYS, THIS_MONTH)
+            fields: A hívó által használt mezők (opcionális); csak az ezekhez szükséges
+                metrikák kerülnek lekérdezésre, a kampány azonosító és név mindig
             
         Returns:
             Teljesítmény adatok listája
@@ -110,60 +1399,85 @@ class GoogleAdsService:
         if not self.is_configured():
             raise ValueError("Google Ads kliens nincs konfigurálva")
         
+        gaql_fields, output_fields = campaign_performance_projection(fields)
+        
+        window = self._warehouse_window(customer_id, "campaign", date_range)
+        if window is not None:
+            performance_data = self.warehouse.get_campaign_performance(customer_id, *window, campaign_id=campaign_id)
+            logger.info(f"Teljesítmény adatok az adattárházból: {len(performance_data)} rekord")
+            if fields is not None:
+                performance_data = [{name: row[name] for name in output_fields} for row in performance_data]
+            return performance_data
+        
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
-            
-            campaign_filter = f"AND campaign.id = {campaign_id}" if campaign_id else ""
-            
-            query = f"""
-                SELECT
-                    campaign.id,
-                    campaign.name,
-                    metrics.impressions,
-                    metrics.clicks,
-                    metrics.ctr,
-                    metrics.average_cpc,
-                    metrics.cost_micros,
-                    metrics.conversions,
-                    metrics.conversions_value,
-                    metrics.cost_per_conversion,
-                    metrics.conversion_rate
-                FROM campaign
-                WHERE segments.date DURING {date_range}
-                {campaign_filter}
-                ORDER BY metrics.impressions DESC
-            """
-            
-            response = ga_service.search(customer_id=customer_id, query=query)
-            
-            performance_data = []
-            for row in response:
-                campaign = row.campaign
-                metrics = row.metrics
-                
-                performance_data.append({
-                    "campaign_id": campaign.id,
-                    "campaign_name": campaign.name,
-                    "impressions": metrics.impressions,
-                    "clicks": metrics.clicks,
-                    "ctr": metrics.ctr,
-                    "average_cpc": metrics.average_cpc / 1_000_000 if metrics.average_cpc else 0,
-                    "cost": metrics.cost_micros / 1_000_000 if metrics.cost_micros else 0,
-                    "conversions": metrics.conversions,
-                    "conversions_value": metrics.conversions_value,
-                    "cost_per_conversion": metrics.cost_per_conversion / 1_000_000 if metrics.cost_per_conversion else 0,
-                    "conversion_rate": metrics.conversion_rate,
-                    "roas": (metrics.conversions_value / (metrics.cost_micros / 1_000_000)) if metrics.cost_micros > 0 else 0
-                })
+            performance_data = self._cached_report(
+                customer_id,
+                self._campaign_performance_query(campaign_id, date_range, gaql_fields),
+                date_range,
+                _campaign_performance_decoder(gaql_fields, columnar=False),
+                campaign_id=campaign_id
+            )
             
             logger.info(f"Teljesítmény adatok lekérdezve: {len(performance_data)} rekord")
             return performance_data
             
-        except GoogleAdsException as ex:
-            logger.error(f"Google Ads API hiba: {ex}")
+        except Exception as e:
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba a teljesítmény adatok lekérdezésekor: {e}")
             raise
+    
+    def get_campaign_performance_columnar(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS",
+        fields: Optional[Iterable[str]] = None
+    ) -> ColumnarResult:
+        """
+        Lekérdezi a kampány teljesítmény adatokat oszlopos formában
+        
+        A sorok dekódolás közben közvetlenül típusos tömbökbe kerülnek, soronkénti
+        szótár nélkül. Az elemzések ezt másolás nélkül csomagolják DataFrame-be.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_id: Kampány azonosító (opcionális)
+            date_range: Dátum tartomány
+            fields: A hívó által használt mezők (opcionális, lásd get_campaign_performance)
+            
+        Returns:
+            ColumnarResult
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        gaql_fields, output_fields = campaign_performance_projection(fields)
+        
+        window = self._warehouse_window(customer_id, "campaign", date_range)
+        if window is not None:
+            performance_data = self.warehouse.get_campaign_performance(customer_id, *window, campaign_id=campaign_id)
+            logger.info(f"Teljesítmény adatok az adattárházból: {len(performance_data)} rekord")
+            return columnar_from_records(performance_data, _campaign_schema(gaql_fields), output_fields)
+        
+        try:
+            performance_data = self._cached_report(
+                customer_id,
+                self._campaign_performance_query(campaign_id, date_range, gaql_fields),
+                date_range,
+                _campaign_performance_decoder(gaql_fields, columnar=True),
+                campaign_id=campaign_id
+            )
+            
+            logger.info(f"Teljesítmény adatok lekérdezve (oszlopos): {len(performance_data)} rekord")
+            return performance_data
+            
         except Exception as e:
-            logger.error(f"Hiba a teljesítmény adatok lekérdezésekor: {e}")
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba a teljesítmény adatok lekérdezésekor: {e}")
             raise
     
     def get_keywords_performance(
@@ -186,70 +1500,535 @@ class GoogleAdsService:
         if not self.is_configured():
             raise ValueError("Google Ads kliens nincs konfigurálva")
         
+        window = self._warehouse_window(customer_id, "keyword", date_range)
+        if window is not None:
+            keywords_data = self.warehouse.get_keywords_performance(customer_id, *window, campaign_id=campaign_id)
+            logger.info(f"Kulcsszó teljesítmény adatok az adattárházból: {len(keywords_data)} rekord")
+            return keywords_data
+        
         try:
-            ga_service = self.client.get_service("GoogleAdsService")
-            
-            campaign_filter = f"AND campaign.id = {campaign_id}" if campaign_id else ""
-            
-            query = f"""
-                SELECT
-                    campaign.id,
-                    campaign.name,
-                    ad_group.id,
-                    ad_group.name,
-                    ad_group_criterion.keyword.text,
-                    ad_group_criterion.keyword.match_type,
-                    metrics.impressions,
-                    metrics.clicks,
-                    metrics.ctr,
-                    metrics.average_cpc,
-                    metrics.cost_micros,
-                    metrics.conversions,
-                    metrics.conversions_value,
-                    metrics.quality_score
-                FROM keyword_view
-                WHERE segments.date DURING {date_range}
-                {campaign_filter}
-                AND ad_group_criterion.status = 'ENABLED'
-                ORDER BY metrics.impressions DESC
-                LIMIT 1000
-            """
-            
-            response = ga_service.search(customer_id=customer_id, query=query)
-            
-            keywords_data = []
-            for row in response:
-                campaign = row.campaign
-                ad_group = row.ad_group
-                keyword = row.ad_group_criterion.keyword
-                metrics = row.metrics
-                
-                keywords_data.append({
-                    "campaign_id": campaign.id,
-                    "campaign_name": campaign.name,
-                    "ad_group_id": ad_group.id,
-                    "ad_group_name": ad_group.name,
-                    "keyword": keyword.text,
-                    "match_type": keyword.match_type.name,
-                    "impressions": metrics.impressions,
-                    "clicks": metrics.clicks,
-                    "ctr": metrics.ctr,
-                    "average_cpc": metrics.average_cpc / 1_000_000 if metrics.average_cpc else 0,
-                    "cost": metrics.cost_micros / 1_000_000 if metrics.cost_micros else 0,
-                    "conversions": metrics.conversions,
-                    "conversions_value": metrics.conversions_value,
-                    "quality_score": metrics.quality_score if hasattr(metrics, 'quality_score') else None
-                })
+            keywords_data = self._cached_report(
+                customer_id,
+                self._keywords_performance_query(campaign_id, date_range),
+                date_range,
+                _decode_keyword_performance_rows,
+                campaign_id=campaign_id
+            )
             
             logger.info(f"Kulcsszó teljesítmény adatok lekérdezve: {len(keywords_data)} rekord")
             return keywords_data
             
-        except GoogleAdsException as ex:
-            logger.error(f"Google Ads API hiba: {ex}")
+        except Exception as e:
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba a kulcsszó adatok lekérdezésekor: {e}")
+            raise
+    
+    def get_keywords_performance_columnar(
+        self,
+        customer_id: str,
+        campaign_id: Optional[str] = None,
+        date_range: str = "LAST_30_DAYS"
+    ) -> ColumnarResult:
+        """
+        Lekérdezi a kulcsszavak teljesítményét oszlopos formában
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_id: Kampány azonosító (opcionális)
+            date_range: Dátum tartomány
+            
+        Returns:
+            ColumnarResult
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        window = self._warehouse_window(customer_id, "keyword", date_range)
+        if window is not None:
+            keywords_data = self.warehouse.get_keywords_performance(customer_id, *window, campaign_id=campaign_id)
+            logger.info(f"Kulcsszó teljesítmény adatok az adattárházból: {len(keywords_data)} rekord")
+            return columnar_from_records(keywords_data, KEYWORD_PERFORMANCE_SCHEMA, KEYWORD_PERFORMANCE_FIELDS)
+        
+        try:
+            keywords_data = self._cached_report(
+                customer_id,
+                self._keywords_performance_query(campaign_id, date_range),
+                date_range,
+                _collect_keyword_performance_columnar,
+                campaign_id=campaign_id
+            )
+            
+            logger.info(f"Kulcsszó teljesítmény adatok lekérdezve (oszlopos): {len(keywords_data)} rekord")
+            return keywords_data
+            
+        except Exception as e:
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba a kulcsszó adatok lekérdezésekor: {e}")
+            raise
+    
+    def get_campaign_daily_history(self, customer_id: str, date_range: str = "LAST_30_DAYS") -> ColumnarResult:
+        """
+        Lekérdezi a kampányok napi költését és konverzióit oszlopos formában
+        
+        A költségvetés optimalizálás ebből illeszti a kampányok válaszgörbéit.
+        Ha az adattárház lefedi a tartományt, onnan szolgálja ki.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            date_range: Dátum tartomány
+            
+        Returns:
+            ColumnarResult kampány/nap sorokkal (campaign_id, cost, conversions, conversions_value)
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        window = self._warehouse_window(customer_id, "campaign", date_range)
+        if window is not None:
+            daily_rows = self.warehouse.get_campaign_daily_metrics(customer_id, *window)
+            logger.info(f"Napi kampány adatok az adattárházból: {len(daily_rows)} rekord")
+            return columnar_from_records(daily_rows, CAMPAIGN_DAILY_SCHEMA, CAMPAIGN_DAILY_FIELDS)
+        
+        query = GaqlQuery("campaign", [
+            "segments.date",
+            "campaign.id",
+            "metrics.cost_micros",
+            "metrics.conversions",
+            "metrics.conversions_value"
+        ]).during(date_range).build()
+        
+        try:
+            history = self._cached_report(customer_id, query, date_range, _collect_campaign_daily_columnar)
+            
+            logger.info(f"Napi kampány adatok lekérdezve (oszlopos): {len(history)} rekord")
+            return history
+            
+        except Exception as e:
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba a napi kampány adatok lekérdezésekor: {e}")
+            raise
+    
+    def get_keyword_bids(self, customer_id: str, campaign_ids: Iterable[Any]) -> List[Dict[str, Any]]:
+        """
+        Lekérdezi a kampányok kulcsszavainak aktuális CPC bidjeit
+        
+        Módosítás előtti olvasás, ezért a riport cache-t megkerüli.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_ids: Kampány azonosítók
+            
+        Returns:
+            Kulcsszavak (kampány, bid stratégia, erőforrás név, cpc_bid_micros)
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        query = GaqlQuery("keyword_view", [
+            "campaign.id",
+            "campaign.bidding_strategy_type",
+            "ad_group_criterion.resource_name",
+            "ad_group_criterion.cpc_bid_micros"
+        ]).where_ids("campaign.id", campaign_ids).where("ad_group_criterion.status != 'REMOVED'").build()
+        
+        try:
+            return [_decode_keyword_bid_row(row) for row in self._search_stream(customer_id, query)]
+        except Exception as e:
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba a kulcsszó bidek lekérdezésekor: {e}")
             raise
+    
+    def get_campaign_budgets(self, customer_id: str, campaign_ids: Iterable[Any]) -> List[Dict[str, Any]]:
+        """
+        Lekérdezi a kampányok költségvetéseit (erőforrás név és napi összeg)
+        
+        Módosítás előtti olvasás, ezért a riport cache-t megkerüli.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            campaign_ids: Kampány azonosítók
+            
+        Returns:
+            Kampány költségvetések
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        query = GaqlQuery("campaign", [
+            "campaign.id",
+            "campaign_budget.resource_name",
+            "campaign_budget.amount_micros"
+        ]).where_ids("campaign.id", campaign_ids).build()
+        
+        try:
+            return [_decode_campaign_budget_row(row) for row in self._search_stream(customer_id, query)]
         except Exception as e:
-            logger.error(f"Hiba a kulcsszó adatok lekérdezésekor: {e}")
+            if is_google_ads_error(e):
+                logger.error(f"Google Ads API hiba: {e}")
+            else:
+                logger.error(f"Hiba a költségvetések lekérdezésekor: {e}")
             raise
+    
+    def mutate(
+        self,
+        customer_id: str,
+        resource_type: str,
+        operations: List[Dict[str, Any]],
+        partial_failure: bool = True,
+        validate_only: bool = False
+    ) -> List[Optional[str]]:
+        """
+        Egy mutate kérés a kvóta ütemezőn keresztül
+        
+        Az újrapróbálás biztonságos, mert a műveletek abszolút értéket állítanak be.
+        
+        Returns:
+            Műveletenkénti hibaüzenet (None: sikeres)
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        return self.scheduler.call(
+            customer_id,
+            lambda: self.backend.mutate(customer_id, resource_type, operations, partial_failure, validate_only)
+        )
+    
+    def run_batch_job(self, customer_id: str, resource_type: str, operations: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Nagy módosítás készlet BatchJobService-en keresztül, a kvóta ütemezőn át
+        
+        Returns:
+            Műveletenkénti hibaüzenet (None: sikeres)
+        """
+        if not self.is_configured():
+            raise ValueError("Google Ads kliens nincs konfigurálva")
+        
+        return self.scheduler.call(
+            customer_id,
+            lambda: self.backend.run_batch_job(customer_id, resource_type, operations)
+        )
+
+
+def _parse_warehouse_token(page_token: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Az adattárház lap tokenjéből kiolvassa az előző lap utolsó (ad_group_id, criterion_id) kulcsát"""
+    if not page_token:
+        return None
+    
+    key = page_token[len("wh:"):].split(":") if page_token.startswith("wh:") else []
+    if len(key) != 2 or not all(part.isdigit() for part in key):
+        raise ValueError(f"Érvénytelen lap token: {page_token}")
+    return int(key[0]), int(key[1])
+
+
+def _account_now(time_zone: str) -> datetime:
+    """Az aktuális idő a fiók időzónájában (időzóna nélküli, másodperc pontosságú)"""
+    try:
+        now = datetime.now(ZoneInfo(time_zone))
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Ismeretlen időzóna: {time_zone}, helyi idő használata")
+        now = datetime.now()
+    return now.replace(tzinfo=None, microsecond=0)
+
+
+def _resource_id(resource_name: str) -> Optional[int]:
+    """Az erőforrás név utolsó azonosítója (pl. customers/1/campaigns/2 -> 2)"""
+    last = resource_name.rsplit("/", 1)[-1] if resource_name else ""
+    return int(last) if last.isdigit() else None
+
+
+def _decode_campaign_row(row: Any) -> Dict[str, Any]:
+    """Kampány sor dekódolása szótárrá"""
+    campaign = row.campaign
+    budget = row.campaign_budget
+    
+    return {
+        "id": campaign.id,
+        "name": campaign.name,
+        "status": campaign.status.name,
+        "channel_type": campaign.advertising_channel_type.name,
+        "bidding_strategy": campaign.bidding_strategy_type.name,
+        "budget_resource_name": budget.resource_name if budget else None,
+        "budget_micros": budget.amount_micros if budget else None,
+        "budget": budget.amount_micros / 1_000_000 if budget and budget.amount_micros else None
+    }
+
+
+def _decode_keyword_bid_row(row: Any) -> Dict[str, Any]:
+    """Kulcsszó bid sor dekódolása szótárrá"""
+    criterion = row.ad_group_criterion
+    
+    return {
+        "campaign_id": row.campaign.id,
+        "bidding_strategy": row.campaign.bidding_strategy_type.name,
+        "resource_name": criterion.resource_name,
+        "cpc_bid_micros": criterion.cpc_bid_micros
+    }
+
+
+def _decode_campaign_budget_row(row: Any) -> Dict[str, Any]:
+    """Kampány költségvetés sor dekódolása szótárrá"""
+    return {
+        "campaign_id": row.campaign.id,
+        "resource_name": row.campaign_budget.resource_name,
+        "amount_micros": row.campaign_budget.amount_micros
+    }
+
+
+def _decode_customer_client_row(row: Any) -> Dict[str, Any]:
+    """Ügyfél hierarchia sor dekódolása szótárrá"""
+    customer_client = row.customer_client
+    
+    return {
+        "id": customer_client.id,
+        "name": customer_client.descriptive_name,
+        "level": customer_client.level
+    }
+
+
+def _decode_campaign_daily_row(row: Any) -> Dict[str, Any]:
+    """Kampány napi metrika sor dekódolása az adattárház sémájára"""
+    campaign = row.campaign
+    metrics = row.metrics
+    
+    return {
+        "date": date.fromisoformat(row.segments.date),
+        "campaign_id": campaign.id,
+        "campaign_name": campaign.name,
+        "impressions": metrics.impressions,
+        "clicks": metrics.clicks,
+        "cost_micros": metrics.cost_micros,
+        "conversions": metrics.conversions,
+        "conversions_value": metrics.conversions_value
+    }
+
+
+def _decode_keyword_daily_row(row: Any) -> Dict[str, Any]:
+    """Kulcsszó napi metrika sor dekódolása az adattárház sémájára"""
+    criterion = row.ad_group_criterion
+    metrics = row.metrics
+    
+    return {
+        "date": date.fromisoformat(row.segments.date),
+        "campaign_id": row.campaign.id,
+        "campaign_name": row.campaign.name,
+        "ad_group_id": row.ad_group.id,
+        "ad_group_name": row.ad_group.name,
+        "criterion_id": criterion.criterion_id,
+        "keyword": criterion.keyword.text,
+        "match_type": criterion.keyword.match_type.name,
+        "impressions": metrics.impressions,
+        "clicks": metrics.clicks,
+        "cost_micros": metrics.cost_micros,
+        "conversions": metrics.conversions,
+        "conversions_value": metrics.conversions_value,
+        "quality_score": metrics.quality_score if hasattr(metrics, 'quality_score') else None
+    }
+
+
+def _decode_campaign_performance_row(row: Any) -> Dict[str, Any]:
+    """Kampány teljesítmény sor dekódolása szótárrá"""
+    campaign = row.campaign
+    metrics = row.metrics
+    
+    return {
+        "campaign_id": campaign.id,
+        "campaign_name": campaign.name,
+        "impressions": metrics.impressions,
+        "clicks": metrics.clicks,
+        "ctr": metrics.ctr,
+        "average_cpc": metrics.average_cpc / 1_000_000 if metrics.average_cpc else 0,
+        "cost": metrics.cost_micros / 1_000_000 if metrics.cost_micros else 0,
+        "conversions": metrics.conversions,
+        "conversions_value": metrics.conversions_value,
+        "cost_per_conversion": metrics.cost_per_conversion / 1_000_000 if metrics.cost_per_conversion else 0,
+        "conversion_rate": metrics.conversion_rate,
+        "roas": (metrics.conversions_value / (metrics.cost_micros / 1_000_000)) if metrics.cost_micros > 0 else 0
+    }
+
+
+def _decode_keyword_performance_row(row: Any) -> Dict[str, Any]:
+    """Kulcsszó teljesítmény sor dekódolása szótárrá"""
+    campaign = row.campaign
+    ad_group = row.ad_group
+    keyword = row.ad_group_criterion.keyword
+    metrics = row.metrics
+    
+    return {
+        "campaign_id": campaign.id,
+        "campaign_name": campaign.name,
+        "ad_group_id": ad_group.id,
+        "ad_group_name": ad_group.name,
+        "keyword": keyword.text,
+        "match_type": keyword.match_type.name,
+        "impressions": metrics.impressions,
+        "clicks": metrics.clicks,
+        "ctr": metrics.ctr,
+        "average_cpc": metrics.average_cpc / 1_000_000 if metrics.average_cpc else 0,
+        "cost": metrics.cost_micros / 1_000_000 if metrics.cost_micros else 0,
+        "conversions": metrics.conversions,
+        "conversions_value": metrics.conversions_value,
+        "quality_score": metrics.quality_score if hasattr(metrics, 'quality_score') else None
+    }
+
+
+def _decode_customer_client_rows(rows: Iterator[Any]) -> List[Dict[str, Any]]:
+    """Ügyfél hierarchia sorok dekódolása szótár listává"""
+    return [_decode_customer_client_row(row) for row in rows]
+
+
+def _decode_campaign_performance_rows(rows: Iterator[Any]) -> List[Dict[str, Any]]:
+    """Kampány teljesítmény sorok dekódolása szótár listává"""
+    return [_decode_campaign_performance_row(row) for row in rows]
+
+
+def _decode_keyword_performance_rows(rows: Iterator[Any]) -> List[Dict[str, Any]]:
+    """Kulcsszó teljesítmény sorok dekódolása szótár listává"""
+    return [_decode_keyword_performance_row(row) for row in rows]
+
+
+def _collect_campaign_performance_columnar(rows: Iterator[Any]) -> ColumnarResult:
+    """Kampány teljesítmény sorok dekódolása közvetlenül típusos oszlopokba"""
+    builder = ColumnarBuilder(CAMPAIGN_PERFORMANCE_SCHEMA, CAMPAIGN_PERFORMANCE_FIELDS)
+    (
+        campaign_id, campaign_name, impressions, clicks, ctr, average_cpc_micros, cost_micros,
+        conversions, conversions_value, cost_per_conversion_micros, conversion_rate
+    ) = builder.appenders()
+    end_row = builder.end_row
+    
+    for row in rows:
+        campaign = row.campaign
+        metrics = row.metrics
+        campaign_id(campaign.id)
+        campaign_name(campaign.name)
+        impressions(metrics.impressions)
+        clicks(metrics.clicks)
+        ctr(metrics.ctr)
+        average_cpc_micros(int(metrics.average_cpc))
+        cost_micros(metrics.cost_micros)
+        conversions(metrics.conversions)
+        conversions_value(metrics.conversions_value)
+        cost_per_conversion_micros(int(metrics.cost_per_conversion))
+        conversion_rate(metrics.conversion_rate)
+        end_row()
+    
+    return builder.finish()
+
+
+def _collect_campaign_daily_columnar(rows: Iterator[Any]) -> ColumnarResult:
+    """Kampány/nap sorok dekódolása közvetlenül típusos oszlopokba"""
+    builder = ColumnarBuilder(CAMPAIGN_DAILY_SCHEMA, CAMPAIGN_DAILY_FIELDS)
+    campaign_id, cost_micros, conversions, conversions_value = builder.appenders()
+    end_row = builder.end_row
+    
+    for row in rows:
+        metrics = row.metrics
+        campaign_id(row.campaign.id)
+        cost_micros(metrics.cost_micros)
+        conversions(metrics.conversions)
+        conversions_value(metrics.conversions_value)
+        end_row()
+    
+    return builder.finish()
+
+
+def _campaign_schema(gaql_fields: Iterable[str]) -> Tuple[Tuple[str, str], ...]:
+    """A kampány teljesítmény oszlopos séma a lekérdezett GAQL mezőkre szűkítve"""
+    selected = set(gaql_fields)
+    return tuple(
+        (name, kind) for name, kind in CAMPAIGN_PERFORMANCE_SCHEMA
+        if CAMPAIGN_PERFORMANCE_COLUMN_SOURCES[name] in selected
+    )
+
+
+def _campaign_column_getter(name: str) -> Callable[[Any], Any]:
+    """Egy kampány oszlop értékét kiolvasó függvény (a micros double mezők egészre kerekítve)"""
+    getter = attrgetter(CAMPAIGN_PERFORMANCE_COLUMN_SOURCES[name])
+    if name in ("average_cpc_micros", "cost_per_conversion_micros"):
+        return lambda row: int(getter(row))
+    return getter
+
+
+@lru_cache(maxsize=64)
+def _campaign_performance_decoder(
+    gaql_fields: Tuple[str, ...],
+    columnar: bool
+) -> Callable[[Iterator[Any]], Union[List[Dict[str, Any]], ColumnarResult]]:
+    """
+    Kampány teljesítmény dekódoló egy lekérdezett mezőkészlethez
+    
+    A teljes mezőkészlethez a kézzel írt gyors dekódolókat adja vissza,
+    szűkített készlethez a séma csak a lekérdezett oszlopokat tartalmazza.
+    
+    Args:
+        gaql_fields: Lekérdezett GAQL mezők (rendezett)
+        columnar: ColumnarResult (True) vagy szótár lista (False)
+        
+    Returns:
+        Sor folyam dekódoló függvény
+    """
+    full_fields, _ = campaign_performance_projection()
+    if gaql_fields == full_fields:
+        return _collect_campaign_performance_columnar if columnar else _decode_campaign_performance_rows
+    
+    schema = _campaign_schema(gaql_fields)
+    output_fields = _campaign_output_fields(gaql_fields)
+    getters = [_campaign_column_getter(name) for name, _ in schema]
+    
+    def collect_projected_columnar(rows: Iterator[Any]) -> ColumnarResult:
+        builder = ColumnarBuilder(schema, output_fields)
+        appenders = list(zip(builder.appenders(), getters))
+        end_row = builder.end_row
+        for row in rows:
+            for append, getter in appenders:
+                append(getter(row))
+            end_row()
+        return builder.finish()
+    
+    def decode_projected_rows(rows: Iterator[Any]) -> List[Dict[str, Any]]:
+        return collect_projected_columnar(rows).to_records()
+    
+    return collect_projected_columnar if columnar else decode_projected_rows
+
+
+def _collect_keyword_performance_columnar(rows: Iterator[Any]) -> ColumnarResult:
+    """Kulcsszó teljesítmény sorok dekódolása közvetlenül típusos oszlopokba"""
+    builder = ColumnarBuilder(KEYWORD_PERFORMANCE_SCHEMA, KEYWORD_PERFORMANCE_FIELDS)
+    (
+        campaign_id, campaign_name, ad_group_id, ad_group_name, keyword_text, match_type, impressions,
+        clicks, ctr, average_cpc_micros, cost_micros, conversions, conversions_value, quality_score
+    ) = builder.appenders()
+    end_row = builder.end_row
+    
+    for row in rows:
+        campaign = row.campaign
+        ad_group = row.ad_group
+        keyword = row.ad_group_criterion.keyword
+        metrics = row.metrics
+        campaign_id(campaign.id)
+        campaign_name(campaign.name)
+        ad_group_id(ad_group.id)
+        ad_group_name(ad_group.name)
+        keyword_text(keyword.text)
+        match_type(keyword.match_type.name)
+        impressions(metrics.impressions)
+        clicks(metrics.clicks)
+        ctr(metrics.ctr)
+        average_cpc_micros(int(metrics.average_cpc))
+        cost_micros(metrics.cost_micros)
+        conversions(metrics.conversions)
+        conversions_value(metrics.conversions_value)
+        quality_score(metrics.quality_score if hasattr(metrics, 'quality_score') else math.nan)
+        end_row()
+    
+    return builder.finish()
 
 
 # Singleton instance
@@ -268,6 +2047,11 @@ def get_google_ads_service(config_file: str = "google-ads.yaml") -> GoogleAdsSer
     """
     global _google_ads_service
     if _google_ads_service is None:
-        _google_ads_service = GoogleAdsService(config_file)
+        warehouse = None
+        if settings.WAREHOUSE_ENABLED:
+            from app.services.warehouse import get_warehouse
+            
+            warehouse = get_warehouse(settings.DATABASE_URL)
+        _google_ads_service = GoogleAdsService(config_file, warehouse=warehouse)
     return _google_ads_service
 
@@ -0,0 +1,174 @@
+"""
+Kulcsszó átfedés (kannibalizáció) keresése normalizált szöveg indexszel
+"""
+from typing import List, Optional, Tuple
+import re
+import numpy as np
+
+from app.services.columnar import (
+    ColumnarResult,
+    ReportData,
+    KEYWORD_PERFORMANCE_SCHEMA,
+    KEYWORD_PERFORMANCE_FIELDS,
+    columnar_from_records
+)
+
+# Szavak: betűk és számjegyek (a match type jelölések, +, "", [] és az írásjelek elhagyásával)
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Többes szám -> egyes szám végződés szabályok, az első illeszkedő érvényes. Magyarul csak
+# a magánhangzóra végződő tövek -k jele (táskák, kefék, cipők, autók): a kötőhangzós
+# alakok (-ok, -ek, -ak) szótár nélkül nem választhatók le biztonságosan (gyerek).
+_PLURAL_RULES: Tuple[Tuple[str, str], ...] = (
+    ("ák", "a"), ("ék", "e"), ("ók", "ó"), ("ők", "ő"), ("úk", "ú"), ("űk", "ű"),
+    ("ies", "y"), ("sses", "ss"), ("ches", "ch"), ("shes", "sh"), ("xes", "x")
+)
+
+# Az angol -s többes jel nem ezek után áll (bus, analysis, glass; magyar -ás, -ós melléknevek)
+_NON_PLURAL_BEFORE_S = frozenset("suiáéíóöőúüű")
+
+# A levágás után legalább ilyen hosszú tő marad (különben a szó változatlan)
+MIN_STEM_LENGTH = 3
+
+
+def _singular(word: str) -> str:
+    """Egy (kisbetűs) szó egyes számú alakja a végződés szabályok szerint"""
+    for suffix, replacement in _PLURAL_RULES:
+        if word.endswith(suffix):
+            stem = word[:-len(suffix)] + replacement
+            return stem if len(stem) >= MIN_STEM_LENGTH else word
+    
+    if word.endswith("s") and len(word) > MIN_STEM_LENGTH and word[-2] not in _NON_PLURAL_BEFORE_S:
+        return word[:-1]
+    return word
+
+
+def normalize_keyword(text: str) -> str:
+    """
+    Kulcsszó szöveg normalizálása az átfedés kereséshez
+    
+    Kisbetűsít, elhagyja a match type jelöléseket és az írásjeleket, a
+    szavakat egyes számra hozza, és ábécé sorrendbe rendezi: a "Női cipők",
+    "+cipő +női" és "[női cipő]" mind "cipő női" lesz. Az ékezetek
+    megmaradnak (kor / kór különböző szó).
+    
+    Args:
+        text: A kulcsszó szövege
+    
+    Returns:
+        Normalizált szöveg (a szavak szóközzel elválasztva)
+    """
+    return " ".join(sorted(_singular(word) for word in _TOKEN_PATTERN.findall(text.casefold())))
+
+
+def _distinct_per_group(groups: np.ndarray, values: np.ndarray, group_count: int) -> np.ndarray:
+    """Csoportonként a különböző értékek száma (a csoport-érték párok hash alapú egyedítésével)"""
+    import pandas as pd
+    
+    codes, uniques = pd.factorize(values)
+    pairs = pd.unique(groups.astype(np.int64) * max(len(uniques), 1) + codes)
+    return np.bincount(pairs // max(len(uniques), 1), minlength=group_count)
+
+
+class KeywordOverlapIndex:
+    """
+    Hash alapú index a normalizált kulcsszó szövegeken (és match type-on)
+    
+    A normalizálás a szótár kódolt kulcsszó oszlop különböző szövegein
+    egyszer fut, nem soronként; a (normalizált szöveg, match type) kulcsok
+    csoportosítása és a csoport összegek hash táblás faktorizálással és
+    bincount-tal számolódnak, így a költség a sorok számában közel lineáris
+    (1M+ kulcsszón is). Átfedő csoport az a kulcs, amelyhez legalább két
+    kulcsszó tartozik: ugyanaz vagy majdnem ugyanaz a kulcsszó több
+    hirdetéscsoportban vagy kampányban verseng önmagával.
+    
+    Csoport szintű tömbök (a csoport azonosítók sorrendjében): keywords, ad_groups,
+    campaigns, variants (különböző eredeti szövegek), cost, conversions,
+    conversions_value, clicks, impressions.
+    """
+    
+    def __init__(self, data: ReportData, ignore_match_type: bool = False):
+        """
+        Args:
+            data: Kulcsszó teljesítmény adatok (szótár lista vagy ColumnarResult)
+            ignore_match_type: Ha igaz, a különböző match type-ú azonos kulcsszavak is egy csoportba kerülnek
+        """
+        import pandas as pd
+        
+        if not isinstance(data, ColumnarResult):
+            data = columnar_from_records(data, KEYWORD_PERFORMANCE_SCHEMA, KEYWORD_PERFORMANCE_FIELDS)
+        self.data = data
+        self.ignore_match_type = ignore_match_type
+        
+        normalized = [normalize_keyword(str(text)) for text in data.categories["keyword"]]
+        text_codes, self.normalized_texts = pd.factorize(np.array(normalized, dtype=object))
+        row_text = text_codes[data.columns["keyword"]].astype(np.int64)
+        
+        match_type_count = 1 if ignore_match_type else max(len(data.categories["match_type"]), 1)
+        row_key = row_text * match_type_count
+        if not ignore_match_type:
+            row_key += data.columns["match_type"]
+        
+        row_group, keys = pd.factorize(row_key)
+        key_count = len(keys)
+        counts = np.bincount(row_group, minlength=key_count)
+        
+        # Csak a legalább két kulcsszavas kulcsok maradnak, 0..G-1 csoport azonosítókkal
+        overlapping = counts >= 2
+        group_ids = np.full(key_count, -1, dtype=np.int64)
+        group_ids[overlapping] = np.arange(int(overlapping.sum()))
+        self.row_group = group_ids[row_group]
+        self.total_keywords = len(data)
+        self.distinct_keys = key_count
+        
+        self._group_keys = keys[overlapping]
+        self._match_type_count = match_type_count
+        
+        members = np.flatnonzero(self.row_group >= 0)
+        self._members = members
+        member_groups = self.row_group[members]
+        group_count = len(self._group_keys)
+        
+        self.keywords = counts[overlapping]
+        self.ad_groups = _distinct_per_group(member_groups, data.columns["ad_group_id"][members], group_count)
+        self.campaigns = _distinct_per_group(member_groups, data.columns["campaign_id"][members], group_count)
+        self.variants = _distinct_per_group(member_groups, data.columns["keyword"][members], group_count)
+        
+        for name in ("cost", "conversions", "conversions_value", "clicks", "impressions"):
+            values = np.nan_to_num(data.column(name)[members].astype(np.float64))
+            setattr(self, name, np.bincount(member_groups, weights=values, minlength=group_count))
+    
+    def __len__(self) -> int:
+        return len(self._group_keys)
+    
+    def normalized_text(self, group: int) -> str:
+        """A csoport normalizált szövege"""
+        return self.normalized_texts[self._group_keys[group] // self._match_type_count]
+    
+    def match_type(self, group: int) -> Optional[str]:
+        """A csoport match type-ja (None, ha a match type nem része a kulcsnak)"""
+        if self.ignore_match_type:
+            return None
+        return self.data.categories["match_type"][self._group_keys[group] % self._match_type_count]
+    
+    def group_rows(self, groups: np.ndarray) -> List[np.ndarray]:
+        """
+        A megadott csoportok kulcsszavainak sor indexei
+        
+        Csak a kért csoportok tagjai rendeződnek, nem a teljes index.
+        
+        Args:
+            groups: Csoport azonosítók
+        
+        Returns:
+            Csoportonként a sor indexek (eredeti sorrendben), a groups sorrendjében
+        """
+        position = np.full(len(self), -1, dtype=np.int64)
+        position[groups] = np.arange(len(groups))
+        member_position = position[self.row_group[self._members]]
+        selected = member_position >= 0
+        rows = self._members[selected]
+        owners = member_position[selected]
+        order = np.argsort(owners, kind="stable")
+        bounds = np.searchsorted(owners[order], np.arange(len(groups) + 1))
+        return [rows[order[bounds[i]:bounds[i + 1]]] for i in range(len(groups))]
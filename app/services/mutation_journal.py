@@ -0,0 +1,147 @@
+"""
+Mutate műveletek idempotencia naplója (a helyi adatbázisban)
+"""
+from typing import Optional, List, Dict, Any, Iterable, Set
+from datetime import datetime
+from loguru import logger
+from sqlalchemy import (
+    create_engine,
+    MetaData,
+    Table,
+    Column,
+    String,
+    BigInteger,
+    Text,
+    DateTime,
+    select,
+    delete
+)
+from sqlalchemy.engine import Engine
+
+metadata = MetaData()
+
+mutation_journal = Table(
+    "mutation_journal",
+    metadata,
+    Column("operation_key", String(64), primary_key=True),
+    Column("job_id", String(128), nullable=False, index=True),
+    Column("customer_id", String(20), nullable=False),
+    Column("resource_type", String(40), nullable=False),
+    Column("resource_name", String(255), nullable=False),
+    Column("field", String(40), nullable=False),
+    Column("old_value", BigInteger),
+    Column("new_value", BigInteger, nullable=False),
+    Column("status", String(20), nullable=False),
+    Column("error", Text),
+    Column("updated_at", DateTime, nullable=False)
+)
+
+# Műveletek státusza a naplóban
+APPLIED = "applied"
+FAILED = "failed"
+
+# SQLite legfeljebb 999 kötött paramétert enged egy lekérdezésben
+_KEY_BATCH_SIZE = 500
+
+
+class MutationJournal:
+    """
+    Idempotencia napló a mutate műveletekhez
+    
+    Minden művelet kulcsa a job azonosítóból, az erőforrásból és a módosított
+    mezőből képződik. Egy job újrafuttatásakor a már sikeresen alkalmazott
+    kulcsok kimaradnak, így egy újrapróbált job nem módosít kétszer (a relatív
+    bid módosítás nem halmozódik).
+    """
+    
+    def __init__(self, database_url: str):
+        """
+        Inicializálja a naplót és létrehozza a táblát
+        
+        Args:
+            database_url: SQLAlchemy adatbázis URL (ugyanaz, mint az adattárházé)
+        """
+        connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+        self.engine: Engine = create_engine(database_url, connect_args=connect_args, future=True)
+        metadata.create_all(self.engine)
+        logger.info(f"Mutate napló inicializálva: {self.engine.url.render_as_string(hide_password=True)}")
+    
+    def applied(self, keys: Iterable[str]) -> Set[str]:
+        """
+        A már sikeresen alkalmazott műveletek kulcsai
+        
+        Args:
+            keys: Ellenőrizendő művelet kulcsok
+        
+        Returns:
+            Az alkalmazott kulcsok halmaza
+        """
+        keys = list(keys)
+        found: Set[str] = set()
+        with self.engine.connect() as conn:
+            for start in range(0, len(keys), _KEY_BATCH_SIZE):
+                found.update(conn.execute(
+                    select(mutation_journal.c.operation_key).where(
+                        mutation_journal.c.operation_key.in_(keys[start:start + _KEY_BATCH_SIZE]),
+                        mutation_journal.c.status == APPLIED
+                    )
+                ).scalars())
+        return found
+    
+    def record(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Rögzíti (felülírja) a műveletek eredményét egy tranzakcióban
+        
+        Args:
+            entries: A tábla oszlopainak megfelelő szótárak (updated_at nélkül)
+        """
+        if not entries:
+            return
+        
+        now = datetime.now()
+        rows = [{**entry, "updated_at": now} for entry in entries]
+        with self.engine.begin() as conn:
+            for start in range(0, len(rows), _KEY_BATCH_SIZE):
+                batch = rows[start:start + _KEY_BATCH_SIZE]
+                conn.execute(delete(mutation_journal).where(
+                    mutation_journal.c.operation_key.in_([row["operation_key"] for row in batch])
+                ))
+                conn.execute(mutation_journal.insert(), batch)
+    
+    def get_job(self, job_id: str) -> List[Dict[str, Any]]:
+        """
+        Egy job naplózott műveletei
+        
+        Args:
+            job_id: Job azonosító
+        
+        Returns:
+            Műveletek a napló oszlopaival
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(mutation_journal)
+                .where(mutation_journal.c.job_id == job_id)
+                .order_by(mutation_journal.c.resource_type, mutation_journal.c.resource_name)
+            ).mappings().all()
+        return [dict(row) for row in rows]
+
+
+# Singleton instance
+_mutation_journal: Optional[MutationJournal] = None
+
+
+def get_mutation_journal(database_url: str = "sqlite:///./google_ads_automation.db") -> MutationJournal:
+    """
+    Visszaadja a mutate napló singleton instance-t
+    
+    Args:
+        database_url: SQLAlchemy adatbázis URL
+    
+    Returns:
+        MutationJournal instance
+    """
+    global _mutation_journal
+    if _mutation_journal is None:
+        _mutation_journal = MutationJournal(database_url)
+    return _mutation_journal
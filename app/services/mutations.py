@@ -0,0 +1,339 @@
+"""
+Bid és költségvetés javaslatok alkalmazása tömeges mutate kérésekkel
+"""
+from typing import Optional, List, Dict, Any, Iterable, Tuple, TYPE_CHECKING
+from datetime import date
+from loguru import logger
+import hashlib
+
+from app.config import settings
+from app.services.google_ads import GoogleAdsService, get_google_ads_service
+
+# A napló SQLAlchemy-t használ, csak az első alkalmazáskor töltődik be
+if TYPE_CHECKING:
+    from app.services.mutation_journal import MutationJournal
+
+# Ezeknél a bid stratégiáknál számít a kulcsszó szintű CPC bid
+MANUAL_BIDDING_STRATEGIES = {"MANUAL_CPC", "ENHANCED_CPC"}
+
+# A bidek és költségvetések a pénznem legkisebb számlázható egységének (0.01) többszörösei
+BILLABLE_UNIT_MICROS = 10_000
+
+# A válaszban legfeljebb ennyi műveleti hiba jelenik meg
+MAX_REPORTED_ERRORS = 100
+
+
+def operation_key(job_id: str, customer_id: str, resource_name: str, field: str) -> str:
+    """
+    Egy művelet idempotencia kulcsa
+    
+    Az érték nem része a kulcsnak: egy jobon belül egy erőforrás mezője
+    legfeljebb egyszer módosul, akkor is, ha az újrafuttatás már a módosított
+    bidből számolna új értéket.
+    """
+    text = "\x1f".join((job_id, customer_id, resource_name, field))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def default_job_id(customer_id: str, rule_ids: Iterable[str], today: Optional[date] = None) -> str:
+    """
+    Alapértelmezett job azonosító: ügyfél, szabályok és a nap
+    
+    Ugyanazon szabályok aznapi újraalkalmazása (pl. egy újrapróbált kérés)
+    így ugyanazt a jobot folytatja, nem módosít újra.
+    """
+    rules = hashlib.sha256("\x1f".join(sorted(set(rule_ids))).encode("utf-8")).hexdigest()[:16]
+    return f"{customer_id}-{(today or date.today()).isoformat()}-{rules}"
+
+
+def to_billable_micros(amount_micros: float) -> int:
+    """Kerekítés a legközelebbi számlázható egységre (legalább egy egység)"""
+    return max(1, round(amount_micros / BILLABLE_UNIT_MICROS)) * BILLABLE_UNIT_MICROS
+
+
+def combine_adjustments(recommendations: Iterable[Dict[str, Any]]) -> float:
+    """
+    Egy kampány bid javaslatainak összevonása egyetlen százalékos módosítássá
+    
+    A több szabályból érkező módosítások szorzódnak (pl. -10% és +10%: -1%).
+    """
+    factor = 1.0
+    for recommendation in recommendations:
+        factor *= 1 + recommendation["adjustment_percent"] / 100
+    return (factor - 1) * 100
+
+
+class MutationService:
+    """
+    Javaslatok alkalmazása a Google Ads API-ban
+    
+    A módosításokat erőforrás típusonként (kulcsszó bid: MutateAdGroupCriteria,
+    költségvetés: MutateCampaignBudgets) kérésenként legfeljebb `chunk_size`
+    műveletes, partial_failure módú mutate kérésekbe csomagolja; a
+    `batch_job_threshold`-nál nagyobb módosítás készleteket BatchJobService-en
+    keresztül küldi. Minden művelet abszolút értéket állít be, és a napló
+    kiszűri a job korábbi futásaiban már alkalmazott műveleteket.
+    """
+    
+    def __init__(
+        self,
+        google_ads_service: GoogleAdsService,
+        journal: "MutationJournal",
+        chunk_size: int = 5000,
+        batch_job_threshold: int = 20000,
+        min_budget_micros: int = 1_000_000
+    ):
+        """
+        Args:
+            google_ads_service: A lekérdezésekhez és módosításokhoz használt szolgáltatás
+            journal: Idempotencia napló
+            chunk_size: Műveletek száma mutate kérésenként (API korlát: 10 000)
+            batch_job_threshold: Ennél több művelet esetén batch job
+            min_budget_micros: Ennél kisebb javasolt napi költségvetés nem kerül beállításra
+        """
+        self.google_ads_service = google_ads_service
+        self.journal = journal
+        self.chunk_size = chunk_size
+        self.batch_job_threshold = batch_job_threshold
+        self.min_budget_micros = min_budget_micros
+    
+    def plan_bid_changes(self, customer_id: str, adjustments: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Kampány szintű százalékos bid módosításokból kulcsszó szintű módosítások
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            adjustments: Kampány azonosító -> módosítás százalékban
+        
+        Returns:
+            Módosítások (`changes`) és a kihagyott kulcsszavak száma okonként (`skipped`)
+        """
+        changes: List[Dict[str, Any]] = []
+        skipped = {"automated_bidding": 0, "inherited_bid": 0, "unchanged": 0}
+        adjustments = {str(campaign_id): percent for campaign_id, percent in adjustments.items() if percent}
+        if not adjustments:
+            return {"changes": changes, "skipped": skipped}
+        
+        for keyword in self.google_ads_service.get_keyword_bids(customer_id, adjustments):
+            current = keyword["cpc_bid_micros"]
+            if keyword["bidding_strategy"] not in MANUAL_BIDDING_STRATEGIES:
+                # Automatikus bid stratégiánál a kulcsszó bid hatástalan
+                skipped["automated_bidding"] += 1
+                continue
+            if not current:
+                # A kulcsszó a hirdetéscsoport bidjét örökli
+                skipped["inherited_bid"] += 1
+                continue
+            
+            target = to_billable_micros(current * (1 + adjustments[str(keyword["campaign_id"])] / 100))
+            if target == current:
+                skipped["unchanged"] += 1
+                continue
+            changes.append({
+                "resource_type": "ad_group_criterion",
+                "resource_name": keyword["resource_name"],
+                "field": "cpc_bid_micros",
+                "old_value": current,
+                "value": target
+            })
+        
+        return {"changes": changes, "skipped": skipped}
+    
+    def plan_budget_changes(self, customer_id: str, budgets: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Kampányonkénti napi költségvetés javaslatokból költségvetés módosítások
+        
+        A több kampány által megosztott költségvetés a kampányok javaslatainak
+        összegét kapja. A min_budget_micros alatti javaslat (pl. egy kampány
+        0 elosztása) nem kerül beállításra: a kampány gyakorlatilag leállna,
+        ezt nem egy automatikus elosztásnak kell eldöntenie.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            budgets: Kampány azonosító -> javasolt napi költségvetés (pénznemben)
+        
+        Returns:
+            Módosítások (`changes`) és a kihagyott költségvetések száma okonként (`skipped`)
+        """
+        budgets = {str(campaign_id): amount for campaign_id, amount in budgets.items()}
+        targets: Dict[str, List[Any]] = {}
+        if budgets:
+            for row in self.google_ads_service.get_campaign_budgets(customer_id, budgets):
+                target = targets.setdefault(row["resource_name"], [row["amount_micros"], 0.0])
+                target[1] += budgets[str(row["campaign_id"])] * 1_000_000
+        
+        changes: List[Dict[str, Any]] = []
+        skipped = {"unchanged": 0, "below_minimum": 0}
+        for resource_name, (current, amount_micros) in targets.items():
+            if amount_micros < self.min_budget_micros:
+                skipped["below_minimum"] += 1
+                continue
+            target = to_billable_micros(amount_micros)
+            if target == current:
+                skipped["unchanged"] += 1
+                continue
+            changes.append({
+                "resource_type": "campaign_budget",
+                "resource_name": resource_name,
+                "field": "amount_micros",
+                "old_value": current,
+                "value": target
+            })
+        
+        if skipped["below_minimum"]:
+            logger.warning(
+                f"{skipped['below_minimum']} költségvetés javaslata a minimum "
+                f"({self.min_budget_micros / 1_000_000:g}) alatt, kihagyva"
+            )
+        return {"changes": changes, "skipped": skipped}
+    
+    def apply_changes(
+        self,
+        customer_id: str,
+        changes: List[Dict[str, Any]],
+        job_id: str,
+        validate_only: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Végrehajtja a módosításokat
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            changes: plan_bid_changes / plan_budget_changes módosításai
+            job_id: Idempotencia kulcs; ugyanazzal a job azonosítóval újrafuttatva
+                a már alkalmazott műveletek kimaradnak
+            validate_only: Csak ellenőrzés (dry run): az API validálja a
+                műveleteket, de nem módosít, és a napló sem változik
+        
+        Returns:
+            Összesítés: elküldött, sikeres, hibás és már korábban alkalmazott
+            műveletek, kérések száma, végrehajtási mód erőforrás típusonként
+            és a hibák (legfeljebb MAX_REPORTED_ERRORS)
+        """
+        keyed = [
+            (operation_key(job_id, customer_id, change["resource_name"], change["field"]), change)
+            for change in changes
+        ]
+        done = set() if validate_only else self.journal.applied(key for key, _ in keyed)
+        
+        by_type: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        for key, change in keyed:
+            if key not in done:
+                by_type.setdefault(change["resource_type"], []).append((key, change))
+        
+        summary: Dict[str, Any] = {
+            "job_id": job_id,
+            "validate_only": validate_only,
+            "submitted": sum(len(items) for items in by_type.values()),
+            "succeeded": 0,
+            "failed": 0,
+            "already_applied": len(keyed) - sum(len(items) for items in by_type.values()),
+            "requests": 0,
+            "mode": {},
+            "errors": []
+        }
+        
+        for resource_type, items in by_type.items():
+            if not validate_only and len(items) > self.batch_job_threshold:
+                # A batch job nem támogatja a validate_only módot, a dry run mindig mutate kérésekkel megy
+                summary["mode"][resource_type] = "batch_job"
+                errors = self.google_ads_service.run_batch_job(customer_id, resource_type, _operations(items))
+                self._collect(customer_id, items, errors, summary, validate_only)
+                continue
+            
+            summary["mode"][resource_type] = "mutate"
+            for start in range(0, len(items), self.chunk_size):
+                chunk = items[start:start + self.chunk_size]
+                errors = self.google_ads_service.mutate(
+                    customer_id,
+                    resource_type,
+                    _operations(chunk),
+                    partial_failure=True,
+                    validate_only=validate_only
+                )
+                # Darabonként naplózunk, hogy egy későbbi darab hibája után az újrafuttatás ne ismételje a korábbiakat
+                self._collect(customer_id, chunk, errors, summary, validate_only)
+        
+        if summary["succeeded"] and not validate_only:
+            # A kampány lista és a riportok a régi költségvetést mutatnák
+            self.google_ads_service.invalidate_cache(customer_id)
+            self.google_ads_service.invalidate_metadata(customer_id)
+        
+        logger.info(
+            f"Mutate job {job_id} ({'validálás' if validate_only else 'alkalmazás'}): "
+            f"{summary['succeeded']} sikeres, {summary['failed']} hibás, "
+            f"{summary['already_applied']} már alkalmazva, {summary['requests']} kérés"
+        )
+        return summary
+    
+    def _collect(
+        self,
+        customer_id: str,
+        items: List[Tuple[str, Dict[str, Any]]],
+        errors: List[Optional[str]],
+        summary: Dict[str, Any],
+        validate_only: bool
+    ) -> None:
+        """Egy kérés eredményének összesítése és naplózása"""
+        from app.services.mutation_journal import APPLIED, FAILED
+        
+        summary["requests"] += 1
+        entries = []
+        for (key, change), error in zip(items, errors):
+            if error:
+                summary["failed"] += 1
+                if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                    summary["errors"].append({"resource_name": change["resource_name"], "error": error})
+            else:
+                summary["succeeded"] += 1
+            entries.append({
+                "operation_key": key,
+                "job_id": summary["job_id"],
+                "customer_id": customer_id,
+                "resource_type": change["resource_type"],
+                "resource_name": change["resource_name"],
+                "field": change["field"],
+                "old_value": change.get("old_value"),
+                "new_value": change["value"],
+                "status": FAILED if error else APPLIED,
+                "error": error
+            })
+        
+        if not validate_only:
+            self.journal.record(entries)
+
+
+def _operations(items: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """A backendnek átadott műveletek (erőforrás név, mező, új érték)"""
+    return [
+        {"resource_name": change["resource_name"], "field": change["field"], "value": change["value"]}
+        for _, change in items
+    ]
+
+
+# Singleton instance
+_mutation_service: Optional[MutationService] = None
+
+
+def get_mutation_service(config_file: str = "google-ads.yaml") -> MutationService:
+    """
+    Visszaadja a mutate szolgáltatás singleton instance-t
+    
+    Args:
+        config_file: Google Ads konfiguráció fájl elérési útja
+    
+    Returns:
+        MutationService instance
+    """
+    global _mutation_service
+    if _mutation_service is None:
+        from app.services.mutation_journal import get_mutation_journal
+        
+        _mutation_service = MutationService(
+            get_google_ads_service(config_file),
+            get_mutation_journal(settings.DATABASE_URL),
+            chunk_size=settings.MUTATION_CHUNK_SIZE,
+            batch_job_threshold=settings.MUTATION_BATCH_JOB_THRESHOLD,
+            min_budget_micros=round(settings.MUTATION_MIN_DAILY_BUDGET * 1_000_000)
+        )
+    return _mutation_service
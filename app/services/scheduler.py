@@ -0,0 +1,400 @@
+"""
+Kvóta-tudatos ütemező a Google Ads API hívásokhoz
+"""
+from typing import Optional, Dict, Any, Callable, Iterator, TypeVar
+from contextlib import contextmanager
+from contextvars import ContextVar
+from loguru import logger
+import random
+import threading
+import time
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# Prioritási osztályok: a felhasználói (dashboard) kérések megelőzik a háttér szinkront
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+# Újrapróbálható gRPC státuszok
+RETRYABLE_STATUS_CODES = {"RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "ABORTED"}
+
+_current_priority: ContextVar[str] = ContextVar("google_ads_priority", default=INTERACTIVE)
+
+
+class QuotaExhaustedError(Exception):
+    """A Google Ads kvóta kimerült, és a kérés nem fért bele a várakozási időbe"""
+    
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def current_priority() -> str:
+    """Az aktuális kontextus prioritási osztálya"""
+    return _current_priority.get()
+
+
+@contextmanager
+def request_priority(priority: str):
+    """
+    Beállítja a blokkon belül indított Google Ads hívások prioritását
+    
+    Args:
+        priority: INTERACTIVE vagy BACKGROUND
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Ismeretlen prioritás: {priority}")
+    
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket rátakorlátozó
+    
+    Másodpercenként `rate` token töltődik vissza legfeljebb `capacity`-ig.
+    Nem szálbiztos önmagában; a QuotaScheduler a saját lockja alatt használja.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Visszatöltési ráta (token / másodperc)
+            capacity: Maximális token szám (burst)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """Másodpercek, amíg legalább `amount` token lesz (0, ha már most van)"""
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+    
+    def take(self, amount: float = 1.0) -> None:
+        """Levon `amount` tokent (előtte wait_time-mal ellenőrizendő)"""
+        self.tokens -= amount
+    
+    def drain(self, now: float) -> None:
+        """Kiüríti a bucketet (pl. RESOURCE_EXHAUSTED válasz után)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+    
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class QuotaScheduler:
+    """
+    Központi ütemező minden GAQL híváshoz
+    
+    - Token bucket a developer tokenre (a folyamat összes hívása) és ügyfelenként
+    - Prioritási osztályok: háttér hívás nem indul, amíg interaktív hívás vár,
+      és a developer bucket egy részét (background_reserve) az interaktív
+      forgalomnak hagyja, így a háttér munka magától lelassul
+    - Jitteres exponenciális backoff újrapróbálható hibákra; streamnél csak az
+      első sor előtt próbál újra, hogy ne adjon duplikált sorokat
+    - Várakozási sor metrikák prioritásonként
+    """
+    
+    def __init__(
+        self,
+        developer_qps: float = 20.0,
+        developer_burst: int = 40,
+        customer_qps: float = 5.0,
+        customer_burst: int = 10,
+        background_reserve: float = 0.25,
+        max_retries: int = 4,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 30.0,
+        max_wait_seconds: Optional[Dict[str, float]] = None,
+        max_customer_buckets: int = 10000
+    ):
+        """
+        Inicializálja az ütemezőt
+        
+        Args:
+            developer_qps: Developer token szintű hívás ráta (hívás / másodperc)
+            developer_burst: Developer token szintű burst
+            customer_qps: Ügyfelenkénti hívás ráta
+            customer_burst: Ügyfelenkénti burst
+            background_reserve: A developer bucket interaktív hívásoknak fenntartott hányada
+            max_retries: Újrapróbálások maximális száma
+            backoff_base_seconds: Backoff alapidő
+            backoff_max_seconds: Backoff felső korlát
+            max_wait_seconds: Maximális várakozás a sorban prioritásonként
+            max_customer_buckets: Ennyi ügyfél bucket felett a tele (tétlen) bucketek törlődnek
+        """
+        self.developer_bucket = TokenBucket(developer_qps, developer_burst)
+        self.customer_qps = customer_qps
+        self.customer_burst = customer_burst
+        self.background_reserve = background_reserve
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.max_wait_seconds = max_wait_seconds or {INTERACTIVE: 10.0, BACKGROUND: 300.0}
+        self.max_customer_buckets = max_customer_buckets
+        
+        self._customer_buckets: Dict[str, TokenBucket] = {}
+        self._cond = threading.Condition()
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        self._max_waiting = {priority: 0 for priority in PRIORITIES}
+        self._acquired = {priority: 0 for priority in PRIORITIES}
+        self._wait_seconds = {priority: 0.0 for priority in PRIORITIES}
+        self._throttled = {priority: 0 for priority in PRIORITIES}
+        self._retries = 0
+        self._resource_exhausted = 0
+    
+    def _customer_bucket(self, customer_id: str, now: float) -> TokenBucket:
+        """Az ügyfél bucketje (a lock-ot a hívó tartja)"""
+        bucket = self._customer_buckets.get(customer_id)
+        if bucket is None:
+            if len(self._customer_buckets) >= self.max_customer_buckets:
+                idle = [key for key, b in self._customer_buckets.items() if b.is_full(now)]
+                for key in idle:
+                    del self._customer_buckets[key]
+            bucket = TokenBucket(self.customer_qps, self.customer_burst)
+            self._customer_buckets[customer_id] = bucket
+        return bucket
+    
+    def _try_take(self, customer_id: str, priority: str, now: float) -> float:
+        """Megpróbál egy tokent venni mindkét bucketből; 0, ha sikerült, különben a várakozási idő"""
+        if priority == BACKGROUND and self._waiting[INTERACTIVE]:
+            return 1.0 / self.developer_bucket.rate
+        
+        reserve = self.developer_bucket.capacity * self.background_reserve if priority == BACKGROUND else 0.0
+        customer_bucket = self._customer_bucket(customer_id, now)
+        wait = max(
+            self.developer_bucket.wait_time(1.0 + reserve, now),
+            customer_bucket.wait_time(1.0, now)
+        )
+        if wait > 0:
+            return wait
+        
+        self.developer_bucket.take()
+        customer_bucket.take()
+        return 0.0
+    
+    def acquire(self, customer_id: str, priority: Optional[str] = None) -> None:
+        """
+        Blokkol, amíg a hívás a kvóták szerint elindulhat
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            priority: Prioritási osztály (alapértelmezetten a kontextusé)
+        
+        Raises:
+            QuotaExhaustedError: Ha a várakozás túllépné a prioritás maximális várakozási idejét
+        """
+        priority = priority or current_priority()
+        started = time.monotonic()
+        deadline = started + self.max_wait_seconds[priority]
+        
+        with self._cond:
+            self._waiting[priority] += 1
+            self._max_waiting[priority] = max(self._max_waiting[priority], self._waiting[priority])
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._try_take(customer_id, priority, now)
+                    if wait == 0:
+                        self._acquired[priority] += 1
+                        self._wait_seconds[priority] += now - started
+                        return
+                    if now + wait > deadline:
+                        self._throttled[priority] += 1
+                        raise QuotaExhaustedError(
+                            f"Google Ads kvóta kimerült ({priority}, ügyfél: {customer_id})",
+                            retry_after=wait
+                        )
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+    
+    def call(self, customer_id: str, func: Callable[[], T], priority: Optional[str] = None) -> T:
+        """
+        Végrehajt egy (nem streamelő) API hívást kvóta várakozással és újrapróbálással
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            func: A hívást végző függvény
+            priority: Prioritási osztály (alapértelmezetten a kontextusé)
+        
+        Returns:
+            A függvény eredménye
+        """
+        attempt = 0
+        while True:
+            self.acquire(customer_id, priority)
+            try:
+                return func()
+            except Exception as e:
+                attempt = self._handle_failure(e, customer_id, attempt)
+    
+    def stream(
+        self,
+        customer_id: str,
+        open_stream: Callable[[], Iterator[T]],
+        priority: Optional[str] = None
+    ) -> Iterator[T]:
+        """
+        Streamelő API hívás kvóta várakozással és újrapróbálással
+        
+        Újrapróbálás csak az első sor megérkezése előtt történik; utána a hiba
+        továbbmegy a hívóhoz, különben a már kiadott sorok duplikálódnának.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            open_stream: A streamet megnyitó függvény
+            priority: Prioritási osztály (alapértelmezetten a kontextusé)
+        
+        Yields:
+            A stream elemei
+        """
+        attempt = 0
+        while True:
+            self.acquire(customer_id, priority)
+            iterator = iter(open_stream())
+            try:
+                first = next(iterator)
+            except StopIteration:
+                return
+            except Exception as e:
+                attempt = self._handle_failure(e, customer_id, attempt)
+                continue
+            
+            yield first
+            yield from iterator
+            return
+    
+    def _handle_failure(self, error: Exception, customer_id: str, attempt: int) -> int:
+        """
+        Eldönti, hogy a hiba újrapróbálható-e, és kivárja a backoffot
+        
+        Returns:
+            A következő próbálkozás sorszáma
+        
+        Raises:
+            Az eredeti hiba, ha nem újrapróbálható; QuotaExhaustedError, ha a
+            kvóta hiba az újrapróbálások után is fennáll
+        """
+        status = _status_name(error)
+        if status not in RETRYABLE_STATUS_CODES:
+            raise error
+        
+        now = time.monotonic()
+        if status == "RESOURCE_EXHAUSTED":
+            # A többi hívó se fusson bele azonnal ugyanabba a kvóta hibába
+            with self._cond:
+                self._resource_exhausted += 1
+                self.developer_bucket.drain(now)
+                self._customer_bucket(customer_id, now).drain(now)
+        
+        delay = max(self._backoff(attempt), _retry_delay(error))
+        if attempt >= self.max_retries:
+            if status == "RESOURCE_EXHAUSTED":
+                raise QuotaExhaustedError(
+                    f"Google Ads kvóta kimerült {attempt + 1} próbálkozás után (ügyfél: {customer_id})",
+                    retry_after=delay
+                ) from error
+            raise error
+        
+        with self._cond:
+            self._retries += 1
+        logger.warning(f"Újrapróbálható Google Ads hiba ({status}), újrapróbálás {delay:.2f} s múlva (ügyfél: {customer_id})")
+        time.sleep(delay)
+        return attempt + 1
+    
+    def _backoff(self, attempt: int) -> float:
+        """Exponenciális backoff teljes jitterrel"""
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Visszaadja a várakozási sor és kvóta metrikákat"""
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "queue_depth": dict(self._waiting),
+                "max_queue_depth": dict(self._max_waiting),
+                "acquired": dict(self._acquired),
+                "average_wait_seconds": {
+                    priority: self._wait_seconds[priority] / self._acquired[priority] if self._acquired[priority] else 0.0
+                    for priority in PRIORITIES
+                },
+                "throttled": dict(self._throttled),
+                "retries": self._retries,
+                "resource_exhausted": self._resource_exhausted,
+                "developer_tokens": round(self.developer_bucket.tokens + (now - self.developer_bucket.updated) * self.developer_bucket.rate, 2),
+                "customer_buckets": len(self._customer_buckets)
+            }
+
+
+def _status_name(error: Exception) -> Optional[str]:
+    """A hiba gRPC státusz neve (GoogleAdsException esetén a becsomagolt hívásé)"""
+    call = getattr(error, "error", error)
+    code = getattr(call, "code", None)
+    if not callable(code):
+        return None
+    try:
+        return code().name
+    except Exception:
+        return None
+
+
+def _retry_delay(error: Exception) -> float:
+    """A szerver által javasolt várakozás (QuotaErrorDetails.retry_delay), ha van"""
+    failure = getattr(error, "failure", None)
+    try:
+        for ads_error in failure.errors:
+            retry_delay = ads_error.details.quota_error_details.retry_delay
+            if retry_delay.seconds or retry_delay.nanos:
+                return retry_delay.seconds + retry_delay.nanos / 1e9
+    except AttributeError:
+        pass
+    return 0.0
+
+
+# Singleton instance
+_quota_scheduler: Optional[QuotaScheduler] = None
+
+
+def get_quota_scheduler() -> QuotaScheduler:
+    """
+    Visszaadja a folyamat kvóta ütemezőjét (a beállítások alapján)
+    
+    Returns:
+        QuotaScheduler instance
+    """
+    global _quota_scheduler
+    if _quota_scheduler is None:
+        _quota_scheduler = QuotaScheduler(
+            developer_qps=settings.GOOGLE_ADS_DEVELOPER_QPS,
+            developer_burst=settings.GOOGLE_ADS_DEVELOPER_BURST,
+            customer_qps=settings.GOOGLE_ADS_CUSTOMER_QPS,
+            customer_burst=settings.GOOGLE_ADS_CUSTOMER_BURST,
+            background_reserve=settings.GOOGLE_ADS_BACKGROUND_RESERVE,
+            max_retries=settings.GOOGLE_ADS_MAX_RETRIES,
+            backoff_base_seconds=settings.GOOGLE_ADS_BACKOFF_BASE_SECONDS,
+            backoff_max_seconds=settings.GOOGLE_ADS_BACKOFF_MAX_SECONDS,
+            max_wait_seconds={
+                INTERACTIVE: settings.GOOGLE_ADS_INTERACTIVE_MAX_WAIT_SECONDS,
+                BACKGROUND: settings.GOOGLE_ADS_BACKGROUND_MAX_WAIT_SECONDS
+            }
+        )
+    return _quota_scheduler
@@ -0,0 +1,386 @@
+"""
+Oszlopos riport adatok megosztása a worker folyamatokkal (osztott memória)
+"""
+from typing import Optional, Dict, Any, List, Tuple
+from multiprocessing import shared_memory
+from loguru import logger
+import os
+import threading
+import numpy as np
+
+from app.services.columnar import ColumnarResult
+
+# Az oszlopok kezdőcíme a szegmensben (cache sor / SIMD igazítás)
+_ALIGNMENT = 64
+# A kategória listák ezzel az elválasztóval, egyetlen UTF-8 blokként kerülnek a szegmensbe
+_SEPARATOR = "\x00"
+# Linuxon a POSIX osztott memória egy tmpfs (konténerben gyakran csak 64 MB)
+_SHM_DIRECTORY = "/dev/shm"
+
+
+def _aligned(offset: int) -> int:
+    """A következő igazított eltolás"""
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class SharedDatasetHandle:
+    """
+    Egy osztott memóriába publikált ColumnarResult leírója
+    
+    Kicsi és sorosítható (pickle): a worker folyamat ebből, a szegmens
+    nevével csatlakozik az adatokhoz. Az oszlopok helyét (eltolás, típus,
+    hossz) és a kategória blokkok helyét írja le; a szegmensbe nem
+    kódolható kategória listák (nem szöveges érték vagy elválasztó
+    karaktert tartalmazó szöveg) magában a leíróban utaznak.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        schema: Tuple[Tuple[str, str], ...],
+        fields: Tuple[str, ...],
+        fingerprint: str,
+        columns: Tuple[Tuple[str, str, int, int], ...],
+        categories: Tuple[Tuple[str, int, int, int], ...],
+        inline_categories: Dict[str, List[Any]]
+    ):
+        """
+        Args:
+            name: Az osztott memória szegmens neve
+            size: A szegmens mérete bájtban
+            schema: Az eredmény sémája
+            fields: A szótár formátumú sorok mezői
+            fingerprint: Az eredmény tartalmának ujjlenyomata
+            columns: (oszlop név, dtype, eltolás, elemszám) négyesek
+            categories: (oszlop név, eltolás, bájtszám, elemszám) négyesek
+            inline_categories: A leíróban átadott kategória listák
+        """
+        self.name = name
+        self.size = size
+        self.schema = schema
+        self.fields = fields
+        self.fingerprint = fingerprint
+        self.columns = columns
+        self.categories = categories
+        self.inline_categories = inline_categories
+    
+    def __repr__(self) -> str:
+        return f"SharedDatasetHandle(name={self.name!r}, size={self.size})"
+
+
+def _shm_free_bytes() -> Optional[int]:
+    """
+    Az osztott memória szabad helye bájtban, ha lekérdezhető
+    
+    A megtelt tmpfs-re író folyamat SIGBUS jelzéssel leáll, ezért a
+    publikálás előtt ellenőrizni kell.
+    """
+    if not os.path.isdir(_SHM_DIRECTORY):
+        return None
+    try:
+        stats = os.statvfs(_SHM_DIRECTORY)
+    except OSError:
+        return None
+    return stats.f_bavail * stats.f_frsize
+
+
+def _encode_categories(values: List[Any]) -> Optional[bytes]:
+    """A kategória lista egyetlen blokkba kódolva, vagy None ha így nem kódolható"""
+    if not all(type(value) is str for value in values):
+        return None
+    joined = _SEPARATOR.join(values)
+    if joined.count(_SEPARATOR) != max(0, len(values) - 1):
+        return None
+    return joined.encode("utf-8", "surrogatepass")
+
+
+def publish(result: ColumnarResult) -> Tuple[shared_memory.SharedMemory, SharedDatasetHandle]:
+    """
+    Egy ColumnarResult tárolt oszlopainak és kategóriáinak másolása egy új osztott memória szegmensbe
+    
+    A származtatott oszlopok (cost, roas, ...) nem kerülnek át, a worker
+    igény szerint számolja őket. A szegmens felszabadítása (close, unlink)
+    a hívó feladata, lásd SharedDatasetRegistry.
+    
+    Args:
+        result: A publikálandó eredmény
+    
+    Returns:
+        (a szegmens, a worker oldali csatlakozás leírója)
+    """
+    layout = []
+    offset = 0
+    for name, values in result.columns.items():
+        offset = _aligned(offset)
+        layout.append((name, values, offset))
+        offset += values.nbytes
+    
+    blocks = []
+    inline_categories = {}
+    for name, values in result.categories.items():
+        encoded = _encode_categories(values)
+        if encoded is None:
+            inline_categories[name] = list(values)
+            continue
+        blocks.append((name, encoded, offset, len(values)))
+        offset += len(encoded)
+    
+    segment = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    try:
+        columns = []
+        for name, values, start in layout:
+            target = np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf, offset=start)
+            target[...] = values
+            columns.append((name, values.dtype.str, start, len(values)))
+            del target
+        
+        categories = []
+        for name, encoded, start, count in blocks:
+            segment.buf[start:start + len(encoded)] = encoded
+            categories.append((name, start, len(encoded), count))
+    except BaseException:
+        segment.close()
+        segment.unlink()
+        raise
+    
+    handle = SharedDatasetHandle(
+        name=segment.name,
+        size=segment.size,
+        schema=result.schema,
+        fields=result.fields,
+        fingerprint=result.fingerprint(),
+        columns=tuple(columns),
+        categories=tuple(categories),
+        inline_categories=inline_categories
+    )
+    return segment, handle
+
+
+def attach(handle: SharedDatasetHandle) -> Tuple[ColumnarResult, shared_memory.SharedMemory]:
+    """
+    Csatlakozás egy publikált eredményhez (worker oldal)
+    
+    A numerikus oszlopok és a kategória kódok másolás nélküli, csak
+    olvasható NumPy nézetek a szegmensre; a kategória listák egyszer
+    dekódolódnak. A szegmenst az eredmény utolsó használata után be kell
+    zárni (lásd release_attachments), felszabadítani (unlink) csak a
+    publikáló folyamat szabadítja fel.
+    
+    Args:
+        handle: A publikáló folyamattól kapott leíró
+    
+    Returns:
+        (az eredmény, a csatlakozott szegmens)
+    
+    Raises:
+        FileNotFoundError: Ha a szegmens már nem létezik
+    """
+    segment = shared_memory.SharedMemory(name=handle.name)
+    
+    columns = {}
+    for name, dtype, start, length in handle.columns:
+        view = np.ndarray((length,), dtype=np.dtype(dtype), buffer=segment.buf, offset=start)
+        view.flags.writeable = False
+        columns[name] = view
+    
+    categories = dict(handle.inline_categories)
+    for name, start, nbytes, count in handle.categories:
+        text = bytes(segment.buf[start:start + nbytes]).decode("utf-8", "surrogatepass")
+        categories[name] = text.split(_SEPARATOR) if count else []
+    
+    result = ColumnarResult(handle.schema, columns, categories, handle.fields)
+    result._fingerprint = handle.fingerprint
+    return result, segment
+
+
+def resolve_shared(value: Any, attachments: List[shared_memory.SharedMemory]) -> Any:
+    """
+    A leírók helyettesítése a csatlakozott eredményekkel (worker oldal)
+    
+    Szótárakon, listákon és tuple-ökön rekurzívan halad végig.
+    
+    Args:
+        value: Argumentum (vagy argumentumok szerkezete)
+        attachments: Ide kerülnek a csatlakozott szegmensek (a hívás után lezárandók)
+    """
+    if isinstance(value, SharedDatasetHandle):
+        result, segment = attach(value)
+        attachments.append(segment)
+        return result
+    if isinstance(value, dict):
+        return {key: resolve_shared(item, attachments) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(resolve_shared(item, attachments) for item in value)
+    return value
+
+
+# Worker oldal: a nézetek miatt még le nem zárható szegmensek (a következő hívás után újra próbálja)
+_pending_close: List[shared_memory.SharedMemory] = []
+
+
+def release_attachments(attachments: List[shared_memory.SharedMemory]) -> None:
+    """
+    A worker oldali csatlakozások lezárása egy hívás után
+    
+    Ha egy szegmensre még hivatkozik nézet (pl. egy hulladékgyűjtésre váró
+    DataFrame), a lezárás a következő hívás utánra halasztódik; a szegmens
+    memóriája addig a workerben leképezve marad.
+    """
+    segments = _pending_close + attachments
+    _pending_close.clear()
+    for segment in segments:
+        try:
+            segment.close()
+        except BufferError:
+            _pending_close.append(segment)
+
+
+class _Segment:
+    """Egy publikált szegmens a hivatkozásszámlálójával"""
+    
+    def __init__(self, segment: shared_memory.SharedMemory, handle: SharedDatasetHandle):
+        self.segment = segment
+        self.handle = handle
+        self.refs = 0
+
+
+class SharedDatasetRegistry:
+    """
+    A publikált szegmensek hivatkozásszámlált élettartam kezelője (publikáló oldal)
+    
+    Az azonos tartalmú eredmények (ujjlenyomat) egy szegmensen osztoznak:
+    a riport cache-ből egyszerre több elemzésnek kiadott eredmény egyszer
+    másolódik. Minden acquire() mellé egy release() tartozik; az utolsó
+    release() lezárja és felszabadítja a szegmenst.
+    """
+    
+    def __init__(self, min_bytes: int = 4 * 1024 * 1024):
+        """
+        Args:
+            min_bytes: Ennél kisebb eredmény nem kerül osztott memóriába (a pickle olcsóbb)
+        """
+        self.min_bytes = min_bytes
+        self.fallbacks = 0
+        self._segments: Dict[str, _Segment] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.reused = 0
+        self.freed = 0
+        self.published_bytes = 0
+    
+    def acquire(self, result: ColumnarResult) -> Optional[SharedDatasetHandle]:
+        """
+        Publikál (vagy újrahasznál) egy eredményt, és növeli a hivatkozásszámát
+        
+        Args:
+            result: Az eredmény
+        
+        Returns:
+            A leíró, vagy None ha az eredmény a küszöbnél kisebb, vagy nem fér
+            el az osztott memóriában (ilyenkor a hívó pickle-lel adja át)
+        """
+        if result.nbytes < self.min_bytes:
+            return None
+        
+        fingerprint = result.fingerprint()
+        with self._lock:
+            entry = self._segments.get(fingerprint)
+            if entry is not None:
+                self.reused += 1
+            else:
+                free = _shm_free_bytes()
+                # Felső becslés: a kategória listák kódolva sem nagyobbak a becsült méretüknél
+                if free is not None and free < result.nbytes:
+                    self.fallbacks += 1
+                    logger.warning(
+                        f"Az osztott memória megtelt ({free} bájt szabad, {result.nbytes} kell), "
+                        f"az adatok pickle-lel kerülnek a workerhez"
+                    )
+                    return None
+                try:
+                    segment, handle = publish(result)
+                except OSError as e:
+                    self.fallbacks += 1
+                    logger.warning(f"Osztott memória szegmens létrehozása sikertelen, pickle-lel adjuk át: {e}")
+                    return None
+                entry = _Segment(segment, handle)
+                self._segments[fingerprint] = entry
+                self.published += 1
+                self.published_bytes += segment.size
+            entry.refs += 1
+            return entry.handle
+    
+    def release(self, handle: SharedDatasetHandle) -> None:
+        """Csökkenti a hivatkozásszámot; nullánál felszabadítja a szegmenst"""
+        with self._lock:
+            entry = self._segments.get(handle.fingerprint)
+            if entry is None or entry.handle is not handle:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            del self._segments[handle.fingerprint]
+            self.freed += 1
+        
+        self._free(entry)
+    
+    def _free(self, entry: _Segment) -> None:
+        """Egy szegmens lezárása és felszabadítása"""
+        try:
+            entry.segment.close()
+            entry.segment.unlink()
+        except OSError as e:
+            logger.warning(f"Osztott memória szegmens felszabadítása sikertelen ({entry.handle.name}): {e}")
+    
+    def share(self, value: Any, handles: List[SharedDatasetHandle]) -> Any:
+        """
+        A (küszöb feletti) ColumnarResult-ok helyettesítése leírókkal
+        
+        Szótárakon, listákon és tuple-ökön rekurzívan halad végig; a megszerzett
+        leírók a handles listába kerülnek, ezeket a feladat végén el kell engedni.
+        
+        Args:
+            value: Argumentum (vagy argumentumok szerkezete)
+            handles: Ide kerülnek a megszerzett leírók
+        """
+        if isinstance(value, ColumnarResult):
+            handle = self.acquire(value)
+            if handle is None:
+                return value
+            handles.append(handle)
+            return handle
+        if isinstance(value, dict):
+            return {key: self.share(item, handles) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(self.share(item, handles) for item in value)
+        return value
+    
+    def release_all(self, handles: List[SharedDatasetHandle]) -> None:
+        """Elengedi a share() által megszerzett leírókat"""
+        for handle in handles:
+            self.release(handle)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Visszaadja az élő szegmensek és a publikálások statisztikáit"""
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "bytes": sum(entry.segment.size for entry in self._segments.values()),
+                "references": sum(entry.refs for entry in self._segments.values()),
+                "min_bytes": self.min_bytes,
+                "published": self.published,
+                "published_bytes": self.published_bytes,
+                "reused": self.reused,
+                "freed": self.freed,
+                "fallbacks": self.fallbacks
+            }
+    
+    def shutdown(self) -> None:
+        """Felszabadítja az összes szegmenst (leálláskor, a futó feladatoktól függetlenül)"""
+        with self._lock:
+            entries = list(self._segments.values())
+            self._segments.clear()
+            self.freed += len(entries)
+        for entry in entries:
+            self._free(entry)
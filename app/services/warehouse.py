@@ -0,0 +1,558 @@
+"""
+Helyi teljesítmény adattárház (napi szintű kampány és kulcsszó metrikák)
+"""
+from typing import Optional, List, Dict, Any, Iterator, Tuple, TYPE_CHECKING
+from datetime import date, datetime, timedelta
+from itertools import islice
+from loguru import logger
+from sqlalchemy import (
+    create_engine,
+    MetaData,
+    Table,
+    Column,
+    Index,
+    String,
+    BigInteger,
+    Integer,
+    Float,
+    Date,
+    DateTime,
+    select,
+    delete,
+    func,
+    and_,
+    or_
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+if TYPE_CHECKING:
+    from app.services.google_ads import GoogleAdsService
+
+
+metadata = MetaData()
+
+campaign_daily_metrics = Table(
+    "campaign_daily_metrics",
+    metadata,
+    Column("customer_id", String(20), primary_key=True),
+    Column("date", Date, primary_key=True),
+    Column("campaign_id", BigInteger, primary_key=True),
+    Column("campaign_name", String(255)),
+    Column("impressions", BigInteger, nullable=False, default=0),
+    Column("clicks", BigInteger, nullable=False, default=0),
+    Column("cost_micros", BigInteger, nullable=False, default=0),
+    Column("conversions", Float, nullable=False, default=0.0),
+    Column("conversions_value", Float, nullable=False, default=0.0)
+)
+
+keyword_daily_metrics = Table(
+    "keyword_daily_metrics",
+    metadata,
+    Column("customer_id", String(20), primary_key=True),
+    Column("date", Date, primary_key=True),
+    Column("ad_group_id", BigInteger, primary_key=True),
+    Column("criterion_id", BigInteger, primary_key=True),
+    Column("campaign_id", BigInteger, nullable=False),
+    Column("campaign_name", String(255)),
+    Column("ad_group_name", String(255)),
+    Column("keyword", String(255)),
+    Column("match_type", String(20)),
+    Column("impressions", BigInteger, nullable=False, default=0),
+    Column("clicks", BigInteger, nullable=False, default=0),
+    Column("cost_micros", BigInteger, nullable=False, default=0),
+    Column("conversions", Float, nullable=False, default=0.0),
+    Column("conversions_value", Float, nullable=False, default=0.0),
+    Column("quality_score", Integer),
+    # Kulcs szerinti (keyset) lapozáshoz és streameléshez
+    Index("ix_keyword_daily_metrics_key", "customer_id", "ad_group_id", "criterion_id", "date")
+)
+
+sync_state = Table(
+    "warehouse_sync_state",
+    metadata,
+    Column("customer_id", String(20), primary_key=True),
+    Column("entity", String(20), primary_key=True),
+    Column("synced_from", Date, nullable=False),
+    Column("synced_through", Date, nullable=False),
+    Column("last_sync_at", DateTime, nullable=False)
+)
+
+ENTITY_TABLES = {
+    "campaign": campaign_daily_metrics,
+    "keyword": keyword_daily_metrics
+}
+
+# Ezeket a relatív tartományokat tudja az adattárház kiszolgálni
+WAREHOUSE_DATE_RANGES = {"LAST_7_DAYS", "LAST_14_DAYS", "LAST_30_DAYS", "LAST_90_DAYS"}
+
+INSERT_BATCH_SIZE = 5000
+
+
+class PerformanceWarehouse:
+    """
+    Napi szintű teljesítmény adattárház
+    
+    A `segments.date` szintű metrikákat napi partíciókban tárolja. A lezárt
+    (a konverziós késleltetési ablaknál régebbi) napokat nem kérdezi le újra,
+    szinkronizáláskor csak az utolsó N napot frissíti.
+    """
+    
+    def __init__(self, database_url: str):
+        """
+        Inicializálja az adattárházat és létrehozza a táblákat
+        
+        Args:
+            database_url: SQLAlchemy adatbázis URL (pl. sqlite:///./google_ads_automation.db)
+        """
+        connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+        self.engine: Engine = create_engine(database_url, connect_args=connect_args, future=True)
+        metadata.create_all(self.engine)
+        # Korábban létrehozott táblánál a create_all az új indexeket nem hozza létre
+        for index in keyword_daily_metrics.indexes:
+            index.create(self.engine, checkfirst=True)
+        logger.info(f"Teljesítmény adattárház inicializálva: {self.engine.url.render_as_string(hide_password=True)}")
+    
+    def sync_customer(
+        self,
+        customer_id: str,
+        google_ads_service: "GoogleAdsService",
+        history_days: int = 90,
+        lag_days: int = 3,
+        today: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Inkrementálisan szinkronizálja egy ügyfél napi metrikáit
+        
+        Első futáskor `history_days` napot tölt be. Később csak a legutóbb
+        szinkronizált nap utáni napokat, valamint a konverziós késleltetés
+        miatt még változó utolsó `lag_days` napot kérdezi le újra.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            google_ads_service: A lekérdezéshez használt GoogleAdsService
+            history_days: Első betöltéskor visszamenőleg lekérdezett napok száma
+            lag_days: Újra lekérdezett (konverziós késleltetés alatti) napok száma
+            today: Referencia nap (alapértelmezetten a mai nap)
+        
+        Returns:
+            Entitásonkénti szinkronizálási eredmény
+        """
+        today = today or date.today()
+        end = today - timedelta(days=1)
+        result = {}
+        
+        fetchers = {
+            "campaign": google_ads_service.iter_campaign_daily_metrics,
+            "keyword": google_ads_service.iter_keyword_daily_metrics
+        }
+        
+        for entity, fetch in fetchers.items():
+            state = self._get_state(customer_id, entity)
+            
+            if state is None:
+                start = today - timedelta(days=history_days)
+                synced_from = start
+            else:
+                start = min(state["synced_through"] + timedelta(days=1), today - timedelta(days=lag_days))
+                synced_from = state["synced_from"]
+            
+            rows = self._replace_partitions(customer_id, entity, start, end, fetch(customer_id, start, end))
+            self._set_state(customer_id, entity, synced_from, end)
+            
+            result[entity] = {
+                "refreshed_from": start.isoformat(),
+                "refreshed_through": end.isoformat(),
+                "rows": rows
+            }
+            logger.info(f"Adattárház szinkron ({entity}): ügyfél {customer_id}, {start} - {end}, {rows} sor")
+        
+        return result
+    
+    def covers(self, customer_id: str, entity: str, start: date, end: date) -> bool:
+        """
+        Ellenőrzi, hogy az adattárház lefedi-e a teljes dátum tartományt
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            entity: campaign vagy keyword
+            start: Kezdő nap
+            end: Záró nap
+        
+        Returns:
+            True, ha a tartomány minden napja szinkronizálva van
+        """
+        state = self._get_state(customer_id, entity)
+        return state is not None and state["synced_from"] <= start and state["synced_through"] >= end
+    
+    def get_freshness(self, customer_id: str, entity: str) -> Optional[Dict[str, Any]]:
+        """
+        Visszaadja egy ügyfél adatainak frissességét
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            entity: campaign vagy keyword
+        
+        Returns:
+            Szinkronizált tartomány és az utolsó szinkron időpontja, vagy None
+        """
+        state = self._get_state(customer_id, entity)
+        if state is None:
+            return None
+        
+        return {
+            "synced_from": state["synced_from"].isoformat(),
+            "synced_through": state["synced_through"].isoformat(),
+            "last_sync_at": state["last_sync_at"].isoformat()
+        }
+    
+    def get_campaign_performance(
+        self,
+        customer_id: str,
+        start: date,
+        end: date,
+        campaign_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Kampány teljesítmény összesítés a napi partíciókból
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            start: Kezdő nap
+            end: Záró nap
+            campaign_id: Kampány azonosító (opcionális)
+        
+        Returns:
+            Teljesítmény adatok a GoogleAdsService.get_campaign_performance formátumában
+        """
+        t = campaign_daily_metrics
+        conditions = [t.c.customer_id == customer_id, t.c.date >= start, t.c.date <= end]
+        if campaign_id:
+            conditions.append(t.c.campaign_id == int(campaign_id))
+        
+        query = (
+            select(
+                t.c.campaign_id,
+                func.max(t.c.campaign_name).label("campaign_name"),
+                *_metric_sums(t)
+            )
+            .where(and_(*conditions))
+            .group_by(t.c.campaign_id)
+            .order_by(func.sum(t.c.impressions).desc())
+        )
+        
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).mappings().all()
+        
+        performance_data = []
+        for row in rows:
+            record = {"campaign_id": row["campaign_id"], "campaign_name": row["campaign_name"]}
+            record.update(_derived_metrics(row))
+            performance_data.append(record)
+        
+        return performance_data
+    
+    def get_campaign_daily_metrics(self, customer_id: str, start: date, end: date) -> List[Dict[str, Any]]:
+        """
+        Kampány/nap sorok a napi partíciókból (a válaszgörbe illesztéshez)
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            start: Kezdő nap
+            end: Záró nap
+        
+        Returns:
+            Sorok a GoogleAdsService.get_campaign_daily_history mezőivel
+        """
+        t = campaign_daily_metrics
+        query = (
+            select(t.c.campaign_id, t.c.cost_micros, t.c.conversions, t.c.conversions_value)
+            .where(and_(t.c.customer_id == customer_id, t.c.date >= start, t.c.date <= end))
+            .order_by(t.c.campaign_id, t.c.date)
+        )
+        
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        
+        return [
+            {
+                "campaign_id": campaign_id,
+                "cost": cost_micros / 1_000_000,
+                "conversions": conversions,
+                "conversions_value": conversions_value
+            }
+            for campaign_id, cost_micros, conversions, conversions_value in rows
+        ]
+    
+    def get_keywords_performance(
+        self,
+        customer_id: str,
+        start: date,
+        end: date,
+        campaign_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Kulcsszó teljesítmény összesítés a napi partíciókból
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            start: Kezdő nap
+            end: Záró nap
+            campaign_id: Kampány azonosító (opcionális)
+        
+        Returns:
+            Kulcsszó adatok a GoogleAdsService.get_keywords_performance formátumában
+        """
+        t = keyword_daily_metrics
+        query = (
+            _keywords_query(customer_id, start, end, campaign_id)
+            .order_by(None)
+            .order_by(func.sum(t.c.impressions).desc(), t.c.ad_group_id, t.c.criterion_id)
+        )
+        
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).mappings().all()
+        
+        return [_keyword_record(row) for row in rows]
+    
+    def get_keywords_page(
+        self,
+        customer_id: str,
+        start: date,
+        end: date,
+        campaign_id: Optional[str] = None,
+        page_size: int = 1000,
+        after: Optional[Tuple[int, int]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[int, int]]]:
+        """
+        A kulcsszó teljesítmény összesítés egy lapja (keyset lapozással)
+        
+        A sorok a (hirdetéscsoport, kulcsszó) kulcs szerint rendezettek, és a
+        lap az előző lap utolsó kulcsa után folytatódik: a lap költsége nem nő
+        a lap sorszámával (nincs OFFSET), és a sorrend a metrikák lapok közötti
+        változásakor is stabil, így sor nem ismétlődik és nem marad ki.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            start: Kezdő nap
+            end: Záró nap
+            campaign_id: Kampány azonosító (opcionális)
+            page_size: Lapméret
+            after: Az előző lap utolsó (ad_group_id, criterion_id) kulcsa (első lapnál None)
+        
+        Returns:
+            (kulcsszó adatok, a lap utolsó kulcsa, ha van következő lap, különben None)
+        """
+        query = _keywords_query(customer_id, start, end, campaign_id, after).limit(page_size + 1)
+        
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).mappings().all()
+        
+        next_key = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_key = (rows[-1]["ad_group_id"], rows[-1]["criterion_id"])
+        return [_keyword_record(row) for row in rows], next_key
+    
+    def iter_keywords_performance(
+        self,
+        customer_id: str,
+        start: date,
+        end: date,
+        campaign_id: Optional[str] = None,
+        chunk_size: int = 10000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Kulcsszó teljesítmény összesítés darabonként, egyetlen streamelt lekérdezéssel
+        
+        A sorok a (hirdetéscsoport, kulcsszó) kulcs szerint rendezettek; a
+        kapcsolat a stream végéig (vagy a generátor lezárásáig) nyitva marad.
+        
+        Args:
+            customer_id: Google Ads ügyfél azonosító
+            start: Kezdő nap
+            end: Záró nap
+            campaign_id: Kampány azonosító (opcionális)
+            chunk_size: Egy darab sorainak száma
+        
+        Yields:
+            Kulcsszó adatok listái a GoogleAdsService.get_keywords_performance formátumában
+        """
+        query = _keywords_query(customer_id, start, end, campaign_id)
+        
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+            for rows in result.mappings().partitions():
+                yield [_keyword_record(row) for row in rows]
+    
+    def _replace_partitions(
+        self,
+        customer_id: str,
+        entity: str,
+        start: date,
+        end: date,
+        rows: Iterator[Dict[str, Any]]
+    ) -> int:
+        """Egy tranzakcióban lecseréli a [start, end] napok partícióit a friss sorokra"""
+        table = ENTITY_TABLES[entity]
+        inserted = 0
+        
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(table).where(and_(
+                    table.c.customer_id == customer_id,
+                    table.c.date >= start,
+                    table.c.date <= end
+                ))
+            )
+            
+            while True:
+                batch = [{**row, "customer_id": customer_id} for row in islice(rows, INSERT_BATCH_SIZE)]
+                if not batch:
+                    break
+                conn.execute(table.insert(), batch)
+                inserted += len(batch)
+        
+        return inserted
+    
+    def _get_state(self, customer_id: str, entity: str) -> Optional[Dict[str, Any]]:
+        """Visszaadja egy ügyfél/entitás szinkronizálási állapotát"""
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(sync_state).where(and_(
+                    sync_state.c.customer_id == customer_id,
+                    sync_state.c.entity == entity
+                ))
+            ).mappings().first()
+        return dict(row) if row else None
+    
+    def _set_state(self, customer_id: str, entity: str, synced_from: date, synced_through: date) -> None:
+        """Frissíti egy ügyfél/entitás szinkronizálási állapotát"""
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(sync_state).where(and_(
+                    sync_state.c.customer_id == customer_id,
+                    sync_state.c.entity == entity
+                ))
+            )
+            conn.execute(sync_state.insert(), {
+                "customer_id": customer_id,
+                "entity": entity,
+                "synced_from": synced_from,
+                "synced_through": synced_through,
+                "last_sync_at": datetime.now()
+            })
+
+
+def _metric_sums(table: Table) -> Tuple:
+    """A napi metrikák összegző oszlopai"""
+    return (
+        func.sum(table.c.impressions).label("impressions"),
+        func.sum(table.c.clicks).label("clicks"),
+        func.sum(table.c.cost_micros).label("cost_micros"),
+        func.sum(table.c.conversions).label("conversions"),
+        func.sum(table.c.conversions_value).label("conversions_value")
+    )
+
+
+def _keywords_query(
+    customer_id: str,
+    start: date,
+    end: date,
+    campaign_id: Optional[str] = None,
+    after: Optional[Tuple[int, int]] = None
+) -> Select:
+    """A kulcsszó összesítés lekérdezése, (hirdetéscsoport, kulcsszó) kulcs szerint rendezve"""
+    t = keyword_daily_metrics
+    # A dátum feltétel függvényen keresztül szűr: így a kulcs szerinti index (és nem az elsődleges
+    # kulcs dátum tartománya + teljes rendezés) adja a sorrendet, és a LIMIT-es lap korán leáll
+    day = func.date(t.c.date, type_=Date)
+    conditions = [t.c.customer_id == customer_id, day >= start, day <= end]
+    if campaign_id:
+        conditions.append(t.c.campaign_id == int(campaign_id))
+    if after is not None:
+        ad_group_id, criterion_id = after
+        conditions.append(or_(
+            t.c.ad_group_id > ad_group_id,
+            and_(t.c.ad_group_id == ad_group_id, t.c.criterion_id > criterion_id)
+        ))
+    
+    return (
+        select(
+            t.c.ad_group_id,
+            t.c.criterion_id,
+            func.max(t.c.campaign_id).label("campaign_id"),
+            func.max(t.c.campaign_name).label("campaign_name"),
+            func.max(t.c.ad_group_name).label("ad_group_name"),
+            func.max(t.c.keyword).label("keyword"),
+            func.max(t.c.match_type).label("match_type"),
+            func.max(t.c.quality_score).label("quality_score"),
+            *_metric_sums(t)
+        )
+        .where(and_(*conditions))
+        .group_by(t.c.ad_group_id, t.c.criterion_id)
+        .order_by(t.c.ad_group_id, t.c.criterion_id)
+    )
+
+
+def _keyword_record(row: Any) -> Dict[str, Any]:
+    """Egy összesített kulcsszó sor a GoogleAdsService.get_keywords_performance formátumában"""
+    metrics = _derived_metrics(row)
+    return {
+        "campaign_id": row["campaign_id"],
+        "campaign_name": row["campaign_name"],
+        "ad_group_id": row["ad_group_id"],
+        "ad_group_name": row["ad_group_name"],
+        "keyword": row["keyword"],
+        "match_type": row["match_type"],
+        "impressions": metrics["impressions"],
+        "clicks": metrics["clicks"],
+        "ctr": metrics["ctr"],
+        "average_cpc": metrics["average_cpc"],
+        "cost": metrics["cost"],
+        "conversions": metrics["conversions"],
+        "conversions_value": metrics["conversions_value"],
+        "quality_score": row["quality_score"]
+    }
+
+
+def _derived_metrics(row: Any) -> Dict[str, Any]:
+    """Az összesített nyers metrikákból számolja a származtatott mutatókat"""
+    impressions = int(row["impressions"] or 0)
+    clicks = int(row["clicks"] or 0)
+    cost = (row["cost_micros"] or 0) / 1_000_000
+    conversions = float(row["conversions"] or 0.0)
+    conversions_value = float(row["conversions_value"] or 0.0)
+    
+    return {
+        "impressions": impressions,
+        "clicks": clicks,
+        "ctr": clicks / impressions if impressions else 0.0,
+        "average_cpc": cost / clicks if clicks else 0,
+        "cost": cost,
+        "conversions": conversions,
+        "conversions_value": conversions_value,
+        "cost_per_conversion": cost / conversions if conversions else 0,
+        "conversion_rate": conversions / clicks if clicks else 0.0,
+        "roas": conversions_value / cost if cost > 0 else 0
+    }
+
+
+# Singleton instance
+_warehouse: Optional[PerformanceWarehouse] = None
+
+
+def get_warehouse(database_url: str = "sqlite:///./google_ads_automation.db") -> PerformanceWarehouse:
+    """
+    Visszaadja az adattárház singleton instance-t
+    
+    Args:
+        database_url: SQLAlchemy adatbázis URL
+    
+    Returns:
+        PerformanceWarehouse instance
+    """
+    global _warehouse
+    if _warehouse is None:
+        _warehouse = PerformanceWarehouse(database_url)
+    return _warehouse
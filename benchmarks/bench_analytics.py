@@ -0,0 +1,369 @@
+"""
+AnalyticsService skálázódási benchmark (100 - 1M sor)
+
+Az elemző függvényeket (és a DataFrame építést, amely a szótár alapú útnál
+a futásidő nagy részét adja) szintetikus bemeneten méri, szótár lista és
+ColumnarResult bemenettel is:
+
+- dataframe:                    pd.DataFrame(szótár lista) / ColumnarResult.to_dataframe()
+- analyze_campaign_performance: kampány szintű bemenet
+- analyze_keyword_performance:  kulcsszó szintű bemenet
+- compare_campaigns:            kampány szintű bemenet (roas)
+- calculate_budget_allocation:  kampány szintű bemenet (maximize_conversions)
+
+Minden (eset, méret) pár külön alfolyamatban fut, így a csúcs RSS nem
+keveredik a többi méréssel. Mért értékek: futási idő (medián és minimum,
+tracemalloc nélkül), a hívás alatti csúcs RSS növekmény, és egy külön
+futásban a tracemalloc szerinti csúcs allokáció. Az eredmény JSON fájlba
+kerül, és egy tárolt baseline-nal összevethető (regressziónál 1-es
+kilépési kód).
+
+Futtatás a repo gyökeréből:
+    python -m benchmarks.bench_analytics
+    python -m benchmarks.bench_analytics --sizes 100 10000 --cases "analyze_*"
+    python -m benchmarks.bench_analytics --save-baseline
+"""
+from typing import Any, Callable, Dict, List, Tuple
+from datetime import datetime
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.services.analysis_cache import AnalysisCache
+from app.services.analytics import AnalyticsService
+from app.services.columnar import (
+    CAMPAIGN_PERFORMANCE_FIELDS,
+    CAMPAIGN_PERFORMANCE_SCHEMA,
+    KEYWORD_PERFORMANCE_FIELDS,
+    KEYWORD_PERFORMANCE_SCHEMA,
+    ColumnarResult,
+    _codes_dtype
+)
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baselines", "bench_analytics.json")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+MATCH_TYPES = ["EXACT", "PHRASE", "BROAD"]
+
+
+def _categorical(rng: np.random.Generator, rows: int, prefix: str, distinct: int) -> Tuple[np.ndarray, List[str]]:
+    """Szótár kódolt szöveg oszlop `distinct` különböző értékkel"""
+    distinct = max(1, min(rows, distinct))
+    codes = rng.integers(0, distinct, rows).astype(_codes_dtype(distinct))
+    return codes, [f"{prefix} {i}" for i in range(distinct)]
+
+
+def _metric_columns(rng: np.random.Generator, rows: int) -> Dict[str, np.ndarray]:
+    """Realisztikus eloszlású metrika oszlopok (nehézfarkú megjelenítés, ritka konverzió)"""
+    impressions = np.floor(rng.lognormal(6.0, 1.8, rows)).astype(np.int64)
+    clicks = rng.binomial(impressions, rng.beta(2, 40, rows)).astype(np.int64)
+    cpc_micros = np.round(rng.lognormal(np.log(800_000), 0.6, rows)).astype(np.int64)
+    cost_micros = clicks * cpc_micros
+    conversions = np.round(clicks * rng.beta(2, 50, rows), 2)
+    conversions_value = np.round(conversions * rng.lognormal(np.log(40), 0.5, rows), 2)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "impressions": impressions,
+            "clicks": clicks,
+            "ctr": np.where(impressions > 0, clicks / impressions, 0.0),
+            "average_cpc_micros": np.where(clicks > 0, cost_micros // np.maximum(clicks, 1), 0),
+            "cost_micros": cost_micros,
+            "conversions": conversions,
+            "conversions_value": conversions_value,
+            "cost_per_conversion_micros": np.where(conversions > 0, cost_micros / conversions, 0).astype(np.int64),
+            "conversion_rate": np.where(clicks > 0, conversions / clicks, 0.0)
+        }
+
+
+def make_campaign_data(rows: int, seed: int = 42) -> ColumnarResult:
+    """Kampány teljesítmény bemenet (egyedi kampány nevekkel)"""
+    rng = np.random.default_rng([seed, rows])
+    columns = _metric_columns(rng, rows)
+    columns["campaign_id"] = np.arange(rows, dtype=np.int64) + 1_000_000
+    columns["campaign_name"] = np.arange(rows).astype(_codes_dtype(rows))
+    categories = {"campaign_name": [f"Kampány {i}" for i in range(rows)]}
+    return ColumnarResult(CAMPAIGN_PERFORMANCE_SCHEMA, columns, categories, CAMPAIGN_PERFORMANCE_FIELDS)
+
+
+def make_keyword_data(rows: int, seed: int = 42) -> ColumnarResult:
+    """Kulcsszó teljesítmény bemenet (200 kulcsszó kampányonként, 25 hirdetéscsoportonként)"""
+    rng = np.random.default_rng([seed, rows, 1])
+    columns = _metric_columns(rng, rows)
+    categories = {}
+    columns["campaign_name"], categories["campaign_name"] = _categorical(rng, rows, "Kampány", rows // 200 + 1)
+    columns["campaign_id"] = columns["campaign_name"].astype(np.int64) + 1_000_000
+    columns["ad_group_name"], categories["ad_group_name"] = _categorical(rng, rows, "Hirdetéscsoport", rows // 25 + 1)
+    columns["ad_group_id"] = columns["ad_group_name"].astype(np.int64) + 50_000_000
+    columns["keyword"], categories["keyword"] = _categorical(rng, rows, "kulcsszó", rows // 3 + 1)
+    columns["match_type"] = rng.integers(0, len(MATCH_TYPES), rows).astype(np.int8)
+    categories["match_type"] = list(MATCH_TYPES)
+    columns["quality_score"] = np.where(rng.random(rows) < 0.9, rng.integers(1, 11, rows), np.nan)
+    return ColumnarResult(KEYWORD_PERFORMANCE_SCHEMA, columns, categories, KEYWORD_PERFORMANCE_FIELDS)
+
+
+def _fresh(data: ColumnarResult) -> ColumnarResult:
+    """Új ColumnarResult ugyanazokkal a tömbökkel (üres származtatott oszlop cache-sel)"""
+    return ColumnarResult(data.schema, data.columns, data.categories, data.fields)
+
+
+# Eset név -> (adathalmaz, a mért hívás)
+CASES: Dict[str, Tuple[str, Callable[[AnalyticsService, Any], Any]]] = {
+    "dataframe_campaign": ("campaign", lambda analytics, data: (
+        data.to_dataframe() if isinstance(data, ColumnarResult) else pd.DataFrame(data)
+    )),
+    "dataframe_keyword": ("keyword", lambda analytics, data: (
+        data.to_dataframe() if isinstance(data, ColumnarResult) else pd.DataFrame(data)
+    )),
+    "analyze_campaign_performance": ("campaign", lambda analytics, data: analytics.analyze_campaign_performance(data)),
+    "analyze_keyword_performance": ("keyword", lambda analytics, data: analytics.analyze_keyword_performance(data)),
+    "compare_campaigns": ("campaign", lambda analytics, data: analytics.compare_campaigns(data, "roas")),
+    "calculate_budget_allocation": ("campaign", lambda analytics, data: analytics.calculate_budget_allocation(data, 10_000.0)),
+}
+
+INPUT_KINDS = ("dict", "columnar")
+
+DATASETS = {
+    "campaign": make_campaign_data,
+    "keyword": make_keyword_data
+}
+
+
+def _reset_peak_rss() -> bool:
+    """Nullázza a folyamat csúcs RSS értékét (Linux /proc/self/clear_refs), ha lehetséges"""
+    try:
+        with open("/proc/self/clear_refs", "w") as handle:
+            handle.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _rss_mb() -> Tuple[float, float]:
+    """(aktuális RSS, csúcs RSS) MB-ban"""
+    try:
+        with open("/proc/self/status") as handle:
+            status = dict(line.split(":", 1) for line in handle if ":" in line)
+        return int(status["VmRSS"].split()[0]) / 1024, int(status["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError):
+        # ru_maxrss: Linuxon KB, macOS-en bájt
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_mb = peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+        return peak_mb, peak_mb
+
+
+def run_case(case: str, input_kind: str, rows: int, repeat: int, min_seconds: float) -> Dict[str, Any]:
+    """
+    Egy (eset, bemenet, méret) mérés az aktuális folyamatban (az alfolyamat ezt futtatja)
+    
+    Returns:
+        Mérési eredmény
+    """
+    dataset, call = CASES[case]
+    data = DATASETS[dataset](rows)
+    records = data.to_records() if input_kind == "dict" else None
+    make_input = (lambda: records) if records is not None else (lambda: _fresh(data))
+    # Memoizálás nélkül: különben az ismételt futások csak a cache találatot mérnék
+    analytics = AnalyticsService(cache=AnalysisCache(max_entries=0))
+    
+    # Bemelegítés nélkül: az első futás idejét is rögzítjük (hideg út)
+    gc.collect()
+    rss_before, _ = _rss_mb()
+    peak_reset = _reset_peak_rss()
+    timings = []
+    started_all = time.perf_counter()
+    while True:
+        argument = make_input()
+        started = time.perf_counter()
+        call(analytics, argument)
+        timings.append(time.perf_counter() - started)
+        del argument
+        if len(timings) >= repeat or time.perf_counter() - started_all >= min_seconds:
+            break
+    _, rss_peak = _rss_mb()
+    
+    gc.collect()
+    argument = make_input()
+    tracemalloc.start()
+    call(analytics, argument)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        "case": case,
+        "input": input_kind,
+        "rows": rows,
+        "runs": len(timings),
+        "seconds": statistics.median(timings),
+        "seconds_min": min(timings),
+        "seconds_first": timings[0],
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_delta_mb": round(max(0.0, rss_peak - rss_before), 1) if peak_reset else None,
+        "peak_rss_mb": round(rss_peak, 1),
+        "alloc_peak_mb": round(traced_peak / 1024 / 1024, 2)
+    }
+
+
+def run_in_subprocess(case: str, input_kind: str, rows: int, repeat: int, min_seconds: float, timeout: float) -> Dict[str, Any]:
+    """Egy mérés futtatása külön Python folyamatban"""
+    command = [
+        sys.executable, "-m", "benchmarks.bench_analytics", "--worker",
+        "--cases", case, "--inputs", input_kind, "--sizes", str(rows),
+        "--repeat", str(repeat), "--min-seconds", str(min_seconds)
+    ]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"case": case, "input": input_kind, "rows": rows, "error": f"időtúllépés ({timeout:.0f} s)"}
+    
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"kilépési kód {completed.returncode}"
+        return {"case": case, "input": input_kind, "rows": rows, "error": error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def environment() -> Dict[str, Any]:
+    """A mérés környezete (a baseline-ok összevethetőségéhez)"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BENCHMARK_DIR
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float, min_delta: float) -> List[Dict[str, Any]]:
+    """
+    Összeveti az eredményeket a baseline-nal
+    
+    Regresszió: a medián idő vagy a csúcs allokáció több mint `tolerance`
+    aránnyal nagyobb (és az idő eltérése legalább `min_delta` másodperc,
+    hogy a mikroszekundumos mérések zaja ne jelezzen).
+    
+    Returns:
+        Regressziók listája
+    """
+    reference = {(r["case"], r["input"], r["rows"]): r for r in baseline.get("results", []) if "error" not in r}
+    regressions = []
+    for result in results:
+        base = reference.get((result["case"], result["input"], result["rows"]))
+        if base is None or "error" in result:
+            continue
+        time_ratio = result["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        alloc_ratio = result["alloc_peak_mb"] / base["alloc_peak_mb"] if base["alloc_peak_mb"] else 1.0
+        result["baseline_seconds"] = base["seconds"]
+        result["time_ratio"] = round(time_ratio, 3)
+        result["alloc_ratio"] = round(alloc_ratio, 3)
+        
+        slower = time_ratio > 1 + tolerance and result["seconds"] - base["seconds"] >= min_delta
+        bigger = alloc_ratio > 1 + tolerance and result["alloc_peak_mb"] - base["alloc_peak_mb"] >= 1.0
+        if slower or bigger:
+            result["regression"] = True
+            regressions.append(result)
+    return regressions
+
+
+def _print_result(result: Dict[str, Any]) -> None:
+    label = f"{result['case']} ({result['input']})"
+    if "error" in result:
+        print(f"{label:<42} {result['rows']:>9}  HIBA: {result['error']}")
+        return
+    ratio = f"{result['time_ratio']:.2f}x" if "time_ratio" in result else "-"
+    rss = f"{result['peak_rss_delta_mb']:.1f}" if result["peak_rss_delta_mb"] is not None else "-"
+    flag = "  REGRESSZIÓ" if result.get("regression") else ""
+    print(
+        f"{label:<42} {result['rows']:>9} {result['seconds']:>10.4f} {ratio:>8} "
+        f"{rss:>10} {result['alloc_peak_mb']:>10.1f}{flag}"
+    )
+
+
+def main(args: argparse.Namespace) -> int:
+    cases = [case for case in CASES if any(fnmatch.fnmatch(case, pattern) for pattern in args.cases)]
+    if not cases:
+        print(f"Nincs a mintáknak megfelelő eset: {args.cases}", file=sys.stderr)
+        return 2
+    
+    if args.worker:
+        from loguru import logger
+        logger.remove()
+        for case in cases:
+            for input_kind in args.inputs:
+                for rows in args.sizes:
+                    print(json.dumps(run_case(case, input_kind, rows, args.repeat, args.min_seconds)))
+        return 0
+    
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+    
+    print(f"{'eset':<42} {'sorok':>9} {'medián s':>10} {'vs base':>8} {'ΔRSS MB':>10} {'alloc MB':>10}")
+    results = []
+    for case in cases:
+        for input_kind in args.inputs:
+            for rows in args.sizes:
+                result = run_in_subprocess(case, input_kind, rows, args.repeat, args.min_seconds, args.timeout)
+                if baseline is not None:
+                    compare([result], baseline, args.tolerance, args.min_delta)
+                results.append(result)
+                _print_result(result)
+    
+    report = {"environment": environment(), "results": results}
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_analytics-{datetime.now():%Y%m%d-%H%M%S}.json")
+    if args.save_baseline:
+        output = args.baseline or DEFAULT_BASELINE
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as handle:
+        json.dump(report, handle, indent=2, ensure_ascii=False)
+    print(f"Eredmények: {output}")
+    
+    if baseline is not None:
+        regressions = [result for result in results if result.get("regression")]
+        if regressions:
+            print(f"{len(regressions)} regresszió a baseline-hoz ({args.baseline}) képest")
+            return 1
+        print(f"Nincs regresszió a baseline-hoz ({args.baseline}) képest")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Bemeneti sorszámok")
+    parser.add_argument("--cases", nargs="+", default=["*"], help="Esetek (glob minták, pl. 'analyze_*')")
+    parser.add_argument("--inputs", nargs="+", choices=INPUT_KINDS, default=list(INPUT_KINDS), help="Bemenet formátumok")
+    parser.add_argument("--repeat", type=int, default=5, help="Ismétlések maximális száma esetenként")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Ennyi idő után nincs több ismétlés")
+    parser.add_argument("--timeout", type=float, default=900.0, help="Időkorlát esetenként (másodperc)")
+    parser.add_argument("--output", help="Eredmény JSON fájl (alapértelmezetten benchmarks/results/)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON fájl az összevetéshez")
+    parser.add_argument("--save-baseline", action="store_true", help="Az eredmények mentése új baseline-ként")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Megengedett relatív romlás (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="Ennél kisebb időeltérés nem regresszió (másodperc)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    sys.exit(main(args))
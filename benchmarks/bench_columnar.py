@@ -0,0 +1,123 @@
+"""
+Oszlopos vs. szótár alapú kulcsszó riport dekódolás mérése
+
+Szintetikus GAQL sorokon (a Google Ads kliens nélkül) összeveti a két utat:
+
+- dict:     sor -> szótár lista -> pd.DataFrame -> analyze_keyword_performance
+- columnar: sor -> ColumnarResult (típusos tömbök) -> másolásnélküli DataFrame -> analyze_keyword_performance
+
+Mindkét útnál méri a futási időt és a tracemalloc szerinti csúcs memóriát.
+Az időmérés tracemalloc nélkül, külön futásban történik.
+
+Futtatás a repo gyökeréből:
+    python -m benchmarks.bench_columnar --rows 1000000
+"""
+from typing import Any, Callable, Iterator, List
+from types import SimpleNamespace
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from loguru import logger
+
+from app.services.analytics import AnalyticsService
+from app.services.google_ads import _collect_keyword_performance_columnar, _decode_keyword_performance_rows
+
+MATCH_TYPES = ["EXACT", "PHRASE", "BROAD"]
+
+
+def make_row_pool(size: int, seed: int = 42) -> List[Any]:
+    """GoogleAdsRow-szerű objektumok (campaign, ad_group, ad_group_criterion, metrics attribútumokkal)"""
+    rng = random.Random(seed)
+    pool = []
+    for i in range(size):
+        cost_micros = rng.randint(0, 50_000_000)
+        conversions = float(rng.randint(0, 5))
+        pool.append(SimpleNamespace(
+            campaign=SimpleNamespace(id=1000 + i % 200, name=f"Campaign {i % 200}"),
+            ad_group=SimpleNamespace(id=50000 + i % 4000, name=f"Ad group {i % 4000}"),
+            ad_group_criterion=SimpleNamespace(keyword=SimpleNamespace(
+                text=f"keyword {i}",
+                match_type=SimpleNamespace(name=MATCH_TYPES[i % 3])
+            )),
+            metrics=SimpleNamespace(
+                impressions=rng.randint(0, 10000),
+                clicks=rng.randint(0, 300),
+                ctr=rng.random() / 10,
+                average_cpc=float(rng.randint(100_000, 3_000_000)),
+                cost_micros=cost_micros,
+                conversions=conversions,
+                conversions_value=conversions * rng.uniform(10, 80),
+                quality_score=rng.randint(1, 10)
+            )
+        ))
+    return pool
+
+
+def iter_rows(pool: List[Any], total: int) -> Iterator[Any]:
+    """`total` sort ad vissza a poolból körbeforogva (a stream szimulációja)"""
+    size = len(pool)
+    for i in range(total):
+        yield pool[i % size]
+
+
+def dict_pipeline(rows: Iterator[Any], analytics: AnalyticsService) -> int:
+    """Szótár lista, az elemzés ebből épít DataFrame-et (a korábbi adatút)"""
+    records = _decode_keyword_performance_rows(rows)
+    analytics.analyze_keyword_performance(records)
+    return len(records)
+
+
+def columnar_pipeline(rows: Iterator[Any], analytics: AnalyticsService) -> int:
+    """Típusos oszlopok, az elemzés másolás nélküli DataFrame nézetet kap"""
+    result = _collect_keyword_performance_columnar(rows)
+    analytics.analyze_keyword_performance(result)
+    return len(result)
+
+
+def measure(pipeline: Callable[[Iterator[Any], AnalyticsService], int], pool: List[Any], total: int) -> dict:
+    """Futási idő (tracemalloc nélkül) és csúcs memória (tracemalloc-kal) egy útra"""
+    analytics = AnalyticsService()
+    
+    gc.collect()
+    started = time.perf_counter()
+    pipeline(iter_rows(pool, total), analytics)
+    elapsed = time.perf_counter() - started
+    
+    gc.collect()
+    tracemalloc.start()
+    pipeline(iter_rows(pool, total), analytics)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {"seconds": elapsed, "peak_mb": peak / 1024 / 1024}
+
+
+def main(total: int, pool_size: int) -> None:
+    logger.remove()
+    pool = make_row_pool(pool_size)
+    
+    print(f"sorok={total}, különböző sorok={pool_size}")
+    print(f"{'út':>10} {'idő (s)':>10} {'csúcs (MB)':>12}")
+    
+    results = {}
+    for name, pipeline in (("dict", dict_pipeline), ("columnar", columnar_pipeline)):
+        results[name] = measure(pipeline, pool, total)
+        print(f"{name:>10} {results[name]['seconds']:>10.2f} {results[name]['peak_mb']:>12.1f}")
+    
+    dict_result, columnar_result = results["dict"], results["columnar"]
+    print(
+        f"columnar: {dict_result['seconds'] / columnar_result['seconds']:.1f}x gyorsabb, "
+        f"{dict_result['peak_mb'] / columnar_result['peak_mb']:.1f}x kisebb csúcs memória"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Dekódolt sorok száma")
+    parser.add_argument("--pool", type=int, default=100_000, help="Különböző szintetikus sorok száma")
+    args = parser.parse_args()
+    
+    main(args.rows, args.pool)
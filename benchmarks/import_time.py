@@ -0,0 +1,115 @@
+"""
+Import idő költségvetés az alkalmazás indulásához
+
+Friss alfolyamatokban méri az `import app.main` idejét (`python -X importtime`),
+és 1-es kóddal lép ki, ha
+
+- a medián import idő meghaladja a költségvetést (--budget-ms), vagy
+- az import betölt egy lustán importálandó nehéz csomagot (pandas, google-ads
+  SDK, SQLAlchemy); ezek csak az első tényleges használatkor töltődhetnek be.
+
+A második ellenőrzés gépfüggetlen, így CI-ban is megbízható; az időkorlát
+a lassú, de még lusta importok (pl. új függőség) ellen véd.
+
+Futtatás a repo gyökeréből:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 1500 --top 20
+"""
+from typing import Dict, List, Tuple
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Ezek a csomagok nem töltődhetnek be az alkalmazás importjakor
+LAZY_MODULES = ("pandas", "google.ads.googleads", "sqlalchemy")
+
+DEFAULT_MODULE = "app.main"
+DEFAULT_BUDGET_MS = 2000.0
+
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Egy import mérése friss alfolyamatban
+    
+    Args:
+        module: Importálandó modul
+    
+    Returns:
+        (modul név, beágyazási szint, saját idő µs, kumulatív idő µs) sorok
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            # Fejléc sor
+            continue
+        level = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), level, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def loaded_lazy_modules(module: str) -> List[str]:
+    """A tiltott (lustán importálandó) csomagok, amelyeket az import mégis betöltött"""
+    code = (
+        f"import json, sys, {module}; "
+        f"print(json.dumps([m for m in {list(LAZY_MODULES)!r} if m in sys.modules]))"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(args: argparse.Namespace) -> int:
+    # Az első futás a bájtkód cache-t tölti fel, nem számít bele
+    measure(args.module)
+    
+    totals: List[float] = []
+    cumulative: Dict[str, List[float]] = {}
+    for _ in range(args.runs):
+        entries = measure(args.module)
+        for name, level, _, cumulative_us in entries:
+            if name == args.module:
+                totals.append(cumulative_us / 1000)
+            if level <= 1 or name.startswith("app."):
+                cumulative.setdefault(name, []).append(cumulative_us / 1000)
+    
+    total_ms = statistics.median(totals)
+    print(f"{args.module} import: {total_ms:.0f} ms (medián, {args.runs} futás), költségvetés: {args.budget_ms:.0f} ms")
+    print()
+    print(f"{'modul':<50} {'kumulatív ms':>12}")
+    heaviest = sorted(cumulative.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, values in heaviest[:args.top]:
+        print(f"{name:<50} {statistics.median(values):>12.1f}")
+    print()
+    
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"HIBA: az import idő ({total_ms:.0f} ms) meghaladja a költségvetést ({args.budget_ms:.0f} ms)")
+        failed = True
+    
+    eager = loaded_lazy_modules(args.module)
+    if eager:
+        print(f"HIBA: az import betöltötte a lustán importálandó csomagokat: {', '.join(eager)}")
+        failed = True
+    
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=DEFAULT_MODULE, help="Mért modul")
+    parser.add_argument("--runs", type=int, default=5, help="Mérések száma")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Megengedett medián import idő (ms)")
+    parser.add_argument("--top", type=int, default=15, help="Ennyi legdrágább modul listázása")
+    sys.exit(main(parser.parse_args()))
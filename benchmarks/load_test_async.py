@@ -0,0 +1,126 @@
+"""
+Terheléses teszt az aszinkron Google Ads adatúthoz
+
+A szintetikus (fake) Google Ads backenddel (injektált késleltetésű, blokkoló
+GAQL hívás) méri, hogyan nő a /campaigns/performance végpont
+áteresztőképessége a párhuzamos kérések számával egyetlen workeren belül.
+A kérések a teljes szolgáltatás rétegen (GAQL építés, kvóta ütemező, dekódolás)
+átmennek; a riport cache alapértelmezetten ki van kapcsolva, hogy minden kérés
+upstream hívást jelentsen.
+
+Futtatás a repo gyökeréből:
+    python -m benchmarks.load_test_async --latency 0.2 --requests 64
+"""
+from typing import List
+import argparse
+import asyncio
+import time
+
+import httpx
+from loguru import logger
+
+from app.config import settings
+from app.services import google_ads, async_google_ads
+from app.services.fake_google_ads import FakeGoogleAdsBackend
+from app.services.google_ads import GoogleAdsService, ReportCache
+from app.services.scheduler import QuotaScheduler
+
+
+def build_service(latency: float, campaigns: int, keywords: int, error_rate: float, cache: bool) -> GoogleAdsService:
+    """GoogleAdsService a fake backenddel és a mérést nem korlátozó kvóta ütemezővel"""
+    backend = FakeGoogleAdsBackend(
+        campaigns=campaigns,
+        keywords=keywords,
+        latency_seconds=latency,
+        latency_jitter=0.1,
+        error_rate=error_rate
+    )
+    scheduler = QuotaScheduler(
+        developer_qps=1_000_000,
+        developer_burst=1_000_000,
+        customer_qps=1_000_000,
+        customer_burst=1_000_000,
+        backoff_base_seconds=0.01
+    )
+    return GoogleAdsService(
+        "fake",
+        cache=None if cache else ReportCache(max_entries=0),
+        scheduler=scheduler,
+        backend=backend
+    )
+
+
+async def _fire(client: httpx.AsyncClient, total: int, concurrency: int) -> float:
+    """Elküld `total` kérést legfeljebb `concurrency` párhuzamossággal, és visszaadja a req/s értéket"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one(i: int) -> None:
+        async with semaphore:
+            response = await client.get(
+                "/api/v1/campaigns/performance",
+                params={"customer_id": str(1000000000 + i)}
+            )
+            response.raise_for_status()
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - started)
+
+
+async def main(
+    latency: float,
+    total: int,
+    levels: List[int],
+    pool_size: int,
+    campaigns: int,
+    keywords: int,
+    error_rate: float,
+    cache: bool
+) -> None:
+    google_ads._google_ads_service = build_service(latency, campaigns, keywords, error_rate, cache)
+    async_google_ads.shutdown_async_google_ads_service()
+    async_google_ads.get_async_google_ads_service(settings.GOOGLE_ADS_CONFIG_FILE, pool_size)
+    
+    from app.main import app
+    
+    # A kérésenkénti INFO naplózás torzítaná a mérést
+    logger.remove()
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(
+            f"fake latency={latency * 1000:.0f} ms, kampányok={campaigns}, kulcsszavak={keywords}, "
+            f"hibaarány={error_rate}, cache={'be' if cache else 'ki'}, kérések={total}, pool={pool_size}"
+        )
+        print(f"{'párhuzamosság':>14} {'req/s':>10} {'gyorsulás':>10}")
+        baseline = None
+        for concurrency in levels:
+            throughput = await _fire(client, total, concurrency)
+            baseline = baseline or throughput
+            print(f"{concurrency:>14} {throughput:>10.1f} {throughput / baseline:>9.1f}x")
+    
+    async_google_ads.shutdown_async_google_ads_service()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake GAQL késleltetés másodpercben")
+    parser.add_argument("--requests", type=int, default=64, help="Kérések száma szintenként")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 32], help="Párhuzamossági szintek")
+    parser.add_argument("--pool-size", type=int, default=settings.GOOGLE_ADS_MAX_CONCURRENCY, help="Szálkészlet mérete")
+    parser.add_argument("--campaigns", type=int, default=20, help="Kampányok száma fiókonként")
+    parser.add_argument("--keywords", type=int, default=2000, help="Kulcsszavak száma fiókonként")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Újrapróbálható hibával végződő hívások aránya")
+    parser.add_argument("--cache", action="store_true", help="Riport cache bekapcsolása")
+    args = parser.parse_args()
+    
+    asyncio.run(main(
+        args.latency,
+        args.requests,
+        args.levels,
+        args.pool_size,
+        args.campaigns,
+        args.keywords,
+        args.error_rate,
+        args.cache
+    ))
@@ -0,0 +1,176 @@
+"""
+MutationService tesztek a szintetikus (fake) Google Ads backenddel
+"""
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services.automation import AutomationService
+from app.services.fake_google_ads import FakeGoogleAdsBackend
+from app.services.google_ads import GoogleAdsService, ReportCache
+from app.services.mutation_journal import APPLIED, MutationJournal
+from app.services.mutations import BILLABLE_UNIT_MICROS, MutationService, operation_key
+from app.services.scheduler import QuotaScheduler
+
+CUSTOMER_ID = "1234567890"
+CAMPAIGNS = 20
+
+
+@pytest.fixture
+def backend() -> FakeGoogleAdsBackend:
+    return FakeGoogleAdsBackend(campaigns=CAMPAIGNS, keywords=200, days=10)
+
+
+@pytest.fixture
+def journal(tmp_path) -> MutationJournal:
+    return MutationJournal(f"sqlite:///{tmp_path / 'journal.db'}")
+
+
+def _service(backend: FakeGoogleAdsBackend, journal: MutationJournal, **kwargs) -> MutationService:
+    """MutationService a fake backenden (a tesztekben nem kell kvótára várni)"""
+    google_ads_service = GoogleAdsService(
+        backend=backend,
+        cache=ReportCache(max_entries=0),
+        scheduler=QuotaScheduler(developer_qps=1000, developer_burst=1000, customer_qps=1000, customer_burst=1000)
+    )
+    return MutationService(google_ads_service, journal, **kwargs)
+
+
+def _budget_changes(service: MutationService) -> List[Dict[str, Any]]:
+    """Minden kampány napi költségvetésének emelése egy pénznem egységgel"""
+    account = service.google_ads_service.backend.account(CUSTOMER_ID)
+    budgets = {
+        str(campaign_id): budget.amount_micros / 1_000_000 + 1
+        for campaign_id, budget in zip(account.campaign_ids.tolist(), account.campaign_budgets)
+    }
+    changes = service.plan_budget_changes(CUSTOMER_ID, budgets)["changes"]
+    assert len(changes) == CAMPAIGNS
+    return changes
+
+
+def _applied_keys(journal: MutationJournal, job_id: str) -> List[str]:
+    return [entry["operation_key"] for entry in journal.get_job(job_id) if entry["status"] == APPLIED]
+
+
+def _key(job_id: str, change: Dict[str, Any]) -> str:
+    return operation_key(job_id, CUSTOMER_ID, change["resource_name"], change["field"])
+
+
+def test_rerun_with_same_job_id_does_not_reapply(backend, journal):
+    service = _service(backend, journal)
+    changes = _budget_changes(service)
+    
+    first = service.apply_changes(CUSTOMER_ID, changes, job_id="job-1")
+    assert first["succeeded"] == CAMPAIGNS
+    assert first["already_applied"] == 0
+    
+    calls = backend.calls
+    second = service.apply_changes(CUSTOMER_ID, changes, job_id="job-1")
+    assert second["submitted"] == 0
+    assert second["already_applied"] == CAMPAIGNS
+    assert second["requests"] == 0
+    assert backend.calls == calls
+    
+    # Más job azonosítóval ugyanaz a módosítás újra elküldődik
+    third = service.apply_changes(CUSTOMER_ID, changes, job_id="job-2")
+    assert third["submitted"] == CAMPAIGNS
+
+
+def test_failure_in_second_chunk_keeps_first_chunk_journaled(backend, journal, monkeypatch):
+    service = _service(backend, journal, chunk_size=5)
+    changes = _budget_changes(service)
+    
+    mutate = backend.mutate
+    requests = []
+    
+    def failing_mutate(*args, **kwargs):
+        requests.append(args)
+        if len(requests) == 2:
+            raise RuntimeError("szimulált hiba a második darabnál")
+        return mutate(*args, **kwargs)
+    
+    monkeypatch.setattr(backend, "mutate", failing_mutate)
+    with pytest.raises(RuntimeError):
+        service.apply_changes(CUSTOMER_ID, changes, job_id="job-1")
+    
+    assert sorted(_applied_keys(journal, "job-1")) == sorted(_key("job-1", change) for change in changes[:5])
+    
+    # Az újrafuttatás csak a hiányzó darabokat küldi el
+    monkeypatch.setattr(backend, "mutate", mutate)
+    summary = service.apply_changes(CUSTOMER_ID, changes, job_id="job-1")
+    assert summary["already_applied"] == 5
+    assert summary["succeeded"] == CAMPAIGNS - 5
+    assert summary["requests"] == 3
+    assert len(_applied_keys(journal, "job-1")) == CAMPAIGNS
+
+
+@pytest.mark.parametrize("threshold, mode, batch_jobs", [
+    (CAMPAIGNS, "mutate", 0),
+    (CAMPAIGNS - 1, "batch_job", 1)
+])
+def test_batch_job_above_threshold(backend, journal, threshold, mode, batch_jobs):
+    service = _service(backend, journal, batch_job_threshold=threshold)
+    changes = _budget_changes(service)
+    
+    summary = service.apply_changes(CUSTOMER_ID, changes, job_id="job-1")
+    assert summary["mode"] == {"campaign_budget": mode}
+    assert summary["succeeded"] == CAMPAIGNS
+    assert backend.batch_jobs == batch_jobs
+    
+    budgets = {row["resource_name"]: row["amount_micros"] for row in service.google_ads_service.get_campaign_budgets(
+        CUSTOMER_ID, backend.account(CUSTOMER_ID).campaign_ids.tolist()
+    )}
+    assert all(budgets[change["resource_name"]] == change["value"] for change in changes)
+
+
+def test_validate_only_writes_nothing_to_journal(backend, journal):
+    service = _service(backend, journal, batch_job_threshold=5)
+    changes = _budget_changes(service)
+    before = [budget.amount_micros for budget in backend.account(CUSTOMER_ID).campaign_budgets]
+    
+    summary = service.apply_changes(CUSTOMER_ID, changes, job_id="job-1", validate_only=True)
+    assert summary["succeeded"] == CAMPAIGNS
+    assert summary["mode"] == {"campaign_budget": "mutate"}
+    assert journal.get_job("job-1") == []
+    assert backend.batch_jobs == 0
+    assert [budget.amount_micros for budget in backend.account(CUSTOMER_ID).campaign_budgets] == before
+    
+    # A dry run után a valódi futtatás mindent elküld
+    summary = service.apply_changes(CUSTOMER_ID, changes, job_id="job-1")
+    assert summary["already_applied"] == 0
+    assert summary["succeeded"] == CAMPAIGNS
+
+
+def test_budget_rule_changes_stay_within_max_change_percent(backend, journal):
+    service = _service(backend, journal)
+    google_ads_service = service.google_ads_service
+    automation_service = AutomationService()
+    
+    performance = google_ads_service.get_campaign_performance(CUSTOMER_ID, fields=AutomationService.APPLY_FIELDS)
+    by_campaign = {str(row["campaign_id"]): row for row in performance}
+    campaign_budgets = google_ads_service.get_campaign_budgets(CUSTOMER_ID, by_campaign)
+    total_budget = sum(row["amount_micros"] for row in campaign_budgets) / 1_000_000
+    rule = automation_service.create_budget_optimization_rule(
+        CUSTOMER_ID,
+        list(by_campaign),
+        total_budget,
+        constraints={"max_change_percent": 50}
+    )["rule"]
+    
+    budgets, recommendations = automation_service.collect_budget_allocations(
+        [rule],
+        by_campaign,
+        google_ads_service.get_campaign_daily_history(CUSTOMER_ID),
+        period_days=30,
+        campaign_budgets=campaign_budgets
+    )
+    assert any(item.get("constraint") == "max_change" for item in recommendations[rule["rule_id"]])
+    
+    changes = service.plan_budget_changes(CUSTOMER_ID, budgets)["changes"]
+    assert changes
+    summary = service.apply_changes(CUSTOMER_ID, changes, job_id="job-1")
+    assert summary["succeeded"] == len(changes)
+    
+    # A régi (élő) költségvetéshez képest legfeljebb ±50% (plusz a számlázható kerekítés)
+    for change in changes:
+        assert change["old_value"] * 0.5 - BILLABLE_UNIT_MICROS <= change["value"] <= change["old_value"] * 1.5 + BILLABLE_UNIT_MICROS